@@ -8,7 +8,6 @@ Ce script permet de sauvegarder et restaurer les bases de données.
 
 import sys
 import os
-import shutil
 from datetime import datetime, timedelta
 import argparse
 
@@ -16,33 +15,35 @@ import argparse
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
 from gestia.core.database import db_manager, set_environment
+from gestia.backup import open_catalog, restore_environment, ChunkStore
+from gestia.backup.catalog import KIND_INCREMENTAL, STORE_DIRNAME, metadata_path_for
+from gestia.backup.verify import verify_backups, record_result, STATUS_OK
 
-def lister_sauvegardes():
-    """Liste toutes les sauvegardes disponibles"""
-    backup_dir = "data/backups"
-    if not os.path.exists(backup_dir):
+BACKUP_DIR = "data/backups"
+
+def _vers_sauvegarde(entree, catalogue):
+    """Convertit une entrée du catalogue en dictionnaire d'affichage"""
+    return {
+        'nom': entree['name'],
+        'chemin': catalogue.resolve_path(entree),
+        'taille': entree['size'] or 0,
+        'date': datetime.fromisoformat(entree['created_at']),
+        'type': entree['kind'],
+        'sha256': entree['sha256'],
+    }
+
+def lister_sauvegardes(limite=-1):
+    """Liste les sauvegardes disponibles (requête sur le catalogue)"""
+    if not os.path.exists(BACKUP_DIR):
         print("❌ Aucune sauvegarde trouvée")
         return []
     
-    sauvegardes = []
-    for fichier in os.listdir(backup_dir):
-        if fichier.endswith('.db'):
-            chemin = os.path.join(backup_dir, fichier)
-            stat = os.stat(chemin)
-            taille = stat.st_size
-            date_modif = datetime.fromtimestamp(stat.st_mtime)
-            
-            sauvegardes.append({
-                'nom': fichier,
-                'chemin': chemin,
-                'taille': taille,
-                'date': date_modif
-            })
-    
-    # Trier par date (plus récent en premier)
-    sauvegardes.sort(key=lambda x: x['date'], reverse=True)
-    
-    return sauvegardes
+    catalogue = open_catalog(BACKUP_DIR)
+    try:
+        # Le catalogue trie déjà du plus récent au plus ancien
+        return [_vers_sauvegarde(entree, catalogue) for entree in catalogue.list(limit=limite)]
+    finally:
+        catalogue.close()
 
 def afficher_sauvegardes():
     """Affiche la liste des sauvegardes"""
@@ -64,6 +65,12 @@ def afficher_sauvegardes():
         
         print(f"{i:<3} {sauvegarde['nom']:<30} {taille_mb:.1f} MB {date_str:<20} {heure_str:<10}")
 
+def afficher_progression(copiees, total):
+    """Affiche la progression d'une sauvegarde à chaud"""
+    pourcentage = 100 * copiees / total if total else 100
+    fin = '\n' if copiees >= total else ''
+    print(f"\r📦 Progression : {pourcentage:5.1f}% ({copiees}/{total} pages)", end=fin, flush=True)
+
 def creer_sauvegarde(env='development', nom_personnalise=None):
     """Crée une sauvegarde de la base de données"""
     print(f"💾 Création d'une sauvegarde de l'environnement '{env}'...")
@@ -72,26 +79,31 @@ def creer_sauvegarde(env='development', nom_personnalise=None):
     set_environment(env)
     
     # Créer la sauvegarde
-    if db_manager.backup_database(nom_personnalise):
+    if db_manager.backup_database(nom_personnalise, progress=afficher_progression):
         print("✅ Sauvegarde créée avec succès !")
     else:
         print("❌ Échec de la création de la sauvegarde")
 
 def restaurer_sauvegarde(numero_sauvegarde):
     """Restaure une sauvegarde"""
-    sauvegardes = lister_sauvegardes()
-    
-    if not sauvegardes:
+    if not os.path.exists(BACKUP_DIR):
         print("❌ Aucune sauvegarde disponible")
         return
     
+    catalogue = open_catalog(BACKUP_DIR)
     try:
-        numero = int(numero_sauvegarde) - 1
-        if numero < 0 or numero >= len(sauvegardes):
-            print(f"❌ Numéro de sauvegarde invalide. Choisissez entre 1 et {len(sauvegardes)}")
+        total = catalogue.count()
+        if not total:
+            print("❌ Aucune sauvegarde disponible")
+            return
+        
+        numero = int(numero_sauvegarde)
+        entree = catalogue.get_by_number(numero)
+        if entree is None:
+            print(f"❌ Numéro de sauvegarde invalide. Choisissez entre 1 et {total}")
             return
         
-        sauvegarde = sauvegardes[numero]
+        sauvegarde = _vers_sauvegarde(entree, catalogue)
         
         # Demander confirmation
         print(f"⚠️ ATTENTION : Vous allez restaurer la sauvegarde :")
@@ -119,8 +131,15 @@ def restaurer_sauvegarde(numero_sauvegarde):
         db_path = db_manager.get_database_path()
         if db_path:
             try:
-                shutil.copy2(sauvegarde['chemin'], db_path)
-                print(f"✅ Sauvegarde restaurée avec succès dans l'environnement '{env}' !")
+                # Préparation à côté de la base active puis substitution atomique ;
+                # le journal est archivé et l'historique postérieur écarté
+                stats = restore_environment(catalogue, env, entree, db_path)
+                print(f"✅ Sauvegarde restaurée avec succès dans l'environnement '{env}' ! "
+                      f"(interruption : {stats['swap_seconds'] * 1000:.1f} ms)")
+                if stats['abandoned']:
+                    print(f"📁 {stats['abandoned']} segments postérieurs écartés de l'historique")
+                # Nouvelle base de départ pour les restaurations futures
+                db_manager.backup_database(f"apres_restauration_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
             except Exception as e:
                 print(f"❌ Erreur lors de la restauration : {e}")
         else:
@@ -128,31 +147,91 @@ def restaurer_sauvegarde(numero_sauvegarde):
     
     except ValueError:
         print("❌ Numéro de sauvegarde invalide")
+    finally:
+        catalogue.close()
 
 def nettoyer_anciennes_sauvegardes(jours=30):
     """Supprime les sauvegardes plus anciennes que X jours"""
-    sauvegardes = lister_sauvegardes()
-    date_limite = datetime.now() - timedelta(days=jours)
-    
-    a_supprimer = [s for s in sauvegardes if s['date'] < date_limite]
-    
-    if not a_supprimer:
-        print(f"✅ Aucune sauvegarde à supprimer (plus récentes que {jours} jours)")
+    if not os.path.exists(BACKUP_DIR):
+        print("❌ Aucune sauvegarde trouvée")
         return
     
-    print(f"🗑️ Suppression des sauvegardes plus anciennes que {jours} jours...")
+    date_limite = datetime.now() - timedelta(days=jours)
+    catalogue = open_catalog(BACKUP_DIR)
+    try:
+        a_supprimer = catalogue.older_than(date_limite)
+        
+        if not a_supprimer:
+            print(f"✅ Aucune sauvegarde à supprimer (plus récentes que {jours} jours)")
+            return
+        
+        print(f"🗑️ Suppression des sauvegardes plus anciennes que {jours} jours...")
+        
+        store = None
+        for entree in a_supprimer:
+            try:
+                if entree['kind'] == KIND_INCREMENTAL:
+                    store = store or ChunkStore(os.path.join(BACKUP_DIR, STORE_DIRNAME))
+                    store.delete_backup(entree['name'])
+                else:
+                    chemin = catalogue.resolve_path(entree)
+                    if os.path.exists(chemin):
+                        os.remove(chemin)
+                    if os.path.exists(metadata_path_for(chemin)):
+                        os.remove(metadata_path_for(chemin))
+                catalogue.remove(entree['name'])
+                print(f"  ✅ Supprimé : {entree['name']}")
+            except Exception as e:
+                print(f"  ❌ Erreur lors de la suppression de {entree['name']} : {e}")
+        
+        # Libérer les blocs qui ne sont plus référencés
+        if store is not None:
+            store.collect_garbage()
+    finally:
+        catalogue.close()
+
+def verifier_sauvegardes(processus=None):
+    """Vérifie toutes les sauvegardes en parallèle (SHA-256 + quick_check)"""
+    if not os.path.exists(BACKUP_DIR):
+        print("❌ Aucune sauvegarde trouvée")
+        return
     
-    for sauvegarde in a_supprimer:
-        try:
-            os.remove(sauvegarde['chemin'])
-            print(f"  ✅ Supprimé : {sauvegarde['nom']}")
-        except Exception as e:
-            print(f"  ❌ Erreur lors de la suppression de {sauvegarde['nom']} : {e}")
+    catalogue = open_catalog(BACKUP_DIR)
+    try:
+        entrees = {entree['name']: entree for entree in catalogue.list()}
+        if not entrees:
+            print("📋 Aucune sauvegarde disponible")
+            return
+        
+        print(f"🔍 Vérification de {len(entrees)} sauvegardes...")
+        taches = [{
+            'name': entree['name'],
+            'kind': entree['kind'],
+            'path': catalogue.resolve_path(entree),
+            'expected_sha256': entree['sha256'],
+            'store_root': os.path.join(BACKUP_DIR, STORE_DIRNAME),
+        } for entree in entrees.values()]
+        
+        echecs = 0
+        for resultat in verify_backups(taches, processus):
+            entree = entrees[resultat['name']]
+            chemin = catalogue.resolve_path(entree)
+            record_result(catalogue, resultat,
+                          chemin if entree['kind'] == KIND_INCREMENTAL else metadata_path_for(chemin))
+            if resultat['status'] == STATUS_OK:
+                print(f"  ✅ {resultat['name']} ({resultat['duration_seconds']:.2f} s)")
+            else:
+                echecs += 1
+                print(f"  ❌ {resultat['name']} : {resultat['status']} - {resultat['detail']}")
+        
+        print(f"✅ {len(taches) - echecs} sauvegardes valides, {echecs} en échec")
+    finally:
+        catalogue.close()
 
 def main():
     """Fonction principale"""
     parser = argparse.ArgumentParser(description="Gestionnaire de sauvegardes GESTIA")
-    parser.add_argument('action', choices=['list', 'backup', 'restore', 'clean'], 
+    parser.add_argument('action', choices=['list', 'backup', 'restore', 'clean', 'verify'], 
                        help='Action à effectuer')
     parser.add_argument('--env', choices=['development', 'production', 'test'], 
                        default='development', help='Environnement (défaut: development)')
@@ -160,6 +239,8 @@ def main():
     parser.add_argument('--numero', type=int, help='Numéro de la sauvegarde à restaurer')
     parser.add_argument('--jours', type=int, default=30, 
                        help='Nombre de jours pour le nettoyage (défaut: 30)')
+    parser.add_argument('--processus', type=int,
+                       help='Processus de vérification en parallèle (défaut: nombre de CPU)')
     
     args = parser.parse_args()
     
@@ -177,6 +258,9 @@ def main():
     
     elif args.action == 'clean':
         nettoyer_anciennes_sauvegardes(args.jours)
+    
+    elif args.action == 'verify':
+        verifier_sauvegardes(args.processus)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Script d'export CSV pour GESTIA
+===============================
+
+Ce script permet d'exporter les données vers des fichiers CSV.
+Les lignes sont lues par lots (iter_* des services) : la mémoire utilisée
+ne dépend pas du nombre de lignes, et toutes les tables exportées ensemble
+proviennent du même état de la base.
+"""
+
+import sys
+import os
+import csv
+import argparse
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from gestia.core.database import init_database, db_manager, set_environment, read_snapshot
+from gestia.core.services import (
+    AppareilService, TechnicienService, SessionDeTestService,
+    ProgrammeDeTestService, CritereDeTestService, DiagnosticReparationService
+)
+
+# Colonnes exportées par type de données (noms des colonnes du modèle)
+EXPORTS = {
+    'appareils': (
+        AppareilService.iter_appareils,
+        ['ID_Appareil', 'Marque', 'Modele', 'NumSerie', 'Capacite', 'Technologie', 'DateReception',
+         'Etat', 'DateMiseEnVente', 'ActionsAFaire', 'SoucisMachine'],
+    ),
+    'techniciens': (
+        TechnicienService.iter_techniciens,
+        ['ID_Technicien', 'Nom', 'Prenom'],
+    ),
+    'sessions': (
+        SessionDeTestService.iter_sessions,
+        ['ID_Session', 'ID_Appareil', 'ID_Technicien', 'DateDebut', 'DateFin', 'ResultatFinal', 'Commentaires'],
+    ),
+    'programmes': (
+        ProgrammeDeTestService.iter_programmes,
+        ['ID_Programme', 'ID_Session', 'NomProgramme', 'StatutExecution', 'DateLancement', 'DateFinExecution'],
+    ),
+    'criteres': (
+        CritereDeTestService.iter_criteres,
+        ['ID_Critere', 'ID_Programme', 'NomCritere', 'EstValide', 'DateValidation', 'ID_Technicien',
+         'CommentaireDefaut'],
+    ),
+    'diagnostics': (
+        DiagnosticReparationService.iter_diagnostics,
+        ['ID_DiagRep', 'ID_Appareil', 'ID_Technicien', 'ID_Session', 'DateDebut', 'DateFin',
+         'DescriptionProbleme', 'ActionsReparation', 'ResultatReparation'],
+    ),
+}
+
+def valeur_csv(valeur):
+    """Convertit une valeur de colonne pour le CSV (énumérations par libellé, dates ISO)"""
+    if valeur is None:
+        return ''
+    if hasattr(valeur, 'value'):
+        return valeur.value
+    if hasattr(valeur, 'isoformat'):
+        return valeur.isoformat()
+    return valeur
+
+def exporter(db, type_donnees, csv_file):
+    """Exporte un type de données vers un fichier CSV et retourne le nombre de lignes"""
+    iterer, colonnes = EXPORTS[type_donnees]
+    nombre = 0
+    with open(csv_file, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(colonnes)
+        for entite in iterer(db):
+            writer.writerow([valeur_csv(getattr(entite, colonne)) for colonne in colonnes])
+            nombre += 1
+    return nombre
+
+def exporter_tout(types, dossier, env='development'):
+    """Exporte les types de données demandés dans un dossier, depuis le même état de la base"""
+    print(f"📤 Export vers {dossier}...")
+
+    # Définir l'environnement
+    set_environment(env)
+    init_database()
+    db = db_manager.get_session()
+
+    try:
+        os.makedirs(dossier, exist_ok=True)
+        with read_snapshot(db):
+            for type_donnees in types:
+                csv_file = os.path.join(dossier, f"{type_donnees}.csv")
+                nombre = exporter(db, type_donnees, csv_file)
+                print(f"  ✅ {nombre} {type_donnees} exportés dans {csv_file}")
+
+        print("✅ Export terminé !")
+
+    except Exception as e:
+        print(f"❌ Erreur lors de l'export : {e}")
+    finally:
+        db.close()
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Export CSV pour GESTIA")
+    parser.add_argument('types', nargs='*',
+                       help=f"Types de données à exporter parmi {', '.join(EXPORTS)} (défaut: tous)")
+    parser.add_argument('--dossier', default='export',
+                       help="Dossier des fichiers CSV (défaut: export)")
+    parser.add_argument('--env', choices=['development', 'production', 'test'],
+                       default='development', help='Environnement (défaut: development)')
+
+    args = parser.parse_args()
+    inconnus = [type_donnees for type_donnees in args.types if type_donnees not in EXPORTS]
+    if inconnus:
+        parser.error(f"type inconnu : {', '.join(inconnus)}")
+    exporter_tout(args.types or list(EXPORTS), args.dossier, args.env)
+
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,7 @@ import argparse
 # Ajouter le répertoire src au path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
-from gestia.core.database import init_database, db_manager, set_environment
+from gestia.core.database import init_database, db_manager, set_environment, transaction
 from gestia.core.services import AppareilService, TechnicienService
 from gestia.core.models import EtatAppareil
 
@@ -32,63 +32,66 @@ def importer_appareils(csv_file, env='development'):
         with open(csv_file, 'r', encoding='utf-8') as file:
             reader = csv.DictReader(file)
             
-            for row in reader:
-                try:
-                    # Parser les données
-                    id_appareil = row.get('ID_Appareil', '').strip()
-                    marque = row.get('Marque', '').strip()
-                    modele = row.get('Modele', '').strip()
-                    date_reception_str = row.get('DateReception', '').strip()
-                    etat_str = row.get('Etat', 'EN_TEST').strip()
-                    date_vente_str = row.get('DateMiseEnVente', '').strip()
+            # Un seul commit pour tout le fichier ; chaque ligne a son SAVEPOINT
+            # pour qu'une ligne en erreur soit ignorée sans annuler les autres
+            with transaction(db):
+                for row in reader:
+                    try:
+                        with transaction(db):
+                            # Parser les données
+                            id_appareil = row.get('ID_Appareil', '').strip()
+                            marque = row.get('Marque', '').strip()
+                            modele = row.get('Modele', '').strip()
+                            date_reception_str = row.get('DateReception', '').strip()
+                            etat_str = row.get('Etat', 'EN_TEST').strip()
+                            date_vente_str = row.get('DateMiseEnVente', '').strip()
                     
-                    # Validation des données obligatoires
-                    if not marque or not modele or not date_reception_str:
-                        print(f"  ⚠️ Ligne ignorée : données manquantes")
-                        continue
+                            # Validation des données obligatoires
+                            if not marque or not modele or not date_reception_str:
+                                print(f"  ⚠️ Ligne ignorée : données manquantes")
+                                continue
                     
-                    # Parser les dates
-                    try:
-                        date_reception = datetime.strptime(date_reception_str, '%Y-%m-%d').date()
-                    except ValueError:
-                        print(f"  ⚠️ Date de réception invalide : {date_reception_str}")
-                        continue
+                            # Parser les dates
+                            try:
+                                date_reception = datetime.strptime(date_reception_str, '%Y-%m-%d').date()
+                            except ValueError:
+                                print(f"  ⚠️ Date de réception invalide : {date_reception_str}")
+                                continue
                     
-                    # Parser l'état
-                    try:
-                        etat = EtatAppareil(etat_str)
-                    except ValueError:
-                        print(f"  ⚠️ État invalide : {etat_str}, utilisation de EN_TEST")
-                        etat = EtatAppareil.EN_TEST
+                            # Parser l'état
+                            try:
+                                etat = EtatAppareil(etat_str)
+                            except ValueError:
+                                print(f"  ⚠️ État invalide : {etat_str}, utilisation de EN_TEST")
+                                etat = EtatAppareil.EN_TEST
                     
-                    # Créer l'appareil
-                    if id_appareil and id_appareil.startswith('APP_'):
-                        # Utiliser l'ID fourni
-                        appareil = AppareilService.creer_appareil(db, marque, modele, date_reception)
-                        # Modifier l'ID si nécessaire
-                        if appareil.ID_Appareil != id_appareil:
-                            print(f"  ⚠️ ID modifié : {appareil.ID_Appareil} -> {id_appareil}")
-                    else:
-                        appareil = AppareilService.creer_appareil(db, marque, modele, date_reception)
+                            # Créer l'appareil
+                            if id_appareil and id_appareil.startswith('APP_'):
+                                # Utiliser l'ID fourni
+                                appareil = AppareilService.creer_appareil(db, marque, modele, date_reception)
+                                # Modifier l'ID si nécessaire
+                                if appareil.ID_Appareil != id_appareil:
+                                    print(f"  ⚠️ ID modifié : {appareil.ID_Appareil} -> {id_appareil}")
+                            else:
+                                appareil = AppareilService.creer_appareil(db, marque, modele, date_reception)
                     
-                    # Modifier l'état si différent de EN_TEST
-                    if etat != EtatAppareil.EN_TEST:
-                        AppareilService.modifier_etat_appareil(db, appareil.ID_Appareil, etat)
+                            # Modifier l'état si différent de EN_TEST
+                            if etat != EtatAppareil.EN_TEST:
+                                AppareilService.modifier_etat_appareil(db, appareil.ID_Appareil, etat)
                     
-                    # Ajouter la date de mise en vente si fournie
-                    if date_vente_str:
-                        try:
-                            date_vente = datetime.strptime(date_vente_str, '%Y-%m-%d').date()
-                            appareil.DateMiseEnVente = date_vente
-                            db.commit()
-                        except ValueError:
-                            print(f"  ⚠️ Date de vente invalide : {date_vente_str}")
+                            # Ajouter la date de mise en vente si fournie
+                            if date_vente_str:
+                                try:
+                                    date_vente = datetime.strptime(date_vente_str, '%Y-%m-%d').date()
+                                    appareil.DateMiseEnVente = date_vente
+                                except ValueError:
+                                    print(f"  ⚠️ Date de vente invalide : {date_vente_str}")
                     
-                    print(f"  ✅ {marque} {modele} importé (ID: {appareil.ID_Appareil})")
+                            print(f"  ✅ {marque} {modele} importé (ID: {appareil.ID_Appareil})")
                     
-                except Exception as e:
-                    print(f"  ❌ Erreur lors de l'import de la ligne : {e}")
-                    continue
+                    except Exception as e:
+                        print(f"  ❌ Erreur lors de l'import de la ligne : {e}")
+                        continue
         
         print("✅ Import des appareils terminé !")
         
@@ -112,26 +115,30 @@ def importer_techniciens(csv_file, env='development'):
         with open(csv_file, 'r', encoding='utf-8') as file:
             reader = csv.DictReader(file)
             
-            for row in reader:
-                try:
-                    # Parser les données
-                    id_technicien = row.get('ID_Technicien', '').strip()
-                    nom = row.get('Nom', '').strip()
-                    prenom = row.get('Prenom', '').strip()
+            # Un seul commit pour tout le fichier ; chaque ligne a son SAVEPOINT
+            # pour qu'une ligne en erreur soit ignorée sans annuler les autres
+            with transaction(db):
+                for row in reader:
+                    try:
+                        with transaction(db):
+                            # Parser les données
+                            id_technicien = row.get('ID_Technicien', '').strip()
+                            nom = row.get('Nom', '').strip()
+                            prenom = row.get('Prenom', '').strip()
                     
-                    # Validation des données obligatoires
-                    if not nom or not prenom:
-                        print(f"  ⚠️ Ligne ignorée : nom ou prénom manquant")
-                        continue
+                            # Validation des données obligatoires
+                            if not nom or not prenom:
+                                print(f"  ⚠️ Ligne ignorée : nom ou prénom manquant")
+                                continue
                     
-                    # Créer le technicien
-                    technicien = TechnicienService.creer_technicien(db, nom, prenom)
+                            # Créer le technicien
+                            technicien = TechnicienService.creer_technicien(db, nom, prenom)
                     
-                    print(f"  ✅ {prenom} {nom} importé (ID: {technicien.ID_Technicien})")
+                            print(f"  ✅ {prenom} {nom} importé (ID: {technicien.ID_Technicien})")
                     
-                except Exception as e:
-                    print(f"  ❌ Erreur lors de l'import de la ligne : {e}")
-                    continue
+                    except Exception as e:
+                        print(f"  ❌ Erreur lors de l'import de la ligne : {e}")
+                        continue
         
         print("✅ Import des techniciens terminé !")
         
@@ -0,0 +1,43 @@
+"""
+Backup package - Sauvegardes et restaurations
+=============================================
+
+Contient le moteur de sauvegarde à chaud des bases SQLite et le magasin
+de sauvegardes incrémentales ou compressées, ainsi que leur catalogue,
+leur vérification et la restauration à un instant donné.
+"""
+
+from .online import online_backup, snapshot_stream, DEFAULT_PAGES_PER_STEP, DEFAULT_STEP_SLEEP
+from .store import ChunkStore, DEFAULT_CHUNK_SIZE
+from .compressed import compressed_backup, compressed_restore, detect_method, COMPRESSION_METHODS
+from .catalog import BackupCatalog, open_catalog, is_backup_file, metadata_path_for
+from .verify import verify_backup, verify_backups, record_result, file_sha256
+from .restore import (restore_to_file, swap_restore, restore_environment, install_database,
+                      point_in_time_restore, archive_changelog)
+
+__all__ = [
+    'online_backup',
+    'snapshot_stream',
+    'ChunkStore',
+    'DEFAULT_CHUNK_SIZE',
+    'compressed_backup',
+    'compressed_restore',
+    'detect_method',
+    'COMPRESSION_METHODS',
+    'BackupCatalog',
+    'open_catalog',
+    'is_backup_file',
+    'metadata_path_for',
+    'verify_backup',
+    'verify_backups',
+    'record_result',
+    'file_sha256',
+    'restore_to_file',
+    'swap_restore',
+    'restore_environment',
+    'install_database',
+    'point_in_time_restore',
+    'archive_changelog',
+    'DEFAULT_PAGES_PER_STEP',
+    'DEFAULT_STEP_SLEEP'
+]
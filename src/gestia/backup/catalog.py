@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Catalogue des sauvegardes
+=========================
+
+Petite base SQLite (data/backups/catalog.db) qui indexe toutes les
+sauvegardes : environnement, date, tailles, empreinte, sauvegarde parente
+et état de vérification. La liste, la rétention et la restauration par
+numéro deviennent des requêtes indexées au lieu de parcourir le dossier
+et de relire chaque fichier JSON. Le catalogue compte aussi les
+sauvegardes incrémentales qui référencent chaque bloc du magasin : la
+rétention et le GC du magasin n'ont pas à relire les manifestes.
+
+Le catalogue peut être reconstruit à tout moment à partir des fichiers
+présents sur disque (rebuild).
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from .compressed import COMPRESSION_METHODS
+from .store import ChunkStore
+
+CATALOG_FILENAME = 'catalog.db'
+# Sous-dossier du magasin des sauvegardes incrémentales
+STORE_DIRNAME = 'store'
+# Sous-dossier des segments archivés du journal des modifications
+CHANGELOG_DIRNAME = 'changelog'
+
+# Types de sauvegardes
+KIND_FULL = 'full'
+KIND_COMPRESSED = 'compressed'
+KIND_INCREMENTAL = 'incremental'
+
+# Extensions des sauvegardes complètes (brutes ou compressées)
+BACKUP_EXTENSIONS = ('.db',) + tuple(
+    f".db{config['extension']}" for config in COMPRESSION_METHODS.values()
+)
+
+_COLUMNS = (
+    'name', 'kind', 'environment', 'created_at', 'path', 'size',
+    'uncompressed_size', 'compression', 'sha256', 'parent', 'description',
+    'verify_status', 'verified_at', 'verify_seconds', 'verify_detail',
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS backups (
+    name TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    environment TEXT,
+    created_at TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER,
+    uncompressed_size INTEGER,
+    compression TEXT,
+    sha256 TEXT,
+    parent TEXT,
+    description TEXT DEFAULT '',
+    verify_status TEXT,
+    verified_at TEXT,
+    verify_seconds REAL,
+    verify_detail TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_backups_created ON backups (created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_backups_env_created ON backups (environment, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_backups_kind_created ON backups (kind, created_at DESC);
+CREATE TABLE IF NOT EXISTS changelog_segments (
+    path TEXT PRIMARY KEY,
+    environment TEXT NOT NULL,
+    first_seq INTEGER NOT NULL,
+    last_seq INTEGER NOT NULL,
+    first_ts TEXT NOT NULL,
+    last_ts TEXT NOT NULL,
+    rows INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_segments_env_seq ON changelog_segments (environment, last_seq);
+CREATE TABLE IF NOT EXISTS chunks (
+    digest TEXT PRIMARY KEY,
+    refs INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_chunks_orphans ON chunks (digest) WHERE refs <= 0;
+"""
+
+def is_backup_file(file):
+    """Indique si un fichier du dossier de sauvegardes est une sauvegarde complète"""
+    return file != CATALOG_FILENAME and file.endswith(BACKUP_EXTENSIONS)
+
+def metadata_path_for(backup_path):
+    """Chemin du fichier de métadonnées associé à une sauvegarde complète"""
+    for extension in BACKUP_EXTENSIONS[::-1]:
+        if backup_path.endswith(extension):
+            return backup_path[:-len(extension)] + '.json'
+    return backup_path + '.json'
+
+class BackupCatalog:
+    """Index SQLite des sauvegardes d'un dossier"""
+
+    def __init__(self, backup_dir='data/backups'):
+        self.backup_dir = backup_dir
+        os.makedirs(backup_dir, exist_ok=True)
+        self.path = os.path.join(backup_dir, CATALOG_FILENAME)
+        # True si le catalogue vient d'être créé (à reconstruire depuis le disque)
+        self.created = not os.path.exists(self.path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        # True si les références des blocs sont à recompter (catalogue antérieur à la table chunks)
+        self.chunks_missing = not self.created and not self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunks'"
+        ).fetchone()
+        self.conn.executescript(_SCHEMA)
+        self._add_missing_columns()
+
+    def _add_missing_columns(self):
+        """Ajoute les colonnes apparues depuis la création du catalogue"""
+        existing = {row['name'] for row in self.conn.execute("PRAGMA table_info(backups)")}
+        with self.conn:
+            for column, sql_type in (('verify_seconds', 'REAL'), ('verify_detail', 'TEXT')):
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE backups ADD COLUMN {column} {sql_type}")
+
+    def close(self):
+        """Ferme la connexion au catalogue"""
+        self.conn.close()
+
+    def resolve_path(self, entry):
+        """Chemin du fichier d'une entrée du catalogue"""
+        return os.path.join(self.backup_dir, entry['path'])
+
+    def add(self, chunks=None, **entry):
+        """
+        Ajoute ou remplace une sauvegarde dans le catalogue.
+
+        Args:
+            chunks (list): Blocs du magasin référencés par la sauvegarde
+                (sauvegardes incrémentales), comptés dans la même transaction
+            **entry: Colonnes de la table backups (name, kind, created_at et
+                path sont obligatoires, path est relatif au dossier)
+        """
+        entry.setdefault('description', '')
+        columns = [column for column in _COLUMNS if column in entry]
+        with self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO backups ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                [entry[column] for column in columns]
+            )
+            if chunks:
+                self._count_chunks(chunks, 1)
+
+    def remove(self, name, chunks=None):
+        """
+        Retire une sauvegarde du catalogue.
+
+        Args:
+            chunks (list): Blocs que la sauvegarde référençait, décomptés
+                dans la même transaction (voir orphan_chunks)
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM backups WHERE name = ?", (name,))
+            if chunks:
+                self._count_chunks(chunks, -1)
+
+    def _count_chunks(self, chunks, delta):
+        """Ajoute delta aux références des blocs distincts d'une sauvegarde"""
+        self.conn.executemany(
+            "INSERT INTO chunks (digest, refs) VALUES (?, ?) "
+            "ON CONFLICT (digest) DO UPDATE SET refs = refs + excluded.refs",
+            [(digest, delta) for digest in set(chunks)]
+        )
+
+    def orphan_chunks(self):
+        """Blocs du magasin qui ne sont plus référencés par aucune sauvegarde"""
+        return [row[0] for row in self.conn.execute("SELECT digest FROM chunks WHERE refs <= 0")]
+
+    def forget_chunks(self, digests):
+        """Oublie des blocs supprimés du magasin (s'ils ne sont toujours pas référencés)"""
+        with self.conn:
+            self.conn.executemany("DELETE FROM chunks WHERE digest = ? AND refs <= 0",
+                                  [(digest,) for digest in digests])
+
+    def get(self, name):
+        """Retourne l'entrée d'une sauvegarde ou None"""
+        return self.conn.execute("SELECT * FROM backups WHERE name = ?", (name,)).fetchone()
+
+    def _where(self, environment=None, kinds=None):
+        """Construit la clause WHERE des filtres courants"""
+        clauses = []
+        params = []
+        if environment is not None:
+            clauses.append("environment = ?")
+            params.append(environment)
+        if kinds:
+            clauses.append(f"kind IN ({', '.join('?' for _ in kinds)})")
+            params.extend(kinds)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def list(self, environment=None, kinds=None, limit=-1, offset=0):
+        """
+        Liste les sauvegardes, de la plus récente à la plus ancienne.
+
+        Args:
+            environment (str): Filtrer sur un environnement
+            kinds (tuple): Filtrer sur des types de sauvegarde
+            limit (int): Nombre maximal d'entrées (-1 : toutes)
+            offset (int): Nombre d'entrées à sauter
+
+        Returns:
+            list: Entrées (sqlite3.Row)
+        """
+        where, params = self._where(environment, kinds)
+        return self.conn.execute(
+            f"SELECT * FROM backups {where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+
+    def count(self, environment=None, kinds=None):
+        """Nombre de sauvegardes cataloguées"""
+        where, params = self._where(environment, kinds)
+        return self.conn.execute(f"SELECT count(*) FROM backups {where}", params).fetchone()[0]
+
+    def get_by_number(self, number, environment=None):
+        """Retourne la sauvegarde numéro `number` (1 = la plus récente) ou None"""
+        if number < 1:
+            return None
+        rows = self.list(environment, limit=1, offset=number - 1)
+        return rows[0] if rows else None
+
+    def latest(self, environment=None, kinds=None):
+        """Retourne la sauvegarde la plus récente ou None"""
+        rows = self.list(environment, kinds, limit=1)
+        return rows[0] if rows else None
+
+    def expired(self, keep_count, environment=None, kinds=None):
+        """
+        Sauvegardes au-delà des `keep_count` plus récentes de leur
+        environnement : la rétention s'applique à chaque environnement
+        séparément, même sans filtre sur l'environnement.
+        """
+        where, params = self._where(environment, kinds)
+        return self.conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM ("
+            f"SELECT *, row_number() OVER (PARTITION BY environment ORDER BY created_at DESC) AS rank "
+            f"FROM backups {where}) WHERE rank > ? ORDER BY created_at DESC",
+            params + [keep_count]
+        ).fetchall()
+
+    def older_than(self, limit_date, environment=None, kinds=None):
+        """Sauvegardes créées avant limit_date (datetime ou chaîne ISO)"""
+        if isinstance(limit_date, datetime):
+            limit_date = limit_date.isoformat()
+        where, params = self._where(environment, kinds)
+        where = f"{where} AND created_at < ?" if where else "WHERE created_at < ?"
+        return self.conn.execute(
+            f"SELECT * FROM backups {where} ORDER BY created_at DESC",
+            params + [limit_date]
+        ).fetchall()
+
+    def set_verification(self, name, status, verified_at=None, seconds=None,
+                         detail=None, sha256=None):
+        """
+        Enregistre le résultat de la vérification d'une sauvegarde.
+
+        L'empreinte calculée n'est retenue que si le catalogue n'en avait
+        pas encore (première vérification d'une sauvegarde complète).
+        """
+        with self.conn:
+            self.conn.execute(
+                "UPDATE backups SET verify_status = ?, verified_at = ?, verify_seconds = ?, "
+                "verify_detail = ?, sha256 = COALESCE(sha256, ?) WHERE name = ?",
+                (status, verified_at or datetime.now().isoformat(), seconds, detail, sha256, name)
+            )
+
+    def changelog_dir(self, environment):
+        """Dossier des segments du journal d'un environnement"""
+        return os.path.join(self.backup_dir, CHANGELOG_DIRNAME, environment)
+
+    def add_segment(self, environment, segment):
+        """Enregistre un segment archivé du journal (voir archive_changes)"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO changelog_segments "
+                "(path, environment, first_seq, last_seq, first_ts, last_ts, rows) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (os.path.relpath(segment['path'], self.backup_dir), environment,
+                 segment['first_seq'], segment['last_seq'], segment['first_ts'],
+                 segment['last_ts'], segment['rows'])
+            )
+
+    def remove_segment(self, path):
+        """Retire un segment du catalogue (chemin absolu ou relatif au dossier)"""
+        if os.path.isabs(path) or not path.startswith(CHANGELOG_DIRNAME):
+            path = os.path.relpath(path, self.backup_dir)
+        with self.conn:
+            self.conn.execute("DELETE FROM changelog_segments WHERE path = ?", (path,))
+
+    def segments(self, environment, after_seq=0):
+        """
+        Segments d'un environnement contenant des séquences > after_seq.
+
+        Returns:
+            list: Entrées triées par séquence (path relatif au dossier)
+        """
+        return self.conn.execute(
+            "SELECT * FROM changelog_segments WHERE environment = ? AND last_seq > ? "
+            "ORDER BY first_seq", (environment, after_seq)
+        ).fetchall()
+
+    def last_archived_seq(self, environment):
+        """Dernière séquence archivée d'un environnement (0 si aucune)"""
+        row = self.conn.execute(
+            "SELECT max(last_seq) FROM changelog_segments WHERE environment = ?", (environment,)
+        ).fetchone()
+        return row[0] or 0
+
+    def _rebuild_segments(self):
+        """Recense les segments présents sur disque"""
+        from .changelog import segment_info
+
+        segments = []
+        root = os.path.join(self.backup_dir, CHANGELOG_DIRNAME)
+        if not os.path.isdir(root):
+            return segments
+        for environment in os.listdir(root):
+            env_dir = os.path.join(root, environment)
+            if not os.path.isdir(env_dir):
+                continue
+            for file in os.listdir(env_dir):
+                if file.endswith('.jsonl.gz'):
+                    info = segment_info(os.path.join(env_dir, file))
+                    if info:
+                        segments.append((environment, info))
+        return segments
+
+    def rebuild(self, store=None):
+        """
+        Reconstruit le catalogue depuis les fichiers présents sur disque.
+
+        Les sauvegardes complètes sont lues avec leur fichier JSON (s'il
+        existe), les sauvegardes incrémentales avec leur manifeste (qui
+        donne aussi les références des blocs), les segments du journal
+        depuis le dossier changelog. Les
+        états de vérification déjà connus du catalogue sont conservés, à
+        défaut ceux enregistrés dans les métadonnées sont repris.
+
+        Args:
+            store (ChunkStore): Magasin des sauvegardes incrémentales
+
+        Returns:
+            int: Nombre de sauvegardes cataloguées
+        """
+        verify_columns = ('verify_status', 'verified_at', 'verify_seconds', 'verify_detail')
+        verifications = {
+            row['name']: tuple(row[column] for column in verify_columns)
+            for row in self.conn.execute(
+                f"SELECT name, {', '.join(verify_columns)} FROM backups "
+                "WHERE verify_status IS NOT NULL"
+            )
+        }
+        entries = []
+
+        for file in os.listdir(self.backup_dir):
+            if not is_backup_file(file):
+                continue
+            backup_path = os.path.join(self.backup_dir, file)
+            metadata = {}
+            metadata_path = metadata_path_for(backup_path)
+            if os.path.exists(metadata_path):
+                try:
+                    with open(metadata_path, 'r') as f:
+                        metadata = json.load(f)
+                except (OSError, ValueError):
+                    pass
+            created_at = metadata.get('created_at') or datetime.fromtimestamp(
+                os.path.getmtime(backup_path)).isoformat()
+            entries.append({
+                'name': file,
+                'kind': KIND_COMPRESSED if metadata.get('compression') or not file.endswith('.db') else KIND_FULL,
+                'environment': metadata.get('environment'),
+                'created_at': created_at,
+                'path': file,
+                'size': os.path.getsize(backup_path),
+                'uncompressed_size': metadata.get('uncompressed_size'),
+                'compression': metadata.get('compression'),
+                'sha256': metadata.get('sha256'),
+                'parent': None,
+                'description': metadata.get('description', ''),
+                'verification': metadata.get('verification'),
+            })
+
+        manifests, refs = self._store_chunk_refs(store)
+        for name, manifest in manifests.items():
+            entries.append({
+                'name': name,
+                'kind': KIND_INCREMENTAL,
+                'environment': manifest.get('environment'),
+                'created_at': manifest.get('created_at', ''),
+                'path': os.path.relpath(store.manifest_path(name), self.backup_dir),
+                'size': manifest.get('size'),
+                'uncompressed_size': manifest.get('size'),
+                'compression': None,
+                'sha256': manifest.get('sha256'),
+                'parent': manifest.get('parent'),
+                'description': manifest.get('description', ''),
+                'verification': manifest.get('verification'),
+            })
+
+        for entry in entries:
+            verification = entry.pop('verification') or {}
+            known = verifications.get(entry['name']) or (
+                verification.get('status'), verification.get('verified_at'),
+                verification.get('duration_seconds'), verification.get('detail'),
+            )
+            entry.update(zip(verify_columns, known))
+
+        segments = self._rebuild_segments()
+
+        with self.conn:
+            self.conn.execute("DELETE FROM changelog_segments")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO changelog_segments "
+                "(path, environment, first_seq, last_seq, first_ts, last_ts, rows) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(os.path.relpath(info['path'], self.backup_dir), environment,
+                  info['first_seq'], info['last_seq'], info['first_ts'], info['last_ts'],
+                  info['rows']) for environment, info in segments]
+            )
+            self.conn.execute("DELETE FROM backups")
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO backups ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                [[entry[column] for column in _COLUMNS] for entry in entries]
+            )
+            self._write_chunk_refs(refs)
+        self.created = False
+        self.chunks_missing = False
+        return len(entries)
+
+    def rebuild_chunks(self, store):
+        """Recompte les références des blocs du magasin depuis ses manifestes"""
+        refs = self._store_chunk_refs(store)[1]
+        with self.conn:
+            self._write_chunk_refs(refs)
+        self.chunks_missing = False
+
+    @staticmethod
+    def _store_chunk_refs(store):
+        """
+        Manifestes du magasin et nombre de sauvegardes référençant chaque bloc.
+
+        Les blocs présents sur disque sans sauvegarde (sauvegarde
+        interrompue) sont comptés sans référence : le prochain GC les libère.
+
+        Returns:
+            tuple: Manifestes par nom, références par empreinte
+        """
+        if store is None:
+            return {}, {}
+        manifests = {name: store.load_manifest(name) for name in store.list_manifests()}
+        refs = dict.fromkeys(store.list_chunks(), 0)
+        for manifest in manifests.values():
+            for digest in set(manifest['chunks']):
+                refs[digest] = refs.get(digest, 0) + 1
+        return manifests, refs
+
+    def _write_chunk_refs(self, refs):
+        """Remplace les références des blocs (dans la transaction en cours)"""
+        self.conn.execute("DELETE FROM chunks")
+        self.conn.executemany("INSERT INTO chunks (digest, refs) VALUES (?, ?)", refs.items())
+
+def open_catalog(backup_dir='data/backups'):
+    """
+    Ouvre le catalogue d'un dossier de sauvegardes.
+
+    Un catalogue absent est créé puis reconstruit depuis les fichiers du
+    dossier (et du magasin incrémental s'il existe). Les références des
+    blocs d'un catalogue qui n'en avait pas encore sont recomptées.
+
+    Returns:
+        BackupCatalog: Catalogue prêt à l'emploi
+    """
+    catalog = BackupCatalog(backup_dir)
+    store_dir = os.path.join(backup_dir, STORE_DIRNAME)
+    store = ChunkStore(store_dir) if os.path.isdir(store_dir) else None
+    if catalog.created:
+        catalog.rebuild(store)
+    elif catalog.chunks_missing and store is not None:
+        catalog.rebuild_chunks(store)
+    return catalog
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Journal des modifications (restauration à un instant donné)
+===========================================================
+
+Des triggers sur les tables du modèle enregistrent chaque insertion,
+modification et suppression dans la table _gestia_changelog (horodatage,
+table, clé primaire, ligne complète en JSON). Le journal est archivé
+régulièrement en segments compressés, puis vidé de la base.
+
+Pour restaurer à un instant T, on part de la sauvegarde la plus proche
+avant T, puis on rejoue les modifications postérieures à cette
+sauvegarde jusqu'à T. La position d'une sauvegarde dans le journal est
+le dernier numéro de séquence qu'elle contient (table sqlite_sequence).
+"""
+
+import gzip
+import json
+import os
+import sqlite3
+import time
+
+from ..core.models import Base
+
+CHANGELOG_TABLE = '_gestia_changelog'
+# Préfixe des triggers de capture
+TRIGGER_PREFIX = '_gestia_cl_'
+# Nombre de modifications rejouées par transaction
+DEFAULT_REPLAY_BATCH = 50000
+
+# Horodatage local à la milliseconde, comparable aux dates ISO du catalogue
+_TIMESTAMP_SQL = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+
+_CHANGELOG_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {CHANGELOG_TABLE} (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    tbl TEXT NOT NULL,
+    op TEXT NOT NULL,
+    pk TEXT NOT NULL,
+    data TEXT
+)
+"""
+
+def tracked_tables():
+    """Noms des tables du modèle suivies par le journal"""
+    return [table.name for table in Base.metadata.sorted_tables]
+
+def _quote(name):
+    """Protège un identifiant SQL"""
+    return '"' + name.replace('"', '""') + '"'
+
+def _table_columns(conn, table):
+    """
+    Colonnes réelles d'une table (migrations comprises).
+
+    Returns:
+        tuple: (liste des colonnes, colonne de clé primaire)
+    """
+    rows = conn.execute(f"PRAGMA table_info({_quote(table)})").fetchall()
+    columns = [row[1] for row in rows]
+    pk = [row[1] for row in rows if row[5]]
+    if len(pk) != 1:
+        raise ValueError(f"La table {table} doit avoir une clé primaire simple")
+    return columns, pk[0]
+
+def _existing_tables(conn):
+    """Tables suivies présentes dans la base"""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return [table for table in tracked_tables() if table in existing]
+
+def _trigger_names(conn):
+    """Triggers de capture présents dans la base"""
+    return [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE ?",
+        (f"{TRIGGER_PREFIX}%",)
+    )]
+
+def is_installed(conn):
+    """Indique si la capture des modifications est active sur la base"""
+    return bool(_trigger_names(conn))
+
+def drop_triggers(conn):
+    """Supprime les triggers de capture (le journal est conservé)"""
+    for name in _trigger_names(conn):
+        conn.execute(f"DROP TRIGGER IF EXISTS {_quote(name)}")
+
+def install_triggers(conn):
+    """
+    Crée la table du journal et (re)génère les triggers de capture.
+
+    Les triggers sont construits à partir des colonnes réelles des tables :
+    il faut les régénérer après chaque migration de schéma.
+
+    Args:
+        conn: Connexion sqlite3 (DBAPI) sur la base
+    """
+    conn.execute(_CHANGELOG_SCHEMA)
+    drop_triggers(conn)
+    insert = f"INSERT INTO {CHANGELOG_TABLE} (ts, tbl, op, pk, data)"
+
+    for table in _existing_tables(conn):
+        columns, pk = _table_columns(conn, table)
+        row_json = "json_object({})".format(
+            ", ".join(f"'{column}', NEW.{_quote(column)}" for column in columns)
+        )
+        name = f"{TRIGGER_PREFIX}{table}"
+        quoted_table = _quote(table)
+        quoted_pk = _quote(pk)
+        conn.execute(
+            f"CREATE TRIGGER {_quote(name + '_ins')} AFTER INSERT ON {quoted_table} BEGIN "
+            f"{insert} VALUES ({_TIMESTAMP_SQL}, '{table}', 'I', NEW.{quoted_pk}, {row_json}); END"
+        )
+        conn.execute(
+            f"CREATE TRIGGER {_quote(name + '_upd')} AFTER UPDATE ON {quoted_table} BEGIN "
+            f"{insert} SELECT {_TIMESTAMP_SQL}, '{table}', 'D', OLD.{quoted_pk}, NULL "
+            f"WHERE OLD.{quoted_pk} IS NOT NEW.{quoted_pk}; "
+            f"{insert} VALUES ({_TIMESTAMP_SQL}, '{table}', 'U', NEW.{quoted_pk}, {row_json}); END"
+        )
+        conn.execute(
+            f"CREATE TRIGGER {_quote(name + '_del')} AFTER DELETE ON {quoted_table} BEGIN "
+            f"{insert} VALUES ({_TIMESTAMP_SQL}, '{table}', 'D', OLD.{quoted_pk}, NULL); END"
+        )
+
+def refresh_triggers(conn):
+    """Régénère les triggers si la capture est active (après une migration)"""
+    if is_installed(conn):
+        install_triggers(conn)
+        return True
+    return False
+
+def last_sequence(conn):
+    """
+    Dernier numéro de séquence du journal contenu dans une base.
+
+    Returns:
+        int: Numéro de séquence, ou None si la base n'a pas de journal
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (CHANGELOG_TABLE,)
+    ).fetchone()
+    if not exists:
+        return None
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (CHANGELOG_TABLE,)).fetchone()
+    return row[0] if row else 0
+
+def segment_filename(first_seq, last_seq):
+    """Nom d'un segment d'archive du journal"""
+    return f"changelog_{first_seq:012d}_{last_seq:012d}.jsonl.gz"
+
+def _write_segment(path, rows):
+    """Écrit un segment (une modification JSON par ligne) de façon atomique"""
+    partial_path = f"{path}.partial"
+    with gzip.open(partial_path, 'wt', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, separators=(',', ':')))
+            f.write('\n')
+    with open(partial_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(partial_path, path)
+
+def archive_changes(db_path, archive_dir, timeout=30.0):
+    """
+    Déplace les modifications du journal vers un segment d'archive.
+
+    La lecture, l'écriture du segment et la purge se font dans une même
+    transaction d'écriture : aucune modification ne peut être perdue ni
+    archivée deux fois.
+
+    Args:
+        db_path (str): Base SQLite dont le journal est archivé
+        archive_dir (str): Dossier des segments de l'environnement
+
+    Returns:
+        dict: Segment créé (chemin, séquences et horodatages, nombre de
+            modifications) ou None si le journal est vide
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None)
+    try:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (CHANGELOG_TABLE,)
+        ).fetchone()
+        if not exists:
+            return None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = [
+                {'seq': seq, 'ts': ts, 'tbl': tbl, 'op': op, 'pk': pk, 'data': data}
+                for seq, ts, tbl, op, pk, data in conn.execute(
+                    f"SELECT seq, ts, tbl, op, pk, data FROM {CHANGELOG_TABLE} ORDER BY seq"
+                )
+            ]
+            if not rows:
+                conn.execute("ROLLBACK")
+                return None
+            path = os.path.join(archive_dir, segment_filename(rows[0]['seq'], rows[-1]['seq']))
+            _write_segment(path, rows)
+            conn.execute(f"DELETE FROM {CHANGELOG_TABLE} WHERE seq <= ?", (rows[-1]['seq'],))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+    return {
+        'path': path,
+        'first_seq': rows[0]['seq'],
+        'last_seq': rows[-1]['seq'],
+        'first_ts': rows[0]['ts'],
+        'last_ts': rows[-1]['ts'],
+        'rows': len(rows),
+    }
+
+def read_segment(path):
+    """Itère sur les modifications d'un segment d'archive"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def segment_info(path):
+    """Relit les bornes d'un segment (reconstruction du catalogue)"""
+    first = last = None
+    count = 0
+    for row in read_segment(path):
+        first = first or row
+        last = row
+        count += 1
+    if first is None:
+        return None
+    return {
+        'path': path,
+        'first_seq': first['seq'],
+        'last_seq': last['seq'],
+        'first_ts': first['ts'],
+        'last_ts': last['ts'],
+        'rows': count,
+    }
+
+def trim_segment(path, last_seq):
+    """
+    Réécrit un segment sans les modifications postérieures à last_seq.
+
+    Returns:
+        dict: Segment réécrit, ou None s'il ne reste aucune modification
+    """
+    rows = [row for row in read_segment(path) if row['seq'] <= last_seq]
+    os.remove(path)
+    if not rows:
+        return None
+    new_path = os.path.join(os.path.dirname(path), segment_filename(rows[0]['seq'], rows[-1]['seq']))
+    _write_segment(new_path, rows)
+    return segment_info(new_path)
+
+def iter_live_changes(db_path, after_seq=0, timeout=30.0):
+    """Itère sur les modifications non archivées d'une base"""
+    conn = sqlite3.connect(db_path, timeout=timeout)
+    try:
+        if last_sequence(conn) is None:
+            return
+        cursor = conn.execute(
+            f"SELECT seq, ts, tbl, op, pk, data FROM {CHANGELOG_TABLE} WHERE seq > ? ORDER BY seq",
+            (after_seq,)
+        )
+        for seq, ts, tbl, op, pk, data in cursor:
+            yield {'seq': seq, 'ts': ts, 'tbl': tbl, 'op': op, 'pk': pk, 'data': data}
+    finally:
+        conn.close()
+
+def iter_changes(segment_paths, live_db_path=None, after_seq=0, until=None):
+    """
+    Itère, dans l'ordre, sur les modifications à rejouer.
+
+    Les segments archivés sont lus d'abord, puis le journal de la base
+    active. L'itération s'arrête à la première modification postérieure à
+    `until` : le résultat est toujours un préfixe cohérent de l'historique.
+
+    Args:
+        segment_paths (list): Segments triés par séquence
+        live_db_path (str): Base active (modifications non archivées)
+        after_seq (int): Séquence de la sauvegarde de départ
+        until (str): Horodatage ISO limite (inclus)
+    """
+    last = after_seq
+
+    def _sources():
+        for path in segment_paths:
+            yield read_segment(path)
+        if live_db_path:
+            yield iter_live_changes(live_db_path, after_seq)
+
+    for source in _sources():
+        for change in source:
+            if change['seq'] <= last:
+                continue
+            if until is not None and change['ts'] > until:
+                return
+            last = change['seq']
+            yield change
+
+def replay_changes(db_path, changes, batch_size=DEFAULT_REPLAY_BATCH, keep_after_seq=None):
+    """
+    Rejoue des modifications sur une base restaurée.
+
+    Les triggers sont supprimés pendant le rejeu (il ne doit pas être
+    journalisé une seconde fois) puis régénérés. Les modifications
+    consécutives de même forme sont regroupées en executemany, et la
+    validation se fait par lots de `batch_size` modifications.
+
+    Args:
+        db_path (str): Base à mettre à jour (copie restaurée, hors ligne)
+        changes (iterable): Modifications issues de iter_changes
+        batch_size (int): Modifications par transaction
+        keep_after_seq (int): Les modifications de séquence supérieure sont
+            recopiées dans le journal de la base (elles ne sont pas archivées)
+
+    Returns:
+        dict: Statistiques (modifications, lots, dernière séquence, durée)
+    """
+    start = time.perf_counter()
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    stats = {'changes': 0, 'batches': 0, 'last_seq': None, 'last_ts': None}
+    statements = {}
+    pending_sql = None
+    pending_params = []
+    journal_rows = []
+
+    def _statement(change):
+        if change['op'] == 'D':
+            key = (change['tbl'], None)
+            if key not in statements:
+                _, pk = _table_columns(conn, change['tbl'])
+                statements[key] = (f"DELETE FROM {_quote(change['tbl'])} WHERE {_quote(pk)} = ?", pk)
+            return statements[key][0], (change['pk'],)
+
+        row = json.loads(change['data'])
+        columns = tuple(row)
+        key = (change['tbl'], columns)
+        if key not in statements:
+            _, pk = _table_columns(conn, change['tbl'])
+            updates = ", ".join(f"{_quote(c)} = excluded.{_quote(c)}" for c in columns if c != pk)
+            statements[key] = (
+                f"INSERT INTO {_quote(change['tbl'])} ({', '.join(_quote(c) for c in columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)}) "
+                f"ON CONFLICT ({_quote(pk)}) DO "
+                + (f"UPDATE SET {updates}" if updates else "NOTHING"),
+                pk
+            )
+        return statements[key][0], tuple(row.values())
+
+    def _flush():
+        nonlocal pending_sql, pending_params
+        if pending_sql is not None:
+            conn.executemany(pending_sql, pending_params)
+        pending_sql = None
+        pending_params = []
+
+    try:
+        conn.execute("PRAGMA foreign_keys = OFF")
+        conn.execute(_CHANGELOG_SCHEMA)
+        had_triggers = is_installed(conn)
+        drop_triggers(conn)
+
+        conn.execute("BEGIN")
+        in_batch = 0
+        for change in changes:
+            sql, params = _statement(change)
+            if sql != pending_sql:
+                _flush()
+                pending_sql = sql
+            pending_params.append(params)
+            if keep_after_seq is not None and change['seq'] > keep_after_seq:
+                journal_rows.append((change['seq'], change['ts'], change['tbl'],
+                                     change['op'], change['pk'], change['data']))
+
+            stats['changes'] += 1
+            stats['last_seq'] = change['seq']
+            stats['last_ts'] = change['ts']
+            in_batch += 1
+            if in_batch >= batch_size:
+                _flush()
+                conn.execute("COMMIT")
+                stats['batches'] += 1
+                in_batch = 0
+                conn.execute("BEGIN")
+        _flush()
+
+        # Journal de la base restaurée : seules les modifications non archivées
+        if keep_after_seq is not None:
+            conn.execute(f"DELETE FROM {CHANGELOG_TABLE} WHERE seq <= ?", (keep_after_seq,))
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {CHANGELOG_TABLE} (seq, ts, tbl, op, pk, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)", journal_rows
+            )
+        if stats['last_seq'] is not None:
+            # La séquence reprend après la dernière modification rejouée
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (CHANGELOG_TABLE,))
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)",
+                         (CHANGELOG_TABLE, stats['last_seq']))
+        conn.execute("COMMIT")
+        stats['batches'] += 1
+
+        if had_triggers:
+            install_triggers(conn)
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    stats['duration'] = time.perf_counter() - start
+    return stats
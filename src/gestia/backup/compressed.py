@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Sauvegardes compressées en flux
+===============================
+
+Compression gzip ou lzma (bibliothèque standard) à la volée depuis
+l'instantané de snapshot_stream : la mémoire utilisée est bornée par la
+taille des blocs lus et aucune copie non compressée n'est écrite sur
+disque. Si l'instantané ne peut pas être figé (écritures en continu, base
+hors WAL), la sauvegarde échoue, sauf si une copie intermédiaire à côté
+de la destination est explicitement autorisée (staging=True, champ
+'staged' des statistiques). La restauration décompresse de la même
+façon, bloc par bloc.
+"""
+
+import gzip
+import hashlib
+import lzma
+import os
+import time
+
+from .online import snapshot_stream
+
+# Méthodes de compression : extension, bornes et niveau par défaut
+COMPRESSION_METHODS = {
+    'gzip': {'extension': '.gz', 'levels': (1, 9), 'default_level': 6},
+    'lzma': {'extension': '.xz', 'levels': (0, 9), 'default_level': 6},
+}
+# Taille des blocs lus puis compressés
+DEFAULT_STREAM_CHUNK = 1024 * 1024
+
+_MAGIC = {
+    b'\x1f\x8b': 'gzip',
+    b'\xfd7zXZ\x00': 'lzma',
+}
+
+def _open_compressed(path, mode, method, level=None):
+    """Ouvre un fichier compressé en lecture ou en écriture"""
+    if method == 'gzip':
+        if 'w' in mode:
+            return gzip.open(path, mode, compresslevel=level)
+        return gzip.open(path, mode)
+    if method == 'lzma':
+        if 'w' in mode:
+            return lzma.open(path, mode, preset=level)
+        return lzma.open(path, mode)
+    raise ValueError(f"Méthode de compression inconnue: {method}")
+
+def detect_method(path):
+    """
+    Détermine la méthode de compression d'un fichier d'après sa signature.
+
+    Returns:
+        str: 'gzip', 'lzma' ou None si le fichier n'est pas compressé
+    """
+    with open(path, 'rb') as f:
+        header = f.read(6)
+    for magic, method in _MAGIC.items():
+        if header.startswith(magic):
+            return method
+    return None
+
+def compressed_backup(source_path, dest_path, method='gzip', level=None,
+                      chunk_size=DEFAULT_STREAM_CHUNK, progress=None, timeout=30.0, staging=False):
+    """
+    Sauvegarde une base SQLite dans un fichier compressé, en flux.
+
+    Args:
+        source_path (str): Base SQLite à sauvegarder
+        dest_path (str): Fichier compressé à créer
+        method (str): 'gzip' ou 'lzma'
+        level (int): Niveau de compression (défaut de la méthode si None)
+        chunk_size (int): Taille des blocs lus sur l'instantané
+        progress (callable): Appelé avec (octets_lus, octets_totaux)
+        timeout (float): Délai d'attente sur les verrous, en secondes
+        staging (bool): Autoriser une copie non compressée à côté de
+            dest_path si l'instantané ne peut pas être figé
+
+    Returns:
+        dict: Statistiques (tailles, ratio, durée, débit, empreinte SHA-256,
+            copie intermédiaire)
+    """
+    if method not in COMPRESSION_METHODS:
+        raise ValueError(f"Méthode de compression inconnue: {method}")
+    config = COMPRESSION_METHODS[method]
+    if level is None:
+        level = config['default_level']
+    low, high = config['levels']
+    if not low <= level <= high:
+        raise ValueError(f"Niveau {level} invalide pour {method} ({low}-{high})")
+
+    dest_dir = os.path.dirname(os.path.abspath(dest_path))
+    os.makedirs(dest_dir, exist_ok=True)
+    partial_path = f"{dest_path}.partial"
+    file_hash = hashlib.sha256()
+    size = 0
+
+    start = time.perf_counter()
+    try:
+        with snapshot_stream(source_path, timeout, dest_dir if staging else None) as (reader, info):
+            with _open_compressed(partial_path, 'wb', method, level) as out:
+                while True:
+                    data = reader.read(chunk_size)
+                    if not data:
+                        break
+                    file_hash.update(data)
+                    out.write(data)
+                    size += len(data)
+                    if progress is not None:
+                        progress(size, info['size'])
+        os.replace(partial_path, dest_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    duration = time.perf_counter() - start
+    compressed_size = os.path.getsize(dest_path)
+    return {
+        'method': method,
+        'level': level,
+        'size': size,
+        'compressed_size': compressed_size,
+        'ratio': round(compressed_size / size, 4) if size else 0,
+        'duration': duration,
+        'throughput_mb_s': round(size / (1024 * 1024) / duration, 2) if duration else 0,
+        'sha256': file_hash.hexdigest(),
+        'staged': info['staged'],
+    }
+
+def compressed_restore(backup_path, dest_path, method=None,
+                       chunk_size=DEFAULT_STREAM_CHUNK, expected_sha256=None):
+    """
+    Décompresse une sauvegarde vers dest_path, en flux.
+
+    Le fichier est écrit à côté de la destination puis renommé ; si une
+    empreinte est fournie, elle est vérifiée avant le renommage.
+
+    Args:
+        backup_path (str): Fichier compressé
+        dest_path (str): Base SQLite à reconstruire
+        method (str): 'gzip' ou 'lzma' (détectée d'après la signature si None)
+        chunk_size (int): Taille des blocs décompressés
+        expected_sha256 (str): Empreinte attendue de la base décompressée
+
+    Returns:
+        dict: Statistiques (taille, durée, débit, empreinte SHA-256)
+    """
+    if method is None:
+        method = detect_method(backup_path)
+        if method is None:
+            raise ValueError(f"Fichier non compressé: {backup_path}")
+
+    partial_path = f"{dest_path}.partial"
+    file_hash = hashlib.sha256()
+    size = 0
+
+    start = time.perf_counter()
+    try:
+        with _open_compressed(backup_path, 'rb', method) as src, open(partial_path, 'wb') as out:
+            while True:
+                data = src.read(chunk_size)
+                if not data:
+                    break
+                file_hash.update(data)
+                out.write(data)
+                size += len(data)
+        if expected_sha256 and file_hash.hexdigest() != expected_sha256:
+            raise ValueError(f"Empreinte invalide pour la sauvegarde {backup_path}")
+        os.replace(partial_path, dest_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    duration = time.perf_counter() - start
+    return {
+        'method': method,
+        'size': size,
+        'duration': duration,
+        'throughput_mb_s': round(size / (1024 * 1024) / duration, 2) if duration else 0,
+        'sha256': file_hash.hexdigest(),
+    }
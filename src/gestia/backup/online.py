@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Sauvegarde à chaud SQLite
+=========================
+
+Moteur de sauvegarde basé sur l'API de sauvegarde en ligne de sqlite3.
+
+La copie se fait par paquets de pages avec une pause entre chaque paquet.
+En mode WAL, une transaction de lecture est ouverte sur la source pendant
+toute la copie : la sauvegarde correspond à un instantané cohérent et les
+écritures des techniciens continuent dans le WAL sans être bloquées.
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+
+# Nombre de pages copiées par étape (4096 octets par page par défaut)
+DEFAULT_PAGES_PER_STEP = 256
+# Pause entre deux étapes, en secondes
+DEFAULT_STEP_SLEEP = 0.005
+# Pause maximale entre deux tentatives pour figer le fichier principal
+FREEZE_RETRY_MAX_SLEEP = 0.5
+
+def _journal_mode(conn):
+    """Retourne le mode de journalisation d'une connexion"""
+    return conn.execute("PRAGMA journal_mode").fetchone()[0].lower()
+
+@contextmanager
+def read_snapshot(source_path, timeout=30.0):
+    """
+    Ouvre une connexion sur la source avec un instantané de lecture figé.
+
+    En mode WAL, la transaction de lecture fixe l'instantané sans bloquer
+    les écrivains. Dans les autres modes, aucune transaction n'est ouverte
+    (elle bloquerait les écritures) : l'API de sauvegarde redémarre alors
+    d'elle-même si la source change pendant la copie.
+
+    Args:
+        source_path (str): Chemin de la base source
+        timeout (float): Délai d'attente sur les verrous, en secondes
+
+    Yields:
+        tuple: (connexion, True si l'instantané est figé)
+    """
+    conn = sqlite3.connect(source_path, timeout=timeout, isolation_level=None)
+    pinned = False
+    try:
+        if _journal_mode(conn) == 'wal':
+            conn.execute("BEGIN")
+            # La première lecture fixe l'instantané
+            conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+            pinned = True
+        yield conn, pinned
+    finally:
+        if pinned:
+            conn.execute("COMMIT")
+        conn.close()
+
+def online_backup(source_path, dest_path, pages=DEFAULT_PAGES_PER_STEP,
+                  sleep=DEFAULT_STEP_SLEEP, progress=None, timeout=30.0):
+    """
+    Sauvegarde une base SQLite à chaud vers dest_path.
+
+    La copie est écrite dans un fichier temporaire puis renommée : le fichier
+    de destination n'est jamais visible dans un état partiel.
+
+    Args:
+        source_path (str): Base SQLite à sauvegarder
+        dest_path (str): Fichier de sauvegarde à créer
+        pages (int): Nombre de pages copiées par étape
+        sleep (float): Pause entre deux étapes, en secondes
+        progress (callable): Appelé avec (pages_copiees, pages_totales)
+        timeout (float): Délai d'attente sur les verrous, en secondes
+
+    Returns:
+        dict: Statistiques (pages, étapes, durée, taille, instantané figé)
+    """
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(source_path)
+
+    dest_dir = os.path.dirname(os.path.abspath(dest_path))
+    os.makedirs(dest_dir, exist_ok=True)
+    partial_path = f"{dest_path}.partial"
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
+
+    stats = {'pages': 0, 'steps': 0}
+
+    def _on_step(status, remaining, total):
+        stats['steps'] += 1
+        stats['pages'] = total
+        if progress is not None:
+            progress(total - remaining, total)
+
+    start = time.perf_counter()
+    try:
+        with read_snapshot(source_path, timeout) as (source, pinned):
+            dest = sqlite3.connect(partial_path)
+            try:
+                source.backup(dest, pages=pages, progress=_on_step, sleep=sleep)
+            finally:
+                dest.close()
+        os.replace(partial_path, dest_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    stats['duration'] = time.perf_counter() - start
+    stats['size'] = os.path.getsize(dest_path)
+    stats['snapshot'] = pinned
+    return stats
+
+class _BoundedReader:
+    """Lecteur limité aux premiers `size` octets d'un fichier"""
+
+    def __init__(self, fileobj, size):
+        self._file = fileobj
+        self._remaining = size
+
+    def read(self, n=-1):
+        if self._remaining <= 0:
+            return b''
+        if n is None or n < 0 or n > self._remaining:
+            n = self._remaining
+        data = self._file.read(n)
+        self._remaining -= len(data)
+        return data
+
+def _freeze_main_file(conn, source_path):
+    """
+    Ouvre une transaction de lecture dont l'instantané est exactement le
+    fichier principal, si le WAL est déjà entièrement reporté.
+
+    Seuls des checkpoints PASSIVE sont utilisés : ils n'attendent pas les
+    lecteurs et ne bloquent aucun écrivain. Le premier reporte ce qui peut
+    l'être, puis l'instantané est fixé. Le second, sur une autre connexion,
+    vérifie que tout le WAL est reporté : aucun checkpoint ne pouvant aller
+    au-delà de l'instantané d'un lecteur, l'instantané est alors le fichier
+    principal, et il le reste tant que la transaction est ouverte (les
+    écritures suivantes s'accumulent dans le WAL). Sinon, la transaction
+    est refermée aussitôt, sans nouvelle tentative.
+
+    Returns:
+        bool: True si le fichier principal est figé
+    """
+    conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+    conn.execute("BEGIN")
+    conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+    check = sqlite3.connect(source_path, isolation_level=None)
+    try:
+        busy, log, checkpointed = check.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    finally:
+        check.close()
+    if busy == 0 and log == checkpointed:
+        return True
+    conn.execute("COMMIT")
+    return False
+
+@contextmanager
+def snapshot_stream(source_path, timeout=30.0, staging_dir=None):
+    """
+    Donne accès en flux à l'image page par page d'un instantané cohérent.
+
+    En mode WAL, le fichier principal est figé (voir _freeze_main_file) puis
+    lu directement : aucune copie non compressée n'est écrite et aucun
+    écrivain n'est bloqué. Si des lectures ou écritures en cours empêchent
+    de le figer, de nouvelles tentatives (checkpoints PASSIVE, sans
+    blocage) sont faites pendant timeout secondes.
+
+    Si l'instantané ne peut pas être figé (écritures en continu, base hors
+    WAL), une copie intermédiaire n'est faite que si staging_dir est donné
+    (à choisir à côté de la destination) : l'instantané y est copié avec
+    online_backup, puis la copie est supprimée à la sortie. Sinon,
+    RuntimeError est levée.
+
+    Args:
+        source_path (str): Base SQLite source
+        timeout (float): Délai d'attente sur les verrous et pour figer le
+            fichier principal, en secondes
+        staging_dir (str): Dossier autorisé pour une copie intermédiaire
+
+    Yields:
+        tuple: (lecteur binaire avec read(n), infos page_size/page_count/size/staged)
+    """
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(source_path)
+
+    conn = sqlite3.connect(source_path, timeout=timeout, isolation_level=None)
+    staged_path = None
+    try:
+        frozen = False
+        if _journal_mode(conn) == 'wal':
+            deadline = time.monotonic() + timeout
+            delay = 0.01
+            frozen = _freeze_main_file(conn, source_path)
+            while not frozen and time.monotonic() < deadline:
+                time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+                delay = min(delay * 2, FREEZE_RETRY_MAX_SLEEP)
+                frozen = _freeze_main_file(conn, source_path)
+
+        if frozen:
+            read_path = source_path
+        elif staging_dir is not None:
+            os.makedirs(staging_dir, exist_ok=True)
+            fd, staged_path = tempfile.mkstemp(prefix='.gestia_snapshot_', suffix='.db', dir=staging_dir)
+            os.close(fd)
+            online_backup(source_path, staged_path, timeout=timeout)
+            read_path = staged_path
+        else:
+            raise RuntimeError(
+                f"Instantané de {source_path} impossible à figer (écritures en continu ou base hors WAL) : "
+                "réessayer, ou autoriser une copie intermédiaire"
+            )
+
+        # Taille de l'instantané : lue dans la transaction figée ou sur la copie
+        info_conn = conn if frozen else sqlite3.connect(read_path)
+        page_size = info_conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = info_conn.execute("PRAGMA page_count").fetchone()[0]
+        if info_conn is not conn:
+            info_conn.close()
+        info = {
+            'page_size': page_size,
+            'page_count': page_count,
+            'size': page_size * page_count,
+            'staged': not frozen,
+        }
+
+        with open(read_path, 'rb') as f:
+            yield _BoundedReader(f, info['size']), info
+
+        if frozen:
+            conn.execute("COMMIT")
+    finally:
+        conn.close()
+        if staged_path and os.path.exists(staged_path):
+            os.remove(staged_path)
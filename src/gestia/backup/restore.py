@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Restauration des sauvegardes
+============================
+
+Reconstruit le fichier de base d'une sauvegarde du catalogue, quel que
+soit son type (complète, compressée ou incrémentale), et restaure une
+base à un instant donné à partir du journal des modifications.
+
+La base active n'est jamais écrasée par une copie en cours : la
+restauration est matérialisée dans un fichier temporaire à côté de la
+cible, vérifiée, synchronisée sur disque puis substituée par os.replace.
+L'interruption de service se limite au renommage.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from . import changelog
+from .catalog import KIND_COMPRESSED, KIND_INCREMENTAL, STORE_DIRNAME
+from .compressed import compressed_restore
+from .store import ChunkStore
+from .verify import check_database
+
+def restore_to_file(catalog, entry, dest_path):
+    """
+    Reconstruit la base d'une sauvegarde dans dest_path.
+
+    Args:
+        catalog (BackupCatalog): Catalogue contenant l'entrée
+        entry: Entrée du catalogue
+        dest_path (str): Fichier de base à créer
+
+    Returns:
+        int: Taille du fichier reconstruit
+    """
+    backup_path = catalog.resolve_path(entry)
+    if entry['kind'] == KIND_INCREMENTAL:
+        ChunkStore(os.path.join(catalog.backup_dir, STORE_DIRNAME)).restore(entry['name'], dest_path)
+    elif entry['kind'] == KIND_COMPRESSED:
+        compressed_restore(backup_path, dest_path, expected_sha256=entry['sha256'])
+    else:
+        partial_path = f"{dest_path}.partial"
+        try:
+            shutil.copyfile(backup_path, partial_path)
+            os.replace(partial_path, dest_path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+    return os.path.getsize(dest_path)
+
+def _fsync_path(path):
+    """Force l'écriture sur disque d'un fichier ou d'un dossier"""
+    flags = os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0) if os.path.isdir(path) else os.O_RDONLY
+    try:
+        fd = os.open(path, flags)
+    except OSError:
+        # Certains systèmes (Windows) n'ouvrent pas les dossiers
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def install_database(work_path, target_path, quick=True, timeout=5.0):
+    """
+    Substitue atomiquement une base préparée à la base active.
+
+    La base préparée est vérifiée (quick_check), son WAL éventuel est
+    intégré, puis elle est synchronisée sur disque. Les pools et les
+    sessions ouverts sur la cible sont fermés, puis une connexion prend le
+    verrou exclusif de la cible (locking_mode=EXCLUSIVE) et le garde
+    jusqu'au renommage : le WAL de l'ancienne base y est reporté
+    (checkpoint TRUNCATE) et la base repasse en journal classique, ce qui
+    supprime ses fichiers -wal/-shm. Aucune écriture ne peut être validée
+    entre le checkpoint et le renommage, et aucun fichier -wal de
+    l'ancienne base ne reste à côté de la nouvelle. Si une autre connexion
+    (autre processus) garde la cible ouverte, le verrou n'est pas obtenu
+    et la base active n'est pas touchée. Si os.replace échoue (fichier
+    encore ouvert sous Windows), la base active reste intacte, de nouveau
+    dans son mode de journal, avec toutes ses transactions validées.
+
+    Args:
+        work_path (str): Base préparée, sur le même système de fichiers
+        target_path (str): Base active à remplacer
+        quick (bool): quick_check (True) ou integrity_check (False)
+        timeout (float): Attente maximale du verrou de la cible (secondes)
+
+    Returns:
+        dict: Durée de l'interruption (fermeture des pools + renommage)
+    """
+    conn = sqlite3.connect(work_path)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    check = check_database(work_path, quick)
+    if check != 'ok':
+        raise ValueError(f"Base restaurée invalide: {check}")
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(work_path + suffix):
+            os.remove(work_path + suffix)
+    _fsync_path(work_path)
+
+    from ..core.database import engine_registry
+
+    start = time.perf_counter()
+    engine_registry.dispose_path(target_path)
+    lock, journal_mode = _lock_database(target_path, timeout) if os.path.exists(target_path) else (None, None)
+    try:
+        # Fichiers laissés par une connexion interrompue : sous le verrou, plus personne ne les utilise
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(target_path + suffix):
+                os.remove(target_path + suffix)
+        try:
+            os.replace(work_path, target_path)
+        except BaseException:
+            if lock is not None:
+                lock.execute(f"PRAGMA journal_mode={journal_mode}")
+            raise
+    finally:
+        if lock is not None:
+            lock.close()
+    swap_seconds = time.perf_counter() - start
+    _fsync_path(os.path.dirname(os.path.abspath(target_path)))
+    return {'swap_seconds': swap_seconds}
+
+def _lock_database(db_path, timeout):
+    """
+    Prend et garde le verrou exclusif d'une base, son WAL intégré et supprimé.
+
+    Returns:
+        tuple: Connexion qui détient le verrou (la fermer le libère) et mode
+            de journal initial de la base
+    """
+    conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None)
+    try:
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        # En mode exclusif, le verrou pris par la transaction est gardé après elle
+        conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+        conn.execute("BEGIN EXCLUSIVE")
+        conn.execute("COMMIT")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("PRAGMA journal_mode=DELETE")
+    except BaseException:
+        conn.close()
+        raise
+    return conn, journal_mode
+
+def work_path_for(target_path):
+    """Crée un fichier temporaire à côté de la cible (même système de fichiers)"""
+    target_dir = os.path.dirname(os.path.abspath(target_path))
+    os.makedirs(target_dir, exist_ok=True)
+    fd, work_path = tempfile.mkstemp(prefix='.gestia_restore_', suffix='.db', dir=target_dir)
+    os.close(fd)
+    return work_path
+
+def swap_restore(catalog, entry, target_path):
+    """
+    Restaure une sauvegarde du catalogue par substitution atomique.
+
+    Returns:
+        dict: Taille restaurée, durée de préparation et d'interruption,
+            séquence du journal de la sauvegarde (None sans journal)
+    """
+    work_path = work_path_for(target_path)
+    start = time.perf_counter()
+    try:
+        size = restore_to_file(catalog, entry, work_path)
+        conn = sqlite3.connect(work_path)
+        try:
+            base_seq = changelog.last_sequence(conn)
+        finally:
+            conn.close()
+        prepare_seconds = time.perf_counter() - start
+        stats = install_database(work_path, target_path)
+    finally:
+        for path in (work_path, work_path + '-wal', work_path + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+    stats['size'] = size
+    stats['prepare_seconds'] = prepare_seconds
+    stats['base_seq'] = base_seq
+    return stats
+
+def restore_environment(catalog, environment, entry, target_path):
+    """
+    Restaure une sauvegarde d'un environnement et écarte l'historique abandonné.
+
+    La base restaurée reprend la séquence du journal là où en était la
+    sauvegarde : les segments archivés après elle appartiennent à un autre
+    historique et ne doivent plus être rejoués. Comme pour restore_at, le
+    journal de la base active est archivé avant la substitution, puis les
+    segments postérieurs à la séquence de la sauvegarde sont écartés (tous
+    si la sauvegarde est antérieure au journal).
+
+    Returns:
+        dict: Statistiques de swap_restore et nombre de segments écartés
+    """
+    if os.path.exists(target_path):
+        archive_changelog(catalog, environment, target_path)
+    stats = swap_restore(catalog, entry, target_path)
+    stats['abandoned'] = _abandon_segments(catalog, environment, stats['base_seq'] or 0)
+    return stats
+
+def normalize_timestamp(value):
+    """Convertit une date saisie (ISO, avec ou sans 'T') en horodatage ISO"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return datetime.fromisoformat(value.strip().replace(' ', 'T')).isoformat()
+
+def archive_changelog(catalog, environment, db_path):
+    """
+    Archive le journal des modifications d'une base et l'indexe.
+
+    Returns:
+        dict: Segment créé ou None si le journal était vide
+    """
+    segment = changelog.archive_changes(db_path, catalog.changelog_dir(environment))
+    if segment:
+        catalog.add_segment(environment, segment)
+    return segment
+
+def _abandon_segments(catalog, environment, last_seq):
+    """
+    Écarte les segments postérieurs au point de restauration.
+
+    Ils appartiennent à un historique abandonné : ils sont déplacés dans un
+    sous-dossier daté et ne seront plus jamais rejoués. Un segment à cheval
+    sur le point de restauration est réécrit sans sa fin.
+
+    Returns:
+        int: Nombre de segments écartés
+    """
+    abandoned_dir = os.path.join(catalog.changelog_dir(environment),
+                                 f"abandoned_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    count = 0
+    for segment in catalog.segments(environment, after_seq=last_seq):
+        path = catalog.resolve_path(segment)
+        catalog.remove_segment(segment['path'])
+        os.makedirs(abandoned_dir, exist_ok=True)
+        if segment['first_seq'] <= last_seq:
+            shutil.copy2(path, abandoned_dir)
+            trimmed = changelog.trim_segment(path, last_seq)
+            if trimmed:
+                catalog.add_segment(environment, trimmed)
+        else:
+            shutil.move(path, abandoned_dir)
+        count += 1
+    return count
+
+def point_in_time_restore(catalog, environment, target, dest_path, live_db_path=None,
+                          batch_size=changelog.DEFAULT_REPLAY_BATCH):
+    """
+    Construit l'état d'un environnement à l'instant `target`.
+
+    La sauvegarde la plus récente antérieure à target est reconstruite,
+    puis les modifications archivées et celles de la base active sont
+    rejouées jusqu'à target. Le résultat est écrit dans dest_path (la
+    base active n'est pas modifiée ; le remplacement est à la charge de
+    l'appelant).
+
+    Args:
+        catalog (BackupCatalog): Catalogue des sauvegardes
+        environment (str): Environnement à restaurer
+        target (str|datetime): Instant visé
+        dest_path (str): Fichier de base à produire
+        live_db_path (str): Base active (modifications non archivées)
+        batch_size (int): Modifications rejouées par transaction
+
+    Returns:
+        dict: Sauvegarde de départ et statistiques du rejeu
+    """
+    target = normalize_timestamp(target)
+    candidates = catalog.older_than(target, environment)
+    if not candidates:
+        raise ValueError(f"Aucune sauvegarde de {environment} antérieure au {target}")
+    base = candidates[0]
+
+    restore_to_file(catalog, base, dest_path)
+    conn = sqlite3.connect(dest_path)
+    try:
+        base_seq = changelog.last_sequence(conn)
+    finally:
+        conn.close()
+    if base_seq is None:
+        raise ValueError(f"La sauvegarde {base['name']} est antérieure au journal des modifications")
+
+    segments = [catalog.resolve_path(segment) for segment in catalog.segments(environment, base_seq)]
+    changes = changelog.iter_changes(segments, live_db_path, base_seq, target)
+    stats = changelog.replay_changes(dest_path, changes, batch_size,
+                                     keep_after_seq=catalog.last_archived_seq(environment))
+    stats['base'] = base['name']
+    stats['base_seq'] = base_seq
+    stats['target'] = target
+    return stats
+
+def abandon_history_after(catalog, environment, stats):
+    """
+    Écarte l'historique postérieur à une restauration à un instant donné.
+
+    À appeler une fois la base restaurée mise en place : les segments
+    postérieurs ne doivent plus être rejoués lors d'une restauration future.
+
+    Returns:
+        int: Nombre de segments écartés
+    """
+    last_seq = stats['last_seq'] if stats['last_seq'] is not None else stats['base_seq']
+    return _abandon_segments(catalog, environment, last_seq)
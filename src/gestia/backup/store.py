@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Stockage incrémental des sauvegardes
+====================================
+
+Magasin adressé par contenu : la base est découpée en blocs de taille fixe
+(multiple de la taille de page SQLite), chaque bloc unique est stocké une
+seule fois sous son empreinte SHA-256, et chaque sauvegarde n'est qu'un
+petit manifeste listant ses blocs.
+
+Organisation sur disque :
+    <racine>/chunks/ab/abcdef...   Blocs bruts
+    <racine>/manifests/<nom>.json  Manifestes des sauvegardes
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+from .online import snapshot_stream
+
+# Taille des blocs par défaut (4 pages de 4096 octets)
+DEFAULT_CHUNK_SIZE = 16 * 1024
+# Les blocs plus récents que ce délai ne sont jamais supprimés par le GC
+DEFAULT_GC_GRACE_SECONDS = 3600
+
+class ChunkStore:
+    """Magasin de sauvegardes incrémentales avec déduplication par bloc"""
+
+    def __init__(self, root):
+        self.root = root
+        self.chunks_dir = os.path.join(root, 'chunks')
+        self.manifests_dir = os.path.join(root, 'manifests')
+        os.makedirs(self.chunks_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+
+    def _chunk_path(self, digest):
+        """Chemin d'un bloc à partir de son empreinte"""
+        return os.path.join(self.chunks_dir, digest[:2], digest)
+
+    def manifest_path(self, name):
+        """Chemin du manifeste d'une sauvegarde"""
+        return os.path.join(self.manifests_dir, f"{name}.json")
+
+    def _write_chunk(self, digest, data):
+        """
+        Écrit un bloc s'il n'existe pas encore.
+
+        Returns:
+            int: Nombre d'octets écrits (0 si le bloc était déjà présent)
+        """
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            # Rafraîchir la date pour le délai de grâce du GC
+            os.utime(path, None)
+            return 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data)
+
+    def create_backup(self, source_path, name, environment='development',
+                      description="", chunk_size=DEFAULT_CHUNK_SIZE, parent=None, staging=False):
+        """
+        Crée une sauvegarde incrémentale d'une base SQLite.
+
+        Args:
+            source_path (str): Base SQLite à sauvegarder
+            name (str): Nom de la sauvegarde (nom du manifeste)
+            environment (str): Environnement source
+            description (str): Description libre
+            chunk_size (int): Taille des blocs, multiple de la taille de page
+            parent (str): Sauvegarde précédente de la chaîne (informatif)
+            staging (bool): Autoriser une copie non compressée dans le
+                magasin si l'instantané ne peut pas être figé
+
+        Returns:
+            dict: Manifeste de la sauvegarde
+        """
+        start = time.perf_counter()
+        digests = []
+        new_chunks = 0
+        bytes_written = 0
+        file_hash = hashlib.sha256()
+
+        with snapshot_stream(source_path, staging_dir=self.root if staging else None) as (reader, info):
+            if chunk_size % info['page_size']:
+                chunk_size = max(1, chunk_size // info['page_size']) * info['page_size']
+            while True:
+                data = reader.read(chunk_size)
+                if not data:
+                    break
+                file_hash.update(data)
+                digest = hashlib.sha256(data).hexdigest()
+                written = self._write_chunk(digest, data)
+                if written:
+                    new_chunks += 1
+                    bytes_written += written
+                digests.append(digest)
+
+        manifest = {
+            'name': name,
+            'environment': environment,
+            'description': description,
+            'parent': parent,
+            'created_at': datetime.now().isoformat(),
+            'page_size': info['page_size'],
+            'chunk_size': chunk_size,
+            'size': info['size'],
+            'sha256': file_hash.hexdigest(),
+            'chunks': digests,
+            'new_chunks': new_chunks,
+            'bytes_written': bytes_written,
+            'duration_seconds': round(time.perf_counter() - start, 3),
+        }
+
+        manifest_path = self.manifest_path(name)
+        tmp_path = f"{manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+        manifest['bytes_written'] += os.path.getsize(manifest_path)
+        return manifest
+
+    def load_manifest(self, name):
+        """Charge le manifeste d'une sauvegarde"""
+        with open(self.manifest_path(name), 'r') as f:
+            return json.load(f)
+
+    def list_manifests(self):
+        """Liste les noms des sauvegardes incrémentales"""
+        return sorted(
+            file[:-len('.json')] for file in os.listdir(self.manifests_dir)
+            if file.endswith('.json')
+        )
+
+    def iter_chunks(self, name):
+        """Itère sur le contenu des blocs d'une sauvegarde, dans l'ordre"""
+        for digest in self.load_manifest(name)['chunks']:
+            with open(self._chunk_path(digest), 'rb') as f:
+                yield f.read()
+
+    def restore(self, name, dest_path):
+        """
+        Reconstruit le fichier de base d'une sauvegarde.
+
+        Le fichier est écrit à côté de la destination puis renommé, après
+        vérification de l'empreinte globale.
+
+        Returns:
+            int: Taille du fichier restauré
+        """
+        manifest = self.load_manifest(name)
+        partial_path = f"{dest_path}.partial"
+        file_hash = hashlib.sha256()
+        try:
+            with open(partial_path, 'wb') as out:
+                for data in self.iter_chunks(name):
+                    file_hash.update(data)
+                    out.write(data)
+            if file_hash.hexdigest() != manifest['sha256']:
+                raise ValueError(f"Empreinte invalide pour la sauvegarde {name}")
+            os.replace(partial_path, dest_path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        return manifest['size']
+
+    def delete_backup(self, name):
+        """Supprime le manifeste d'une sauvegarde (les blocs restent jusqu'au GC)"""
+        os.remove(self.manifest_path(name))
+
+    def prune(self, catalog, keep_count=5, environment=None):
+        """
+        Supprime les sauvegardes au-delà de la rétention puis lance le GC.
+
+        Les sauvegardes expirées sont trouvées par une requête du catalogue
+        (les plus récentes de chaque environnement sont conservées) : seuls
+        leurs manifestes sont relus, pour décompter leurs blocs.
+
+        Args:
+            catalog (BackupCatalog): Catalogue des sauvegardes du magasin
+            keep_count (int): Nombre de sauvegardes à conserver par environnement
+            environment (str): Limiter la rétention à un environnement
+
+        Returns:
+            dict: Manifestes supprimés et résultat du GC
+        """
+        from .catalog import KIND_INCREMENTAL
+
+        removed = []
+        for entry in catalog.expired(keep_count, environment, kinds=(KIND_INCREMENTAL,)):
+            name = entry['name']
+            path = self.manifest_path(name)
+            chunks = self.load_manifest(name)['chunks'] if os.path.exists(path) else None
+            catalog.remove(name, chunks)
+            if chunks is not None:
+                self.delete_backup(name)
+            removed.append(name)
+
+        result = self.collect_garbage(catalog)
+        result['removed_manifests'] = removed
+        return result
+
+    def collect_garbage(self, catalog, grace_seconds=DEFAULT_GC_GRACE_SECONDS):
+        """
+        Supprime les blocs qui ne sont référencés par aucune sauvegarde.
+
+        Les blocs à supprimer sont ceux que le catalogue ne compte plus dans
+        aucune sauvegarde : ni manifeste ni dossier de blocs ne sont
+        parcourus. Les blocs écrits ou réutilisés pendant le délai de grâce
+        sont conservés pour ne pas supprimer ceux d'une sauvegarde en cours
+        d'écriture ; ils restent candidats pour le GC suivant.
+
+        Args:
+            catalog (BackupCatalog): Catalogue des sauvegardes du magasin
+            grace_seconds (float): Délai de grâce
+
+        Returns:
+            dict: Nombre de blocs et d'octets libérés
+        """
+        limit = time.time() - grace_seconds
+        deleted_chunks = 0
+        freed_bytes = 0
+        forgotten = []
+        for digest in catalog.orphan_chunks():
+            path = self._chunk_path(digest)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                forgotten.append(digest)
+                continue
+            if stat.st_mtime > limit:
+                continue
+            os.remove(path)
+            forgotten.append(digest)
+            deleted_chunks += 1
+            freed_bytes += stat.st_size
+        catalog.forget_chunks(forgotten)
+
+        return {'deleted_chunks': deleted_chunks, 'freed_bytes': freed_bytes}
+
+    def list_chunks(self):
+        """Liste les empreintes des blocs présents sur disque"""
+        return [digest for prefix in os.listdir(self.chunks_dir)
+                for digest in os.listdir(os.path.join(self.chunks_dir, prefix))
+                if '.tmp' not in digest]
+
+    def disk_usage(self):
+        """Retourne le nombre de blocs et l'espace disque occupé"""
+        chunks = 0
+        size = 0
+        for prefix in os.listdir(self.chunks_dir):
+            prefix_dir = os.path.join(self.chunks_dir, prefix)
+            for digest in os.listdir(prefix_dir):
+                chunks += 1
+                size += os.path.getsize(os.path.join(prefix_dir, digest))
+        return {'chunks': chunks, 'bytes': size}
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Vérification des sauvegardes
+============================
+
+Contrôle qu'une sauvegarde est restaurable : empreinte SHA-256 calculée en
+flux et comparée à celle du catalogue, puis PRAGMA quick_check (ou
+integrity_check) sur la base. Les sauvegardes compressées et
+incrémentales sont reconstruites dans un fichier temporaire, supprimé
+après le contrôle.
+
+Les vérifications sont indépendantes : verify_backups les répartit sur un
+pool de processus pour vérifier toute l'archive en parallèle.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from .catalog import KIND_COMPRESSED, KIND_INCREMENTAL
+from .compressed import compressed_restore
+from .store import ChunkStore
+
+# Taille des blocs lus pour le calcul d'empreinte
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Résultats possibles d'une vérification
+STATUS_OK = 'ok'
+STATUS_CORRUPT = 'corrupt'
+STATUS_ERROR = 'error'
+
+def file_sha256(path, chunk_size=HASH_CHUNK_SIZE):
+    """Calcule l'empreinte SHA-256 d'un fichier en flux"""
+    file_hash = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            file_hash.update(data)
+    return file_hash.hexdigest()
+
+def check_database(path, quick=True):
+    """
+    Lance quick_check ou integrity_check sur une base en lecture seule.
+
+    Returns:
+        str: 'ok' ou le premier message d'erreur de SQLite
+    """
+    pragma = 'quick_check' if quick else 'integrity_check'
+    conn = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True)
+    try:
+        return conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+    finally:
+        conn.close()
+
+def verify_backup(name, kind, path, expected_sha256=None, store_root=None, quick=True):
+    """
+    Vérifie une sauvegarde (fonction exécutée dans les processus du pool).
+
+    Args:
+        name (str): Nom de la sauvegarde dans le catalogue
+        kind (str): Type de sauvegarde (full, compressed, incremental)
+        path (str): Fichier de la sauvegarde (ou manifeste)
+        expected_sha256 (str): Empreinte attendue de la base, si connue
+        store_root (str): Racine du magasin incrémental
+        quick (bool): quick_check (True) ou integrity_check (False)
+
+    Returns:
+        dict: Résultat (statut, détail, empreinte, durées)
+    """
+    start = time.perf_counter()
+    result = {'name': name, 'kind': kind, 'sha256': None, 'detail': ''}
+    staged_path = None
+    try:
+        if kind == KIND_COMPRESSED or kind == KIND_INCREMENTAL:
+            fd, staged_path = tempfile.mkstemp(prefix='gestia_verify_', suffix='.db')
+            os.close(fd)
+            if kind == KIND_COMPRESSED:
+                # Décompression en flux avec calcul d'empreinte au passage
+                result['sha256'] = compressed_restore(path, staged_path)['sha256']
+            else:
+                # La restauration vérifie déjà l'empreinte du manifeste
+                ChunkStore(store_root).restore(name, staged_path)
+                result['sha256'] = file_sha256(staged_path)
+            db_path = staged_path
+        else:
+            result['sha256'] = file_sha256(path)
+            db_path = path
+        hash_done = time.perf_counter()
+
+        if expected_sha256 and result['sha256'] != expected_sha256:
+            result['status'] = STATUS_CORRUPT
+            result['detail'] = "Empreinte SHA-256 différente du catalogue"
+        else:
+            check = check_database(db_path, quick)
+            result['status'] = STATUS_OK if check == 'ok' else STATUS_CORRUPT
+            result['detail'] = '' if check == 'ok' else check
+        result['hash_seconds'] = round(hash_done - start, 3)
+    except Exception as e:
+        result['status'] = STATUS_ERROR
+        result['detail'] = str(e)
+    finally:
+        if staged_path and os.path.exists(staged_path):
+            os.remove(staged_path)
+
+    result['duration_seconds'] = round(time.perf_counter() - start, 3)
+    result['verified_at'] = datetime.now().isoformat()
+    result['check'] = 'quick_check' if quick else 'integrity_check'
+    return result
+
+def verify_backups(tasks, workers=None, quick=True):
+    """
+    Vérifie plusieurs sauvegardes en parallèle dans un pool de processus.
+
+    Args:
+        tasks (list): Dictionnaires d'arguments de verify_backup (name, kind,
+            path, expected_sha256, store_root)
+        workers (int): Nombre de processus (nombre de CPU par défaut)
+        quick (bool): quick_check (True) ou integrity_check (False)
+
+    Yields:
+        dict: Résultats, dans l'ordre de fin des vérifications
+    """
+    if not tasks:
+        return
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers == 1:
+        for task in tasks:
+            yield verify_backup(quick=quick, **task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(verify_backup, quick=quick, **task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+def record_result(catalog, result, metadata_path=None):
+    """
+    Enregistre un résultat de vérification dans le catalogue et dans les
+    métadonnées de la sauvegarde (fichier JSON ou manifeste).
+
+    Args:
+        catalog (BackupCatalog): Catalogue des sauvegardes
+        result (dict): Résultat de verify_backup
+        metadata_path (str): Fichier JSON de métadonnées à compléter
+    """
+    # Une empreinte n'est retenue comme référence que si la sauvegarde est valide
+    sha256 = result['sha256'] if result['status'] == STATUS_OK else None
+    catalog.set_verification(result['name'], result['status'], result['verified_at'],
+                             result['duration_seconds'], result['detail'] or None, sha256)
+
+    if metadata_path and os.path.exists(metadata_path):
+        with open(metadata_path, 'r') as f:
+            metadata = json.load(f)
+        if sha256:
+            metadata.setdefault('sha256', sha256)
+        metadata['verification'] = {
+            'status': result['status'],
+            'verified_at': result['verified_at'],
+            'check': result['check'],
+            'duration_seconds': result['duration_seconds'],
+            'hash_seconds': result.get('hash_seconds'),
+            'detail': result['detail'],
+        }
+        tmp_path = f"{metadata_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            # Les manifestes incrémentaux restent compacts (liste des blocs)
+            json.dump(metadata, f, indent=None if 'chunks' in metadata else 2)
+        os.replace(tmp_path, metadata_path)
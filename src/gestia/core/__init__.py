@@ -17,5 +17,6 @@ __all__ = [
     'SessionDeTestService',
     'ProgrammeDeTestService',
     'CritereDeTestService',
-    'DiagnosticReparationService'
+    'DiagnosticReparationService',
+    'StatistiquesService'
 ] 
\ No newline at end of file
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Cache - Lectures fréquentes GESTIA
+==================================
+
+Cache LRU borné avec durée de vie, pour les lectures répétées de données
+qui changent rarement (techniciens, marques). Les services vident le cache
+concerné à chaque écriture ; la durée de vie couvre les écritures faites
+par un autre processus (import CSV, autre poste).
+
+Chaque cache compte ses succès et ses échecs : cache_stats() les expose
+pour le suivi.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Taille et durée de vie par défaut
+DEFAULT_MAXSIZE = 256
+DEFAULT_TTL = 300.0  # secondes
+
+# Caches créés par le processus, pour cache_stats() et invalidate_all()
+_caches = []
+
+class LookupCache:
+    """
+    Cache LRU à durée de vie, partagé entre threads.
+
+    Les valeurs doivent être indépendantes de toute session SQLAlchemy
+    (tuples, dictionnaires de colonnes...) : elles sont servies telles
+    quelles à tous les appelants.
+    """
+
+    def __init__(self, name, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, clock=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock or time.monotonic
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Incrémentée à chaque invalidation : un chargement commencé avant
+        # n'est pas conservé
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        _caches.append(self)
+
+    def get_or_load(self, key, loader):
+        """
+        Retourne la valeur en cache pour key, ou la charge avec loader().
+
+        Le chargement se fait hors du verrou : deux threads peuvent charger
+        la même clé en même temps, le dernier résultat est conservé. Si le
+        cache est invalidé pendant le chargement, la valeur (peut-être lue
+        avant l'écriture) est retournée sans être conservée.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+        with self._lock:
+            if generation != self._generation:
+                return value
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self, key=None):
+        """Retire une clé du cache, ou toutes les clés si key est None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        """
+        Retourne les compteurs du cache.
+
+        Returns:
+            dict: name, size, maxsize, ttl, hits, misses, hit_rate,
+                evictions, invalidations
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+def cache_stats():
+    """Retourne les compteurs de tous les caches du processus"""
+    return [cache.stats() for cache in _caches]
+
+def invalidate_all():
+    """Vide tous les caches (après une restauration de base par exemple)"""
+    for cache in _caches:
+        cache.invalidate()
@@ -1,53 +1,227 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from .models import Base
+from .cache import invalidate_all
+from contextlib import contextmanager
+import atexit
+import logging
 import os
+import threading
+import weakref
+
+# Profils de moteur par environnement.
+# Les pragmas sont appliqués à chaque nouvelle connexion SQLite.
+# 'changelog' active le journal des modifications (restauration à un instant donné).
+ENGINE_PROFILES = {
+    'development': {
+        'echo': False,
+        'log_level': 'WARNING',
+        'changelog': True,
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -16000,           # ~16 Mo
+            'mmap_size': 64 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+            'busy_timeout': 5000,
+            'foreign_keys': 'ON',
+        },
+    },
+    'test': {
+        'echo': False,
+        'log_level': 'WARNING',
+        'changelog': False,             # Pas de restauration à un instant donné
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'OFF',           # Données jetables : pas de fsync
+            'cache_size': -16000,
+            'mmap_size': 64 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+            'busy_timeout': 5000,
+            'foreign_keys': 'ON',
+        },
+    },
+    'production': {
+        'echo': False,
+        'log_level': 'WARNING',
+        'changelog': True,
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',        # Sûr en mode WAL
+            'cache_size': -64000,           # ~64 Mo
+            'mmap_size': 256 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+            'busy_timeout': 10000,
+            'foreign_keys': 'ON',
+        },
+    },
+}
+
+def get_engine_profile(profile=None):
+    """
+    Retourne le profil de moteur à utiliser.
+    
+    Args:
+        profile (str|dict): Nom du profil, profil explicite ou None pour
+            utiliser l'environnement courant
+    
+    Returns:
+        dict: Profil avec les clés 'echo', 'log_level', 'changelog' et 'pragmas'
+    """
+    if isinstance(profile, dict):
+        resolved = dict(profile)
+    else:
+        name = profile or os.getenv('GESTIA_ENV', 'development')
+        resolved = dict(ENGINE_PROFILES.get(name, ENGINE_PROFILES['development']))
+    
+    # Surcharges par variables d'environnement
+    echo = os.getenv('GESTIA_SQL_ECHO')
+    if echo is not None:
+        echo = echo.strip().lower()
+        resolved['echo'] = 'debug' if echo == 'debug' else echo in ('1', 'true', 'yes', 'on')
+    log_level = os.getenv('GESTIA_SQL_LOG_LEVEL')
+    if log_level:
+        resolved['log_level'] = log_level.strip().upper()
+    
+    resolved.setdefault('echo', False)
+    resolved.setdefault('changelog', False)
+    resolved.setdefault('pragmas', {})
+    return resolved
+
+def _apply_sqlite_pragmas(dbapi_connection, pragmas):
+    """Applique les pragmas du profil sur une connexion SQLite brute"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+# Instructions qui n'ouvrent pas de transaction d'écriture (voir DatabaseManager)
+_LECTURES = ('SELECT', 'PRAGMA', 'EXPLAIN', 'BEGIN', 'COMMIT', 'ROLLBACK', 'END')
+
+def resolve_database_url(env=None):
+    """Retourne l'URL de la base SQLite d'un environnement"""
+    env = env or os.getenv('GESTIA_ENV', 'development')
+    
+    # CORRECTION : Utiliser la même structure de chemins que les migrations
+    if env == 'production':
+        return "sqlite:///data/production/gestia.db"
+    elif env == 'test':
+        return "sqlite:///data/test/gestia.db"
+    return "sqlite:///data/development/gestia.db"
 
 class DatabaseManager:
-    def __init__(self, db_url=None):
+    def __init__(self, db_url=None, profile=None):
         if db_url is None:
-            # Détecter l'environnement
-            env = os.getenv('GESTIA_ENV', 'development')
+            db_url = resolve_database_url()
+        
+        self.db_url = db_url
+        self.profile = get_engine_profile(profile)
+        
+        # Créer le dossier de la base s'il n'existe pas
+        db_path = self.get_database_path()
+        if db_path and db_path != ':memory:' and os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        
+        self.engine = create_engine(db_url, echo=self.profile['echo'])
+        if self.profile.get('log_level'):
+            logging.getLogger('sqlalchemy.engine').setLevel(self.profile['log_level'])
+        
+        if self.engine.dialect.name == 'sqlite':
+            pragmas = self.profile['pragmas']
             
-            # Créer le dossier data s'il n'existe pas
-            os.makedirs('data', exist_ok=True)
+            @event.listens_for(self.engine, 'connect')
+            def _on_connect(dbapi_connection, connection_record):
+                _apply_sqlite_pragmas(dbapi_connection, pragmas)
+                # Le module sqlite3 ouvre et ferme lui-même les transactions, ce
+                # qui casse les SAVEPOINT : les transactions sont ouvertes ici
+                dbapi_connection.isolation_level = None
             
-            # CORRECTION : Utiliser la même structure de chemins que les migrations
-            if env == 'development':
-                db_url = "sqlite:///data/development/gestia.db"
-            elif env == 'production':
-                db_url = "sqlite:///data/production/gestia.db"
-            elif env == 'test':
-                db_url = "sqlite:///data/test/gestia.db"
-            else:
-                db_url = "sqlite:///data/development/gestia.db"
+            @event.listens_for(self.engine, 'before_cursor_execute')
+            def _on_execute(connection, cursor, statement, parameters, context, executemany):
+                # Les lectures restent en autocommit : une session qui ne fait
+                # que lire ne garde pas d'instantané WAL ouvert (qui masquerait
+                # les écritures des autres connexions et bloquerait les
+                # checkpoints). La première écriture ouvre la transaction.
+                if (not connection.connection.driver_connection.in_transaction
+                        and not statement.lstrip()[:8].upper().startswith(_LECTURES)):
+                    cursor.execute("BEGIN IMMEDIATE")
         
-        self.engine = create_engine(db_url, echo=True)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
-        self.db_url = db_url
+        # Sessions ouvertes, pour fermer leurs connexions avec le pool (dispose)
+        self._sessions = weakref.WeakSet()
     
     def create_tables(self):
         """Crée toutes les tables de la base de données"""
         Base.metadata.create_all(bind=self.engine)
+        if self.engine.dialect.name == 'sqlite':
+            self.install_versions()
+        if self.profile['changelog'] and self.engine.dialect.name == 'sqlite':
+            self.install_changelog()
+    
+    def install_versions(self):
+        """Installe (ou régénère) les triggers de version des lignes (actualisation des listes)"""
+        from .versions import install_versions
+        
+        connection = self.engine.raw_connection()
+        try:
+            install_versions(connection.driver_connection)
+            connection.commit()
+        finally:
+            connection.close()
+    
+    def install_changelog(self):
+        """Installe (ou régénère) les triggers du journal des modifications"""
+        from ..backup.changelog import install_triggers
+        
+        connection = self.engine.raw_connection()
+        try:
+            install_triggers(connection.driver_connection)
+            connection.commit()
+        finally:
+            connection.close()
     
     def get_session(self):
         """Retourne une session de base de données"""
-        return self.SessionLocal()
+        session = self.SessionLocal()
+        self._sessions.add(session)
+        return session
     
     def close_session(self, session):
         """Ferme une session de base de données"""
         session.close()
     
+    def dispose(self):
+        """
+        Ferme toutes les connexions : celles du pool et celles que gardent
+        les sessions ouvertes (sessions de l'interface, des threads de
+        lecture). Les sessions restent utilisables et rouvrent une connexion
+        à la demande ; leur transaction en cours est annulée.
+        """
+        for session in list(self._sessions):
+            session.invalidate()
+        self.engine.dispose()
+    
     def get_database_path(self):
         """Retourne le chemin du fichier de base de données"""
         if self.db_url.startswith('sqlite:///'):
             return self.db_url.replace('sqlite:///', '')
         return None
     
-    def backup_database(self, backup_name=None):
-        """Sauvegarde la base de données"""
-        import shutil
+    def backup_database(self, backup_name=None, progress=None):
+        """
+        Sauvegarde la base de données à chaud (API de sauvegarde SQLite).
+        
+        Le journal des modifications est ensuite archivé, comme par
+        `backup_manager.py create` : la sauvegarde sert de point de départ
+        aux restaurations à un instant donné, et le journal ne grossit pas
+        indéfiniment dans la base.
+        """
         from datetime import datetime
+        import json
+        from ..backup import online_backup, open_catalog, file_sha256, archive_changelog
+        from ..backup.catalog import KIND_FULL, metadata_path_for
         
         db_path = self.get_database_path()
         if not db_path or not os.path.exists(db_path):
@@ -64,15 +238,147 @@ class DatabaseManager:
         backup_path = f"data/backups/{backup_name}"
         
         try:
-            shutil.copy2(db_path, backup_path)
-            print(f"✅ Sauvegarde créée : {backup_path}")
+            stats = online_backup(db_path, backup_path, progress=progress)
+            
+            # Métadonnées (empreinte comprise) comme pour BackupManager.create_backup
+            metadata = {
+                'environment': os.path.basename(os.path.dirname(db_path)),
+                'description': '',
+                'created_at': datetime.now().isoformat(),
+                'source_size': os.path.getsize(db_path),
+                'backup_size': os.path.getsize(backup_path),
+                'sha256': file_sha256(backup_path),
+                'duration_seconds': round(stats['duration'], 3)
+            }
+            with open(metadata_path_for(backup_path), 'w') as f:
+                json.dump(metadata, f, indent=2)
+            
+            # Indexer la sauvegarde dans le catalogue
+            catalog = open_catalog('data/backups')
+            try:
+                catalog.add(
+                    name=backup_name, kind=KIND_FULL, environment=metadata['environment'],
+                    created_at=metadata['created_at'], path=backup_name,
+                    size=metadata['backup_size'], uncompressed_size=metadata['backup_size'],
+                    sha256=metadata['sha256']
+                )
+                print(f"✅ Sauvegarde créée : {backup_path}")
+                
+                segment = archive_changelog(catalog, metadata['environment'], db_path)
+                if segment:
+                    print(f"📜 Journal archivé : {segment['rows']} modifications")
+            finally:
+                catalog.close()
             return True
         except Exception as e:
             print(f"❌ Erreur lors de la sauvegarde : {e}")
             return False
 
+class EngineRegistry:
+    """
+    Registre des gestionnaires de base de données, indexé par URL.
+    
+    Les gestionnaires (et donc les moteurs et leurs pools de connexions) sont
+    créés à la première utilisation puis réutilisés lors des changements
+    d'environnement. La fermeture des pools est explicite via dispose().
+    """
+    
+    def __init__(self):
+        self._managers = {}
+        self._lock = threading.Lock()
+    
+    def get(self, env=None, db_url=None):
+        """
+        Retourne le gestionnaire d'un environnement ou d'une URL.
+        
+        Args:
+            env (str): Environnement (par défaut : GESTIA_ENV)
+            db_url (str): URL explicite, prioritaire sur l'environnement
+            
+        Returns:
+            DatabaseManager: Gestionnaire partagé pour cette URL
+        """
+        env = env or os.getenv('GESTIA_ENV', 'development')
+        url = db_url or resolve_database_url(env)
+        manager = self._managers.get(url)
+        if manager is None:
+            with self._lock:
+                manager = self._managers.get(url)
+                if manager is None:
+                    manager = DatabaseManager(url, profile=env)
+                    self._managers[url] = manager
+        return manager
+    
+    def dispose(self, env=None, db_url=None):
+        """Ferme le pool d'un environnement et le retire du registre"""
+        url = db_url or resolve_database_url(env)
+        with self._lock:
+            manager = self._managers.pop(url, None)
+        if manager is not None:
+            manager.dispose()
+        return manager is not None
+    
+    def dispose_path(self, db_path):
+        """
+        Ferme les pools ouverts sur un fichier de base, quelle que soit l'URL
+        utilisée pour l'ouvrir (chemin relatif ou absolu). Le fichier allant
+        être remplacé, les caches de lecture sont vidés.
+        
+        Returns:
+            int: Nombre de gestionnaires fermés
+        """
+        target = os.path.abspath(db_path)
+        with self._lock:
+            urls = [
+                url for url, manager in self._managers.items()
+                if manager.get_database_path() and os.path.abspath(manager.get_database_path()) == target
+            ]
+            managers = [self._managers.pop(url) for url in urls]
+        for manager in managers:
+            manager.dispose()
+        invalidate_all()
+        return len(managers)
+    
+    def dispose_all(self):
+        """Ferme tous les pools du registre"""
+        with self._lock:
+            managers = list(self._managers.values())
+            self._managers.clear()
+        for manager in managers:
+            manager.dispose()
+    
+    def urls(self):
+        """Liste les URLs ayant un moteur actif"""
+        return list(self._managers)
+
+class CurrentDatabaseManager:
+    """
+    Proxy vers le gestionnaire de l'environnement courant.
+    
+    Les modules qui font `from gestia.core.database import db_manager`
+    conservent ce proxy : chaque accès est résolu via le registre, ils
+    suivent donc les changements d'environnement sans moteur périmé.
+    """
+    
+    def __init__(self, registry):
+        self._registry = registry
+    
+    def __getattr__(self, name):
+        return getattr(self._registry.get(), name)
+    
+    def __repr__(self):
+        return f"<CurrentDatabaseManager env={get_current_environment()}>"
+
+# Registre global des moteurs
+engine_registry = EngineRegistry()
+atexit.register(engine_registry.dispose_all)
+
 # Instance globale du gestionnaire de base de données
-db_manager = DatabaseManager()
+db_manager = CurrentDatabaseManager(engine_registry)
+
+def get_database_manager(env=None):
+    """Retourne le gestionnaire (partagé) d'un environnement"""
+    return engine_registry.get(env)
 
 def init_database():
     """Initialise la base de données"""
@@ -88,13 +394,94 @@ def get_db():
     finally:
         db_manager.close_session(db)
 
+# Clé de Session.info : profondeur des blocs transaction() en cours
+_TRANSACTION_DEPTH = 'gestia_transaction_depth'
+
+def in_transaction(db):
+    """Indique si la session est dans un bloc transaction()"""
+    return db.info.get(_TRANSACTION_DEPTH, 0) > 0
+
+@contextmanager
+def transaction(db):
+    """
+    Regroupe des appels de services dans une seule transaction.
+    
+    Dans le bloc, les services ne valident plus eux-mêmes (flush seulement) :
+    le bloc le plus externe valide une seule fois à la sortie, ou annule tout
+    en cas d'exception. Un bloc imbriqué correspond à un SAVEPOINT : son
+    échec n'annule que ses propres opérations si l'exception est rattrapée.
+    
+    Exemple :
+        with transaction(db):
+            session = SessionDeTestService.creer_session(db, id_app, id_tech)
+            ProgrammeDeTestService.creer_programme(db, session.ID_Session, NomProgramme.RAPIDE)
+    """
+    depth = db.info.get(_TRANSACTION_DEPTH, 0)
+    if not depth:
+        # Verrou d'écriture dès l'entrée : les lectures du bloc voient l'état
+        # dans lequel ses écritures seront validées
+        _begin(db, "BEGIN IMMEDIATE")
+    scope = db.begin_nested() if depth else None
+    db.info[_TRANSACTION_DEPTH] = depth + 1
+    try:
+        yield db
+        if scope is not None:
+            scope.commit()
+        else:
+            db.commit()
+    except BaseException:
+        if scope is not None:
+            scope.rollback()
+        else:
+            db.rollback()
+        raise
+    finally:
+        db.info[_TRANSACTION_DEPTH] = depth
+
+@contextmanager
+def read_snapshot(db):
+    """
+    Regroupe des lectures dans une même transaction de lecture.
+
+    Toutes les requêtes du bloc (par exemple plusieurs iter_* des services)
+    voient la base dans le même état, même si d'autres connexions écrivent
+    entre-temps (mode WAL). Hors de ce bloc, les lectures sont en autocommit.
+    Le bloc est terminé par un ROLLBACK : il ne doit pas écrire. Si la
+    session a déjà une transaction SQLite en cours (écriture non validée),
+    ses lectures partagent déjà le même état et elle est laissée telle quelle.
+    """
+    session_ouverte = db.in_transaction()
+    connection = db.connection()
+    if not _begin(db, "BEGIN"):
+        yield db
+        return
+    try:
+        yield db
+    finally:
+        if session_ouverte:
+            connection.exec_driver_sql("ROLLBACK")
+        else:
+            db.rollback()
+
+def _begin(db, begin):
+    """
+    Ouvre une transaction SQLite sur la connexion de la session.
+
+    Returns:
+        bool: True si la transaction a été ouverte (False si une transaction
+            était déjà en cours, ou hors SQLite)
+    """
+    connection = db.connection()
+    if connection.dialect.name != 'sqlite' or connection.connection.driver_connection.in_transaction:
+        return False
+    connection.exec_driver_sql(begin)
+    return True
+
 def get_current_environment():
     """Retourne l'environnement actuel"""
     return os.getenv('GESTIA_ENV', 'development')
 
 def set_environment(env):
-    """Définit l'environnement"""
+    """Définit l'environnement (le moteur est créé à la première utilisation)"""
     os.environ['GESTIA_ENV'] = env
-    global db_manager
-    db_manager = DatabaseManager()
     print(f"🔄 Environnement changé vers : {env}") 
\ No newline at end of file
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Identifiants - Génération des clés primaires GESTIA
+===================================================
+
+Les identifiants suivent le format ULID (horodatage en millisecondes sur
+48 bits puis 80 bits aléatoires, encodés en base32 de Crockford sur 26
+caractères) derrière le préfixe de l'entité : APP_01HZX3K5V0Q8W2N7C4M9R6T1BD.
+
+L'ordre alphabétique des identifiants suit l'ordre de création : les
+insertions se font en fin d'index au lieu d'être dispersées dans le B-tree.
+Au sein d'une même milliseconde, la partie aléatoire est incrémentée, ce
+qui garantit des identifiants strictement croissants et uniques pour un
+processus, y compris lorsque l'horloge recule.
+"""
+
+import base64
+import os
+import threading
+import time
+from typing import List
+
+# Préfixes des entités
+PREFIX_APPAREIL = 'APP'
+PREFIX_TECHNICIEN = 'TECH'
+PREFIX_SESSION = 'SESS'
+PREFIX_PROGRAMME = 'PROG'
+PREFIX_CRITERE = 'CRIT'
+PREFIX_DIAGNOSTIC = 'DIAG'
+
+# Alphabet de Crockford : ordre ASCII croissant, sans I, L, O ni U
+ENCODING = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+TIME_BITS = 48
+RANDOM_BITS = 80
+RANDOM_MAX = (1 << RANDOM_BITS) - 1
+
+# Longueur de la partie ULID (hors préfixe)
+ID_LENGTH = 26
+
+# Passage de l'alphabet base32 standard (RFC 4648) à celui de Crockford
+_FROM_RFC4648 = bytes.maketrans(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ234567', ENCODING.encode())
+
+def _encode(value, length):
+    """Encode un entier en base32 de Crockford sur `length` caractères"""
+    chars = []
+    for _ in range(length):
+        chars.append(ENCODING[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+def _encode_random_range(first, count):
+    """
+    Encode `count` parties aléatoires consécutives (16 caractères chacune).
+
+    80 bits forment exactement 16 caractères base32 : la plage entière est
+    encodée en un seul appel à base64.b32encode puis découpée.
+    """
+    raw = b''.join((first + offset).to_bytes(10, 'big') for offset in range(count))
+    encoded = base64.b32encode(raw).translate(_FROM_RFC4648).decode('ascii')
+    return [encoded[i:i + 16] for i in range(0, len(encoded), 16)]
+
+class IdAllocator:
+    """
+    Distributeur d'identifiants croissants.
+
+    Un seul distributeur est partagé par le processus (voir new_id) ; il est
+    protégé par un verrou et peut réserver des plages entières pour les
+    insertions en masse.
+    """
+
+    def __init__(self, clock=None):
+        self._clock = clock or (lambda: time.time_ns() // 1_000_000)
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def _reserve(self, count):
+        """Réserve `count` valeurs consécutives et retourne (ms, premier aléa)"""
+        with self._lock:
+            now = self._clock()
+            if now > self._last_ms:
+                # Nouvelle milliseconde : aléa frais, en gardant de la marge
+                # pour incrémenter sans déborder dans la milliseconde
+                random_part = int.from_bytes(os.urandom(10), 'big') >> 1
+                if random_part + count > RANDOM_MAX:
+                    random_part = RANDOM_MAX - count
+                ms = now
+            else:
+                # Même milliseconde (ou horloge en recul) : on continue la plage
+                ms = self._last_ms
+                random_part = self._last_random + 1
+                if random_part + count - 1 > RANDOM_MAX:
+                    ms += 1
+                    random_part = 0
+            self._last_ms = ms
+            self._last_random = random_part + count - 1
+        return ms, random_part
+
+    def new_id(self, prefix):
+        """Retourne un nouvel identifiant `PREFIX_<ULID>`"""
+        ms, random_part = self._reserve(1)
+        return f"{prefix}_{_encode(ms, 10)}{_encode(random_part, 16)}"
+
+    def allocate(self, prefix, count):
+        """
+        Réserve une plage de `count` identifiants consécutifs.
+
+        Args:
+            prefix (str): Préfixe de l'entité (APP, SESS...)
+            count (int): Nombre d'identifiants
+
+        Returns:
+            List[str]: Identifiants croissants
+        """
+        if count <= 0:
+            return []
+        ms, first = self._reserve(count)
+        head = f"{prefix}_{_encode(ms, 10)}"
+        return [head + random_part for random_part in _encode_random_range(first, count)]
+
+# Distributeur partagé du processus
+_allocator = IdAllocator()
+
+def new_id(prefix: str) -> str:
+    """Retourne un nouvel identifiant croissant pour une entité"""
+    return _allocator.new_id(prefix)
+
+def allocate_ids(prefix: str, count: int) -> List[str]:
+    """Réserve une plage d'identifiants croissants pour une insertion en masse"""
+    return _allocator.allocate(prefix, count)
+
+def id_timestamp(identifier: str) -> float:
+    """Retourne l'horodatage (en secondes) encodé dans un identifiant"""
+    ulid = identifier.rsplit('_', 1)[-1]
+    if len(ulid) != ID_LENGTH:
+        raise ValueError(f"Identifiant non horodaté: {identifier}")
+    ms = 0
+    for char in ulid[:10]:
+        ms = (ms << 5) | ENCODING.index(char)
+    return ms / 1000
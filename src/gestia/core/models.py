@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, String, Date, Boolean, ForeignKey, Enum, Text
+from sqlalchemy import create_engine, Column, String, Date, Boolean, ForeignKey, Enum, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 from datetime import datetime, date
@@ -52,6 +52,16 @@ class ResultatReparation(enum.Enum):
 # Classes du modèle
 class Appareil(Base):
     __tablename__ = 'appareils'
+    __table_args__ = (
+        # Pagination par clé (voir AppareilService.lister_appareils_page) :
+        # chaque index se termine par ID_Appareil pour départager les ex aequo.
+        # Les index par marque et par état servent aussi à lister_marques
+        # (DISTINCT) et aux comptages par état.
+        Index('ix_appareils_date', 'DateReception', 'ID_Appareil'),
+        Index('ix_appareils_marque_date', 'Marque', 'DateReception', 'ID_Appareil'),
+        Index('ix_appareils_etat_date', 'Etat', 'DateReception', 'ID_Appareil'),
+        Index('ix_appareils_numserie', 'NumSerie', 'ID_Appareil'),
+    )
     
     ID_Appareil = Column(String(50), primary_key=True)
     Marque = Column(String(100), nullable=False)
@@ -86,6 +96,11 @@ class Technicien(Base):
 
 class SessionDeTest(Base):
     __tablename__ = 'sessions_de_test'
+    __table_args__ = (
+        # Sessions d'un appareil, de la plus récente à la plus ancienne
+        Index('ix_sessions_appareil_date', 'ID_Appareil', 'DateDebut'),
+        Index('ix_sessions_technicien', 'ID_Technicien'),
+    )
     
     ID_Session = Column(String(50), primary_key=True)
     DateDebut = Column(Date, nullable=False)
@@ -105,6 +120,9 @@ class SessionDeTest(Base):
 
 class ProgrammeDeTest(Base):
     __tablename__ = 'programmes_de_test'
+    __table_args__ = (
+        Index('ix_programmes_session', 'ID_Session'),
+    )
     
     ID_Programme = Column(String(50), primary_key=True)
     NomProgramme = Column(Enum(NomProgramme), nullable=False)
@@ -121,6 +139,10 @@ class ProgrammeDeTest(Base):
 
 class CritereDeTest(Base):
     __tablename__ = 'criteres_de_test'
+    __table_args__ = (
+        Index('ix_criteres_programme', 'ID_Programme'),
+        Index('ix_criteres_technicien', 'ID_Technicien'),
+    )
     
     ID_Critere = Column(String(50), primary_key=True)
     NomCritere = Column(Enum(NomCritere), nullable=False)
@@ -138,6 +160,12 @@ class CritereDeTest(Base):
 
 class DiagnosticReparation(Base):
     __tablename__ = 'diagnostics_reparation'
+    __table_args__ = (
+        # Diagnostics d'un appareil, du plus récent au plus ancien
+        Index('ix_diagnostics_appareil_date', 'ID_Appareil', 'DateDebut'),
+        Index('ix_diagnostics_technicien', 'ID_Technicien'),
+        Index('ix_diagnostics_session', 'ID_Session'),
+    )
     
     ID_DiagRep = Column(String(50), primary_key=True)
     DateDebut = Column(Date, nullable=False)
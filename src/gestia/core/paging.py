@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Paging - Lignes virtuelles GESTIA
+=================================
+
+Accès par position à une liste paginée par clé (keyset), pour les listes
+virtualisées de l'interface : seules quelques pages autour de la zone
+affichée sont gardées en mémoire, quelle que soit la taille de la liste.
+
+Le défilement page après page suit les clés 'cle_suivante'. Un saut
+(barre de défilement tirée loin) repart de la clé connue la plus proche
+avant la page visée, avec un décalage : le coût du saut dépend de la
+distance à cette clé, et non plus de la position dans la liste.
+
+Les pages peuvent aussi être lues ailleurs (thread de travail) : les
+lignes absentes sont alors remplacées par des lignes d'attente,
+missing_pages et prefetch_pages indiquent les pages à lire, page_request
+donne les arguments de load_page et add_page enregistre la page lue.
+"""
+
+from bisect import bisect_right, insort
+from collections import OrderedDict
+
+# Lignes par page et pages gardées en mémoire par défaut
+DEFAULT_PAGE_SIZE = 200
+DEFAULT_MAX_PAGES = 16
+
+class VirtualRows:
+    """
+    Lignes d'une liste paginée, lues à la demande par position.
+
+    load_page(apres, decalage, limite) doit retourner une page au format de
+    AppareilService.lister_lignes_appareils_page : 'appareils',
+    'cle_suivante', et 'total' / 'total_exact' pour la première page.
+    first_page, si elle est fournie, est cette première page déjà lue
+    (ailleurs, par exemple sur un thread de travail) avec limite=page_size.
+    load_page peut être None si toutes les pages sont lues ailleurs.
+    """
+
+    def __init__(self, load_page, page_size=DEFAULT_PAGE_SIZE, max_pages=DEFAULT_MAX_PAGES, first_page=None):
+        self._load_page = load_page
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._pages = OrderedDict()  # numéro de page -> lignes (LRU)
+        self._keys = {0: None}  # numéro de page -> clé 'apres' qui la précède
+        self._known = [0]  # numéros de page dont la clé est connue, triés
+        self.pages_loaded = 0
+        self.total = 0
+        self.total_exact = True
+        self._page(0, first_page)
+
+    def rows(self, start, count, placeholder=None):
+        """
+        Retourne les lignes [start, start + count[ (moins en fin de liste).
+
+        Avec placeholder, les pages absentes ne sont pas lues : chaque ligne
+        manquante est remplacée par placeholder(position).
+        """
+        rows = []
+        if count <= 0:
+            return rows
+        first, last = start // self.page_size, (start + count - 1) // self.page_size
+        for number in range(first, last + 1):
+            if placeholder is not None and number not in self._pages:
+                end = min(start + count, (number + 1) * self.page_size, self.total)
+                rows.extend(placeholder(position) for position in range(max(start, number * self.page_size), end))
+                continue
+            page = self._page(number)
+            begin = start - number * self.page_size if number == first else 0
+            rows.extend(page[begin:start + count - number * self.page_size])
+            if len(page) < self.page_size:
+                break
+        return rows
+
+    def prefetch(self, start, count):
+        """Charge les pages voisines de [start, start + count[ si elles manquent"""
+        for number in self.prefetch_pages(start, count):
+            self._page(number)
+
+    def prefetch_pages(self, start, count):
+        """Numéros des pages voisines de [start, start + count[ absentes de la mémoire"""
+        numbers = []
+        for position in (start - 1, start + count):
+            number = position // self.page_size
+            if position >= 0 and number not in self._pages and position < self.total:
+                numbers.append(number)
+        return numbers
+
+    def missing_pages(self, start, count):
+        """Numéros des pages de [start, start + count[ absentes de la mémoire"""
+        end = min(start + count, self.total)
+        if end <= start:
+            return []
+        return [number for number in range(start // self.page_size, (end - 1) // self.page_size + 1)
+                if number not in self._pages]
+
+    def page_request(self, number):
+        """
+        Arguments (apres, decalage, limite) de load_page pour lire une page.
+
+        La clé connue la plus proche avant la page est reprise, avec le
+        décalage jusqu'à elle.
+        """
+        base = self._known[bisect_right(self._known, number) - 1]
+        return self._keys[base], (number - base) * self.page_size, self.page_size
+
+    def add_page(self, number, page):
+        """Enregistre une page lue ailleurs avec les arguments de page_request"""
+        self._page(number, page)
+
+    def update_rows(self, rows, sort_key):
+        """
+        Remplace en mémoire des lignes modifiées, identifiées par leur première valeur.
+
+        Tout ou rien : rien n'est remplacé si une ligne est absente des pages
+        en mémoire (nouvelle, ou pas encore lue) ou si sort_key(ligne) a
+        changé, car sa position dans la liste a pu changer.
+
+        Returns:
+            bool: True si les lignes ont été remplacées, False s'il faut relire la liste
+        """
+        positions = {row[0]: (number, index) for number, page in self._pages.items() for index, row in enumerate(page)}
+        replacements = []
+        for row in rows:
+            position = positions.get(row[0])
+            if position is None:
+                return False
+            number, index = position
+            if sort_key(self._pages[number][index]) != sort_key(row):
+                return False
+            replacements.append((number, index, row))
+        for number, index, row in replacements:
+            self._pages[number][index] = row
+        return True
+
+    def _page(self, number, page=None):
+        """Retourne les lignes d'une page, en la chargeant si besoin"""
+        rows = self._pages.get(number)
+        if rows is not None:
+            self._pages.move_to_end(number)
+            return rows
+
+        if page is None:
+            page = self._load_page(*self.page_request(number))
+        rows = page['appareils']
+        self.pages_loaded += 1
+        if 'total' in page:
+            self.total, self.total_exact = page['total'], page['total_exact']
+
+        end = number * self.page_size + len(rows)
+        if page['cle_suivante'] is None:
+            # Fin de liste atteinte. Une page vide (saut au-delà d'un total
+            # surestimé) borne seulement le total : la fin est avant elle.
+            self.total, self.total_exact = end, bool(rows) or number == 0
+        else:
+            if number + 1 not in self._keys:
+                self._keys[number + 1] = page['cle_suivante']
+                insort(self._known, number + 1)
+            if end >= self.total:
+                # Total estimé dépassé : la liste continue au moins une page
+                self.total, self.total_exact = end + self.page_size, False
+
+        self._pages[number] = rows
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return rows
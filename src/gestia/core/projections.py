@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Projections - Structures de lecture GESTIA
+==========================================
+
+Tuples nommés, en lecture seule, renvoyés par les services de consultation.
+Ils ne sont pas liés à la session SQLAlchemy : aucun chargement paresseux
+ne peut être déclenché pendant l'affichage.
+"""
+
+from datetime import date
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+from .models import (
+    EtatAppareil, Technologie, ResultatSession, NomProgramme, StatutExecution,
+    NomCritere, ResultatReparation
+)
+
+@lru_cache(maxsize=4096)
+def formater_date(valeur: Optional[date], vide: str = '-') -> str:
+    """
+    Formate une date pour l'affichage (JJ/MM/AAAA).
+    
+    Les listes répètent peu de dates différentes sur beaucoup de lignes :
+    les derniers formatages sont mémorisés.
+    """
+    return f"{valeur.day:02d}/{valeur.month:02d}/{valeur.year}" if valeur else vide
+
+class LigneAppareil(NamedTuple):
+    """Ligne d'une liste d'appareils, prête à afficher dans l'ordre des colonnes"""
+    ID_Appareil: str
+    Marque: str
+    Modele: str
+    NumSerie: str
+    DateReception: str  # JJ/MM/AAAA
+    Etat: str  # Libellé de l'état
+    DateMiseEnVente: str  # JJ/MM/AAAA ou '-'
+
+class CritereDossier(NamedTuple):
+    ID_Critere: str
+    NomCritere: NomCritere
+    EstValide: bool
+    DateValidation: Optional[date]
+    CommentaireDefaut: Optional[str]
+    Technicien: Optional[str]  # "Nom Prénom" du technicien ayant validé
+
+class ProgrammeDossier(NamedTuple):
+    ID_Programme: str
+    NomProgramme: NomProgramme
+    StatutExecution: StatutExecution
+    DateLancement: Optional[date]
+    DateFinExecution: Optional[date]
+    criteres: Tuple[CritereDossier, ...]
+
+class SessionDossier(NamedTuple):
+    ID_Session: str
+    DateDebut: date
+    DateFin: Optional[date]
+    ResultatFinal: ResultatSession
+    Commentaires: Optional[str]
+    ID_Technicien: str
+    Technicien: str
+    programmes: Tuple[ProgrammeDossier, ...]
+
+class DiagnosticDossier(NamedTuple):
+    ID_DiagRep: str
+    DateDebut: date
+    DateFin: Optional[date]
+    DescriptionProbleme: str
+    ActionsReparation: Optional[str]
+    ResultatReparation: Optional[ResultatReparation]
+    ID_Session: Optional[str]
+    ID_Technicien: str
+    Technicien: str
+
+class DossierAppareil(NamedTuple):
+    ID_Appareil: str
+    Marque: str
+    Modele: str
+    NumSerie: str
+    Capacite: Optional[str]
+    Technologie: Optional[Technologie]
+    DateReception: date
+    Etat: EtatAppareil
+    DateMiseEnVente: Optional[date]
+    ActionsAFaire: Optional[str]
+    SoucisMachine: Optional[str]
+    sessions: Tuple[SessionDossier, ...]  # De la plus récente à la plus ancienne
+    diagnostics: Tuple[DiagnosticDossier, ...]  # Du plus récent au plus ancien
+    statistiques: dict  # Même format que obtenir_recapitulatif_appareil
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Search - Index de recherche en mémoire GESTIA
+=============================================
+
+Recherche instantanée de documents (appareils) par le début ou par une
+partie de leurs champs texte, sans la casse.
+
+- Préfixe : les termes distincts sont gardés triés ; les termes commençant
+  par la recherche forment un intervalle trouvé par dichotomie (un trie
+  aplati dans une liste, bien plus compact que des nœuds en dictionnaires).
+- Sous-chaîne : chaque terme est listé sous ses trigrammes. Les candidats
+  sont ceux du trigramme le plus rare de la recherche, vérifiés un à un ;
+  le parcours s'arrête dès que limit résultats sont trouvés.
+
+L'index se met à jour par document (update, remove) : seuls les termes
+changés sont touchés. Un terme qui ne sert plus à aucun document est
+retiré de la liste triée ; dans les listes de ses trigrammes, il est
+seulement compté comme retiré (ignoré à la vérification), et une liste
+est recopiée sans ses termes retirés dès qu'ils en forment la moitié :
+les listes restent bornées sans parcours à chaque retrait. L'index n'est
+pas protégé contre les accès concurrents : c'est à l'appelant de le faire.
+"""
+
+from bisect import bisect_left, insort
+
+# Longueur des n-grammes de l'index des sous-chaînes (et longueur minimale
+# d'une recherche par sous-chaîne ; en dessous, recherche par préfixe seul)
+GRAM = 3
+
+# Au-delà de ce nombre de nouveaux termes, la liste triée est triée à
+# nouveau d'un bloc plutôt que par insertions successives
+BULK_INSERT = 64
+
+def normalize(text):
+    """Forme indexée d'un texte : sans la casse ni les espaces autour"""
+    return str(text).strip().casefold()
+
+def grams(term):
+    """Trigrammes distincts d'un terme"""
+    return {term[i:i + GRAM] for i in range(len(term) - GRAM + 1)}
+
+class SearchIndex:
+    """
+    Index de recherche par préfixe et sous-chaîne.
+
+    Chaque document est une ligne (id, *champs), l'identifiant étant un
+    texte : il est cherché par préfixe seulement, les autres champs par
+    préfixe et sous-chaîne.
+    """
+
+    def __init__(self):
+        self._documents = {}  # id -> (terme de l'id, termes des champs)
+        # terme -> id du document, ou set d'ids si plusieurs documents le
+        # partagent (marque, modèle) : un set par numéro de série coûterait
+        # plusieurs centaines d'octets par document
+        self._terms = {}
+        self._sorted = []  # termes distincts triés (recherche par préfixe)
+        self._grams = {}  # trigramme -> termes qui le contiennent
+        self._dead = {}  # trigramme -> termes retirés encore dans sa liste
+
+    def __len__(self):
+        return len(self._documents)
+
+    def update(self, rows):
+        """Ajoute ou remplace des documents, lignes (id, *champs)"""
+        new_terms = []
+        for doc_id, *fields in rows:
+            entry = (normalize(doc_id), tuple(sorted({normalize(field) for field in fields if field})))
+            old = self._documents.get(doc_id)
+            if old == entry:
+                continue
+            if old is not None:
+                self._remove_terms(doc_id, old)
+            self._documents[doc_id] = entry
+            id_term, terms = entry
+            self._add_term(id_term, doc_id, new_terms)
+            for term in terms:
+                if self._add_term(term, doc_id, new_terms):
+                    for gram in grams(term):
+                        self._grams.setdefault(gram, []).append(term)
+
+        # Un terme a pu être ajouté puis retiré (ou ajouté deux fois) dans le même lot
+        new_terms = [term for term in dict.fromkeys(new_terms) if term in self._terms]
+        if len(new_terms) < BULK_INSERT:
+            for term in new_terms:
+                insort(self._sorted, term)
+        else:
+            self._sorted.extend(new_terms)
+            self._sorted.sort()
+
+    def remove(self, doc_ids):
+        """Retire des documents de l'index"""
+        for doc_id in doc_ids:
+            entry = self._documents.pop(doc_id, None)
+            if entry is not None:
+                self._remove_terms(doc_id, entry)
+
+    def search(self, query, limit):
+        """
+        Retourne au plus limit identifiants de documents correspondant à query.
+
+        Les documents dont un champ commence par query viennent d'abord (par
+        ordre alphabétique du champ), puis ceux dont un champ la contient.
+        """
+        query = normalize(query)
+        found = {}
+        if not query or limit <= 0:
+            return []
+
+        index = bisect_left(self._sorted, query)
+        while index < len(self._sorted) and self._sorted[index].startswith(query):
+            if self._collect(self._sorted[index], found, limit):
+                return list(found)
+            index += 1
+
+        if len(query) >= GRAM:
+            postings = [self._grams.get(gram) for gram in grams(query)]
+            if all(postings):
+                for term in min(postings, key=len):
+                    # Les préfixes sont déjà comptés ; ignorer les termes retirés
+                    if query in term and not term.startswith(query) and term in self._terms:
+                        if self._collect(term, found, limit):
+                            break
+        return list(found)
+
+    def _collect(self, term, found, limit):
+        """Ajoute à found les documents d'un terme ; True quand limit est atteint"""
+        docs = self._terms[term]
+        for doc_id in (docs,) if isinstance(docs, str) else docs:
+            found[doc_id] = None
+            if len(found) >= limit:
+                return True
+        return False
+
+    def _add_term(self, term, doc_id, new_terms):
+        """Rattache un terme à un document ; True si le terme est nouveau"""
+        docs = self._terms.get(term)
+        if docs is None:
+            self._terms[term] = doc_id
+            new_terms.append(term)
+            return True
+        if isinstance(docs, str):
+            if docs != doc_id:
+                self._terms[term] = {docs, doc_id}
+        else:
+            docs.add(doc_id)
+        return False
+
+    def _remove_terms(self, doc_id, entry):
+        """Détache les termes d'un document, et retire ceux qui ne servent plus"""
+        id_term, terms = entry
+        for term in (id_term, *terms):
+            docs = self._terms.get(term)
+            if docs is None:
+                continue
+            if isinstance(docs, str):
+                if docs != doc_id:
+                    continue
+                del self._terms[term]
+                index = bisect_left(self._sorted, term)
+                if index < len(self._sorted) and self._sorted[index] == term:
+                    del self._sorted[index]
+                # Seuls les termes des champs sont listés sous leurs trigrammes
+                if term is not id_term:
+                    self._drop_grams(term)
+            else:
+                docs.discard(doc_id)
+                if len(docs) == 1:
+                    self._terms[term] = docs.pop()
+
+    def _drop_grams(self, term):
+        """Compte un terme retiré dans les listes de ses trigrammes, recopiées à moitié mortes"""
+        for gram in grams(term):
+            postings = self._grams.get(gram)
+            if postings is None:
+                continue
+            dead = self._dead.get(gram, 0) + 1
+            if dead * 2 < len(postings):
+                self._dead[gram] = dead
+                continue
+            # Un terme retiré puis ajouté de nouveau peut y figurer deux fois
+            live = list(dict.fromkeys(other for other in postings if other in self._terms))
+            self._dead.pop(gram, None)
+            if live:
+                self._grams[gram] = live
+            else:
+                del self._grams[gram]
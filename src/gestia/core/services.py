@@ -6,10 +6,15 @@ Services - Logique métier GESTIA
 Contient tous les services pour la gestion des entités du système.
 """
 
-from sqlalchemy.orm import Session
+from sqlalchemy import event, func, select, text, tuple_
+from sqlalchemy.orm import Session, joinedload, selectinload, make_transient_to_detached
+from collections import Counter
 from datetime import date, datetime
-from typing import List, Optional
-import uuid
+from itertools import islice
+import logging
+import threading
+import time
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 
 from .models import (
     Appareil, Technicien, SessionDeTest, ProgrammeDeTest, 
@@ -17,13 +22,252 @@ from .models import (
     EtatAppareil, ResultatSession, NomProgramme, StatutExecution,
     NomCritere, ResultatReparation
 )
+from .database import transaction, in_transaction, read_snapshot
+from .cache import LookupCache
+from .search import SearchIndex
+from .versions import versions, last_version
+from .projections import (
+    LigneAppareil, formater_date, DossierAppareil, SessionDossier, ProgrammeDossier, CritereDossier, DiagnosticDossier
+)
+from .ids import (
+    new_id, allocate_ids, PREFIX_APPAREIL, PREFIX_TECHNICIEN, PREFIX_SESSION,
+    PREFIX_PROGRAMME, PREFIX_CRITERE, PREFIX_DIAGNOSTIC
+)
+
+logger = logging.getLogger(__name__)
+
+def _valider(db: Session, commit: bool) -> bool:
+    """
+    Termine l'écriture d'un service.
+    
+    Valide la transaction, sauf avec commit=False ou dans un bloc
+    transaction() : les modifications sont alors seulement envoyées (flush)
+    et la validation revient à l'appelant.
+    
+    Returns:
+        bool: True si la transaction a été validée
+    """
+    if commit and not in_transaction(db):
+        db.commit()
+        return True
+    db.flush()
+    return False
+
+# Caches des lectures fréquentes, indexés par (URL de la base, clé)
+_cache_techniciens = LookupCache('techniciens', maxsize=1024)
+_cache_marques = LookupCache('marques', maxsize=32)
+
+# Index de recherche des appareils, un par base. Chaque recherche applique à
+# l'index les appareils modifiés ou supprimés depuis sa dernière mise à jour
+# (versions des lignes). Par sécurité (écritures faites sans les triggers de
+# version), l'index est reconstruit après DUREE_INDEX_RECHERCHE secondes :
+# dans un thread, les recherches continuant sur l'index courant jusqu'à la
+# substitution. Le verrou protège les index, partagés entre threads ; il
+# n'est jamais tenu pendant une construction.
+DUREE_INDEX_RECHERCHE = 3600.0
+_cache_recherche = LookupCache('recherche', maxsize=4, ttl=float('inf'))
+_verrou_recherche = threading.Lock()
+
+# Caches à vider de nouveau à la fin de la transaction en cours (session.info)
+_CACHES_A_INVALIDER = 'gestia_caches_a_invalider'
+
+def _cle_cache(db: Session, *cle) -> tuple:
+    """Clé de cache propre à la base de la session"""
+    return (str(db.get_bind().url),) + cle
+
+def _colonnes(entite) -> dict:
+    """Copie les colonnes d'une entité, indépendamment de la session"""
+    return {colonne.key: getattr(entite, colonne.key) for colonne in entite.__table__.columns}
+
+def _rattacher(db: Session, modele, colonnes: Optional[dict]):
+    """Rattache à la session une entité en cache, sans requête"""
+    if colonnes is None:
+        return None
+    entite = modele(**colonnes)
+    make_transient_to_detached(entite)
+    return db.merge(entite, load=False)
+
+def _invalider(db: Session, *caches: LookupCache):
+    """
+    Vide les caches touchés par une écriture.
+    
+    Si l'écriture n'est pas encore validée (commit=False ou bloc
+    transaction()), les caches sont vidés une seconde fois à la fin de la
+    transaction : une lecture faite entre-temps a pu y placer des données
+    qui seront finalement annulées.
+    """
+    for cache in caches:
+        cache.invalidate()
+    if db.in_transaction():
+        db.info.setdefault(_CACHES_A_INVALIDER, set()).update(caches)
+
+@event.listens_for(Session, 'after_transaction_end')
+def _vider_caches_en_attente(session, transaction):
+    if transaction.parent is None:
+        for cache in session.info.pop(_CACHES_A_INVALIDER, ()):
+            cache.invalidate()
+
+# Colonnes de tri de lister_appareils_page (toutes couvertes par un index
+# se terminant par ID_Appareil)
+TRIS_APPAREILS = ('DateReception', 'NumSerie', 'ID_Appareil')
+
+# Colonnes lues pour les listes d'appareils (voir LigneAppareil)
+COLONNES_LIGNE_APPAREIL = (
+    Appareil.ID_Appareil, Appareil.Marque, Appareil.Modele, Appareil.NumSerie,
+    Appareil.DateReception, Appareil.Etat, Appareil.DateMiseEnVente
+)
+
+# Colonnes indexées par la recherche d'appareils (identifiant en premier)
+COLONNES_RECHERCHE_APPAREIL = (Appareil.ID_Appareil, Appareil.NumSerie, Appareil.Marque, Appareil.Modele)
+
+# Nombre maximal de résultats d'une recherche d'appareils
+LIMITE_RECHERCHE = 500
+
+# Libellés des états, sans passer par le descripteur Enum.value à chaque ligne
+LIBELLES_ETAT = {etat: etat.value for etat in EtatAppareil}
+
+# Au-delà, le nombre de résultats d'une liste filtrée n'est plus compté exactement
+PLAFOND_COMPTAGE = 10000
+
+# Lignes réservées (identifiants) et converties par lot lors des créations en masse
+TAILLE_LOT_BULK = 5000
+
+# Lignes lues par lot par les itérateurs iter_*
+TAILLE_LOT_LECTURE = 1000
+
+# Limite historique de SQLite sur le nombre de paramètres d'une instruction
+MAX_PARAMETRES_SQL = 999
+
+# Au-delà, l'actualisation d'une liste d'appareils la relit plutôt que d'appliquer les modifications
+LIMITE_MODIFICATIONS = 1000
+
+def _inserer_par_lots(db: Session, modele, prefixe: str, colonnes: List[str], enregistrements: Iterable[dict],
+                      construire_ligne: Callable[[dict], tuple], taille_lot: int = TAILLE_LOT_BULK, commit: bool = True) -> List[str]:
+    """
+    Insère des enregistrements en masse, tout ou rien.
+    
+    Les identifiants sont réservés par plage pour chaque lot, puis les
+    lignes sont envoyées en INSERT multi-lignes (VALUES (...), (...), ...)
+    directement au pilote : pas d'objets ORM, pas de refresh. construire_ligne
+    doit donc fournir des valeurs déjà au format stocké (nom de l'enum,
+    date ISO, 0/1 pour les booléens).
+    
+    Args:
+        db (Session): Session de base de données
+        modele: Classe du modèle à insérer
+        prefixe (str): Préfixe des identifiants
+        colonnes (List[str]): Colonnes renseignées, hors clé primaire
+        enregistrements (Iterable[dict]): Données à insérer (itérable quelconque)
+        construire_ligne (Callable): Convertit un enregistrement en tuple de valeurs
+        taille_lot (int): Enregistrements traités par lot
+        commit (bool): Valider à la fin (sinon SAVEPOINT dans la transaction
+            de l'appelant)
+    
+    Returns:
+        List[str]: Identifiants générés, dans l'ordre des enregistrements
+    """
+    table = modele.__table__
+    noms = [table.primary_key.columns[0].name] + list(colonnes)
+    par_instruction = max(1, MAX_PARAMETRES_SQL // len(noms))
+    marqueurs = f"({', '.join('?' * len(noms))})"
+    instructions = {}
+    
+    ids = []
+    iterateur = iter(enregistrements)
+    # Tout ou rien : une erreur annule aussi les lots déjà envoyés
+    with transaction(db) if commit else db.begin_nested():
+        db.flush()
+        connexion = db.connection()
+        while True:
+            lot = list(islice(iterateur, taille_lot))
+            if not lot:
+                break
+            nouveaux_ids = allocate_ids(prefixe, len(lot))
+            valeurs = []
+            for identifiant, enregistrement in zip(nouveaux_ids, lot):
+                valeurs.append(identifiant)
+                valeurs.extend(construire_ligne(enregistrement))
+            
+            for debut in range(0, len(lot), par_instruction):
+                nb_lignes = min(par_instruction, len(lot) - debut)
+                if nb_lignes not in instructions:
+                    instructions[nb_lignes] = (f"INSERT INTO {table.name} ({', '.join(noms)}) "
+                                               f"VALUES {', '.join([marqueurs] * nb_lignes)}")
+                connexion.exec_driver_sql(
+                    instructions[nb_lignes],
+                    tuple(valeurs[debut * len(noms):(debut + nb_lignes) * len(noms)])
+                )
+            ids.extend(nouveaux_ids)
+    return ids
+
+def _modifications(requete, modele, depuis: Optional[int], limite: Optional[int] = None) -> dict:
+    """
+    Lignes d'une requête sur modele modifiées après la version depuis, de la
+    plus ancienne modification à la plus récente, et clés des lignes
+    supprimées depuis.
+    
+    Les versions sont attribuées dans l'ordre de validation des transactions
+    (voir versions.py) : une écriture validée après la lecture du repère a
+    toujours une version supérieure, même si elle a commencé avant. Avec
+    depuis=None, toutes les lignes sont retournées (lecture initiale d'une
+    liste) et aucune suppression.
+    
+    Returns:
+        dict: lignes, supprimes (clés), version (repère pour l'appel suivant)
+            et complet (False si plus de limite lignes ont changé)
+    """
+    db = requete.session
+    cle = modele.__table__.primary_key.columns[0]
+    jointure = (versions.c.tbl == modele.__tablename__) & (versions.c.pk == cle)
+    suppressions = None
+    if depuis is None:
+        # Les lignes sans version (antérieures à la migration 007) viennent en premier
+        requete = requete.outerjoin(versions, jointure)
+    else:
+        requete = requete.join(versions, jointure).filter(versions.c.version > depuis)
+        suppressions = (
+            select(versions.c.pk)
+            .where(versions.c.tbl == modele.__tablename__, versions.c.version > depuis, versions.c.deleted == 1)
+            .order_by(versions.c.version)
+        )
+    requete = requete.order_by(versions.c.version)
+    if limite is not None:
+        requete = requete.limit(limite + 1)
+        if suppressions is not None:
+            suppressions = suppressions.limit(limite + 1)
+    
+    # Le repère, les lignes et les suppressions sont lus dans le même état de la base
+    with read_snapshot(db):
+        version = last_version(db)
+        lignes = requete.all()
+        supprimes = db.execute(suppressions).scalars().all() if suppressions is not None else []
+    
+    complet = limite is None or len(lignes) + len(supprimes) <= limite
+    return {
+        'lignes': lignes[:limite],
+        'supprimes': supprimes[:limite],
+        'version': version if complet else depuis,
+        'complet': complet,
+    }
+
+def _iterer(requete, taille_lot: int) -> Iterator:
+    """
+    Parcourt le résultat d'une requête par lots de taille_lot lignes.
+    
+    Une seule requête est exécutée et son curseur est lu au fur et à mesure
+    (yield_per) : seul le lot courant est en mémoire, la carte d'identité de
+    la session ne gardant pas les entités que l'appelant abandonne. Les lignes
+    parcourues ne doivent pas être modifiées pendant l'itération ; pour
+    parcourir plusieurs tables dans le même état, utiliser read_snapshot().
+    """
+    yield from requete.execution_options(stream_results=True).yield_per(taille_lot)
 
 class AppareilService:
     @staticmethod
-    def creer_appareil(db: Session, marque: str, modele: str, num_serie: str, date_reception: date) -> Appareil:
+    def creer_appareil(db: Session, marque: str, modele: str, num_serie: str, date_reception: date, commit: bool = True) -> Appareil:
         """Crée un nouvel appareil"""
         appareil = Appareil(
-            ID_Appareil=f"APP_{uuid.uuid4().hex[:8].upper()}",
+            ID_Appareil=new_id(PREFIX_APPAREIL),
             Marque=marque,
             Modele=modele,
             NumSerie=num_serie,
@@ -31,10 +275,33 @@ class AppareilService:
             Etat=EtatAppareil.EN_TEST
         )
         db.add(appareil)
-        db.commit()
-        db.refresh(appareil)
+        if _valider(db, commit):
+            db.refresh(appareil)
+        _invalider(db, _cache_marques)
         return appareil
     
+    @staticmethod
+    def creer_appareil_bulk(db: Session, appareils: Iterable[dict], taille_lot: int = TAILLE_LOT_BULK, commit: bool = True) -> List[str]:
+        """
+        Crée des appareils en masse.
+        
+        Args:
+            appareils (Iterable[dict]): Dictionnaires avec les clés marque,
+                modele, num_serie et date_reception
+        
+        Returns:
+            List[str]: Identifiants des appareils créés
+        """
+        etat = EtatAppareil.EN_TEST.name
+        ids = _inserer_par_lots(
+            db, Appareil, PREFIX_APPAREIL, ['Marque', 'Modele', 'NumSerie', 'DateReception', 'Etat'],
+            appareils,
+            lambda a: (a['marque'], a['modele'], a['num_serie'], a['date_reception'].isoformat(), etat),
+            taille_lot, commit
+        )
+        _invalider(db, _cache_marques)
+        return ids
+    
     @staticmethod
     def obtenir_appareil(db: Session, id_appareil: str) -> Optional[Appareil]:
         """Récupère un appareil par son ID"""
@@ -46,22 +313,350 @@ class AppareilService:
         return db.query(Appareil).all()
     
     @staticmethod
-    def modifier_etat_appareil(db: Session, id_appareil: str, nouvel_etat: EtatAppareil) -> bool:
+    def iter_appareils(db: Session, filtres: Optional[dict] = None,
+                       taille_lot: int = TAILLE_LOT_LECTURE) -> Iterator[Appareil]:
+        """
+        Parcourt les appareils par ordre de création, en mémoire bornée.
+        
+        Args:
+            filtres (dict): Mêmes filtres que lister_appareils_page
+            taille_lot (int): Lignes lues par lot
+        """
+        requete = AppareilService._filtrer_appareils(db.query(Appareil), filtres)
+        return _iterer(requete.order_by(Appareil.ID_Appareil), taille_lot)
+    
+    @staticmethod
+    def _filtrer_appareils(requete, filtres: Optional[dict]):
+        """
+        Applique les filtres de liste : etat (EtatAppareil), marque,
+        date_min / date_max (DateReception incluse) et num_serie_prefixe.
+        """
+        filtres = filtres or {}
+        if filtres.get('etat') is not None:
+            requete = requete.filter(Appareil.Etat == filtres['etat'])
+        if filtres.get('marque'):
+            requete = requete.filter(Appareil.Marque == filtres['marque'])
+        if filtres.get('date_min'):
+            requete = requete.filter(Appareil.DateReception >= filtres['date_min'])
+        if filtres.get('date_max'):
+            requete = requete.filter(Appareil.DateReception <= filtres['date_max'])
+        prefixe = filtres.get('num_serie_prefixe')
+        if prefixe:
+            # Intervalle [prefixe, prefixe suivant[ plutôt que LIKE : utilise l'index
+            borne = prefixe[:-1] + chr(ord(prefixe[-1]) + 1)
+            requete = requete.filter(Appareil.NumSerie >= prefixe, Appareil.NumSerie < borne)
+        return requete
+    
+    @staticmethod
+    def estimer_nombre_appareils(db: Session, filtres: Optional[dict] = None) -> Tuple[int, bool]:
+        """
+        Estime le nombre d'appareils correspondant aux filtres sans tout compter.
+        
+        Le comptage s'arrête à PLAFOND_COMPTAGE lignes. Au-delà, sans filtre,
+        le plus grand rowid donne le nombre de lignes (les appareils ne sont
+        pas supprimés) ; avec filtres, seul le plafond est retourné.
+        
+        Returns:
+            Tuple[int, bool]: Nombre et indicateur d'exactitude
+        """
+        requete = AppareilService._filtrer_appareils(db.query(Appareil.ID_Appareil), filtres)
+        nombre = db.query(func.count()).select_from(requete.limit(PLAFOND_COMPTAGE + 1).subquery()).scalar()
+        if nombre <= PLAFOND_COMPTAGE:
+            return nombre, True
+        if not any(filtres.values() if filtres else ()):
+            return db.execute(text("SELECT MAX(rowid) FROM appareils")).scalar() or 0, False
+        return PLAFOND_COMPTAGE, False
+    
+    @staticmethod
+    def lister_appareils_page(db: Session, filtres: Optional[dict] = None, tri: str = 'DateReception',
+                              apres: Optional[tuple] = None, limite: int = 100, decalage: int = 0) -> dict:
+        """
+        Liste une page d'appareils par pagination par clé (keyset).
+        
+        La page suivante repart de la clé de la dernière ligne
+        (valeur de tri, ID_Appareil) au lieu d'un OFFSET : le coût d'une page
+        ne dépend pas de sa position dans la liste.
+        
+        Args:
+            filtres (dict): etat, marque, date_min, date_max, num_serie_prefixe
+            tri (str): Colonne de TRIS_APPAREILS, préfixée de '-' pour un tri
+                décroissant (ex: '-DateReception')
+            apres (tuple): 'cle_suivante' de la page précédente (None : première page)
+            limite (int): Nombre maximal d'appareils
+            decalage (int): Lignes à sauter après la clé, pour un saut de
+                plusieurs pages (listes virtualisées)
+        
+        Returns:
+            dict: appareils, cle_suivante (None sur la dernière page), et sur
+                la première page total / total_exact (voir estimer_nombre_appareils)
+        """
+        return AppareilService._page_appareils(db, db.query(Appareil), filtres, tri, apres, limite, decalage)
+    
+    @staticmethod
+    def lister_lignes_appareils_page(db: Session, filtres: Optional[dict] = None, tri: str = 'DateReception',
+                                     apres: Optional[tuple] = None, limite: int = 100,
+                                     decalage: int = 0) -> dict:
+        """
+        Comme lister_appareils_page, mais en ne lisant que les colonnes affichées.
+        
+        Les appareils sont retournés sous forme de LigneAppareil (dates et
+        état déjà formatés) au lieu d'entités ORM : pas de carte d'identité,
+        pas d'instrumentation, ni de lecture des colonnes Text.
+        """
+        page = AppareilService._page_appareils(db, db.query(*COLONNES_LIGNE_APPAREIL), filtres, tri, apres, limite,
+                                               decalage)
+        page['appareils'] = AppareilService._lignes_appareils(page['appareils'])
+        return page
+    
+    @staticmethod
+    def derniere_modification_appareils(db: Session) -> int:
+        """Version de la dernière création ou modification (repère d'actualisation, voir versions.py)"""
+        return last_version(db)
+    
+    @staticmethod
+    def lister_lignes_appareils_modifiees(db: Session, depuis: Optional[int],
+                                          limite: int = LIMITE_MODIFICATIONS) -> dict:
+        """
+        Lignes des appareils créés ou modifiés après depuis, et ID des
+        appareils supprimés depuis, pour actualiser une liste sans la relire.
+        
+        Args:
+            depuis (int): 'version' de l'appel précédent, ou
+                derniere_modification_appareils lu avec la liste
+            limite (int): Nombre maximal de modifications retournées
+        
+        Returns:
+            dict: appareils (LigneAppareil), supprimes (ID_Appareil), version
+                (repère suivant) et complet (False au-delà de limite : relire la liste)
+        """
+        modifications = _modifications(db.query(*COLONNES_LIGNE_APPAREIL), Appareil, depuis, limite)
+        modifications['appareils'] = AppareilService._lignes_appareils(modifications.pop('lignes'))
+        return modifications
+    
+    @staticmethod
+    def rechercher_appareils(db: Session, texte: str, limite: int = LIMITE_RECHERCHE) -> dict:
+        """
+        Recherche des appareils par ID, numéro de série, marque ou modèle.
+        
+        La recherche ignore la casse et porte sur le début des champs, ou sur
+        une partie d'un champ à partir de 3 caractères (l'ID par son début
+        seulement). Elle utilise un index en mémoire construit à la première
+        recherche sur la base, puis mis à jour avec les appareils créés,
+        modifiés ou supprimés depuis, y compris par un autre processus.
+        
+        Args:
+            texte (str): Texte recherché
+            limite (int): Nombre maximal de résultats
+        
+        Returns:
+            dict: appareils (LigneAppareil, correspondances en début de champ
+                d'abord), complet (False au-delà de limite résultats) et
+                version (repère pour lister_lignes_appareils_modifiees)
+        """
+        index = AppareilService._index_recherche(db)
+        with _verrou_recherche:
+            ids = index['index'].search(texte, limite + 1)
+            version = index['version']
+        
+        complet = len(ids) <= limite
+        ids = ids[:limite]
+        lignes = {}
+        for debut in range(0, len(ids), MAX_PARAMETRES_SQL):
+            tranche = ids[debut:debut + MAX_PARAMETRES_SQL]
+            lignes.update((ligne[0], ligne) for ligne in
+                          db.query(*COLONNES_LIGNE_APPAREIL).filter(Appareil.ID_Appareil.in_(tranche)))
+        return {
+            'appareils': AppareilService._lignes_appareils([lignes[i] for i in ids if i in lignes]),
+            'complet': complet,
+            'version': version,
+        }
+    
+    @staticmethod
+    def indexer_recherche_appareils(db: Session) -> int:
+        """
+        Construit (ou met à jour) l'index de recherche à l'avance, pour que
+        la première recherche soit immédiate.
+        
+        Returns:
+            int: Nombre d'appareils indexés
+        """
+        index = AppareilService._index_recherche(db)
+        with _verrou_recherche:
+            return len(index['index'])
+    
+    @staticmethod
+    def _index_recherche(db: Session) -> dict:
+        """
+        Index de recherche de la base, à jour des dernières modifications.
+        
+        Les constructions et la lecture des modifications se font hors du
+        verrou, qui ne couvre que leur application en mémoire. Au-delà de
+        DUREE_INDEX_RECHERCHE, une reconstruction est lancée en arrière-plan
+        et l'index courant est retourné.
+        """
+        index = _cache_recherche.get_or_load(_cle_cache(db), lambda: AppareilService._construire_index(db))
+        while True:
+            with _verrou_recherche:
+                recherche, depuis = index['index'], index['version']
+            modifications = _modifications(db.query(*COLONNES_RECHERCHE_APPAREIL), Appareil, depuis)
+            with _verrou_recherche:
+                # Index remplacé entre-temps par une reconstruction : relire depuis son repère
+                if index['index'] is not recherche:
+                    continue
+                # Un autre thread a pu appliquer des modifications plus récentes
+                if modifications['version'] > index['version']:
+                    recherche.remove(modifications['supprimes'])
+                    recherche.update(modifications['lignes'])
+                    index['version'] = modifications['version']
+                if index['reconstruction'] is None and time.monotonic() - index['construit'] > DUREE_INDEX_RECHERCHE:
+                    index['reconstruction'] = threading.Thread(
+                        target=AppareilService._reconstruire_index, args=(db.get_bind(), index),
+                        name='gestia-index-recherche', daemon=True
+                    )
+                    index['reconstruction'].start()
+                return index
+    
+    @staticmethod
+    def _construire_index(db: Session) -> dict:
+        """Construit l'index de recherche de tous les appareils, et son repère de version"""
+        with read_snapshot(db):
+            version = AppareilService.derniere_modification_appareils(db)
+            index = SearchIndex()
+            index.update(_iterer(db.query(*COLONNES_RECHERCHE_APPAREIL), TAILLE_LOT_LECTURE))
+        return {'index': index, 'version': version, 'construit': time.monotonic(), 'reconstruction': None}
+    
+    @staticmethod
+    def _reconstruire_index(bind, index: dict):
+        """
+        Reconstruit un index dans une session propre au thread, puis le
+        substitue à l'index courant (la recherche suivante le met à jour
+        depuis son repère). En cas d'erreur, l'index courant est gardé et
+        la reconstruction retentée à la recherche suivante.
+        """
+        db = Session(bind=bind)
+        try:
+            nouvel_index = AppareilService._construire_index(db)
+        except Exception:
+            logger.exception("Reconstruction de l'index de recherche impossible")
+            nouvel_index = None
+        finally:
+            db.close()
+        with _verrou_recherche:
+            if nouvel_index is not None:
+                index.update(nouvel_index)
+            index['reconstruction'] = None
+    
+    @staticmethod
+    def _lignes_appareils(lignes) -> List[LigneAppareil]:
+        """Convertit les colonnes COLONNES_LIGNE_APPAREIL lues en lignes affichables"""
+        return [
+            LigneAppareil(id_appareil, marque, modele, num_serie, formater_date(date_reception),
+                          LIBELLES_ETAT[etat], formater_date(date_vente))
+            for id_appareil, marque, modele, num_serie, date_reception, etat, date_vente in lignes
+        ]
+    
+    @staticmethod
+    def _page_appareils(db: Session, requete, filtres: Optional[dict], tri: str,
+                        apres: Optional[tuple], limite: int, decalage: int = 0) -> dict:
+        """Pagination par clé commune aux listes d'entités et de lignes"""
+        decroissant = tri.startswith('-')
+        nom_colonne = tri.lstrip('-')
+        if nom_colonne not in TRIS_APPAREILS:
+            raise ValueError(f"Tri non supporté: {tri} (colonnes: {', '.join(TRIS_APPAREILS)})")
+        colonne = getattr(Appareil, nom_colonne)
+        
+        requete = AppareilService._filtrer_appareils(requete, filtres)
+        if colonne is Appareil.ID_Appareil:
+            cle = Appareil.ID_Appareil
+            ordre = [cle.desc() if decroissant else cle]
+            borne = apres[-1] if apres is not None else None
+        else:
+            cle = tuple_(colonne, Appareil.ID_Appareil)
+            ordre = [colonne.desc(), Appareil.ID_Appareil.desc()] if decroissant else [colonne, Appareil.ID_Appareil]
+            borne = tuple_(*apres) if apres is not None else None
+        if borne is not None:
+            requete = requete.filter(cle < borne if decroissant else cle > borne)
+        
+        requete = requete.order_by(*ordre).limit(limite)
+        if decalage:
+            requete = requete.offset(decalage)
+        appareils = requete.all()
+        page = {
+            'appareils': appareils,
+            'cle_suivante': None,
+        }
+        if len(appareils) == limite:
+            dernier = appareils[-1]
+            page['cle_suivante'] = (getattr(dernier, nom_colonne), dernier.ID_Appareil)
+        if apres is None and not decalage:
+            page['total'], page['total_exact'] = AppareilService.estimer_nombre_appareils(db, filtres)
+        return page
+    
+    @staticmethod
+    def modifier_etat_appareil(db: Session, id_appareil: str, nouvel_etat: EtatAppareil, commit: bool = True) -> bool:
         """Modifie l'état d'un appareil"""
         appareil = AppareilService.obtenir_appareil(db, id_appareil)
         if appareil:
             appareil.Etat = nouvel_etat
             if nouvel_etat == EtatAppareil.EN_VENTE:
                 appareil.DateMiseEnVente = date.today()
-            db.commit()
+            _valider(db, commit)
             return True
         return False
     
+    @staticmethod
+    def modifier_etat_appareils(db: Session, nouvel_etat: EtatAppareil, ids: Optional[Iterable[str]] = None,
+                                filtres: Optional[dict] = None, commit: bool = True) -> dict:
+        """
+        Modifie l'état de plusieurs appareils par UPDATE ensembliste.
+        
+        Les appareils sont désignés par leurs identifiants ou par les filtres
+        de lister_appareils_page. La date de mise en vente est fixée dans le
+        même UPDATE. Les identifiants sont d'abord vérifiés : les absents sont
+        signalés et les autres sont modifiés. Au-delà de MAX_PARAMETRES_SQL
+        identifiants, un UPDATE est émis par tranche, dans la même transaction.
+        
+        Args:
+            nouvel_etat (EtatAppareil): État à appliquer
+            ids (Iterable[str]): Identifiants des appareils
+            filtres (dict): etat, marque, date_min, date_max, num_serie_prefixe
+        
+        Returns:
+            dict: 'modifies' (nombre d'appareils) et 'manquants' (identifiants inconnus)
+        """
+        if (ids is None) == (filtres is None):
+            raise ValueError("Indiquer soit ids, soit filtres")
+        
+        valeurs = {Appareil.Etat: nouvel_etat}
+        if nouvel_etat == EtatAppareil.EN_VENTE:
+            valeurs[Appareil.DateMiseEnVente] = date.today()
+        
+        if filtres is not None:
+            requete = AppareilService._filtrer_appareils(db.query(Appareil), filtres)
+            modifies = requete.update(valeurs, synchronize_session='evaluate')
+            _valider(db, commit)
+            return {'modifies': modifies, 'manquants': []}
+        
+        ids = list(dict.fromkeys(ids))
+        tranches = [ids[i:i + MAX_PARAMETRES_SQL] for i in range(0, len(ids), MAX_PARAMETRES_SQL)]
+        existants = set()
+        for tranche in tranches:
+            existants.update(i for i, in db.query(Appareil.ID_Appareil).filter(Appareil.ID_Appareil.in_(tranche)))
+        
+        modifies = 0
+        for tranche in tranches:
+            modifies += db.query(Appareil).filter(Appareil.ID_Appareil.in_(tranche)).update(
+                valeurs, synchronize_session='evaluate')
+        _valider(db, commit)
+        return {'modifies': modifies, 'manquants': [i for i in ids if i not in existants]}
+    
     @staticmethod
     def lister_marques(db: Session) -> List[str]:
-        """Liste toutes les marques distinctes d'appareils"""
-        marques = db.query(Appareil.Marque).distinct().all()
-        return sorted([marque[0] for marque in marques])
+        """Liste toutes les marques distinctes d'appareils (en cache)"""
+        def charger():
+            marques = db.query(Appareil.Marque).distinct().all()
+            return tuple(sorted(marque[0] for marque in marques))
+        return list(_cache_marques.get_or_load(_cle_cache(db), charger))
     
     @staticmethod
     def obtenir_sessions_test(db: Session, id_appareil: str) -> List[SessionDeTest]:
@@ -83,17 +678,9 @@ class AppareilService:
         sessions = AppareilService.obtenir_sessions_test(db, id_appareil)
         diagnostics = AppareilService.obtenir_diagnostics(db, id_appareil)
         
-        # Statistiques des sessions
-        total_sessions = len(sessions)
-        sessions_reussies = len([s for s in sessions if s.ResultatFinal == ResultatSession.PASSE])
-        sessions_echouees = len([s for s in sessions if s.ResultatFinal == ResultatSession.ECHOUÉ])
-        sessions_en_cours = len([s for s in sessions if s.ResultatFinal == ResultatSession.EN_COURS])
-        
-        # Statistiques des diagnostics
-        total_diagnostics = len(diagnostics)
-        diagnostics_reussis = len([d for d in diagnostics if d.ResultatReparation == ResultatReparation.REUSSI])
-        diagnostics_echoues = len([d for d in diagnostics if d.ResultatReparation == ResultatReparation.ECHOUÉ_IRREPARABLE])
-        diagnostics_en_cours = len([d for d in diagnostics if d.ResultatReparation is None])
+        # Statistiques comptées par la base
+        par_resultat_session = dict(StatistiquesService.sessions_par_resultat(db, id_appareil))
+        par_resultat_diagnostic = dict(StatistiquesService.diagnostics_par_resultat(db, id_appareil))
         
         return {
             'appareil': appareil,
@@ -101,92 +688,241 @@ class AppareilService:
             'diagnostics': diagnostics,
             'statistiques': {
                 'sessions': {
-                    'total': total_sessions,
-                    'reussies': sessions_reussies,
-                    'echouees': sessions_echouees,
-                    'en_cours': sessions_en_cours
+                    'total': sum(par_resultat_session.values()),
+                    'reussies': par_resultat_session.get(ResultatSession.PASSE, 0),
+                    'echouees': par_resultat_session.get(ResultatSession.ECHOUÉ, 0),
+                    'en_cours': par_resultat_session.get(ResultatSession.EN_COURS, 0)
                 },
                 'diagnostics': {
-                    'total': total_diagnostics,
-                    'reussis': diagnostics_reussis,
-                    'echoues': diagnostics_echoues,
-                    'en_cours': diagnostics_en_cours
+                    'total': sum(par_resultat_diagnostic.values()),
+                    'reussis': par_resultat_diagnostic.get(ResultatReparation.REUSSI, 0),
+                    'echoues': par_resultat_diagnostic.get(ResultatReparation.ECHOUÉ_IRREPARABLE, 0),
+                    'en_cours': par_resultat_diagnostic.get(None, 0)
                 }
             }
         }
     
     @staticmethod
-    def mettre_a_jour_actions_a_faire(db: Session, id_appareil: str, actions: str) -> bool:
+    def obtenir_dossier_appareil(db: Session, id_appareil: str) -> Optional[DossierAppareil]:
+        """
+        Charge le dossier complet d'un appareil en un nombre fixe de requêtes.
+        
+        L'appareil, ses sessions, programmes, critères, diagnostics et les
+        noms des techniciens sont chargés par 5 requêtes (selectinload, les
+        techniciens en jointure), quel que soit le nombre de lignes.
+        
+        Returns:
+            DossierAppareil: Dossier en lecture seule, ou None si l'appareil n'existe pas
+        """
+        appareil = (
+            db.query(Appareil)
+            .options(
+                selectinload(Appareil.sessions).joinedload(SessionDeTest.technicien),
+                selectinload(Appareil.sessions).selectinload(SessionDeTest.programmes)
+                .selectinload(ProgrammeDeTest.criteres).joinedload(CritereDeTest.technicien),
+                selectinload(Appareil.diagnostics).joinedload(DiagnosticReparation.technicien),
+            )
+            .filter(Appareil.ID_Appareil == id_appareil)
+            .populate_existing()
+            .first()
+        )
+        if not appareil:
+            return None
+        
+        def nom(technicien):
+            return f"{technicien.Nom} {technicien.Prenom}" if technicien else "Inconnu"
+        
+        sessions = tuple(
+            SessionDossier(
+                s.ID_Session, s.DateDebut, s.DateFin, s.ResultatFinal, s.Commentaires,
+                s.ID_Technicien, nom(s.technicien),
+                tuple(
+                    ProgrammeDossier(
+                        p.ID_Programme, p.NomProgramme, p.StatutExecution, p.DateLancement, p.DateFinExecution,
+                        tuple(
+                            CritereDossier(c.ID_Critere, c.NomCritere, c.EstValide, c.DateValidation,
+                                           c.CommentaireDefaut, nom(c.technicien) if c.ID_Technicien else None)
+                            for c in sorted(p.criteres, key=lambda c: c.ID_Critere)
+                        )
+                    )
+                    for p in sorted(s.programmes, key=lambda p: p.ID_Programme)
+                )
+            )
+            for s in sorted(appareil.sessions, key=lambda s: (s.DateDebut, s.ID_Session), reverse=True)
+        )
+        diagnostics = tuple(
+            DiagnosticDossier(
+                d.ID_DiagRep, d.DateDebut, d.DateFin, d.DescriptionProbleme, d.ActionsReparation,
+                d.ResultatReparation, d.ID_Session, d.ID_Technicien, nom(d.technicien)
+            )
+            for d in sorted(appareil.diagnostics, key=lambda d: (d.DateDebut, d.ID_DiagRep), reverse=True)
+        )
+        
+        # Statistiques comptées sur les lignes déjà chargées
+        par_resultat_session = Counter(s.ResultatFinal for s in sessions)
+        par_resultat_diagnostic = Counter(d.ResultatReparation for d in diagnostics)
+        statistiques = {
+            'sessions': {
+                'total': len(sessions),
+                'reussies': par_resultat_session[ResultatSession.PASSE],
+                'echouees': par_resultat_session[ResultatSession.ECHOUÉ],
+                'en_cours': par_resultat_session[ResultatSession.EN_COURS]
+            },
+            'diagnostics': {
+                'total': len(diagnostics),
+                'reussis': par_resultat_diagnostic[ResultatReparation.REUSSI],
+                'echoues': par_resultat_diagnostic[ResultatReparation.ECHOUÉ_IRREPARABLE],
+                'en_cours': par_resultat_diagnostic[None]
+            }
+        }
+        
+        return DossierAppareil(
+            appareil.ID_Appareil, appareil.Marque, appareil.Modele, appareil.NumSerie,
+            appareil.Capacite, appareil.Technologie, appareil.DateReception, appareil.Etat,
+            appareil.DateMiseEnVente, appareil.ActionsAFaire, appareil.SoucisMachine,
+            sessions, diagnostics, statistiques
+        )
+    
+    @staticmethod
+    def mettre_a_jour_actions_a_faire(db: Session, id_appareil: str, actions: str, commit: bool = True) -> bool:
         """Met à jour les actions à faire pour un appareil"""
         appareil = AppareilService.obtenir_appareil(db, id_appareil)
         if appareil:
             appareil.ActionsAFaire = actions
-            db.commit()
+            _valider(db, commit)
             return True
         return False
     
     @staticmethod
-    def mettre_a_jour_problemes_identifies(db: Session, id_appareil: str, problemes: str) -> bool:
+    def mettre_a_jour_problemes_identifies(db: Session, id_appareil: str, problemes: str, commit: bool = True) -> bool:
         """Met à jour les problèmes identifiés pour un appareil"""
         appareil = AppareilService.obtenir_appareil(db, id_appareil)
         if appareil:
             appareil.SoucisMachine = problemes
-            db.commit()
+            _valider(db, commit)
             return True
         return False
 
 class TechnicienService:
     @staticmethod
-    def creer_technicien(db: Session, nom: str, prenom: str) -> Technicien:
+    def creer_technicien(db: Session, nom: str, prenom: str, commit: bool = True) -> Technicien:
         """Crée un nouveau technicien"""
         technicien = Technicien(
-            ID_Technicien=f"TECH_{uuid.uuid4().hex[:8].upper()}",
+            ID_Technicien=new_id(PREFIX_TECHNICIEN),
             Nom=nom,
             Prenom=prenom
         )
         db.add(technicien)
-        db.commit()
-        db.refresh(technicien)
+        if _valider(db, commit):
+            db.refresh(technicien)
+        _invalider(db, _cache_techniciens)
         return technicien
     
+    @staticmethod
+    def creer_technicien_bulk(db: Session, techniciens: Iterable[dict], taille_lot: int = TAILLE_LOT_BULK, commit: bool = True) -> List[str]:
+        """Crée des techniciens en masse (clés nom et prenom)"""
+        ids = _inserer_par_lots(
+            db, Technicien, PREFIX_TECHNICIEN, ['Nom', 'Prenom'],
+            techniciens, lambda t: (t['nom'], t['prenom']), taille_lot, commit
+        )
+        _invalider(db, _cache_techniciens)
+        return ids
+    
     @staticmethod
     def obtenir_technicien(db: Session, id_technicien: str) -> Optional[Technicien]:
-        """Récupère un technicien par son ID"""
-        return db.query(Technicien).filter(Technicien.ID_Technicien == id_technicien).first()
+        """Récupère un technicien par son ID (en cache)"""
+        def charger():
+            technicien = db.query(Technicien).filter(Technicien.ID_Technicien == id_technicien).first()
+            return _colonnes(technicien) if technicien else None
+        colonnes = _cache_techniciens.get_or_load(_cle_cache(db, id_technicien), charger)
+        return _rattacher(db, Technicien, colonnes)
+    
+    @staticmethod
+    def iter_techniciens(db: Session, taille_lot: int = TAILLE_LOT_LECTURE) -> Iterator[Technicien]:
+        """Parcourt les techniciens par ordre de création, en mémoire bornée"""
+        return _iterer(db.query(Technicien).order_by(Technicien.ID_Technicien), taille_lot)
     
     @staticmethod
     def lister_techniciens(db: Session) -> List[Technicien]:
-        """Liste tous les techniciens"""
-        return db.query(Technicien).all()
+        """Liste tous les techniciens (en cache)"""
+        def charger():
+            return tuple(_colonnes(technicien) for technicien in db.query(Technicien).all())
+        techniciens = _cache_techniciens.get_or_load(_cle_cache(db, None), charger)
+        return [_rattacher(db, Technicien, colonnes) for colonnes in techniciens]
+    
+    @staticmethod
+    def derniere_modification_techniciens(db: Session) -> int:
+        """Version de la dernière création ou modification (repère d'actualisation, voir versions.py)"""
+        return last_version(db)
+    
+    @staticmethod
+    def lister_techniciens_modifies(db: Session, depuis: Optional[int]) -> dict:
+        """
+        Techniciens créés, modifiés ou supprimés après depuis (voir lister_lignes_appareils_modifiees).
+        Avec depuis=None, tous les techniciens sont retournés avec le repère
+        de l'actualisation suivante.
+        
+        Returns:
+            dict: techniciens (tuples ID_Technicien, Nom, Prenom), supprimes
+                (ID_Technicien), version, complet
+        """
+        modifications = _modifications(
+            db.query(Technicien.ID_Technicien, Technicien.Nom, Technicien.Prenom), Technicien, depuis
+        )
+        modifications['techniciens'] = [tuple(ligne) for ligne in modifications.pop('lignes')]
+        return modifications
 
 class SessionDeTestService:
     @staticmethod
-    def creer_session(db: Session, id_appareil: str, id_technicien: str) -> SessionDeTest:
+    def creer_session(db: Session, id_appareil: str, id_technicien: str, commit: bool = True) -> SessionDeTest:
         """Crée une nouvelle session de test"""
         session = SessionDeTest(
-            ID_Session=f"SESS_{uuid.uuid4().hex[:8].upper()}",
+            ID_Session=new_id(PREFIX_SESSION),
             DateDebut=date.today(),
             ResultatFinal=ResultatSession.EN_COURS,
             ID_Appareil=id_appareil,
             ID_Technicien=id_technicien
         )
         db.add(session)
-        db.commit()
-        db.refresh(session)
+        if _valider(db, commit):
+            db.refresh(session)
         return session
     
     @staticmethod
-    def terminer_session(db: Session, id_session: str, resultat: ResultatSession, commentaires: str = None) -> bool:
+    def creer_session_bulk(db: Session, sessions: Iterable[dict], taille_lot: int = TAILLE_LOT_BULK, commit: bool = True) -> List[str]:
+        """Crée des sessions de test en masse (clés id_appareil et id_technicien)"""
+        aujourd_hui = date.today().isoformat()
+        resultat = ResultatSession.EN_COURS.name
+        return _inserer_par_lots(
+            db, SessionDeTest, PREFIX_SESSION, ['DateDebut', 'ResultatFinal', 'ID_Appareil', 'ID_Technicien'],
+            sessions, lambda s: (aujourd_hui, resultat, s['id_appareil'], s['id_technicien']), taille_lot, commit
+        )
+    
+    @staticmethod
+    def terminer_session(db: Session, id_session: str, resultat: ResultatSession, commentaires: str = None, commit: bool = True) -> bool:
         """Termine une session de test"""
         session = db.query(SessionDeTest).filter(SessionDeTest.ID_Session == id_session).first()
         if session:
             session.DateFin = date.today()
             session.ResultatFinal = resultat
             session.Commentaires = commentaires
-            db.commit()
+            _valider(db, commit)
             return True
         return False
     
+    @staticmethod
+    def iter_sessions(db: Session, id_appareil: str = None, id_technicien: str = None,
+                      resultat: ResultatSession = None, taille_lot: int = TAILLE_LOT_LECTURE) -> Iterator[SessionDeTest]:
+        """Parcourt les sessions de test par ordre de création, en mémoire bornée"""
+        requete = db.query(SessionDeTest)
+        if id_appareil:
+            requete = requete.filter(SessionDeTest.ID_Appareil == id_appareil)
+        if id_technicien:
+            requete = requete.filter(SessionDeTest.ID_Technicien == id_technicien)
+        if resultat is not None:
+            requete = requete.filter(SessionDeTest.ResultatFinal == resultat)
+        return _iterer(requete.order_by(SessionDeTest.ID_Session), taille_lot)
+    
     @staticmethod
     def obtenir_session(db: Session, id_session: str) -> Optional[SessionDeTest]:
         """Récupère une session par son ID"""
@@ -194,58 +930,97 @@ class SessionDeTestService:
 
 class ProgrammeDeTestService:
     @staticmethod
-    def creer_programme(db: Session, id_session: str, nom_programme: NomProgramme) -> ProgrammeDeTest:
+    def creer_programme(db: Session, id_session: str, nom_programme: NomProgramme, commit: bool = True) -> ProgrammeDeTest:
         """Crée un nouveau programme de test"""
         programme = ProgrammeDeTest(
-            ID_Programme=f"PROG_{uuid.uuid4().hex[:8].upper()}",
+            ID_Programme=new_id(PREFIX_PROGRAMME),
             NomProgramme=nom_programme,
             StatutExecution=StatutExecution.NON_LANCE,
             ID_Session=id_session
         )
         db.add(programme)
-        db.commit()
-        db.refresh(programme)
+        if _valider(db, commit):
+            db.refresh(programme)
         return programme
     
     @staticmethod
-    def lancer_programme(db: Session, id_programme: str) -> bool:
+    def creer_programme_bulk(db: Session, programmes: Iterable[dict], taille_lot: int = TAILLE_LOT_BULK, commit: bool = True) -> List[str]:
+        """Crée des programmes de test en masse (clés id_session et nom_programme)"""
+        statut = StatutExecution.NON_LANCE.name
+        return _inserer_par_lots(
+            db, ProgrammeDeTest, PREFIX_PROGRAMME, ['NomProgramme', 'StatutExecution', 'ID_Session'],
+            programmes, lambda p: (p['nom_programme'].name, statut, p['id_session']), taille_lot, commit
+        )
+    
+    @staticmethod
+    def iter_programmes(db: Session, id_session: str = None, statut: StatutExecution = None,
+                        taille_lot: int = TAILLE_LOT_LECTURE) -> Iterator[ProgrammeDeTest]:
+        """Parcourt les programmes de test par ordre de création, en mémoire bornée"""
+        requete = db.query(ProgrammeDeTest)
+        if id_session:
+            requete = requete.filter(ProgrammeDeTest.ID_Session == id_session)
+        if statut is not None:
+            requete = requete.filter(ProgrammeDeTest.StatutExecution == statut)
+        return _iterer(requete.order_by(ProgrammeDeTest.ID_Programme), taille_lot)
+    
+    @staticmethod
+    def lancer_programme(db: Session, id_programme: str, commit: bool = True) -> bool:
         """Lance un programme de test"""
         programme = db.query(ProgrammeDeTest).filter(ProgrammeDeTest.ID_Programme == id_programme).first()
         if programme:
             programme.StatutExecution = StatutExecution.EN_COURS
             programme.DateLancement = date.today()
-            db.commit()
+            _valider(db, commit)
             return True
         return False
     
     @staticmethod
-    def terminer_programme(db: Session, id_programme: str, succes: bool) -> bool:
+    def terminer_programme(db: Session, id_programme: str, succes: bool, commit: bool = True) -> bool:
         """Termine un programme de test"""
         programme = db.query(ProgrammeDeTest).filter(ProgrammeDeTest.ID_Programme == id_programme).first()
         if programme:
             programme.StatutExecution = StatutExecution.TERMINE_OK if succes else StatutExecution.TERMINE_ECHEC
             programme.DateFinExecution = date.today()
-            db.commit()
+            _valider(db, commit)
             return True
         return False
 
 class CritereDeTestService:
     @staticmethod
-    def creer_critere(db: Session, id_programme: str, nom_critere: NomCritere) -> CritereDeTest:
+    def creer_critere(db: Session, id_programme: str, nom_critere: NomCritere, commit: bool = True) -> CritereDeTest:
         """Crée un nouveau critère de test"""
         critere = CritereDeTest(
-            ID_Critere=f"CRIT_{uuid.uuid4().hex[:8].upper()}",
+            ID_Critere=new_id(PREFIX_CRITERE),
             NomCritere=nom_critere,
             EstValide=False,
             ID_Programme=id_programme
         )
         db.add(critere)
-        db.commit()
-        db.refresh(critere)
+        if _valider(db, commit):
+            db.refresh(critere)
         return critere
     
     @staticmethod
-    def valider_critere(db: Session, id_critere: str, id_technicien: str, commentaire_defaut: str = None) -> bool:
+    def creer_critere_bulk(db: Session, criteres: Iterable[dict], taille_lot: int = TAILLE_LOT_BULK, commit: bool = True) -> List[str]:
+        """Crée des critères de test en masse (clés id_programme et nom_critere)"""
+        return _inserer_par_lots(
+            db, CritereDeTest, PREFIX_CRITERE, ['NomCritere', 'EstValide', 'ID_Programme'],
+            criteres, lambda c: (c['nom_critere'].name, 0, c['id_programme']), taille_lot, commit
+        )
+    
+    @staticmethod
+    def iter_criteres(db: Session, id_programme: str = None, est_valide: bool = None,
+                      taille_lot: int = TAILLE_LOT_LECTURE) -> Iterator[CritereDeTest]:
+        """Parcourt les critères de test par ordre de création, en mémoire bornée"""
+        requete = db.query(CritereDeTest)
+        if id_programme:
+            requete = requete.filter(CritereDeTest.ID_Programme == id_programme)
+        if est_valide is not None:
+            requete = requete.filter(CritereDeTest.EstValide == est_valide)
+        return _iterer(requete.order_by(CritereDeTest.ID_Critere), taille_lot)
+    
+    @staticmethod
+    def valider_critere(db: Session, id_critere: str, id_technicien: str, commentaire_defaut: str = None, commit: bool = True) -> bool:
         """Valide un critère de test"""
         critere = db.query(CritereDeTest).filter(CritereDeTest.ID_Critere == id_critere).first()
         if critere:
@@ -253,17 +1028,17 @@ class CritereDeTestService:
             critere.DateValidation = date.today()
             critere.ID_Technicien = id_technicien
             critere.CommentaireDefaut = commentaire_defaut
-            db.commit()
+            _valider(db, commit)
             return True
         return False
 
 class DiagnosticReparationService:
     @staticmethod
     def creer_diagnostic(db: Session, id_appareil: str, id_technicien: str, 
-                        description_probleme: str, id_session: str = None) -> DiagnosticReparation:
+                        description_probleme: str, id_session: str = None, commit: bool = True) -> DiagnosticReparation:
         """Crée un nouveau diagnostic/réparation"""
         diagnostic = DiagnosticReparation(
-            ID_DiagRep=f"DIAG_{uuid.uuid4().hex[:8].upper()}",
+            ID_DiagRep=new_id(PREFIX_DIAGNOSTIC),
             DateDebut=date.today(),
             DescriptionProbleme=description_probleme,
             ID_Appareil=id_appareil,
@@ -271,19 +1046,127 @@ class DiagnosticReparationService:
             ID_Session=id_session
         )
         db.add(diagnostic)
-        db.commit()
-        db.refresh(diagnostic)
+        if _valider(db, commit):
+            db.refresh(diagnostic)
         return diagnostic
     
+    @staticmethod
+    def creer_diagnostic_bulk(db: Session, diagnostics: Iterable[dict], taille_lot: int = TAILLE_LOT_BULK, commit: bool = True) -> List[str]:
+        """
+        Crée des diagnostics en masse.
+        
+        Args:
+            diagnostics (Iterable[dict]): Dictionnaires avec les clés
+                id_appareil, id_technicien, description_probleme et
+                id_session (facultative)
+        
+        Returns:
+            List[str]: Identifiants des diagnostics créés
+        """
+        aujourd_hui = date.today().isoformat()
+        return _inserer_par_lots(
+            db, DiagnosticReparation, PREFIX_DIAGNOSTIC,
+            ['DateDebut', 'DescriptionProbleme', 'ID_Appareil', 'ID_Technicien', 'ID_Session'],
+            diagnostics,
+            lambda d: (aujourd_hui, d['description_probleme'], d['id_appareil'], d['id_technicien'],
+                       d.get('id_session')),
+            taille_lot, commit
+        )
+    
+    @staticmethod
+    def iter_diagnostics(db: Session, id_appareil: str = None, id_technicien: str = None,
+                         taille_lot: int = TAILLE_LOT_LECTURE) -> Iterator[DiagnosticReparation]:
+        """Parcourt les diagnostics par ordre de création, en mémoire bornée"""
+        requete = db.query(DiagnosticReparation)
+        if id_appareil:
+            requete = requete.filter(DiagnosticReparation.ID_Appareil == id_appareil)
+        if id_technicien:
+            requete = requete.filter(DiagnosticReparation.ID_Technicien == id_technicien)
+        return _iterer(requete.order_by(DiagnosticReparation.ID_DiagRep), taille_lot)
+    
     @staticmethod
     def terminer_diagnostic(db: Session, id_diagnostic: str, actions_reparation: str, 
-                           resultat: ResultatReparation) -> bool:
+                           resultat: ResultatReparation, commit: bool = True) -> bool:
         """Termine un diagnostic/réparation"""
         diagnostic = db.query(DiagnosticReparation).filter(DiagnosticReparation.ID_DiagRep == id_diagnostic).first()
         if diagnostic:
             diagnostic.DateFin = date.today()
             diagnostic.ActionsReparation = actions_reparation
             diagnostic.ResultatReparation = resultat
-            db.commit()
+            _valider(db, commit)
             return True
-        return False 
\ No newline at end of file
+        return False 
+
+class StatistiquesService:
+    """
+    Statistiques calculées par la base (GROUP BY) : seuls les comptes
+    remontent, jamais les lignes. Les résultats sont des listes de tuples
+    (valeur, nombre).
+    """
+    
+    @staticmethod
+    def _compter_par(db: Session, colonne, *filtres) -> List[tuple]:
+        """Compte les lignes par valeur de colonne, du plus grand nombre au plus petit"""
+        nombre = func.count()
+        requete = db.query(colonne, nombre).filter(*filtres).group_by(colonne)
+        return [tuple(ligne) for ligne in requete.order_by(nombre.desc(), colonne)]
+    
+    @staticmethod
+    def appareils_par_etat(db: Session) -> List[Tuple[EtatAppareil, int]]:
+        """Nombre d'appareils par état"""
+        return StatistiquesService._compter_par(db, Appareil.Etat)
+    
+    @staticmethod
+    def appareils_par_marque(db: Session) -> List[Tuple[str, int]]:
+        """Nombre d'appareils par marque"""
+        return StatistiquesService._compter_par(db, Appareil.Marque)
+    
+    @staticmethod
+    def sessions_par_resultat(db: Session, id_appareil: str = None) -> List[Tuple[ResultatSession, int]]:
+        """Nombre de sessions de test par résultat, pour tous les appareils ou un seul"""
+        filtres = [SessionDeTest.ID_Appareil == id_appareil] if id_appareil else []
+        return StatistiquesService._compter_par(db, SessionDeTest.ResultatFinal, *filtres)
+    
+    @staticmethod
+    def diagnostics_par_resultat(db: Session, id_appareil: str = None) -> List[Tuple[Optional[ResultatReparation], int]]:
+        """Nombre de diagnostics par résultat (None : en cours), pour tous les appareils ou un seul"""
+        filtres = [DiagnosticReparation.ID_Appareil == id_appareil] if id_appareil else []
+        return StatistiquesService._compter_par(db, DiagnosticReparation.ResultatReparation, *filtres)
+    
+    @staticmethod
+    def sessions_par_technicien(db: Session) -> List[Tuple[str, str, str, int]]:
+        """
+        Nombre de sessions de test par technicien, techniciens sans session compris.
+        
+        Returns:
+            List[Tuple[str, str, str, int]]: (ID_Technicien, Nom, Prenom, nombre)
+        """
+        nombre = func.count(SessionDeTest.ID_Session)
+        requete = (
+            db.query(Technicien.ID_Technicien, Technicien.Nom, Technicien.Prenom, nombre)
+            .outerjoin(SessionDeTest, SessionDeTest.ID_Technicien == Technicien.ID_Technicien)
+            .group_by(Technicien.ID_Technicien)
+            .order_by(nombre.desc(), Technicien.Nom, Technicien.Prenom)
+        )
+        return [tuple(ligne) for ligne in requete]
+    
+    @staticmethod
+    def tableau_de_bord(db: Session) -> dict:
+        """
+        Regroupe les statistiques affichées par les interfaces.
+        
+        Returns:
+            dict: total_appareils, total_techniciens, par_etat, par_marque,
+                sessions_par_technicien, sessions_par_resultat, diagnostics_par_resultat
+        """
+        par_etat = StatistiquesService.appareils_par_etat(db)
+        par_technicien = StatistiquesService.sessions_par_technicien(db)
+        return {
+            'total_appareils': sum(nombre for _, nombre in par_etat),
+            'total_techniciens': len(par_technicien),
+            'par_etat': par_etat,
+            'par_marque': StatistiquesService.appareils_par_marque(db),
+            'sessions_par_technicien': par_technicien,
+            'sessions_par_resultat': StatistiquesService.sessions_par_resultat(db),
+            'diagnostics_par_resultat': StatistiquesService.diagnostics_par_resultat(db),
+        }
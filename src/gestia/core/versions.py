@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Versions - Repères d'actualisation des listes GESTIA
+====================================================
+
+Des triggers donnent à chaque ligne créée ou modifiée des tables suivies
+(appareils, techniciens) un numéro de version, pris dans un compteur
+unique : la colonne AUTOINCREMENT de la table _gestia_versions. Le numéro
+est attribué par l'instruction d'écriture elle-même, donc sous le verrou
+d'écriture de SQLite, qu'une transaction garde jusqu'à sa validation :
+les versions croissent dans l'ordre de validation des transactions, quelle
+que soit l'horloge du poste qui écrit. Un lecteur qui a vu la version N a
+donc vu toutes les lignes de version inférieure ou égale à N, et
+« version > N » ne manque aucune écriture validée ensuite.
+
+Une ligne modifiée de nouveau perd son ancienne version (une entrée par
+ligne). Une ligne supprimée (ou dont la clé change) laisse une entrée
+marquée deleted, avec une nouvelle version : les listes qui l'affichent
+apprennent ainsi sa suppression. Cette entrée disparaît si la clé est
+réutilisée. Les lignes antérieures à la migration 007 n'ont pas de
+version jusqu'à leur prochaine écriture.
+"""
+
+from sqlalchemy import column, func, select, table
+
+VERSIONS_TABLE = '_gestia_versions'
+# Préfixe des triggers de version
+TRIGGER_PREFIX = '_gestia_v_'
+# Tables suivies et leur clé primaire
+VERSIONED_TABLES = {
+    'appareils': 'ID_Appareil',
+    'techniciens': 'ID_Technicien',
+}
+
+_VERSIONS_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE} (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    tbl TEXT NOT NULL,
+    pk TEXT NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (tbl, pk)
+)
+"""
+
+# Lignes d'une table modifiées après une version, dans l'ordre des versions
+_VERSIONS_INDEX = f"CREATE INDEX IF NOT EXISTS ix_gestia_versions_tbl ON {VERSIONS_TABLE} (tbl, version)"
+
+# Table des versions pour les requêtes des services
+versions = table(VERSIONS_TABLE, column('version'), column('tbl'), column('pk'), column('deleted'))
+
+def version_statements():
+    """
+    Instructions SQL créant la table des versions et ses triggers.
+
+    Les triggers suppriment puis réinsèrent l'entrée de la ligne (plutôt
+    qu'un INSERT OR REPLACE) : la politique de conflit d'une instruction
+    externe (INSERT OR IGNORE...) s'imposerait à celle du trigger.
+
+    Returns:
+        list: Instructions à exécuter dans l'ordre (rejouables)
+    """
+    statements = [_VERSIONS_SCHEMA, _VERSIONS_INDEX]
+    for name, pk in VERSIONED_TABLES.items():
+        # Entrée supprimée (deleted = 1) pour l'ancienne clé, si elle n'est plus utilisée
+        tombstone = (f"DELETE FROM {VERSIONS_TABLE} WHERE tbl = '{name}' AND pk = OLD.{pk} AND OLD.{pk} IS NOT NEW.{pk}; "
+                     f"INSERT INTO {VERSIONS_TABLE} (tbl, pk, deleted) SELECT '{name}', OLD.{pk}, 1 "
+                     f"WHERE OLD.{pk} IS NOT NEW.{pk};")
+        renew = (f"DELETE FROM {VERSIONS_TABLE} WHERE tbl = '{name}' AND pk = NEW.{pk}; "
+                 f"INSERT INTO {VERSIONS_TABLE} (tbl, pk) VALUES ('{name}', NEW.{pk});")
+        trigger = f"{TRIGGER_PREFIX}{name}"
+        statements += [
+            f"DROP TRIGGER IF EXISTS {trigger}_ins",
+            f"DROP TRIGGER IF EXISTS {trigger}_upd",
+            f"DROP TRIGGER IF EXISTS {trigger}_del",
+            f"CREATE TRIGGER {trigger}_ins AFTER INSERT ON {name} BEGIN {renew} END",
+            f"CREATE TRIGGER {trigger}_upd AFTER UPDATE ON {name} BEGIN {tombstone} {renew} END",
+            f"CREATE TRIGGER {trigger}_del AFTER DELETE ON {name} BEGIN "
+            f"DELETE FROM {VERSIONS_TABLE} WHERE tbl = '{name}' AND pk = OLD.{pk}; "
+            f"INSERT INTO {VERSIONS_TABLE} (tbl, pk, deleted) VALUES ('{name}', OLD.{pk}, 1); END",
+        ]
+    return statements
+
+def install_versions(conn):
+    """
+    Crée la table des versions et (re)génère ses triggers.
+
+    Args:
+        conn: Connexion sqlite3 (DBAPI) sur la base
+    """
+    for statement in version_statements():
+        conn.execute(statement)
+
+def last_version(db):
+    """
+    Dernière version attribuée, toutes tables confondues (repère d'actualisation).
+
+    Returns:
+        int: Numéro de version, 0 si aucune ligne n'a encore de version
+    """
+    return db.execute(select(func.max(versions.c.version))).scalar() or 0
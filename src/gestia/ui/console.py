@@ -10,10 +10,12 @@ import sys
 from datetime import date
 from typing import Optional
 
-from ..core.database import db_manager, init_database
+from ..core.database import db_manager, init_database, transaction
+from ..core.cache import cache_stats
 from ..core.services import (
     AppareilService, TechnicienService, SessionDeTestService,
-    ProgrammeDeTestService, CritereDeTestService, DiagnosticReparationService
+    ProgrammeDeTestService, CritereDeTestService, DiagnosticReparationService,
+    StatistiquesService
 )
 from ..core.models import (
     EtatAppareil, ResultatSession, NomProgramme, StatutExecution,
@@ -45,6 +47,8 @@ class InterfaceConsole:
             print("2. Lister tous les appareils")
             print("3. Consulter un appareil")
             print("4. Modifier l'état d'un appareil")
+            print("5. Modifier l'état de plusieurs appareils")
+            print("6. Rechercher un appareil")
             print("0. Retour au menu principal")
             
             choix = input("\nVotre choix : ")
@@ -57,6 +61,10 @@ class InterfaceConsole:
                 self.consulter_appareil()
             elif choix == "4":
                 self.modifier_etat_appareil()
+            elif choix == "5":
+                self.modifier_etat_appareils()
+            elif choix == "6":
+                self.rechercher_appareils()
             elif choix == "0":
                 break
     
@@ -74,18 +82,43 @@ class InterfaceConsole:
         except Exception as e:
             print(f"❌ Erreur lors de la création : {e}")
     
-    def lister_appareils(self):
+    def lister_appareils(self, taille_page=50):
         print("\n--- LISTE DES APPAREILS ---")
-        appareils = AppareilService.lister_appareils(self.db)
-        if appareils:
-            for app in appareils:
-                print(f"ID: {app.ID_Appareil} | {app.Marque} {app.Modele} | État: {app.Etat.value}")
-        else:
+        page = AppareilService.lister_lignes_appareils_page(self.db, tri='-DateReception', limite=taille_page)
+        if not page['appareils']:
+            print("Aucun appareil trouvé.")
+            return
+        
+        total = page['total'] if page['total_exact'] else f"plus de {page['total']}"
+        print(f"{total} appareils")
+        while True:
+            for app in page['appareils']:
+                print(f"ID: {app.ID_Appareil} | {app.Marque} {app.Modele} | État: {app.Etat}")
+            if page['cle_suivante'] is None:
+                break
+            if input("-- Entrée pour la suite, 'q' pour arrêter -- ").strip().lower() == 'q':
+                break
+            page = AppareilService.lister_lignes_appareils_page(
+                self.db, tri='-DateReception', apres=page['cle_suivante'], limite=taille_page
+            )
+    
+    def rechercher_appareils(self):
+        texte = input("Rechercher (ID, numéro de série, marque ou modèle) : ").strip()
+        if not texte:
+            return
+        resultat = AppareilService.rechercher_appareils(self.db, texte)
+        if not resultat['appareils']:
             print("Aucun appareil trouvé.")
+            return
+        
+        nombre = len(resultat['appareils'])
+        print(f"{nombre} résultats" if resultat['complet'] else f"{nombre} premiers résultats")
+        for app in resultat['appareils']:
+            print(f"ID: {app.ID_Appareil} | {app.Marque} {app.Modele} | N° série: {app.NumSerie} | État: {app.Etat}")
     
     def consulter_appareil(self):
         id_app = input("ID de l'appareil : ")
-        appareil = AppareilService.obtenir_appareil(self.db, id_app)
+        appareil = AppareilService.obtenir_dossier_appareil(self.db, id_app)
         if appareil:
             print(f"\n--- DÉTAILS DE L'APPAREIL {id_app} ---")
             print(f"Marque: {appareil.Marque}")
@@ -94,18 +127,29 @@ class InterfaceConsole:
             print(f"État: {appareil.Etat.value}")
             if appareil.DateMiseEnVente:
                 print(f"Date de mise en vente: {appareil.DateMiseEnVente}")
+            
+            for session in appareil.sessions:
+                print(f"\n🧪 Session {session.ID_Session} du {session.DateDebut} "
+                      f"({session.Technicien}) : {session.ResultatFinal.value}")
+                for programme in session.programmes:
+                    valides = sum(1 for critere in programme.criteres if critere.EstValide)
+                    print(f"  - {programme.NomProgramme.value} : {programme.StatutExecution.value} "
+                          f"({valides}/{len(programme.criteres)} critères validés)")
+            
+            for diag in appareil.diagnostics:
+                resultat = diag.ResultatReparation.value if diag.ResultatReparation else 'En cours'
+                print(f"\n🔧 Diagnostic {diag.ID_DiagRep} du {diag.DateDebut} "
+                      f"({diag.Technicien}) : {resultat}")
+                print(f"  Problème: {diag.DescriptionProbleme}")
         else:
             print("❌ Appareil non trouvé.")
     
     def modifier_etat_appareil(self):
         id_app = input("ID de l'appareil : ")
         print("Nouveaux états disponibles:")
-        for i, etat in enumerate(EtatAppareil, 1):
-            print(f"{i}. {etat.value}")
         
         try:
-            choix = int(input("Choisissez le nouvel état : ")) - 1
-            nouvel_etat = list(EtatAppareil)[choix]
+            nouvel_etat = self.choisir_etat("Choisissez le nouvel état : ")
             if AppareilService.modifier_etat_appareil(self.db, id_app, nouvel_etat):
                 print("✅ État modifié avec succès !")
             else:
@@ -113,6 +157,34 @@ class InterfaceConsole:
         except (ValueError, IndexError):
             print("❌ Choix invalide.")
     
+    def choisir_etat(self, invite):
+        """Affiche les états et retourne celui choisi (ValueError/IndexError si invalide)"""
+        for i, etat in enumerate(EtatAppareil, 1):
+            print(f"{i}. {etat.value}")
+        return list(EtatAppareil)[int(input(invite)) - 1]
+    
+    def modifier_etat_appareils(self):
+        saisie = input("IDs des appareils (séparés par des espaces ou virgules, vide pour filtrer) : ")
+        ids = saisie.replace(',', ' ').split()
+        
+        try:
+            filtres = None
+            if not ids:
+                print("État actuel des appareils à modifier :")
+                filtres = {'etat': self.choisir_etat("Choisissez l'état actuel : ")}
+                marque = input("Marque (vide pour toutes) : ").strip()
+                if marque:
+                    filtres['marque'] = marque
+            
+            print("Nouvel état :")
+            nouvel_etat = self.choisir_etat("Choisissez le nouvel état : ")
+            resultat = AppareilService.modifier_etat_appareils(self.db, nouvel_etat, ids=ids or None, filtres=filtres)
+            print(f"✅ État modifié pour {resultat['modifies']} appareil(s).")
+            if resultat['manquants']:
+                print(f"⚠️ Appareils introuvables : {', '.join(resultat['manquants'])}")
+        except (ValueError, IndexError):
+            print("❌ Choix invalide.")
+    
     def menu_techniciens(self):
         while True:
             print("\n--- GESTION DES TECHNICIENS ---")
@@ -168,6 +240,7 @@ class InterfaceConsole:
             print("1. Créer une nouvelle session")
             print("2. Consulter une session")
             print("3. Terminer une session")
+            print("4. Créer une session complète (programmes et critères)")
             print("0. Retour au menu principal")
             
             choix = input("\nVotre choix : ")
@@ -178,6 +251,8 @@ class InterfaceConsole:
                 self.consulter_session_test()
             elif choix == "3":
                 self.terminer_session_test()
+            elif choix == "4":
+                self.creer_session_complete()
             elif choix == "0":
                 break
     
@@ -192,6 +267,24 @@ class InterfaceConsole:
         except Exception as e:
             print(f"❌ Erreur lors de la création : {e}")
     
+    def creer_session_complete(self):
+        print("\n--- CRÉATION D'UNE SESSION COMPLÈTE ---")
+        id_app = input("ID de l'appareil : ")
+        id_tech = input("ID du technicien : ")
+        
+        try:
+            # Session, programmes et critères : une seule validation, tout ou rien
+            with transaction(self.db):
+                session = SessionDeTestService.creer_session(self.db, id_app, id_tech)
+                for nom_programme in NomProgramme:
+                    programme = ProgrammeDeTestService.creer_programme(self.db, session.ID_Session, nom_programme)
+                    for nom_critere in NomCritere:
+                        CritereDeTestService.creer_critere(self.db, programme.ID_Programme, nom_critere)
+            print(f"✅ Session créée avec {len(NomProgramme)} programmes et "
+                  f"{len(NomProgramme) * len(NomCritere)} critères ! ID: {session.ID_Session}")
+        except Exception as e:
+            print(f"❌ Erreur lors de la création : {e}")
+    
     def consulter_session_test(self):
         id_session = input("ID de la session : ")
         session = SessionDeTestService.obtenir_session(self.db, id_session)
@@ -368,22 +461,41 @@ class InterfaceConsole:
     
     def afficher_statistiques(self):
         print("\n--- STATISTIQUES ---")
-        appareils = AppareilService.lister_appareils(self.db)
-        techniciens = TechnicienService.lister_techniciens(self.db)
+        stats = StatistiquesService.tableau_de_bord(self.db)
         
-        print(f"Nombre total d'appareils : {len(appareils)}")
-        print(f"Nombre total de techniciens : {len(techniciens)}")
+        print(f"Nombre total d'appareils : {stats['total_appareils']}")
+        print(f"Nombre total de techniciens : {stats['total_techniciens']}")
         
         # Statistiques par état
-        if appareils:
-            etats = {}
-            for app in appareils:
-                etat = app.Etat.value
-                etats[etat] = etats.get(etat, 0) + 1
-            
+        if stats['par_etat']:
             print("\nRépartition par état :")
-            for etat, count in etats.items():
-                print(f"  {etat} : {count}")
+            for etat, count in stats['par_etat']:
+                print(f"  {etat.value} : {count}")
+        
+        if stats['par_marque']:
+            print("\nRépartition par marque :")
+            for marque, count in stats['par_marque']:
+                print(f"  {marque} : {count}")
+        
+        if stats['sessions_par_resultat']:
+            print("\nSessions de test par résultat :")
+            for resultat, count in stats['sessions_par_resultat']:
+                print(f"  {resultat.value} : {count}")
+        
+        if stats['diagnostics_par_resultat']:
+            print("\nDiagnostics par résultat :")
+            for resultat, count in stats['diagnostics_par_resultat']:
+                print(f"  {resultat.value if resultat else 'En cours'} : {count}")
+        
+        if stats['sessions_par_technicien']:
+            print("\nSessions par technicien :")
+            for _, nom, prenom, count in stats['sessions_par_technicien']:
+                print(f"  {nom} {prenom} : {count}")
+        
+        print("\nCaches de lecture :")
+        for cache in cache_stats():
+            print(f"  {cache['name']} : {cache['hits']} succès / {cache['misses']} échecs "
+                  f"({cache['hit_rate']:.0%}), {cache['size']}/{cache['maxsize']} entrées")
     
     def executer(self):
         print("🚀 Initialisation du système...")
@@ -7,27 +7,96 @@ Interface graphique moderne pour le système de gestion d'appareils
 utilisant Tkinter avec un design moderne et intuitif.
 """
 
+import re
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
+from bisect import insort
 from datetime import date
-from ..core.database import db_manager, init_database
+from enum import Enum
+from functools import partial
+from operator import itemgetter
+from ..core.database import db_manager, init_database, transaction, read_snapshot
+from ..core.paging import VirtualRows, DEFAULT_PAGE_SIZE
+from ..core.projections import LigneAppareil
 from ..core.services import (
     AppareilService, TechnicienService, SessionDeTestService,
-    ProgrammeDeTestService, CritereDeTestService, DiagnosticReparationService
+    ProgrammeDeTestService, CritereDeTestService, DiagnosticReparationService,
+    StatistiquesService
 )
 from ..core.models import (
     EtatAppareil, ResultatSession, NomProgramme, StatutExecution,
     NomCritere, ResultatReparation
 )
-import threading
+from .workers import BackgroundExecutor
+
+# Groupe des lectures de l'écran affiché, annulées quand on change d'écran
+GROUPE_CONTENU = 'contenu'
+# Groupe de la lecture du dossier d'appareil en cours de consultation
+GROUPE_DOSSIER = 'dossier'
+# Groupe de la recherche d'appareils en cours (remplacée à chaque frappe)
+GROUPE_RECHERCHE = 'recherche'
+
+# Début de l'identifiant des lignes affichées en attendant la lecture de leur page
+PREFIXE_ATTENTE = '⏳ '
+
+# Délai sans frappe avant de lancer la recherche (ms)
+DELAI_RECHERCHE_MS = 250
+
+# Colonnes de la liste des appareils triables par la base (en-tête -> tri du service)
+TRIS_LISTE_APPAREILS = {
+    'ID': 'ID_Appareil',
+    'N° Série': 'NumSerie',
+    'Date Réception': 'DateReception',
+}
+
+# Date affichée JJ/MM/AAAA et nombre affiché (virgule ou point décimal)
+_DATE_AFFICHEE = re.compile(r'(\d{2})/(\d{2})/(\d{4})$')
+_NOMBRE_AFFICHE = re.compile(r'-?\d+(?:[.,]\d+)?$')
+
+def cle_de_tri(valeur):
+    """
+    Clé de tri typée d'une valeur de cellule.
+    
+    Les cellules vides ('' ou '-') viennent en premier, puis les nombres,
+    les dates (objets date ou texte JJ/MM/AAAA, dans l'ordre chronologique),
+    les énumérations (ordre de déclaration) et le texte (sans la casse).
+    Le premier élément de la clé classe les types entre eux : deux clés
+    sont toujours comparables.
+    """
+    if valeur is None or valeur == '' or valeur == '-':
+        return (0, 0)
+    if isinstance(valeur, (int, float)):
+        return (1, valeur)
+    if isinstance(valeur, date):
+        return (2, valeur.timetuple()[:6])
+    if isinstance(valeur, Enum):
+        return (3, list(type(valeur)).index(valeur))
+    texte = str(valeur)
+    if _NOMBRE_AFFICHE.match(texte):
+        return (1, float(texte.replace(',', '.')))
+    jour_mois_annee = _DATE_AFFICHEE.match(texte)
+    if jour_mois_annee:
+        jour, mois, annee = map(int, jour_mois_annee.groups())
+        return (2, (annee, mois, jour, 0, 0, 0))
+    return (4, texte.casefold())
 
 class TreeviewSortable(ttk.Treeview):
-    """Treeview avec fonctionnalité de tri par colonnes"""
+    """
+    Treeview avec fonctionnalité de tri par colonnes.
+    
+    Les valeurs insérées sont gardées côté Python (objets d'origine, pas le
+    texte affiché par Tk) avec, par colonne déjà triée, les clés de tri
+    typées de chaque ligne (voir cle_de_tri). Un tri ne relit donc rien
+    dans Tk et réordonne la liste en un seul appel.
+    """
     
     def __init__(self, parent, **kwargs):
         super().__init__(parent, **kwargs)
         self.sort_column = None
         self.sort_reverse = False
+        self._valeurs = {}  # élément -> valeurs insérées
+        self._cles = {}  # colonne -> {élément: clé de tri}, calculées au premier tri
+        self._colonnes = None
         
         # Bind le double-clic sur les en-têtes pour le tri
         self.bind('<Double-1>', self._on_double_click_header)
@@ -36,15 +105,13 @@ class TreeviewSortable(ttk.Treeview):
         """Gère le double-clic sur les en-têtes pour trier"""
         region = self.identify_region(event.x, event.y)
         if region == "heading":
+            # Identifiant de la colonne (le texte de l'en-tête porte la flèche de tri)
             column = self.identify_column(event.x)
-            column_id = self.heading(column)['text']
+            column_id = self['columns'][int(column[1:]) - 1]
             self.sort_by_column(column_id)
     
     def sort_by_column(self, column_id):
         """Trie le Treeview par la colonne spécifiée"""
-        # Récupérer tous les éléments
-        items = [(self.set(item, column_id), item) for item in self.get_children('')]
-        
         # Déterminer si on inverse le tri
         if self.sort_column == column_id:
             self.sort_reverse = not self.sort_reverse
@@ -53,18 +120,117 @@ class TreeviewSortable(ttk.Treeview):
         
         self.sort_column = column_id
         
-        # Trier les éléments
-        items.sort(reverse=self.sort_reverse)
+        # Trier les éléments sur leurs clés typées (l'élément départage les ex aequo)
+        cles = self._cles_colonne(column_id)
+        items = sorted(self.get_children(''), key=lambda item: (cles[item], item), reverse=self.sort_reverse)
         
-        # Réorganiser les éléments dans le Treeview
-        for index, (val, item) in enumerate(items):
-            self.move(item, '', index)
+        # Réorganiser les éléments dans le Treeview en un seul appel
+        self.set_children('', *items)
         
         # Mettre à jour l'apparence de l'en-tête pour indiquer le tri
         self._update_header_appearance(column_id)
     
+    def insert(self, parent, index, iid=None, **kw):
+        iid = super().insert(parent, index, iid=iid, **kw)
+        self._memoriser(iid, kw.get('values', ()))
+        return iid
+    
+    def item(self, item, option=None, **kw):
+        if 'values' in kw:
+            self._memoriser(item, kw['values'])
+        return super().item(item, option, **kw)
+    
+    def set(self, item, column=None, value=None):
+        if value is not None:
+            valeurs = list(self._valeurs.get(item, ()))
+            index = self._index_colonne(column)
+            valeurs.extend([''] * (index + 1 - len(valeurs)))
+            valeurs[index] = value
+            self._memoriser(item, valeurs)
+        return super().set(item, column, value)
+    
+    def delete(self, *items):
+        for item in items:
+            self._valeurs.pop(item, None)
+            for cles in self._cles.values():
+                cles.pop(item, None)
+        super().delete(*items)
+    
+    def _memoriser(self, item, valeurs):
+        """Garde les valeurs d'un élément et met à jour ses clés de tri déjà calculées"""
+        valeurs = self._valeurs[item] = tuple(valeurs)
+        for column_id, cles in self._cles.items():
+            cles[item] = cle_de_tri(self._valeur(valeurs, self._index_colonne(column_id)))
+    
+    @staticmethod
+    def _valeur(valeurs, index):
+        return valeurs[index] if index < len(valeurs) else None
+    
+    def _index_colonne(self, column_id):
+        """Position d'une colonne dans les valeurs (liste des colonnes lue une fois)"""
+        if self._colonnes is None:
+            self._colonnes = {colonne: index for index, colonne in enumerate(self['columns'])}
+        return self._colonnes[column_id]
+    
+    def _cles_colonne(self, column_id):
+        """Clés de tri de tous les éléments pour une colonne (calculées une fois)"""
+        cles = self._cles.get(column_id)
+        if cles is None:
+            index = self._index_colonne(column_id)
+            cles = self._cles[column_id] = {
+                item: cle_de_tri(self._valeur(valeurs, index)) for item, valeurs in self._valeurs.items()
+            }
+        return cles
+    
+    def appliquer_modifications(self, lignes, supprimes=()):
+        """
+        Applique des lignes créées ou modifiées, sans reconstruire la liste.
+        
+        Chaque ligne est identifiée par sa première valeur, utilisée comme
+        identifiant d'élément. Les éléments inchangés ne sont pas touchés et
+        le tri en cours est conservé : seuls les éléments modifiés sont replacés.
+        
+        Returns:
+            bool: True (les modifications sont toujours applicables)
+        """
+        for iid in supprimes:
+            if self.exists(iid):
+                self.delete(iid)
+        
+        modifies = []
+        for ligne in lignes:
+            iid = ligne[0]
+            if self.exists(iid):
+                self.item(iid, values=ligne)
+            else:
+                self.insert('', tk.END, iid=iid, values=ligne)
+            modifies.append(iid)
+        
+        if modifies and self.sort_column is not None:
+            self._replacer(modifies)
+        return True
+    
+    def _replacer(self, iids):
+        """Replace des éléments à leur rang dans le tri en cours"""
+        iids = set(iids)
+        self.detach(*iids)
+        cles_colonne = self._cles_colonne(self.sort_column)
+        cles = [(cles_colonne[item], item) for item in self.get_children('')]
+        if self.sort_reverse:
+            cles.reverse()
+        for iid in iids:
+            insort(cles, (cles_colonne[iid], iid))
+        if self.sort_reverse:
+            cles.reverse()
+        
+        # Les éléments restés en place sont déjà dans l'ordre : rattacher les
+        # autres par rang croissant les place chacun à son rang final
+        for index, (val, item) in enumerate(cles):
+            if item in iids:
+                self.move(item, '', index)
+    
     def _update_header_appearance(self, column_id):
-        """Met à jour l'apparence des en-têtes pour indiquer le tri"""
+        """Met à jour l'apparence des en-têtes pour indiquer le tri (aucun si column_id est None)"""
         # Réinitialiser tous les en-têtes
         for col in self['columns']:
             current_text = self.heading(col)['text']
@@ -72,6 +238,8 @@ class TreeviewSortable(ttk.Treeview):
             if current_text.endswith(' ↑') or current_text.endswith(' ↓'):
                 current_text = current_text[:-2]
             self.heading(col, text=current_text)
+        if column_id is None:
+            return
         
         # Ajouter l'indicateur de tri à la colonne active
         current_text = self.heading(column_id)['text']
@@ -80,6 +248,293 @@ class TreeviewSortable(ttk.Treeview):
         else:
             self.heading(column_id, text=f"{current_text} ↑")
 
+class TreeviewVirtuel(TreeviewSortable):
+    """
+    Treeview virtualisé pour les très grandes listes.
+    
+    Le widget ne contient que les lignes visibles : elles sont lues par pages
+    (VirtualRows) au fil du défilement, les pages voisines étant préchargées
+    pendant les temps morts. Avec un exécuteur, les pages sont lues sur ses
+    threads de travail : des lignes d'attente s'affichent jusqu'à leur
+    arrivée, le thread Tk n'attend jamais la base. La barre de défilement
+    représente la position dans la liste complète. Le tri par en-tête est
+    fait par la base, pour les colonnes déclarées dans tris.
+    
+    Chaque ligne a pour identifiant Tk sa première valeur (ID de l'appareil) :
+    la sélection est conservée quand les lignes sortent de la zone visible.
+    """
+    
+    def __init__(self, parent, tris=None, executeur=None, groupe=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.tris = tris or {}
+        self.executeur = executeur
+        self.groupe = groupe
+        self.lignes = None
+        self.premiere = 0
+        self.visibles = int(self['height'])
+        self.scrollbar = None
+        self._charger_page = None
+        self._en_memoire = False
+        self._demandes = {}  # numéro de page -> tâche de lecture en cours
+        self.tri = None
+        self._selection = set()
+        self._affichees = []
+        self._prechargement = None
+        
+        self.bind('<MouseWheel>', self._on_molette)
+        self.bind('<Button-4>', lambda event: self.defiler(-3))
+        self.bind('<Button-5>', lambda event: self.defiler(3))
+        self.bind('<Prior>', lambda event: self.defiler(-self.visibles))
+        self.bind('<Next>', lambda event: self.defiler(self.visibles))
+        self.bind('<Up>', lambda event: self._on_fleche(-1))
+        self.bind('<Down>', lambda event: self._on_fleche(1))
+        self.bind('<Configure>', self._on_configure)
+        self.bind('<<TreeviewSelect>>', self._on_selection)
+        # Un clic simple remplace la sélection, y compris hors de la zone visible
+        self.bind('<Button-1>', self._on_clic)
+        self.bind('<Control-Button-1>', lambda event: None)
+        self.bind('<Shift-Button-1>', lambda event: None)
+    
+    def attacher_scrollbar(self, scrollbar):
+        """Relie une barre de défilement verticale à la liste complète"""
+        self.scrollbar = scrollbar
+        scrollbar.configure(command=self._on_scrollbar)
+    
+    def charger(self, charger_page, tri, premiere_page=None, en_memoire=False):
+        """
+        Affiche une nouvelle liste depuis son début.
+        
+        Sans première page, elle est d'abord lue par l'exécuteur : la liste
+        affichée ne change qu'à son arrivée.
+        
+        Args:
+            charger_page: fonction (db, tri, apres, decalage, limite) -> page
+                au format de AppareilService.lister_lignes_appareils_page,
+                exécutée sur un thread de travail
+            tri (str): Tri du service (ex: '-DateReception'), ou '' pour
+                l'ordre de charger_page (résultats de recherche)
+            premiere_page (dict): Première page déjà lue (limite DEFAULT_PAGE_SIZE)
+            en_memoire (bool): Lignes déjà en mémoire : pages lues
+                directement sur le thread Tk, avec db=None
+        """
+        if premiere_page is None and not (en_memoire or self.executeur is None):
+            self._lire_premiere_page(charger_page, tri, partial(self.charger, charger_page, tri))
+            return
+        self._charger_page = charger_page
+        self._en_memoire = en_memoire
+        self.tri = tri
+        self._nouvelles_lignes(premiere_page)
+        self.premiere = 0
+        self._selection.clear()
+        
+        # Indiquer le tri courant sur l'en-tête correspondant
+        self.sort_column = self._colonne_tri()
+        self.sort_reverse = tri.startswith('-')
+        self._update_header_appearance(self.sort_column)
+        self._afficher()
+    
+    def actualiser(self, premiere_page=None):
+        """Relit la liste en gardant la position et la sélection"""
+        if self._charger_page is None:
+            return
+        if premiere_page is None and not self._synchrone():
+            self._lire_premiere_page(self._charger_page, self.tri, self.actualiser)
+            return
+        self._nouvelles_lignes(premiere_page)
+        self._afficher()
+    
+    def en_attente(self, item):
+        """Indique si une ligne du widget attend encore la lecture de sa page"""
+        return str(item).startswith(PREFIXE_ATTENTE)
+    
+    def _synchrone(self):
+        """Pages lues sur le thread Tk (lignes en mémoire, ou pas d'exécuteur)"""
+        return self._en_memoire or self.executeur is None
+    
+    def _lire_premiere_page(self, charger_page, tri, suite):
+        """Lit la première page en arrière-plan, puis appelle suite(page)"""
+        self.executeur.submit(
+            partial(charger_page, tri=tri, apres=None, decalage=0, limite=DEFAULT_PAGE_SIZE),
+            suite, group=self.groupe
+        )
+    
+    def _nouvelles_lignes(self, premiere_page):
+        """Remplace les lignes virtuelles ; les lectures de l'ancienne liste sont annulées"""
+        for tache in self._demandes.values():
+            tache.cancel()
+        self._demandes.clear()
+        charger_page = partial(self._charger_page, None, self.tri) if self._synchrone() else None
+        self.lignes = VirtualRows(charger_page, first_page=premiere_page)
+    
+    def _demander_pages(self, numeros):
+        """Fait lire des pages par l'exécuteur (une seule lecture par page)"""
+        lignes = self.lignes
+        for numero in numeros:
+            tache = self._demandes.get(numero)
+            # Une lecture en erreur n'est pas relancée avant la prochaine relecture de la liste
+            if tache is not None and not tache.cancelled:
+                continue
+            apres, decalage, limite = lignes.page_request(numero)
+            self._demandes[numero] = self.executeur.submit(
+                partial(self._charger_page, tri=self.tri, apres=apres, decalage=decalage, limite=limite),
+                partial(self._page_lue, lignes, numero),
+                group=self.groupe
+            )
+    
+    def _page_lue(self, lignes, numero, page):
+        """Affiche une page arrivée du thread de travail"""
+        if lignes is not self.lignes or not self.winfo_exists():
+            return  # Liste remplacée ou fermée entre-temps
+        self._demandes.pop(numero, None)
+        lignes.add_page(numero, page)
+        self._afficher()
+    
+    def _ligne_attente(self, position):
+        """Ligne affichée à une position en attendant la lecture de sa page"""
+        return (f"{PREFIXE_ATTENTE}{position + 1}",) + ('…',) * (len(self['columns']) - 1)
+    
+    def appliquer_modifications(self, lignes, supprimes=()):
+        """
+        Applique des lignes modifiées aux pages en mémoire et à la zone visible.
+        
+        Returns:
+            bool: False si la liste doit être relue : ligne nouvelle ou pas
+                encore lue, clé de tri modifiée, ou suppression
+        """
+        if self.lignes is None or supprimes:
+            return False
+        # Sans tri par colonne, les lignes gardent leur place
+        column_id = self._colonne_tri()
+        cle = itemgetter(self['columns'].index(column_id)) if column_id else (lambda ligne: None)
+        if not self.lignes.update_rows(lignes, cle):
+            return False
+        self._afficher()
+        return True
+    
+    def _colonne_tri(self):
+        """En-tête de la colonne du tri courant, None si la liste n'est pas triée par colonne"""
+        colonne = self.tri.lstrip('-')
+        return next((column_id for column_id, tri in self.tris.items() if tri == colonne), None)
+    
+    def ids_selectionnes(self):
+        """Retourne les identifiants sélectionnés, visibles ou non"""
+        return sorted(self._selection)
+    
+    def defiler(self, pas):
+        """Fait défiler la liste de pas lignes (négatif : vers le haut)"""
+        self.premiere += pas
+        self._afficher()
+        return 'break'
+    
+    def sort_by_column(self, column_id):
+        """Trie la liste par la base, si la colonne le permet"""
+        column_id = column_id.rstrip(' ↑↓')
+        colonne = self.tris.get(column_id)
+        if colonne is None or self._charger_page is None:
+            return
+        reverse = not self.sort_reverse if self.sort_column == column_id else False
+        self.charger(self._charger_page, f"-{colonne}" if reverse else colonne, en_memoire=self._en_memoire)
+    
+    def _afficher(self):
+        """Remplace les lignes du widget par celles de la zone visible"""
+        if self.lignes is None:
+            return
+        # Le total peut diminuer en atteignant la fin de liste : recadrer
+        attente = None if self._synchrone() else self._ligne_attente
+        while True:
+            self.premiere = max(0, min(self.premiere, self.lignes.total - self.visibles))
+            lignes = self.lignes.rows(self.premiere, self.visibles, attente)
+            if lignes or self.premiere == 0:
+                break
+        if attente is not None:
+            self._demander_pages(self.lignes.missing_pages(self.premiere, self.visibles))
+        
+        # Une ligne déplacée entre deux lectures de pages peut apparaître deux fois
+        uniques, vues = [], set()
+        for ligne in lignes:
+            if ligne[0] not in vues:
+                vues.add(ligne[0])
+                uniques.append(ligne)
+        lignes = uniques
+        
+        if [ligne[0] for ligne in lignes] == [ligne[0] for ligne in self._affichees]:
+            # Mêmes éléments : ne mettre à jour que les lignes modifiées
+            for ancienne, ligne in zip(self._affichees, lignes):
+                if ancienne != ligne:
+                    self.item(ligne[0], values=ligne)
+        else:
+            self.delete(*self.get_children())
+            for ligne in lignes:
+                self.insert('', tk.END, iid=ligne[0], values=ligne)
+            selection = [ligne[0] for ligne in lignes if ligne[0] in self._selection]
+            if selection:
+                self.selection_set(selection)
+        self._affichees = lignes
+        
+        if self.scrollbar is not None:
+            total = max(self.lignes.total, 1)
+            self.scrollbar.set(self.premiere / total, min(1.0, (self.premiere + len(lignes)) / total))
+        
+        # Précharger les pages voisines une fois l'affichage terminé
+        if self._prechargement is not None:
+            self.after_cancel(self._prechargement)
+        self._prechargement = self.after_idle(self._precharger)
+    
+    def _precharger(self):
+        self._prechargement = None
+        if self.lignes is None:
+            return
+        if self._synchrone():
+            self.lignes.prefetch(self.premiere, self.visibles)
+        else:
+            self._demander_pages(self.lignes.prefetch_pages(self.premiere, self.visibles))
+    
+    def _on_scrollbar(self, action, valeur, unite=None):
+        """Commande de la barre de défilement ('moveto' ou 'scroll')"""
+        if action == 'moveto':
+            self.premiere = int(float(valeur) * self.lignes.total) if self.lignes else 0
+            self._afficher()
+        elif action == 'scroll':
+            self.defiler(int(valeur) * (self.visibles if unite == 'pages' else 1))
+    
+    def _on_molette(self, event):
+        return self.defiler(-3 if event.delta > 0 else 3)
+    
+    def _on_fleche(self, pas):
+        """Les flèches font défiler la liste quand la ligne active est au bord"""
+        items = self.get_children()
+        if not items or self.focus() != items[0 if pas < 0 else -1]:
+            return None
+        self.defiler(pas)
+        items = self.get_children()
+        if items:
+            item = items[0 if pas < 0 else -1]
+            self._selection.clear()
+            self.focus(item)
+            self.selection_set(item)
+        return 'break'
+    
+    def _on_clic(self, event):
+        if self.identify_region(event.x, event.y) in ('cell', 'tree'):
+            self._selection.clear()
+    
+    def _on_selection(self, event):
+        """Met à jour la sélection pour la partie visible de la liste (hors lignes d'attente)"""
+        self._selection.difference_update(self.get_children())
+        self._selection.update(item for item in self.selection() if not self.en_attente(item))
+    
+    def _on_configure(self, event):
+        """Adapte le nombre de lignes affichées à la hauteur du widget"""
+        items = self.get_children()
+        bbox = self.bbox(items[0]) if items else ''
+        if not bbox:
+            return
+        # bbox de la première ligne : y = hauteur de l'en-tête, hauteur = ligne
+        visibles = max(1, (event.height - bbox[1]) // bbox[3])
+        if visibles != self.visibles:
+            self.visibles = visibles
+            self._afficher()
+
 class GestiaGUI:
     def __init__(self):
         self.root = tk.Tk()
@@ -94,8 +549,17 @@ class GestiaGUI:
         self.db = db_manager.get_session()
         init_database()
         
+        # Lectures en arrière-plan (une session par thread de travail)
+        self.executeur = BackgroundExecutor(self.root, db_manager.get_session,
+                                            on_busy=self.afficher_chargement,
+                                            on_error=self.afficher_erreur_chargement)
+        
         # Variables
         self.current_frame = None
+        self.recherche_programmee = None
+        
+        # Index de recherche des appareils construit dès le démarrage
+        self.executeur.submit(AppareilService.indexer_recherche_appareils, lambda nombre: None)
         
         # Création de l'interface
         self.create_widgets()
@@ -129,6 +593,10 @@ class GestiaGUI:
                                style='Title.TLabel')
         title_label.grid(row=0, column=0, columnspan=2, pady=(0, 20))
         
+        # Indicateur de chargement (lectures en arrière-plan)
+        self.chargement_label = ttk.Label(main_frame, text="", foreground='#7f8c8d')
+        self.chargement_label.grid(row=0, column=1, pady=(0, 20), sticky=tk.E)
+        
         # Frame de navigation (gauche)
         nav_frame = ttk.Frame(main_frame, relief='raised', borderwidth=2)
         nav_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=(0, 10))
@@ -162,6 +630,12 @@ class GestiaGUI:
         
     def clear_content(self):
         """Efface le contenu actuel"""
+        # Les lectures de l'écran quitté n'ont plus où s'afficher
+        self.executeur.cancel_group(GROUPE_CONTENU)
+        self.executeur.cancel_group(GROUPE_RECHERCHE)
+        if self.recherche_programmee is not None:
+            self.root.after_cancel(self.recherche_programmee)
+            self.recherche_programmee = None
         for widget in self.content_frame.winfo_children():
             widget.destroy()
     
@@ -179,40 +653,54 @@ class GestiaGUI:
         stats_frame.columnconfigure(0, weight=1)
         stats_frame.columnconfigure(1, weight=1)
         
-        # Récupération des statistiques
-        try:
-            appareils = AppareilService.lister_appareils(self.db)
-            techniciens = TechnicienService.lister_techniciens(self.db)
-            
-            # Statistiques des appareils
-            stats_app = ttk.LabelFrame(stats_frame, text="📱 Appareils", padding="10")
-            stats_app.grid(row=0, column=0, padx=10, pady=10, sticky=(tk.W, tk.E, tk.N, tk.S))
-            
-            ttk.Label(stats_app, text=f"Total: {len(appareils)}", font=('Arial', 14, 'bold')).pack()
-            
-            if appareils:
-                etats = {}
-                for app in appareils:
-                    etat = app.Etat.value
-                    etats[etat] = etats.get(etat, 0) + 1
-                
-                for etat, count in etats.items():
-                    ttk.Label(stats_app, text=f"{etat}: {count}").pack()
-            
-            # Statistiques des techniciens
-            stats_tech = ttk.LabelFrame(stats_frame, text="👨‍🔧 Techniciens", padding="10")
-            stats_tech.grid(row=0, column=1, padx=10, pady=10, sticky=(tk.W, tk.E, tk.N, tk.S))
-            
-            ttk.Label(stats_tech, text=f"Total: {len(techniciens)}", font=('Arial', 14, 'bold')).pack()
-            
-            if techniciens:
-                for tech in techniciens[:5]:  # Afficher les 5 premiers
-                    ttk.Label(stats_tech, text=f"{tech.Nom} {tech.Prenom}").pack()
-                if len(techniciens) > 5:
-                    ttk.Label(stats_tech, text=f"... et {len(techniciens) - 5} autres").pack()
-            
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Erreur lors du chargement des statistiques: {e}")
+        # Récupération des statistiques en arrière-plan
+        self.executeur.submit(
+            StatistiquesService.tableau_de_bord,
+            lambda stats: self.afficher_tableau_de_bord(stats_frame, stats),
+            group=GROUPE_CONTENU
+        )
+    
+    def afficher_tableau_de_bord(self, stats_frame, stats):
+        """Affiche les statistiques du tableau de bord"""
+        # Statistiques des appareils
+        stats_app = ttk.LabelFrame(stats_frame, text="📱 Appareils", padding="10")
+        stats_app.grid(row=0, column=0, padx=10, pady=10, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        ttk.Label(stats_app, text=f"Total: {stats['total_appareils']}", font=('Arial', 14, 'bold')).pack()
+        
+        for etat, count in stats['par_etat']:
+            ttk.Label(stats_app, text=f"{etat.value}: {count}").pack()
+        
+        marques = stats['par_marque']
+        if marques:
+            ttk.Separator(stats_app, orient=tk.HORIZONTAL).pack(fill=tk.X, pady=5)
+            for marque, count in marques[:5]:  # Les 5 marques les plus représentées
+                ttk.Label(stats_app, text=f"{marque}: {count}").pack()
+            if len(marques) > 5:
+                ttk.Label(stats_app, text=f"... et {len(marques) - 5} autres marques").pack()
+        
+        # Statistiques des techniciens
+        stats_tech = ttk.LabelFrame(stats_frame, text="👨‍🔧 Techniciens", padding="10")
+        stats_tech.grid(row=0, column=1, padx=10, pady=10, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        ttk.Label(stats_tech, text=f"Total: {stats['total_techniciens']}", font=('Arial', 14, 'bold')).pack()
+        
+        techniciens = stats['sessions_par_technicien']
+        for _, nom, prenom, count in techniciens[:5]:  # Les 5 plus actifs
+            ttk.Label(stats_tech, text=f"{nom} {prenom}: {count} sessions").pack()
+        if len(techniciens) > 5:
+            ttk.Label(stats_tech, text=f"... et {len(techniciens) - 5} autres").pack()
+        
+        # Résultats des tests et réparations
+        stats_res = ttk.LabelFrame(stats_frame, text="🧪 Résultats", padding="10")
+        stats_res.grid(row=1, column=0, columnspan=2, padx=10, pady=10, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        for resultat, count in stats['sessions_par_resultat']:
+            ttk.Label(stats_res, text=f"Sessions {resultat.value}: {count}").pack()
+        for resultat, count in stats['diagnostics_par_resultat']:
+            libelle = resultat.value if resultat else "En cours"
+            ttk.Label(stats_res, text=f"Diagnostics {libelle}: {count}").pack()
+
     
     def show_appareils(self):
         """Affiche la gestion des appareils"""
@@ -230,10 +718,23 @@ class GestiaGUI:
                   command=self.creer_appareil_gui, style='Success.TButton').pack(side=tk.LEFT, padx=5)
         ttk.Button(action_frame, text="🔄 Actualiser", 
                   command=self.refresh_appareils, style='Info.TButton').pack(side=tk.LEFT, padx=5)
-        
-        # Treeview pour la liste des appareils
+        ttk.Button(action_frame, text="🏷️ État de la sélection",
+                  command=self.modifier_etat_selection_gui, style='Warning.TButton').pack(side=tk.LEFT, padx=5)
+        self.appareils_count_label = ttk.Label(action_frame, text="")
+        self.appareils_count_label.pack(side=tk.LEFT, padx=10)
+        
+        # Recherche instantanée (ID, N° série, marque, modèle)
+        ttk.Label(action_frame, text="🔍 Rechercher :").pack(side=tk.LEFT, padx=(20, 5))
+        self.appareils_recherche = ''
+        self.recherche_var = tk.StringVar()
+        self.recherche_var.trace_add('write', self.programmer_recherche_appareils)
+        ttk.Entry(action_frame, textvariable=self.recherche_var, width=30).pack(side=tk.LEFT)
+        
+        # Treeview virtualisé pour la liste des appareils (sélection multiple avec Ctrl/Maj)
         columns = ('ID', 'Marque', 'Modèle', 'N° Série', 'Date Réception', 'État', 'Date Vente')
-        tree = TreeviewSortable(self.content_frame, columns=columns, show='headings', height=15)
+        tree = TreeviewVirtuel(self.content_frame, tris=TRIS_LISTE_APPAREILS, executeur=self.executeur,
+                               groupe=GROUPE_CONTENU, columns=columns, show='headings', height=15,
+                               selectmode='extended')
         
         # Configuration des colonnes
         for col in columns:
@@ -249,9 +750,9 @@ class GestiaGUI:
         tree.column('État', width=100)
         tree.column('Date Vente', width=100)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(self.content_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
+        # Scrollbar (position dans la liste complète, pas dans le widget)
+        scrollbar = ttk.Scrollbar(self.content_frame, orient=tk.VERTICAL)
+        tree.attacher_scrollbar(scrollbar)
         
         tree.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=(0, 10))
         scrollbar.grid(row=2, column=1, sticky=(tk.N, tk.S))
@@ -262,34 +763,141 @@ class GestiaGUI:
         # Stocker la référence pour l'actualisation
         self.appareils_tree = tree
         
-        # Charger les données
-        self.refresh_appareils()
+        # Charger les données (les plus récents d'abord)
+        self.appareils_version = None
+        self.executeur.submit(
+            partial(self.lire_premiere_page_appareils, tri='-DateReception'),
+            partial(self.afficher_appareils, tri='-DateReception'),
+            group=GROUPE_CONTENU
+        )
         
-        # Double-clic pour consulter
-        tree.bind('<Double-1>', self.consulter_appareil_gui)
+        # Double-clic pour consulter (le double-clic sur un en-tête trie la liste)
+        tree.bind('<Double-1>', self.consulter_appareil_gui, add='+')
     
     def refresh_appareils(self):
-        """Actualise la liste des appareils"""
-        if hasattr(self, 'appareils_tree'):
-            # Effacer les données existantes
-            for item in self.appareils_tree.get_children():
-                self.appareils_tree.delete(item)
-            
-            # Charger les nouvelles données
-            try:
-                appareils = AppareilService.lister_appareils(self.db)
-                for app in appareils:
-                    self.appareils_tree.insert('', tk.END, values=(
-                        app.ID_Appareil,
-                        app.Marque,
-                        app.Modele,
-                        app.NumSerie,
-                        app.DateReception.strftime('%d/%m/%Y'),
-                        app.Etat.value,
-                        app.DateMiseEnVente.strftime('%d/%m/%Y') if app.DateMiseEnVente else '-'
-                    ))
-            except Exception as e:
-                messagebox.showerror("Erreur", f"Erreur lors du chargement: {e}")
+        """Actualise la liste des appareils avec les seules lignes modifiées depuis la dernière lecture"""
+        if hasattr(self, 'appareils_tree') and self.appareils_tree.winfo_exists():
+            self.executeur.submit(
+                partial(AppareilService.lister_lignes_appareils_modifiees, depuis=self.appareils_version),
+                self.appliquer_modifications_appareils,
+                group=GROUPE_CONTENU
+            )
+    
+    def appliquer_modifications_appareils(self, modifications):
+        """Applique les modifications à la liste, ou la relit si elles déplacent des lignes"""
+        if modifications['complet'] and self.appareils_tree.appliquer_modifications(modifications['appareils'],
+                                                                                    modifications['supprimes']):
+            self.appareils_version = modifications['version']
+        elif self.appareils_recherche:
+            self.rechercher_appareils_gui()
+        else:
+            self.executeur.submit(
+                partial(self.lire_premiere_page_appareils, tri=self.appareils_tree.tri),
+                self.afficher_appareils,
+                group=GROUPE_CONTENU
+            )
+    
+    @staticmethod
+    def lire_premiere_page_appareils(db, tri):
+        """
+        Lit la première page de la liste (avec l'estimation du total), sur un thread de travail.
+        
+        La version de la dernière modification est lue dans le même état de
+        la base : elle sert de repère à l'actualisation suivante.
+        """
+        with read_snapshot(db):
+            version = AppareilService.derniere_modification_appareils(db)
+            page = AppareilService.lister_lignes_appareils_page(db, tri=tri, limite=DEFAULT_PAGE_SIZE)
+        page['version'] = version
+        return page
+    
+    def afficher_appareils(self, page, tri=None):
+        """Affiche la liste à partir de sa première page lue en arrière-plan (tri : nouvelle liste)"""
+        try:
+            if tri:
+                self.appareils_tree.charger(self.charger_page_appareils, tri, page)
+            else:
+                self.appareils_tree.actualiser(page)
+            self.appareils_version = page['version']
+            self.afficher_nombre_appareils()
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Erreur lors du chargement: {e}")
+    
+    @staticmethod
+    def charger_page_appareils(db, tri, apres, decalage, limite):
+        """Lit une page de la liste des appareils (lignes dans l'ordre des colonnes), sur un thread de travail"""
+        return AppareilService.lister_lignes_appareils_page(
+            db, tri=tri, apres=apres, decalage=decalage, limite=limite
+        )
+    
+    def afficher_nombre_appareils(self):
+        """Affiche le nombre d'appareils de la liste (estimé au-delà du plafond de comptage)"""
+        lignes = self.appareils_tree.lignes
+        total = lignes.total if lignes.total_exact else f"≈ {lignes.total}"
+        self.appareils_count_label.config(text=f"{total} appareils")
+    
+    def programmer_recherche_appareils(self, *args):
+        """Relance le délai de recherche à chaque frappe"""
+        if self.recherche_programmee is not None:
+            self.root.after_cancel(self.recherche_programmee)
+        self.recherche_programmee = self.root.after(DELAI_RECHERCHE_MS, self.rechercher_appareils_gui)
+    
+    def rechercher_appareils_gui(self):
+        """Lance la recherche saisie en arrière-plan, ou revient à la liste complète si elle est vide"""
+        self.recherche_programmee = None
+        if not self.appareils_tree.winfo_exists():
+            return
+        texte = self.recherche_var.get().strip()
+        self.executeur.cancel_group(GROUPE_RECHERCHE)
+        if texte:
+            # Une lecture de la liste complète arrivant après les résultats les remplacerait
+            self.executeur.cancel_group(GROUPE_CONTENU)
+            self.executeur.submit(
+                partial(AppareilService.rechercher_appareils, texte=texte),
+                partial(self.afficher_resultats_recherche, texte),
+                group=GROUPE_RECHERCHE
+            )
+        elif self.appareils_recherche:
+            self.appareils_recherche = ''
+            tri = self.appareils_tree.tri or '-DateReception'
+            self.executeur.submit(
+                partial(self.lire_premiere_page_appareils, tri=tri),
+                partial(self.afficher_appareils, tri=tri),
+                group=GROUPE_RECHERCHE
+            )
+    
+    def afficher_resultats_recherche(self, texte, resultat):
+        """Affiche les résultats de la recherche dans la liste (les plus pertinents d'abord)"""
+        self.appareils_recherche = texte
+        self.appareils_tree.charger(partial(self.charger_page_resultats, resultat['appareils']), '',
+                                    en_memoire=True)
+        self.appareils_version = resultat['version']
+        nombre = len(resultat['appareils'])
+        self.appareils_count_label.config(
+            text=f"{nombre} résultats" if resultat['complet'] else f"{nombre}+ résultats"
+        )
+    
+    @staticmethod
+    def charger_page_resultats(lignes, db, tri, apres, decalage, limite):
+        """
+        Page des résultats de recherche, au format de lister_lignes_appareils_page.
+        
+        Les résultats sont en mémoire (db n'est pas utilisée) : la clé de page
+        est la position, et le tri par en-tête se fait sur les clés typées des
+        lignes.
+        """
+        if tri:
+            index = LigneAppareil._fields.index(tri.lstrip('-'))
+            lignes = sorted(lignes, key=lambda ligne: (cle_de_tri(ligne[index]), ligne[0]),
+                            reverse=tri.startswith('-'))
+        debut = (apres or 0) + decalage
+        fin = debut + limite
+        return {
+            'appareils': lignes[debut:fin],
+            'cle_suivante': fin if fin < len(lignes) else None,
+            'total': len(lignes),
+            'total_exact': True,
+        }
     
     def creer_appareil_gui(self):
         """Interface pour créer un nouvel appareil"""
@@ -378,7 +986,8 @@ class GestiaGUI:
                 
                 # Créer l'appareil
                 date_rec = date.fromisoformat(date_var.get())
-                appareil = AppareilService.creer_appareil(self.db, marque, modele_var.get().strip(), num_serie_var.get().strip(), date_rec)
+                with transaction(self.db):
+                    appareil = AppareilService.creer_appareil(self.db, marque, modele_var.get().strip(), num_serie_var.get().strip(), date_rec)
                 
                 messagebox.showinfo("Succès", f"Appareil créé avec l'ID: {appareil.ID_Appareil}")
                 self.refresh_appareils()
@@ -398,24 +1007,35 @@ class GestiaGUI:
     
     def consulter_appareil_gui(self, event):
         """Interface pour consulter un appareil"""
+        if self.appareils_tree.identify_region(event.x, event.y) == 'heading':
+            return
         selection = self.appareils_tree.selection()
-        if not selection:
+        if not selection or self.appareils_tree.en_attente(selection[0]):
             return
         
         item = self.appareils_tree.item(selection[0])
         id_appareil = item['values'][0]
         
+        # Récupérer le dossier complet de l'appareil (techniciens compris) en
+        # arrière-plan ; un nouveau double-clic remplace la consultation en cours
+        self.executeur.cancel_group(GROUPE_DOSSIER)
+        self.executeur.submit(
+            lambda db: AppareilService.obtenir_dossier_appareil(db, id_appareil),
+            self.afficher_dossier_appareil,
+            group=GROUPE_DOSSIER
+        )
+    
+    def afficher_dossier_appareil(self, appareil):
+        """Affiche le dossier d'un appareil dans une fenêtre de détails"""
         try:
-            # Récupérer le récapitulatif complet de l'appareil
-            recapitulatif = AppareilService.obtenir_recapitulatif_appareil(self.db, id_appareil)
-            if not recapitulatif:
+            if not appareil:
                 messagebox.showerror("Erreur", "Appareil non trouvé")
                 return
             
-            appareil = recapitulatif['appareil']
-            sessions = recapitulatif['sessions']
-            diagnostics = recapitulatif['diagnostics']
-            stats = recapitulatif['statistiques']
+            id_appareil = appareil.ID_Appareil
+            sessions = appareil.sessions
+            diagnostics = appareil.diagnostics
+            stats = appareil.statistiques
             
             # Créer une fenêtre de détails avec onglets
             dialog = tk.Toplevel(self.root)
@@ -449,7 +1069,7 @@ class GestiaGUI:
             
             # Bouton pour modifier l'état
             ttk.Button(info_frame, text="Modifier l'état", 
-                      command=lambda: self.modifier_etat_appareil_gui(appareil.ID_Appareil, dialog),
+                      command=lambda: self.modifier_etat_appareil_gui([appareil.ID_Appareil], dialog),
                       style='Info.TButton').pack(pady=10)
             
             # Onglet 2: Récapitulatif des tests et diagnostics
@@ -602,14 +1222,11 @@ class GestiaGUI:
                 
                 # Remplir les données des sessions
                 for session in sessions:
-                    technicien = TechnicienService.obtenir_technicien(self.db, session.ID_Technicien)
-                    nom_tech = f"{technicien.Nom} {technicien.Prenom}" if technicien else "Inconnu"
-                    
                     tree_sessions.insert('', tk.END, values=(
                         session.ID_Session,
                         session.DateDebut.strftime('%d/%m/%Y'),
                         session.DateFin.strftime('%d/%m/%Y') if session.DateFin else '-',
-                        nom_tech,
+                        session.Technicien,
                         session.ResultatFinal.value,
                         session.Commentaires or '-'
                     ))
@@ -647,9 +1264,6 @@ class GestiaGUI:
                 
                 # Remplir les données des diagnostics
                 for diag in diagnostics:
-                    technicien = TechnicienService.obtenir_technicien(self.db, diag.ID_Technicien)
-                    nom_tech = f"{technicien.Nom} {technicien.Prenom}" if technicien else "Inconnu"
-                    
                     # Tronquer le problème et les actions pour l'affichage
                     probleme = diag.DescriptionProbleme[:50] + "..." if len(diag.DescriptionProbleme) > 50 else diag.DescriptionProbleme
                     actions = diag.ActionsReparation[:50] + "..." if diag.ActionsReparation and len(diag.ActionsReparation) > 50 else (diag.ActionsReparation or '-')
@@ -658,7 +1272,7 @@ class GestiaGUI:
                         diag.ID_DiagRep,
                         diag.DateDebut.strftime('%d/%m/%Y'),
                         diag.DateFin.strftime('%d/%m/%Y') if diag.DateFin else '-',
-                        nom_tech,
+                        diag.Technicien,
                         probleme,
                         actions,
                         diag.ResultatReparation.value if diag.ResultatReparation else 'En cours'
@@ -670,15 +1284,25 @@ class GestiaGUI:
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors de la consultation: {e}")
     
-    def modifier_etat_appareil_gui(self, id_appareil, parent_dialog):
-        """Interface pour modifier l'état d'un appareil"""
-        dialog = tk.Toplevel(parent_dialog)
+    def modifier_etat_selection_gui(self):
+        """Modifie l'état de tous les appareils sélectionnés dans la liste"""
+        # La sélection peut contenir des appareils sortis de la zone visible
+        ids = self.appareils_tree.ids_selectionnes()
+        if not ids:
+            messagebox.showwarning("Attention", "Sélectionnez un ou plusieurs appareils")
+            return
+        self.modifier_etat_appareil_gui(ids)
+    
+    def modifier_etat_appareil_gui(self, ids, parent_dialog=None):
+        """Interface pour modifier l'état d'un ou plusieurs appareils"""
+        dialog = tk.Toplevel(parent_dialog or self.root)
         dialog.title("Modifier l'état")
         dialog.geometry("300x250")
-        dialog.transient(parent_dialog)
+        dialog.transient(parent_dialog or self.root)
         dialog.grab_set()
         
-        ttk.Label(dialog, text="Nouvel état:").pack(pady=20)
+        texte = "Nouvel état:" if len(ids) == 1 else f"Nouvel état des {len(ids)} appareils:"
+        ttk.Label(dialog, text=texte).pack(pady=20)
         
         # Variable pour l'état sélectionné
         etat_var = tk.StringVar()
@@ -690,11 +1314,18 @@ class GestiaGUI:
         def valider():
             try:
                 nouvel_etat = next(etat for etat in EtatAppareil if etat.value == etat_var.get())
-                if AppareilService.modifier_etat_appareil(self.db, id_appareil, nouvel_etat):
-                    messagebox.showinfo("Succès", "État modifié avec succès!")
+                # En cas d'échec, la session partagée de l'interface est remise en état
+                with transaction(self.db):
+                    resultat = AppareilService.modifier_etat_appareils(self.db, nouvel_etat, ids=ids)
+                if resultat['modifies']:
+                    message = f"État modifié pour {resultat['modifies']} appareil(s) !"
+                    if resultat['manquants']:
+                        message += f"\nIntrouvables : {', '.join(resultat['manquants'])}"
+                    messagebox.showinfo("Succès", message)
                     self.refresh_appareils()
                     dialog.destroy()
-                    parent_dialog.destroy()
+                    if parent_dialog:
+                        parent_dialog.destroy()
                 else:
                     messagebox.showerror("Erreur", "Appareil non trouvé")
             except Exception as e:
@@ -741,25 +1372,23 @@ class GestiaGUI:
         # Stocker la référence
         self.techniciens_tree = tree
         
-        # Charger les données
+        # Charger les données (toutes les lignes, puis seulement les modifications)
+        self.techniciens_version = None
         self.refresh_techniciens()
     
     def refresh_techniciens(self):
-        """Actualise la liste des techniciens"""
-        if hasattr(self, 'techniciens_tree'):
-            for item in self.techniciens_tree.get_children():
-                self.techniciens_tree.delete(item)
-            
-            try:
-                techniciens = TechnicienService.lister_techniciens(self.db)
-                for tech in techniciens:
-                    self.techniciens_tree.insert('', tk.END, values=(
-                        tech.ID_Technicien,
-                        tech.Nom,
-                        tech.Prenom
-                    ))
-            except Exception as e:
-                messagebox.showerror("Erreur", f"Erreur lors du chargement: {e}")
+        """Actualise la liste des techniciens avec les seules lignes modifiées depuis la dernière lecture"""
+        if hasattr(self, 'techniciens_tree') and self.techniciens_tree.winfo_exists():
+            self.executeur.submit(
+                partial(TechnicienService.lister_techniciens_modifies, depuis=self.techniciens_version),
+                self.afficher_techniciens,
+                group=GROUPE_CONTENU
+            )
+    
+    def afficher_techniciens(self, modifications):
+        """Ajoute, met à jour ou retire les techniciens lus, sans toucher aux autres lignes"""
+        self.techniciens_tree.appliquer_modifications(modifications['techniciens'], modifications['supprimes'])
+        self.techniciens_version = modifications['version']
     
     def creer_technicien_gui(self):
         """Interface pour créer un nouveau technicien"""
@@ -841,11 +1470,21 @@ class GestiaGUI:
         # Placeholder pour les statistiques détaillées
         ttk.Label(self.content_frame, text="Statistiques détaillées en cours de développement...").grid(row=1, column=0, pady=50)
     
+    def afficher_chargement(self, en_cours):
+        """Indicateur de chargement pendant les lectures en arrière-plan"""
+        self.chargement_label.config(text="⏳ Chargement..." if en_cours else "")
+        self.root.config(cursor='watch' if en_cours else '')
+    
+    def afficher_erreur_chargement(self, erreur):
+        """Erreur d'une lecture en arrière-plan"""
+        messagebox.showerror("Erreur", f"Erreur lors du chargement: {erreur}")
+    
     def run(self):
         """Lance l'application"""
         try:
             self.root.mainloop()
         finally:
+            self.executeur.shutdown()
             if hasattr(self, 'db'):
                 self.db.close()
 
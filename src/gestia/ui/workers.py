@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Workers - Accès aux données en arrière-plan GESTIA
+==================================================
+
+Exécute les lectures de l'interface graphique hors du thread Tk, pour que
+la fenêtre reste réactive sur une base lente ou verrouillée.
+
+Chaque thread de travail a sa propre session. Les résultats reviennent par
+une file lue depuis le thread Tk (root.after) : les fonctions de rappel, et
+donc tous les appels Tk, s'exécutent sur le thread de l'interface. Les
+objets ORM lus sont détachés de la session du thread avant d'être livrés.
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads de travail et intervalle de lecture des résultats par défaut
+DEFAULT_MAX_WORKERS = 2
+POLL_INTERVAL_MS = 25
+
+class BackgroundTask:
+    """Tâche soumise à BackgroundExecutor, annulable jusqu'à sa livraison"""
+
+    def __init__(self, group, on_success, on_error):
+        self.group = group
+        self.on_success = on_success
+        self.on_error = on_error
+        self.cancelled = False
+        self._future = None
+
+    def cancel(self):
+        """Annule la tâche : elle ne démarre pas, ou son résultat est ignoré"""
+        self.cancelled = True
+        if self._future is not None:
+            self._future.cancel()
+
+class BackgroundExecutor:
+    """
+    Exécuteur de lectures en arrière-plan pour une fenêtre Tk.
+
+    submit(), cancel_group() et shutdown() s'appellent depuis le thread Tk.
+    on_busy(True / False) est appelé quand des tâches commencent à être en
+    attente, puis quand il n'y en a plus (indicateur de chargement).
+    on_error(exception) traite les erreurs des tâches sans on_error propre.
+    """
+
+    def __init__(self, root, session_factory, max_workers=DEFAULT_MAX_WORKERS, on_busy=None, on_error=None):
+        self._root = root
+        self._session_factory = session_factory
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gestia-worker')
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+        self._results = queue.Queue()
+        self._pending = set()
+        self._poll_id = None
+        self._closed = False
+        self.on_busy = on_busy
+        self.on_error = on_error
+
+    @property
+    def busy(self):
+        """Indique si des tâches sont en attente de livraison"""
+        return bool(self._pending)
+
+    def submit(self, work, on_success, on_error=None, group=None):
+        """
+        Exécute work(db) sur un thread de travail.
+
+        Args:
+            work: fonction (session) -> résultat, indépendant de la session
+            on_success: appelé sur le thread Tk avec le résultat
+            on_error: appelé sur le thread Tk avec l'exception (défaut : on_error de l'exécuteur)
+            group: nom de groupe, pour annuler ensemble les tâches d'un écran
+
+        Returns:
+            BackgroundTask: la tâche, annulable
+        """
+        task = BackgroundTask(group, on_success, on_error or self.on_error)
+        was_busy = self.busy
+        self._pending.add(task)
+        task._future = self._pool.submit(self._run, task, work)
+        if not was_busy and self.on_busy:
+            self.on_busy(True)
+        if self._poll_id is None:
+            self._poll_id = self._root.after(POLL_INTERVAL_MS, self._poll)
+        return task
+
+    def cancel_group(self, group):
+        """Annule les tâches en attente d'un groupe (écran quitté par exemple)"""
+        for task in [task for task in self._pending if task.group == group]:
+            self._cancel(task)
+
+    def cancel_all(self):
+        """Annule toutes les tâches en attente"""
+        for task in list(self._pending):
+            self._cancel(task)
+
+    def shutdown(self):
+        """
+        Annule les tâches, attend la fin des requêtes en cours et ferme les sessions.
+        
+        Peut être appelé après la destruction de la fenêtre : aucun appel Tk.
+        """
+        self._closed = True
+        # Les tâches non démarrées sont annulées une à une (cancel_futures
+        # demande Python 3.9)
+        for task in self._pending:
+            task.cancel()
+        self._pending.clear()
+        self._pool.shutdown(wait=True)
+        with self._sessions_lock:
+            for db in self._sessions:
+                db.close()
+            self._sessions.clear()
+
+    def _cancel(self, task):
+        task.cancel()
+        self._pending.discard(task)
+        if not self.busy and self.on_busy:
+            self.on_busy(False)
+
+    def _session(self):
+        """Session propre au thread de travail courant"""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = self._session_factory()
+            with self._sessions_lock:
+                self._sessions.append(db)
+        return db
+
+    def _run(self, task, work):
+        """Exécute une tâche sur un thread de travail"""
+        if task.cancelled:
+            return
+        result = error = None
+        try:
+            db = self._session()
+            try:
+                result = work(db)
+            finally:
+                # Détacher les objets lus (ils restent lisibles) puis terminer la
+                # transaction de lecture pour ne pas garder d'instantané ouvert
+                db.expunge_all()
+                db.rollback()
+        except Exception as e:
+            error = e
+        self._results.put((task, result, error))
+
+    def _poll(self):
+        """Livre les résultats arrivés, sur le thread Tk"""
+        self._poll_id = None
+        if self._closed:
+            return
+        try:
+            while True:
+                try:
+                    task, result, error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                if task not in self._pending:
+                    continue  # Tâche annulée entre-temps
+                self._pending.discard(task)
+                if error is None:
+                    task.on_success(result)
+                elif task.on_error:
+                    task.on_error(error)
+        finally:
+            if self._pending:
+                if self._poll_id is None:
+                    self._poll_id = self._root.after(POLL_INTERVAL_MS, self._poll)
+            elif self.on_busy:
+                self.on_busy(False)
@@ -0,0 +1,688 @@
+#!/usr/bin/env python3
+"""
+Tests pour les sauvegardes GESTIA
+=================================
+
+Tests unitaires pour le moteur de sauvegarde à chaud.
+"""
+
+import pytest
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import sys
+import os
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from sqlalchemy import text
+
+from gestia.backup import (online_backup, ChunkStore, compressed_backup, compressed_restore,
+                           detect_method, BackupCatalog, open_catalog, verify_backups,
+                           record_result, file_sha256, point_in_time_restore, archive_changelog,
+                           swap_restore, restore_environment, install_database, snapshot_stream)
+from gestia.backup import changelog
+from gestia.core.database import DatabaseManager, engine_registry
+
+def creer_base(path, lignes=5000):
+    """Crée une base WAL de test avec une table remplie"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, x BLOB)")
+    conn.executemany("INSERT INTO t (x) VALUES (randomblob(400))", ([] for _ in range(lignes)))
+    conn.commit()
+    conn.close()
+
+class TestOnlineBackup:
+    """Tests pour la sauvegarde à chaud"""
+    
+    def test_copie_coherente_sous_ecritures(self, tmp_path):
+        """La copie reste cohérente pendant des écritures concurrentes"""
+        source = str(tmp_path / 'gestia.db')
+        dest = str(tmp_path / 'backup.db')
+        creer_base(source)
+        
+        stop = threading.Event()
+        ecritures = []
+        
+        def writer():
+            conn = sqlite3.connect(source, timeout=5)
+            while not stop.is_set():
+                conn.execute("INSERT INTO t (x) VALUES (randomblob(400))")
+                conn.commit()
+                ecritures.append(1)
+            conn.close()
+        
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            progression = []
+            stats = online_backup(source, dest, pages=8, sleep=0.001,
+                                  progress=lambda copiees, total: progression.append((copiees, total)))
+        finally:
+            stop.set()
+            thread.join()
+        
+        assert stats['snapshot'] is True
+        assert progression[-1][0] == progression[-1][1] == stats['pages']
+        assert len(progression) == stats['steps']
+        assert len(ecritures) > 0
+        
+        copie = sqlite3.connect(dest)
+        assert copie.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+        assert copie.execute("SELECT count(*) FROM t").fetchone()[0] >= 5000
+        copie.close()
+        assert not os.path.exists(dest + '.partial')
+    
+    def test_source_absente(self, tmp_path):
+        """Une source inexistante lève FileNotFoundError"""
+        with pytest.raises(FileNotFoundError):
+            online_backup(str(tmp_path / 'absente.db'), str(tmp_path / 'backup.db'))
+    
+    def test_instantane_sans_bloquer_les_ecrivains(self, tmp_path):
+        """Le fichier principal est figé dès la fin d'un lecteur long, sans copie ni écritures bloquées"""
+        source = str(tmp_path / 'gestia.db')
+        creer_base(source, lignes=100)
+        ecrivain = sqlite3.connect(source, timeout=0, isolation_level=None)
+        ecrivain.execute("PRAGMA wal_autocheckpoint=0")
+        ecrivain.execute("INSERT INTO t (x) VALUES (randomblob(400))")
+        # Lecteur long : le WAL ne peut pas être reporté en entier avant sa fin
+        lecteur = sqlite3.connect(source, isolation_level=None, check_same_thread=False)
+        lecteur.execute("BEGIN")
+        lecteur.execute("SELECT count(*) FROM t").fetchone()
+        ecrivain.execute("INSERT INTO t (x) VALUES (randomblob(400))")
+        fin_lecture = threading.Timer(0.1, lecteur.execute, ("COMMIT",))
+        fin_lecture.start()
+        
+        with snapshot_stream(source, timeout=5) as (reader, info):
+            # Écriture immédiate (timeout=0) pendant la lecture de l'instantané
+            ecrivain.execute("INSERT INTO t (x) VALUES (randomblob(400))")
+            image = reader.read()
+        fin_lecture.join()
+        
+        assert not info['staged']
+        assert [f for f in os.listdir(tmp_path) if 'snapshot' in f] == []
+        copie = tmp_path / 'copie.db'
+        copie.write_bytes(image)
+        conn = sqlite3.connect(str(copie))
+        assert conn.execute("SELECT count(*) FROM t").fetchone()[0] == 102
+        conn.close()
+        lecteur.close()
+        ecrivain.close()
+    
+    def test_copie_intermediaire_sur_demande(self, tmp_path):
+        """Si l'instantané ne peut pas être figé, la copie n'est faite que dans le dossier autorisé"""
+        source = str(tmp_path / 'gestia.db')
+        creer_base(source, lignes=100)
+        ecrivain = sqlite3.connect(source, isolation_level=None)
+        ecrivain.execute("PRAGMA wal_autocheckpoint=0")
+        lecteur = sqlite3.connect(source, isolation_level=None)
+        lecteur.execute("BEGIN")
+        lecteur.execute("SELECT count(*) FROM t").fetchone()
+        ecrivain.execute("INSERT INTO t (x) VALUES (randomblob(400))")
+        
+        with pytest.raises(RuntimeError):
+            with snapshot_stream(source, timeout=0.2):
+                pass
+        
+        dossier = tmp_path / 'sauvegardes'
+        with snapshot_stream(source, timeout=0.2, staging_dir=str(dossier)) as (reader, info):
+            assert len(os.listdir(dossier)) == 1
+            image = reader.read()
+        lecteur.execute("COMMIT")
+        
+        assert info['staged'] and os.listdir(dossier) == []
+        assert len(image) == info['size']
+        lecteur.close()
+        ecrivain.close()
+
+class TestChunkStore:
+    """Tests pour le magasin de sauvegardes incrémentales"""
+    
+    def test_deduplication_et_restauration(self, tmp_path):
+        """Une seconde sauvegarde n'écrit que les blocs modifiés et se restaure à l'identique"""
+        source = str(tmp_path / 'gestia.db')
+        creer_base(source)
+        store = ChunkStore(str(tmp_path / 'store'))
+        
+        premiere = store.create_backup(source, 'b1', chunk_size=4096)
+        assert premiere['new_chunks'] == len(set(premiere['chunks']))
+        
+        conn = sqlite3.connect(source)
+        conn.execute("UPDATE t SET x = randomblob(400) WHERE id = 42")
+        conn.commit()
+        conn.close()
+        
+        seconde = store.create_backup(source, 'b2', chunk_size=4096)
+        assert 0 < seconde['new_chunks'] < len(seconde['chunks']) // 10
+        
+        dest = str(tmp_path / 'restauree.db')
+        assert store.restore('b2', dest) == seconde['size']
+        copie = sqlite3.connect(dest)
+        assert copie.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+        assert copie.execute("SELECT count(*) FROM t").fetchone()[0] == 5000
+        copie.close()
+    
+    def test_prune_et_gc(self, tmp_path, monkeypatch):
+        """Rétention par environnement et GC depuis le catalogue, hors délai de grâce"""
+        source = str(tmp_path / 'gestia.db')
+        creer_base(source, lignes=500)
+        store = ChunkStore(str(tmp_path / 'store'))
+        catalogue = BackupCatalog(str(tmp_path))
+        
+        def sauvegarder(nom, environnement):
+            manifeste = store.create_backup(source, nom, environnement, chunk_size=4096)
+            catalogue.add(name=nom, kind='incremental', environment=environnement,
+                          created_at=manifeste['created_at'], path=nom, chunks=manifeste['chunks'])
+        
+        sauvegarder('b1', 'test')
+        sauvegarder('p1', 'production')
+        conn = sqlite3.connect(source)
+        conn.execute("UPDATE t SET x = randomblob(400)")
+        conn.commit()
+        conn.close()
+        sauvegarder('b2', 'test')
+        
+        result = store.prune(catalogue, keep_count=1)
+        assert result['removed_manifests'] == ['b1']
+        assert result['deleted_chunks'] == 0
+        # b1 partageait ses blocs avec p1 : aucun n'est orphelin
+        assert catalogue.orphan_chunks() == []
+        
+        result = store.prune(catalogue, keep_count=0, environment='production')
+        assert result['removed_manifests'] == ['p1']
+        assert result['deleted_chunks'] == 0 and catalogue.orphan_chunks()
+        
+        # Le GC ne relit aucun manifeste
+        def interdit(nom):
+            raise AssertionError(f"manifeste {nom} relu")
+        monkeypatch.setattr(store, 'load_manifest', interdit)
+        result = store.collect_garbage(catalogue, grace_seconds=0)
+        assert result['deleted_chunks'] > 0 and catalogue.orphan_chunks() == []
+        monkeypatch.undo()
+        
+        assert store.list_manifests() == ['b2']
+        assert [e['name'] for e in catalogue.list()] == ['b2']
+        store.restore('b2', str(tmp_path / 'restauree.db'))
+        
+        # La reconstruction recompte les mêmes références
+        references = catalogue.conn.execute("SELECT digest, refs FROM chunks ORDER BY digest").fetchall()
+        catalogue.rebuild(store)
+        assert catalogue.conn.execute("SELECT digest, refs FROM chunks ORDER BY digest").fetchall() == references
+        catalogue.close()
+
+class TestCompressedBackup:
+    """Tests pour les sauvegardes compressées en flux"""
+    
+    @pytest.mark.parametrize('methode', ['gzip', 'lzma'])
+    def test_aller_retour(self, tmp_path, methode):
+        """Une sauvegarde compressée se restaure à l'identique"""
+        source = str(tmp_path / 'gestia.db')
+        creer_base(source, lignes=500)
+        archive = str(tmp_path / 'backup.db.z')
+        
+        stats = compressed_backup(source, archive, methode, level=1)
+        assert stats['compressed_size'] == os.path.getsize(archive)
+        assert detect_method(archive) == methode
+        
+        dest = str(tmp_path / 'restauree.db')
+        restauration = compressed_restore(archive, dest, expected_sha256=stats['sha256'])
+        assert restauration['size'] == stats['size']
+        copie = sqlite3.connect(dest)
+        assert copie.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+        assert copie.execute("SELECT count(*) FROM t").fetchone()[0] == 500
+        copie.close()
+    
+    def test_empreinte_invalide(self, tmp_path):
+        """Une empreinte différente empêche le remplacement de la destination"""
+        source = str(tmp_path / 'gestia.db')
+        creer_base(source, lignes=100)
+        archive = str(tmp_path / 'backup.db.gz')
+        compressed_backup(source, archive)
+        
+        dest = str(tmp_path / 'restauree.db')
+        with pytest.raises(ValueError):
+            compressed_restore(archive, dest, expected_sha256='0' * 64)
+        assert not os.path.exists(dest)
+        assert not os.path.exists(dest + '.partial')
+    
+    def test_ecritures_en_continu(self, tmp_path):
+        """Sans pouvoir figer le fichier principal, la sauvegarde échoue, sauf copie autorisée à côté"""
+        source = str(tmp_path / 'gestia.db')
+        creer_base(source, lignes=100)
+        ecrivain = sqlite3.connect(source, timeout=0, isolation_level=None)
+        ecrivain.execute("PRAGMA wal_autocheckpoint=0")
+        lecteur = sqlite3.connect(source, isolation_level=None)
+        lecteur.execute("BEGIN")
+        lecteur.execute("SELECT count(*) FROM t").fetchone()
+        ecrivain.execute("INSERT INTO t (x) VALUES (randomblob(400))")
+        
+        archive = str(tmp_path / 'backup.db.xz')
+        with pytest.raises(RuntimeError):
+            compressed_backup(source, archive, 'lzma', level=0, timeout=0.2)
+        assert sorted(os.listdir(tmp_path)) == ['gestia.db', 'gestia.db-shm', 'gestia.db-wal']
+        
+        # Écriture immédiate (timeout=0) pendant la compression
+        stats = compressed_backup(source, archive, 'lzma', level=0, chunk_size=4096, timeout=0.2, staging=True,
+                                  progress=lambda lus, total: ecrivain.execute(
+                                      "INSERT INTO t (x) VALUES (randomblob(400))"))
+        lecteur.execute("COMMIT")
+        lecteur.close()
+        ecrivain.close()
+        
+        assert stats['staged']
+        dest = str(tmp_path / 'restauree.db')
+        compressed_restore(archive, dest, expected_sha256=stats['sha256'])
+        copie = sqlite3.connect(dest)
+        assert copie.execute("SELECT count(*) FROM t").fetchone()[0] == 101
+        copie.close()
+    
+    def test_niveau_invalide(self, tmp_path):
+        """Un niveau hors bornes est refusé"""
+        with pytest.raises(ValueError):
+            compressed_backup(str(tmp_path / 'gestia.db'), str(tmp_path / 'b.gz'), 'gzip', level=0)
+
+class TestBackupCatalog:
+    """Tests pour le catalogue des sauvegardes"""
+    
+    def test_requetes_indexees(self, tmp_path):
+        """Liste, numéro et rétention sont triés du plus récent au plus ancien"""
+        catalogue = BackupCatalog(str(tmp_path))
+        for i in range(5):
+            catalogue.add(name=f"b{i}.db", kind='full', environment='test' if i % 2 else 'production',
+                          created_at=f"2024-01-0{i + 1}T00:00:00", path=f"b{i}.db", size=i)
+        
+        assert [e['name'] for e in catalogue.list()] == ['b4.db', 'b3.db', 'b2.db', 'b1.db', 'b0.db']
+        assert catalogue.get_by_number(2)['name'] == 'b3.db'
+        assert catalogue.get_by_number(6) is None
+        assert [e['name'] for e in catalogue.expired(1, environment='test')] == ['b1.db']
+        # Sans filtre, la rétention s'applique à chaque environnement
+        assert [e['name'] for e in catalogue.expired(1)] == ['b2.db', 'b1.db', 'b0.db']
+        assert catalogue.count(environment='production') == 3
+        assert [e['name'] for e in catalogue.older_than('2024-01-02T12:00:00')] == ['b1.db', 'b0.db']
+        
+        plan = catalogue.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM backups WHERE environment = ? "
+            "ORDER BY created_at DESC", ('test',)
+        ).fetchall()
+        assert any('idx_backups_env_created' in row[3] for row in plan)
+        catalogue.close()
+    
+    def test_reconstruction(self, tmp_path):
+        """Le catalogue se reconstruit depuis les fichiers et manifestes"""
+        source = str(tmp_path / 'gestia.db')
+        creer_base(source, lignes=100)
+        dossier = tmp_path / 'backups'
+        dossier.mkdir()
+        online_backup(source, str(dossier / 'complete.db'))
+        stats = compressed_backup(source, str(dossier / 'archive.db.gz'))
+        (dossier / 'archive.json').write_text(
+            '{"environment": "test", "created_at": "2024-01-01T00:00:00", '
+            f'"compression": "gzip", "sha256": "{stats["sha256"]}"}}'
+        )
+        store = ChunkStore(str(dossier / 'store'))
+        store.create_backup(source, 'inc1', environment='test')
+        store.create_backup(source, 'inc2', environment='test', parent='inc1')
+        
+        catalogue = open_catalog(str(dossier))
+        assert catalogue.count() == 4
+        assert catalogue.get('archive.db.gz')['kind'] == 'compressed'
+        assert catalogue.get('archive.db.gz')['sha256'] == stats['sha256']
+        assert catalogue.get('inc2')['parent'] == 'inc1'
+        assert catalogue.get('catalog.db') is None
+        
+        catalogue.set_verification('complete.db', 'ok')
+        assert catalogue.rebuild(store) == 4
+        assert catalogue.get('complete.db')['verify_status'] == 'ok'
+        catalogue.close()
+    
+    def test_sauvegarde_du_gestionnaire(self, tmp_path, monkeypatch):
+        """DatabaseManager.backup_database enregistre l'empreinte et les métadonnées"""
+        monkeypatch.chdir(tmp_path)
+        os.makedirs('data/test')
+        manager = DatabaseManager('sqlite:///data/test/gestia.db', profile='test')
+        manager.create_tables()
+        assert manager.backup_database('manuelle.db')
+        manager.dispose()
+        
+        empreinte = file_sha256('data/backups/manuelle.db')
+        with open('data/backups/manuelle.json') as f:
+            metadata = json.load(f)
+        assert metadata['sha256'] == empreinte
+        assert metadata['environment'] == 'test'
+        catalogue = open_catalog('data/backups')
+        assert catalogue.get('manuelle.db')['sha256'] == empreinte
+        catalogue.close()
+    
+    def test_sauvegarde_archive_le_journal(self, tmp_path, monkeypatch):
+        """DatabaseManager.backup_database vide le journal des modifications dans un segment"""
+        monkeypatch.chdir(tmp_path)
+        os.makedirs('data/development')
+        manager = DatabaseManager('sqlite:///data/development/gestia.db', profile='development')
+        manager.create_tables()
+        with manager.engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO techniciens (ID_Technicien, Nom, Prenom) VALUES ('T1', 'Martin', 'Paul')")
+        assert manager.backup_database('manuelle.db')
+        manager.dispose()
+        
+        base = sqlite3.connect('data/development/gestia.db')
+        assert base.execute(f"SELECT count(*) FROM {changelog.CHANGELOG_TABLE}").fetchone()[0] == 0
+        base.close()
+        catalogue = open_catalog('data/backups')
+        assert [segment['rows'] for segment in catalogue.segments('development')] == [1]
+        catalogue.close()
+
+class TestVerification:
+    """Tests pour la vérification des sauvegardes"""
+    
+    def test_verification_parallele(self, tmp_path):
+        """Les sauvegardes valides passent, une sauvegarde altérée est détectée"""
+        source = str(tmp_path / 'gestia.db')
+        creer_base(source, lignes=300)
+        dossier = tmp_path / 'backups'
+        store = ChunkStore(str(dossier / 'store'))
+        online_backup(source, str(dossier / 'saine.db'))
+        online_backup(source, str(dossier / 'alteree.db'))
+        stats = compressed_backup(source, str(dossier / 'archive.db.xz'), 'lzma')
+        manifest = store.create_backup(source, 'inc', environment='test')
+        
+        catalogue = open_catalog(str(dossier))
+        sha_alteree = catalogue.get('alteree.db')
+        with open(dossier / 'alteree.db', 'r+b') as f:
+            f.seek(8192)
+            f.write(b'\xff' * 512)
+        
+        taches = [{
+            'name': 'saine.db', 'kind': 'full', 'path': str(dossier / 'saine.db'),
+        }, {
+            'name': 'alteree.db', 'kind': 'full', 'path': str(dossier / 'alteree.db'),
+            'expected_sha256': file_sha256(str(dossier / 'saine.db')),
+        }, {
+            'name': 'archive.db.xz', 'kind': 'compressed', 'path': str(dossier / 'archive.db.xz'),
+            'expected_sha256': stats['sha256'],
+        }, {
+            'name': 'inc', 'kind': 'incremental', 'path': store.manifest_path('inc'),
+            'expected_sha256': manifest['sha256'], 'store_root': store.root,
+        }]
+        resultats = {r['name']: r for r in verify_backups(taches, workers=2)}
+        
+        assert resultats['saine.db']['status'] == 'ok'
+        assert resultats['archive.db.xz']['status'] == 'ok'
+        assert resultats['inc']['status'] == 'ok'
+        assert resultats['alteree.db']['status'] == 'corrupt'
+        
+        for resultat in resultats.values():
+            record_result(catalogue, resultat)
+        assert catalogue.get('alteree.db')['verify_status'] == 'corrupt'
+        assert catalogue.get('alteree.db')['sha256'] == sha_alteree['sha256']
+        assert catalogue.get('saine.db')['sha256'] == resultats['saine.db']['sha256']
+        assert catalogue.get('inc')['verify_seconds'] is not None
+        catalogue.close()
+
+class TestPointInTimeRestore:
+    """Tests pour le journal des modifications et la restauration à un instant donné"""
+    
+    def _etat(self, path):
+        conn = sqlite3.connect(path)
+        etat = dict(conn.execute("SELECT ID_Appareil, Marque FROM appareils").fetchall())
+        conn.close()
+        return etat
+    
+    def _instant(self):
+        time.sleep(0.02)
+        instant = datetime.now().isoformat()
+        time.sleep(0.02)
+        return instant
+    
+    def test_rejeu_jusqu_a_l_instant(self, tmp_path):
+        """L'état restauré correspond exactement à l'instant demandé"""
+        source = str(tmp_path / 'gestia.db')
+        manager = DatabaseManager(f"sqlite:///{source}", profile='production')
+        manager.create_tables()
+        manager.dispose()
+        
+        conn = sqlite3.connect(source)
+        insert = ("INSERT INTO appareils (ID_Appareil, Marque, Modele, NumSerie, DateReception, Etat) "
+                  "VALUES (?, ?, 'M', 'SN', '2024-01-01', 'EN_TEST')")
+        conn.executemany(insert, [('A1', 'LG'), ('A2', 'Bosch'), ('A3', 'Beko')])
+        conn.commit()
+        
+        catalogue = open_catalog(str(tmp_path / 'backups'))
+        online_backup(source, str(tmp_path / 'backups' / 'base.db'))
+        catalogue.add(name='base.db', kind='full', environment='test',
+                      created_at=self._instant(), path='base.db')
+        
+        conn.execute("UPDATE appareils SET Marque = 'Samsung' WHERE ID_Appareil = 'A1'")
+        conn.execute("DELETE FROM appareils WHERE ID_Appareil = 'A2'")
+        conn.execute(insert, ('A4', 'Candy'))
+        conn.commit()
+        t1 = self._instant()
+        # Les insertions initiales (avant la sauvegarde) sont archivées aussi
+        assert archive_changelog(catalogue, 'test', source)['rows'] == 6
+        
+        conn.execute("UPDATE appareils SET ID_Appareil = 'A9' WHERE ID_Appareil = 'A3'")
+        conn.execute(insert, ('A5', 'Whirlpool'))
+        conn.commit()
+        t2 = self._instant()
+        conn.execute("UPDATE appareils SET Marque = 'Electrolux'")
+        conn.commit()
+        conn.close()
+        
+        dest = str(tmp_path / 'pitr_t1.db')
+        stats = point_in_time_restore(catalogue, 'test', t1, dest, source, batch_size=2)
+        assert stats['base'] == 'base.db' and stats['changes'] == 3
+        assert self._etat(dest) == {'A1': 'Samsung', 'A3': 'Beko', 'A4': 'Candy'}
+        
+        dest = str(tmp_path / 'pitr_t2.db')
+        stats = point_in_time_restore(catalogue, 'test', t2, dest, source)
+        assert self._etat(dest) == {'A1': 'Samsung', 'A9': 'Beko', 'A4': 'Candy', 'A5': 'Whirlpool'}
+        
+        # Le journal reste actif sur la base restaurée et reprend après le rejeu
+        restauree = sqlite3.connect(dest)
+        assert changelog.is_installed(restauree)
+        assert changelog.last_sequence(restauree) == stats['last_seq']
+        restauree.close()
+        catalogue.close()
+    
+    def test_triggers_regeneres_apres_migration(self, tmp_path):
+        """Une colonne ajoutée par migration est capturée après régénération"""
+        source = str(tmp_path / 'gestia.db')
+        manager = DatabaseManager(f"sqlite:///{source}", profile='production')
+        manager.create_tables()
+        manager.dispose()
+        
+        conn = sqlite3.connect(source)
+        changelog.drop_triggers(conn)
+        conn.execute("ALTER TABLE techniciens ADD COLUMN Equipe TEXT")
+        changelog.install_triggers(conn)
+        conn.execute("INSERT INTO techniciens (ID_Technicien, Nom, Prenom, Equipe) "
+                     "VALUES ('T1', 'Martin', 'Paul', 'Atelier')")
+        conn.commit()
+        data = conn.execute(f"SELECT data FROM {changelog.CHANGELOG_TABLE}").fetchone()[0]
+        assert '"Equipe":"Atelier"' in data
+        conn.close()
+    
+    def test_restauration_puis_rejeu(self, tmp_path):
+        """Après une restauration, l'historique abandonné n'est plus rejoué"""
+        source = str(tmp_path / 'gestia.db')
+        manager = DatabaseManager(f"sqlite:///{source}", profile='production')
+        manager.create_tables()
+        manager.dispose()
+        
+        insert = ("INSERT INTO appareils (ID_Appareil, Marque, Modele, NumSerie, DateReception, Etat) "
+                  "VALUES (?, ?, 'M', 'SN', '2024-01-01', 'EN_TEST')")
+        conn = sqlite3.connect(source)
+        conn.executemany(insert, [('A1', 'LG'), ('A2', 'Bosch')])
+        conn.commit()
+        conn.close()
+        catalogue = open_catalog(str(tmp_path / 'backups'))
+        online_backup(source, str(tmp_path / 'backups' / 'base.db'))
+        catalogue.add(name='base.db', kind='full', environment='test',
+                      created_at=self._instant(), path='base.db')
+        
+        # Historique abandonné : archivé en partie, le reste dans la base active
+        conn = sqlite3.connect(source)
+        conn.execute(insert, ('A3', 'Beko'))
+        conn.commit()
+        archive_changelog(catalogue, 'test', source)
+        conn.execute(insert, ('A4', 'Candy'))
+        conn.commit()
+        conn.close()
+        
+        stats = restore_environment(catalogue, 'test', catalogue.get('base.db'), source)
+        assert stats['base_seq'] == 2 and stats['abandoned'] == 2
+        
+        # Les nouvelles écritures reprennent les séquences de l'historique abandonné
+        conn = sqlite3.connect(source)
+        conn.execute(insert, ('A5', 'Whirlpool'))
+        conn.commit()
+        archive_changelog(catalogue, 'test', source)
+        conn.execute(insert, ('A6', 'Samsung'))
+        conn.commit()
+        conn.close()
+        instant = self._instant()
+        
+        dest = str(tmp_path / 'pitr.db')
+        point_in_time_restore(catalogue, 'test', instant, dest, source)
+        assert self._etat(dest) == {'A1': 'LG', 'A2': 'Bosch', 'A5': 'Whirlpool', 'A6': 'Samsung'}
+        catalogue.close()
+
+class TestSwapRestore:
+    """Tests pour la restauration par substitution atomique"""
+    
+    def test_substitution_et_reconnexion(self, tmp_path):
+        """La base est remplacée, les pools rouverts et les fichiers -wal/-shm écartés"""
+        cible = str(tmp_path / 'live' / 'gestia.db')
+        os.makedirs(os.path.dirname(cible))
+        creer_base(cible, lignes=10)
+        catalogue = open_catalog(str(tmp_path / 'backups'))
+        creer_base(str(tmp_path / 'backups' / 'save.db'), lignes=200)
+        catalogue.add(name='save.db', kind='full', environment='test',
+                      created_at=datetime.now().isoformat(), path='save.db')
+        
+        manager = engine_registry.get(db_url=f"sqlite:///{cible}")
+        with manager.engine.connect() as connection:
+            assert connection.exec_driver_sql("SELECT COUNT(*) FROM t").scalar() == 10
+        open(cible + '-wal', 'wb').close()
+        
+        stats = swap_restore(catalogue, catalogue.get('save.db'), cible)
+        assert stats['size'] > 0 and stats['swap_seconds'] >= 0
+        assert not os.path.exists(cible + '-wal')
+        assert sorted(os.listdir(os.path.dirname(cible))) == ['gestia.db']
+        assert f"sqlite:///{cible}" not in engine_registry.urls()
+        
+        manager = engine_registry.get(db_url=f"sqlite:///{cible}")
+        with manager.engine.connect() as connection:
+            assert connection.exec_driver_sql("SELECT COUNT(*) FROM t").scalar() == 200
+        engine_registry.dispose(db_url=f"sqlite:///{cible}")
+        catalogue.close()
+    
+    def test_base_invalide_refusee(self, tmp_path):
+        """Une base préparée corrompue ne remplace pas la base active"""
+        cible = str(tmp_path / 'gestia.db')
+        creer_base(cible, lignes=10)
+        avant = file_sha256(cible)
+        preparee = str(tmp_path / 'preparee.db')
+        with open(preparee, 'wb') as f:
+            f.write(b'pas une base SQLite' * 100)
+        
+        with pytest.raises(sqlite3.DatabaseError):
+            install_database(preparee, cible)
+        assert file_sha256(cible) == avant
+    
+    def test_renommage_impossible(self, tmp_path, monkeypatch):
+        """Si le renommage échoue, la base active est conservée avec ses transactions, toujours en WAL"""
+        cible = str(tmp_path / 'gestia.db')
+        creer_base(cible, lignes=10)
+        ecrivain = sqlite3.connect(cible, isolation_level=None)
+        ecrivain.execute("INSERT INTO t (x) VALUES (randomblob(400))")
+        ecrivain.close()
+        preparee = str(tmp_path / 'preparee.db')
+        creer_base(preparee, lignes=200)
+        
+        def refuser(source, destination):
+            raise PermissionError("fichier encore ouvert")
+        monkeypatch.setattr(os, 'replace', refuser)
+        with pytest.raises(PermissionError):
+            install_database(preparee, cible)
+        
+        conn = sqlite3.connect(cible)
+        assert conn.execute("SELECT count(*) FROM t").fetchone()[0] == 11
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        conn.close()
+    
+    def test_base_ouverte_ailleurs(self, tmp_path):
+        """Une base gardée ouverte par une autre connexion n'est pas remplacée"""
+        cible = str(tmp_path / 'gestia.db')
+        creer_base(cible, lignes=10)
+        ecrivain = sqlite3.connect(cible, isolation_level=None)
+        ecrivain.execute("PRAGMA wal_autocheckpoint=0")
+        ecrivain.execute("INSERT INTO t (x) VALUES (randomblob(400))")
+        preparee = str(tmp_path / 'preparee.db')
+        creer_base(preparee, lignes=200)
+        
+        with pytest.raises(sqlite3.OperationalError):
+            install_database(preparee, cible, timeout=0.1)
+        
+        assert os.path.exists(preparee)
+        conn = sqlite3.connect(cible)
+        assert conn.execute("SELECT count(*) FROM t").fetchone()[0] == 11
+        conn.close()
+        ecrivain.close()
+    
+    def test_ecriture_pendant_la_substitution(self, tmp_path, monkeypatch):
+        """Une écriture tentée pendant la substitution attend le verrou : rien de l'ancienne base ne s'ajoute à la nouvelle"""
+        cible = str(tmp_path / 'gestia.db')
+        creer_base(cible, lignes=10)
+        preparee = str(tmp_path / 'preparee.db')
+        creer_base(preparee, lignes=200)
+        resultats = []
+        
+        def ecrire():
+            conn = sqlite3.connect(cible, timeout=0.2, isolation_level=None)
+            try:
+                conn.execute("INSERT INTO t (x) VALUES (randomblob(400))")
+                resultats.append('validée')
+            except sqlite3.OperationalError as e:
+                resultats.append(str(e))
+            finally:
+                conn.close()
+        
+        remplacer = os.replace
+        
+        def remplacer_sous_ecriture(source, destination):
+            ecrivain = threading.Thread(target=ecrire)
+            ecrivain.start()
+            ecrivain.join()
+            remplacer(source, destination)
+            # Un lecteur arrivé juste après le renommage ne voit que la base restaurée
+            lecteur = sqlite3.connect(cible)
+            resultats.append(lecteur.execute("SELECT count(*) FROM t").fetchone()[0])
+            lecteur.close()
+        monkeypatch.setattr(os, 'replace', remplacer_sous_ecriture)
+        install_database(preparee, cible)
+        
+        assert resultats == ['database is locked', 200]
+        conn = sqlite3.connect(cible)
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+        assert conn.execute("SELECT count(*) FROM t").fetchone()[0] == 200
+        conn.close()
+    
+    def test_sessions_ouvertes_reconnectees(self, tmp_path):
+        """Les sessions gardées par l'application lisent la base restaurée"""
+        cible = str(tmp_path / 'gestia.db')
+        creer_base(cible, lignes=10)
+        preparee = str(tmp_path / 'preparee.db')
+        creer_base(preparee, lignes=200)
+        
+        manager = engine_registry.get(db_url=f"sqlite:///{cible}")
+        session = manager.get_session()
+        assert session.execute(text("SELECT count(*) FROM t")).scalar() == 10
+        
+        install_database(preparee, cible, timeout=0.1)
+        assert session.execute(text("SELECT count(*) FROM t")).scalar() == 200
+        session.close()
+        engine_registry.dispose(db_url=f"sqlite:///{cible}")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests pour la gestion de base de données GESTIA
+===============================================
+
+Tests unitaires pour les profils de moteur et le gestionnaire de base.
+"""
+
+import pytest
+import sys
+import os
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from sqlalchemy import text
+
+from gestia.core.database import (
+    DatabaseManager, EngineRegistry, CurrentDatabaseManager,
+    get_engine_profile, ENGINE_PROFILES
+)
+from gestia.core.models import Base, Technicien
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools', 'tools', 'db'))
+from migrate_db import DatabaseMigrator
+
+class TestEngineProfiles:
+    """Tests pour les profils de moteur SQLite"""
+    
+    def test_pragmas_appliques_a_la_connexion(self, tmp_path):
+        """Les pragmas du profil sont appliqués à chaque connexion"""
+        manager = DatabaseManager(f"sqlite:///{tmp_path / 'gestia.db'}", profile='production')
+        
+        with manager.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == 'wal'
+            assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 10000
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == -64000
+        
+        manager.engine.dispose()
+    
+    def test_echo_desactive_par_defaut(self, monkeypatch):
+        """Aucun profil n'active l'écho SQL par défaut"""
+        monkeypatch.delenv('GESTIA_SQL_ECHO', raising=False)
+        for name in ENGINE_PROFILES:
+            assert get_engine_profile(name)['echo'] is False
+    
+    def test_echo_configurable_par_variable(self, monkeypatch):
+        """GESTIA_SQL_ECHO surcharge l'écho du profil"""
+        monkeypatch.setenv('GESTIA_SQL_ECHO', 'debug')
+        assert get_engine_profile('production')['echo'] == 'debug'
+        
+        monkeypatch.setenv('GESTIA_SQL_ECHO', '1')
+        assert get_engine_profile('production')['echo'] is True
+
+class TestEngineRegistry:
+    """Tests pour le registre des moteurs"""
+    
+    def test_reutilise_le_moteur_apres_changement(self, tmp_path, monkeypatch):
+        """Revenir à un environnement réutilise le même moteur"""
+        monkeypatch.chdir(tmp_path)
+        registry = EngineRegistry()
+        
+        dev = registry.get('development')
+        prod = registry.get('production')
+        
+        assert dev is not prod
+        assert registry.get('development') is dev
+        assert registry.get('development').engine is dev.engine
+        assert len(registry.urls()) == 2
+        
+        registry.dispose_all()
+        assert registry.urls() == []
+    
+    def test_proxy_suit_l_environnement_courant(self, tmp_path, monkeypatch):
+        """Une référence capturée au proxy suit set_environment"""
+        monkeypatch.chdir(tmp_path)
+        registry = EngineRegistry()
+        proxy = CurrentDatabaseManager(registry)
+        
+        monkeypatch.setenv('GESTIA_ENV', 'development')
+        assert proxy.db_url.endswith('data/development/gestia.db')
+        
+        monkeypatch.setenv('GESTIA_ENV', 'test')
+        assert proxy.db_url.endswith('data/test/gestia.db')
+        assert proxy.engine is registry.get('test').engine
+        
+        assert registry.dispose('test') is True
+        assert registry.dispose('test') is False
+        registry.dispose_all()
+
+class TestTransactions:
+    """Tests pour l'ouverture des transactions SQLite"""
+    
+    def test_lectures_sans_instantane(self, tmp_path):
+        """Une session qui n'a fait que lire voit les écritures des autres et ne bloque ni checkpoint ni écriture"""
+        manager = DatabaseManager(f"sqlite:///{tmp_path / 'gestia.db'}", profile='test')
+        manager.create_tables()
+        lecteur = manager.get_session()
+        ecrivain = manager.get_session()
+        
+        assert lecteur.query(Technicien).count() == 0
+        ecrivain.add(Technicien(ID_Technicien='TECH_1', Nom='Martin', Prenom='Paul'))
+        ecrivain.commit()
+        assert lecteur.query(Technicien).count() == 1
+        
+        with manager.engine.connect() as conn:
+            busy, log, checkpointed = conn.execute(text("PRAGMA wal_checkpoint(PASSIVE)")).one()
+        assert busy == 0 and log == checkpointed
+        
+        lecteur.add(Technicien(ID_Technicien='TECH_2', Nom='Durand', Prenom='Marie'))
+        lecteur.commit()
+        assert ecrivain.query(Technicien).count() == 2
+        
+        lecteur.close()
+        ecrivain.close()
+        manager.dispose()
+
+class TestPerformanceIndexes:
+    """Tests pour les index des requêtes critiques"""
+    
+    def test_plan_utilise_les_index(self, tmp_path):
+        """Les recherches par appareil et par parent ne parcourent plus les tables"""
+        manager = DatabaseManager(f"sqlite:///{tmp_path / 'gestia.db'}", profile='test')
+        manager.create_tables()
+        
+        requetes = {
+            "SELECT * FROM sessions_de_test WHERE ID_Appareil = 'A' ORDER BY DateDebut DESC":
+                'ix_sessions_appareil_date',
+            "SELECT * FROM diagnostics_reparation WHERE ID_Appareil = 'A' ORDER BY DateDebut DESC":
+                'ix_diagnostics_appareil_date',
+            "SELECT * FROM criteres_de_test WHERE ID_Programme = 'P'": 'ix_criteres_programme',
+            "SELECT DISTINCT Marque FROM appareils": 'ix_appareils_marque_date',
+            "SELECT * FROM appareils WHERE Etat = 'EN_TEST' ORDER BY DateReception, ID_Appareil":
+                'ix_appareils_etat_date',
+        }
+        with manager.engine.connect() as conn:
+            for sql, index in requetes.items():
+                plan = ' | '.join(row[3] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+                assert index in plan and 'TEMP B-TREE' not in plan, plan
+        manager.dispose()
+    
+    def test_migration_alignee_sur_les_modeles(self, monkeypatch):
+        """Les migrations créent exactement les index déclarés dans les modèles"""
+        monkeypatch.setenv('GESTIA_ENV', 'test')
+        crees = set()
+        for migration in DatabaseMigrator('test').get_all_migrations():
+            for sql in migration['sql']:
+                # Les tables internes (_gestia_versions) n'ont pas de modèle
+                if sql.startswith('CREATE INDEX') and sql.split()[7] in Base.metadata.tables:
+                    crees.add(sql.split()[5])
+                elif sql.startswith('DROP INDEX'):
+                    crees.discard(sql.split()[-1])
+        
+        declares = {index.name for table in Base.metadata.tables.values() for index in table.indexes}
+        assert crees == declares
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Tests pour l'interface graphique GESTIA
+=======================================
+
+Tests unitaires des parties de l'interface qui ne demandent pas d'affichage.
+"""
+
+import pytest
+from datetime import date
+import sys
+import os
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+pytest.importorskip('tkinter')
+
+from gestia.core.models import EtatAppareil
+from gestia.ui.gui import cle_de_tri
+
+class TestCleDeTri:
+    """Tests pour les clés de tri typées des listes"""
+
+    def test_dates_affichees_chronologiques(self):
+        """Les dates JJ/MM/AAAA se trient par date et non par texte"""
+        dates = ['02/01/2024', '31/12/2023', '15/06/2023', '-']
+        assert sorted(dates, key=cle_de_tri) == ['-', '15/06/2023', '31/12/2023', '02/01/2024']
+        assert cle_de_tri('02/01/2024') == cle_de_tri(date(2024, 1, 2))
+
+    def test_nombres_et_texte(self):
+        """Les nombres se trient numériquement, le texte sans la casse"""
+        assert sorted(['10', '9', '1,5'], key=cle_de_tri) == ['1,5', '9', '10']
+        assert sorted(['martin', 'Durand', 'SN10'], key=cle_de_tri) == ['Durand', 'martin', 'SN10']
+
+    def test_enumerations_et_types_melanges(self):
+        """Les énumérations suivent leur déclaration ; des types mélangés restent comparables"""
+        etats = [EtatAppareil.EN_VENTE, EtatAppareil.EN_TEST, EtatAppareil.RECONDITIONNE]
+        assert sorted(etats, key=cle_de_tri) == [EtatAppareil.EN_TEST, EtatAppareil.RECONDITIONNE,
+                                                  EtatAppareil.EN_VENTE]
+        assert sorted(['texte', 3, None, '01/01/2020', EtatAppareil.EN_TEST], key=cle_de_tri) == \
+            [None, 3, '01/01/2020', EtatAppareil.EN_TEST, 'texte']
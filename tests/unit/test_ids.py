@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests pour les identifiants GESTIA
+==================================
+
+Tests unitaires pour le distributeur d'identifiants horodatés.
+"""
+
+import pytest
+import threading
+import time
+import sys
+import os
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from gestia.core.ids import IdAllocator, new_id, id_timestamp, ID_LENGTH, PREFIX_APPAREIL
+
+class TestIdAllocator:
+    """Tests pour le distributeur d'identifiants"""
+
+    def test_format_et_horodatage(self):
+        """Le préfixe est conservé et l'horodatage est décodable"""
+        identifiant = new_id(PREFIX_APPAREIL)
+
+        assert identifiant.startswith('APP_')
+        assert len(identifiant) == len('APP_') + ID_LENGTH
+        assert abs(id_timestamp(identifiant) - time.time()) < 5
+
+    def test_croissants_meme_si_l_horloge_recule(self):
+        """Les identifiants restent strictement croissants"""
+        instants = iter([1000, 1000, 999, 1001] + [1001] * 10)
+        allocator = IdAllocator(clock=lambda: next(instants))
+
+        ids = [allocator.new_id('SESS') for _ in range(4)]
+        ids += allocator.allocate('SESS', 10)
+
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+
+    def test_unicite_entre_threads(self):
+        """Plusieurs threads ne reçoivent jamais le même identifiant"""
+        allocator = IdAllocator()
+        resultats = []
+
+        def allouer():
+            ids = [allocator.new_id('CRIT') for _ in range(2000)]
+            ids += allocator.allocate('CRIT', 2000)
+            resultats.append(ids)
+
+        threads = [threading.Thread(target=allouer) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        tous = [identifiant for ids in resultats for identifiant in ids]
+        assert len(set(tous)) == 16000
+        for ids in resultats:
+            assert ids == sorted(ids)
+
+    def test_identifiant_historique_refuse(self):
+        """Un identifiant de l'ancien format n'a pas d'horodatage"""
+        with pytest.raises(ValueError):
+            id_timestamp('APP_1A2B3C4D')
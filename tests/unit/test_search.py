@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests pour l'index de recherche GESTIA
+======================================
+
+Tests unitaires pour la recherche en mémoire par préfixe et sous-chaîne.
+"""
+
+import pytest
+import sys
+import os
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from gestia.core.search import SearchIndex
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.update([
+        ('APP_01', 'SN-1000', 'Bosch', 'Serie 4'),
+        ('APP_02', 'SN-1001', 'Bosch', 'Serie 6'),
+        ('APP_03', 'XK-2000', 'LG', 'F4WV'),
+    ])
+    return index
+
+class TestSearchIndex:
+    """Tests pour l'index de recherche des appareils"""
+
+    def test_prefixe_puis_sous_chaine(self, index):
+        """Début de champ d'abord, sans la casse ; sous-chaîne à partir de 3 caractères"""
+        index.update([('APP_04', 'SN-3000', 'Candy', 'Mini Serie')])
+        assert index.search('SERIE', 10) == ['APP_01', 'APP_02', 'APP_04']
+        assert sorted(index.search('n-100', 10)) == ['APP_01', 'APP_02']
+        assert index.search('app_03', 10) == ['APP_03']
+        assert index.search('p_03', 10) == []  # L'identifiant est cherché par son début seulement
+        assert index.search('00', 10) == []  # Trop court pour une sous-chaîne
+        assert len(index.search('sn', 2)) == 2
+
+    def test_mise_a_jour_incrementale(self, index):
+        """Un champ modifié remplace l'ancien terme ; un document retiré disparaît"""
+        index.update([('APP_01', 'SN-9999', 'Bosch', 'Serie 4')])
+        assert index.search('1000', 10) == []
+        assert index.search('sn-9', 10) == ['APP_01']
+        assert sorted(index.search('bosch', 10)) == ['APP_01', 'APP_02']
+
+        index.remove(['APP_02'])
+        assert index.search('bosch', 10) == ['APP_01']
+        assert index.search('sn-1001', 10) == [] and len(index) == 2
+
+    def test_listes_de_trigrammes_raccourcies(self, index):
+        """Les termes retirés ne s'accumulent pas dans les listes de trigrammes"""
+        for i in range(100):
+            index.update([('APP_03', f'XK-{3000 + i}', 'LG', 'F4WV')])
+        assert index.search('k-30', 10) == ['APP_03']
+        assert index.search('k-2000', 10) == []
+        assert max(len(termes) for termes in index._grams.values()) <= 8
+
+        index.remove(['APP_01', 'APP_02', 'APP_03'])
+        assert index._sorted == [] and index._grams == {} and len(index) == 0
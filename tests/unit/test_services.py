@@ -0,0 +1,754 @@
+#!/usr/bin/env python3
+"""
+Tests pour les services GESTIA
+==============================
+
+Tests unitaires pour la logique métier.
+"""
+
+import pytest
+from datetime import date, timedelta
+from operator import itemgetter
+import sys
+import os
+import threading
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from sqlalchemy import event, text
+
+from gestia.core.database import DatabaseManager, transaction, read_snapshot
+from gestia.core.models import (
+    Appareil, Technicien, CritereDeTest, EtatAppareil, NomCritere, NomProgramme,
+    ResultatSession, ResultatReparation
+)
+from gestia.core.cache import LookupCache, cache_stats
+from gestia.core.paging import VirtualRows
+from gestia.core import services
+from gestia.core.services import (
+    AppareilService, TechnicienService, SessionDeTestService,
+    ProgrammeDeTestService, CritereDeTestService, DiagnosticReparationService,
+    StatistiquesService
+)
+
+@pytest.fixture
+def manager(tmp_path):
+    """Base de test neuve"""
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'gestia.db'}", profile='test')
+    manager.create_tables()
+    yield manager
+    manager.dispose()
+
+@pytest.fixture
+def db(manager):
+    """Session sur une base de test neuve"""
+    session = manager.get_session()
+    yield session
+    session.close()
+
+class TestCreationEnMasse:
+    """Tests pour les créations en masse"""
+
+    def test_appareils_relus_par_l_orm(self, db):
+        """Les lignes insérées en masse se relisent comme des créations unitaires"""
+        enregistrements = (
+            {'marque': 'LG', 'modele': f'M{i}', 'num_serie': f'SN{i}', 'date_reception': date(2024, 5, 17)}
+            for i in range(1200)
+        )
+        ids = AppareilService.creer_appareil_bulk(db, enregistrements, taille_lot=500)
+
+        assert len(ids) == 1200 and ids == sorted(ids)
+        assert db.query(Appareil).count() == 1200
+        appareil = AppareilService.obtenir_appareil(db, ids[42])
+        assert appareil.Modele == 'M42'
+        assert appareil.DateReception == date(2024, 5, 17)
+        assert appareil.Etat == EtatAppareil.EN_TEST
+
+    def test_chaine_complete(self, db):
+        """Sessions, programmes et critères créés en masse restent liés"""
+        technicien = TechnicienService.creer_technicien(db, 'Martin', 'Paul')
+        id_appareil = AppareilService.creer_appareil(db, 'Bosch', 'S6', 'SN1', date.today()).ID_Appareil
+
+        sessions = SessionDeTestService.creer_session_bulk(
+            db, [{'id_appareil': id_appareil, 'id_technicien': technicien.ID_Technicien}] * 2)
+        programmes = ProgrammeDeTestService.creer_programme_bulk(
+            db, ({'id_session': s, 'nom_programme': NomProgramme.RAPIDE} for s in sessions))
+        CritereDeTestService.creer_critere_bulk(
+            db, ({'id_programme': p, 'nom_critere': nom} for p in programmes for nom in NomCritere))
+
+        assert len(AppareilService.obtenir_sessions_test(db, id_appareil)) == 2
+        critere = db.query(CritereDeTest).filter(CritereDeTest.ID_Programme == programmes[0]).first()
+        assert critere.EstValide is False
+        assert critere.programme.session.ID_Session == sessions[0]
+
+    def test_tout_ou_rien(self, db):
+        """Une erreur dans un lot annule aussi les lots déjà envoyés"""
+        enregistrements = [
+            {'marque': 'LG', 'modele': 'M', 'num_serie': 'SN', 'date_reception': date.today()}
+        ] * 10 + [{'marque': 'LG'}]
+
+        with pytest.raises(KeyError):
+            AppareilService.creer_appareil_bulk(db, enregistrements, taille_lot=4)
+        assert db.query(Appareil).count() == 0
+
+class TestTransaction:
+    """Tests pour le regroupement des appels de services en transaction"""
+
+    def _compter_commits(self, db):
+        commits = []
+        event.listen(db.get_bind(), 'commit', lambda connection: commits.append(1))
+        return commits
+
+    def test_une_seule_validation(self, db):
+        """Session, 3 programmes et 21 critères : un seul COMMIT"""
+        technicien = TechnicienService.creer_technicien(db, 'Martin', 'Paul')
+        id_appareil = AppareilService.creer_appareil(db, 'LG', 'F4', 'SN1', date.today()).ID_Appareil
+        commits = self._compter_commits(db)
+
+        with transaction(db):
+            session = SessionDeTestService.creer_session(db, id_appareil, technicien.ID_Technicien)
+            for nom_programme in NomProgramme:
+                programme = ProgrammeDeTestService.creer_programme(db, session.ID_Session, nom_programme)
+                for nom_critere in NomCritere:
+                    CritereDeTestService.creer_critere(db, programme.ID_Programme, nom_critere)
+
+        assert len(commits) == 1
+        assert db.query(CritereDeTest).count() == 21
+
+    def test_annulation_complete(self, db):
+        """Une exception dans le bloc annule toutes les opérations"""
+        with pytest.raises(RuntimeError):
+            with transaction(db):
+                TechnicienService.creer_technicien(db, 'Martin', 'Paul')
+                AppareilService.creer_appareil(db, 'LG', 'F4', 'SN1', date.today())
+                raise RuntimeError("abandon")
+
+        assert db.query(Technicien).count() == 0
+        assert db.query(Appareil).count() == 0
+
+    def test_savepoint_imbrique(self, db):
+        """L'échec d'un bloc imbriqué n'annule que ses propres opérations"""
+        with transaction(db):
+            TechnicienService.creer_technicien(db, 'Martin', 'Paul')
+            with pytest.raises(RuntimeError):
+                with transaction(db):
+                    TechnicienService.creer_technicien(db, 'Durand', 'Marie')
+                    raise RuntimeError("ligne invalide")
+            TechnicienService.creer_technicien(db, 'Petit', 'Sophie')
+
+        noms = sorted(t.Nom for t in TechnicienService.lister_techniciens(db))
+        assert noms == ['Martin', 'Petit']
+
+    def test_commit_false(self, db):
+        """Avec commit=False, la validation revient à l'appelant"""
+        commits = self._compter_commits(db)
+        technicien = TechnicienService.creer_technicien(db, 'Martin', 'Paul', commit=False)
+        AppareilService.creer_appareil_bulk(
+            db, [{'marque': 'LG', 'modele': 'M', 'num_serie': 'SN', 'date_reception': date.today()}],
+            commit=False)
+
+        assert technicien.ID_Technicien.startswith('TECH_') and commits == []
+        db.rollback()
+        assert db.query(Technicien).count() == 0 and db.query(Appareil).count() == 0
+
+class TestListeParPage:
+    """Tests pour la liste paginée des appareils"""
+
+    @pytest.fixture
+    def appareils(self, db):
+        debut = date(2024, 1, 1)
+        return AppareilService.creer_appareil_bulk(db, (
+            {'marque': ['LG', 'Bosch'][i % 2], 'modele': 'M', 'num_serie': f'SN{i:04d}',
+             'date_reception': debut + timedelta(days=i % 7)}
+            for i in range(230)
+        ))
+
+    def _parcourir(self, db, **kwargs):
+        vus, apres = [], None
+        while True:
+            page = AppareilService.lister_appareils_page(db, apres=apres, limite=50, **kwargs)
+            vus += page['appareils']
+            apres = page['cle_suivante']
+            if apres is None:
+                return vus
+
+    @pytest.mark.parametrize('tri', ['DateReception', '-DateReception', 'NumSerie', '-ID_Appareil'])
+    def test_pages_sans_doublon(self, db, appareils, tri):
+        """Les pages couvrent toute la liste, dans l'ordre, sans doublon"""
+        vus = self._parcourir(db, tri=tri)
+        colonne = tri.lstrip('-')
+        cles = [(getattr(a, colonne), a.ID_Appareil) for a in vus]
+
+        assert len(vus) == 230 and len({a.ID_Appareil for a in vus}) == 230
+        assert cles == sorted(cles, reverse=tri.startswith('-'))
+
+    def test_filtres(self, db, appareils):
+        """Les filtres se combinent, y compris le préfixe de numéro de série"""
+        vus = self._parcourir(db, filtres={'marque': 'LG', 'date_min': date(2024, 1, 3),
+                                           'etat': EtatAppareil.EN_TEST})
+        assert vus and all(a.Marque == 'LG' and a.DateReception >= date(2024, 1, 3) for a in vus)
+
+        page = AppareilService.lister_appareils_page(db, filtres={'num_serie_prefixe': 'SN01'})
+        assert sorted(a.NumSerie for a in page['appareils']) == [f'SN{i:04d}' for i in range(100, 200)]
+
+    def test_total_premiere_page(self, db, appareils):
+        """Le total n'est calculé qu'à la première page et reste exact sous le plafond"""
+        page = AppareilService.lister_appareils_page(db, filtres={'marque': 'Bosch'}, limite=10)
+        assert (page['total'], page['total_exact']) == (115, True)
+
+        suivante = AppareilService.lister_appareils_page(db, apres=page['cle_suivante'], limite=10)
+        assert 'total' not in suivante
+
+    def test_lignes_identiques_aux_entites(self, db, appareils):
+        """Les lignes projetées suivent les mêmes pages que les entités, dates formatées"""
+        filtres = {'marque': 'LG'}
+        entites = AppareilService.lister_appareils_page(db, filtres=filtres, tri='-DateReception', limite=20)
+        lignes = AppareilService.lister_lignes_appareils_page(db, filtres=filtres, tri='-DateReception', limite=20)
+
+        assert lignes['cle_suivante'] == entites['cle_suivante']
+        assert lignes['total'] == entites['total']
+        assert [l.ID_Appareil for l in lignes['appareils']] == [a.ID_Appareil for a in entites['appareils']]
+        ligne, entite = lignes['appareils'][0], entites['appareils'][0]
+        assert ligne.DateReception == entite.DateReception.strftime('%d/%m/%Y')
+        assert (ligne.Etat, ligne.DateMiseEnVente) == ('En Test', '-')
+
+    def test_tri_invalide(self, db):
+        """Un tri sur une colonne non prévue est refusé"""
+        with pytest.raises(ValueError):
+            AppareilService.lister_appareils_page(db, tri='Modele')
+
+class TestListeVirtuelle:
+    """Tests pour l'accès par position des listes virtualisées"""
+
+    @pytest.fixture
+    def ids(self, db):
+        debut = date(2024, 1, 1)
+        AppareilService.creer_appareil_bulk(db, (
+            {'marque': 'LG', 'modele': 'M', 'num_serie': f'SN{i:04d}', 'date_reception': debut + timedelta(days=i % 9)}
+            for i in range(230)
+        ))
+        page = AppareilService.lister_lignes_appareils_page(db, tri='-DateReception', limite=1000)
+        return [ligne.ID_Appareil for ligne in page['appareils']]
+
+    def _lignes(self, db, **kwargs):
+        def charger(apres, decalage, limite):
+            return AppareilService.lister_lignes_appareils_page(db, tri='-DateReception', apres=apres,
+                                                                decalage=decalage, limite=limite)
+        return VirtualRows(charger, page_size=25, **kwargs)
+
+    def test_fenetres_par_position(self, db, ids):
+        """Sauts et défilement donnent les mêmes lignes que la liste complète"""
+        lignes = self._lignes(db, max_pages=2)
+        assert (lignes.total, lignes.total_exact) == (230, True)
+
+        # Saut direct loin dans la liste (décalage depuis la première page), puis retour
+        for debut in (170, 40, 0, 215, 60, 61):
+            fenetre = lignes.rows(debut, 20)
+            assert [ligne.ID_Appareil for ligne in fenetre] == ids[debut:debut + 20]
+        assert len(lignes._pages) == 2
+
+    def test_decalage_depuis_une_cle(self, db, ids):
+        """Un décalage s'applique après la clé de la page précédente"""
+        page = AppareilService.lister_lignes_appareils_page(db, tri='-DateReception', limite=30)
+        suite = AppareilService.lister_lignes_appareils_page(db, tri='-DateReception', apres=page['cle_suivante'],
+                                                             decalage=50, limite=10)
+        assert [ligne.ID_Appareil for ligne in suite['appareils']] == ids[80:90]
+        assert 'total' not in suite
+
+    def test_total_estime_corrige(self):
+        """Un total sous-estimé grandit au défilement et devient exact en fin de liste"""
+        valeurs = list(range(95))
+
+        def charger(apres, decalage, limite):
+            debut = (0 if apres is None else apres + 1) + decalage
+            lignes = valeurs[debut:debut + limite]
+            page = {'appareils': lignes, 'cle_suivante': lignes[-1] if len(lignes) == limite else None}
+            if apres is None and not decalage:
+                page['total'], page['total_exact'] = 20, False
+            return page
+
+        lignes = VirtualRows(charger, page_size=10)
+        assert lignes.rows(15, 10) == list(range(15, 25))
+        assert lignes.total > 25 and not lignes.total_exact
+
+        assert lignes.rows(90, 10) == list(range(90, 95))
+        assert (lignes.total, lignes.total_exact) == (95, True)
+
+    def test_pages_lues_ailleurs(self):
+        """Sans load_page, les lignes manquantes sont des lignes d'attente jusqu'à l'ajout de leur page"""
+        valeurs = list(range(45))
+
+        def charger(apres, decalage, limite):
+            debut = (0 if apres is None else apres + 1) + decalage
+            lignes = valeurs[debut:debut + limite]
+            return {'appareils': lignes, 'cle_suivante': lignes[-1] if debut + limite < len(valeurs) else None,
+                    'total': len(valeurs), 'total_exact': True}
+
+        lignes = VirtualRows(None, page_size=10, first_page=charger(None, 0, 10))
+        assert lignes.rows(5, 10, placeholder=lambda position: -position) == [5, 6, 7, 8, 9] + [-p for p in range(10, 15)]
+        assert lignes.missing_pages(5, 10) == [1]
+        assert lignes.missing_pages(38, 20) == [3, 4]
+        assert lignes.prefetch_pages(5, 10) == [1]
+
+        # Saut : décalage depuis la dernière clé connue
+        assert lignes.page_request(3) == (9, 20, 10)
+        lignes.add_page(3, charger(*lignes.page_request(3)))
+        assert lignes.rows(30, 10, placeholder=lambda position: None) == list(range(30, 40))
+        assert lignes.missing_pages(25, 10) == [2]
+
+class TestStatistiques:
+    """Tests pour les statistiques calculées par la base"""
+
+    @pytest.fixture
+    def parc(self, db):
+        martin = TechnicienService.creer_technicien(db, 'Martin', 'Paul').ID_Technicien
+        TechnicienService.creer_technicien(db, 'Durand', 'Marie')
+        ids = AppareilService.creer_appareil_bulk(db, (
+            {'marque': marque, 'modele': 'M', 'num_serie': f'SN{i}', 'date_reception': date.today()}
+            for i, marque in enumerate(['LG', 'LG', 'LG', 'Bosch'])
+        ))
+        AppareilService.modifier_etat_appareil(db, ids[0], EtatAppareil.EN_VENTE)
+        session = SessionDeTestService.creer_session(db, ids[0], martin)
+        SessionDeTestService.terminer_session(db, session.ID_Session, ResultatSession.PASSE)
+        SessionDeTestService.creer_session(db, ids[0], martin)
+        diagnostic = DiagnosticReparationService.creer_diagnostic(db, ids[1], martin, 'Fuite')
+        DiagnosticReparationService.terminer_diagnostic(db, diagnostic.ID_DiagRep, 'Joint', ResultatReparation.REUSSI)
+        return ids
+
+    def test_tableau_de_bord(self, db, parc):
+        """Les comptes par état, marque, technicien et résultat sont exacts"""
+        stats = StatistiquesService.tableau_de_bord(db)
+
+        assert stats['total_appareils'] == 4 and stats['total_techniciens'] == 2
+        assert stats['par_etat'] == [(EtatAppareil.EN_TEST, 3), (EtatAppareil.EN_VENTE, 1)]
+        assert stats['par_marque'] == [('LG', 3), ('Bosch', 1)]
+        assert [(nom, n) for _, nom, _, n in stats['sessions_par_technicien']] == [('Martin', 2), ('Durand', 0)]
+        assert sorted(stats['sessions_par_resultat'], key=str) == [
+            (ResultatSession.EN_COURS, 1), (ResultatSession.PASSE, 1)]
+        assert stats['diagnostics_par_resultat'] == [(ResultatReparation.REUSSI, 1)]
+
+    def test_recapitulatif_appareil(self, db, parc):
+        """Le récapitulatif compte les sessions et diagnostics d'un seul appareil"""
+        recap = AppareilService.obtenir_recapitulatif_appareil(db, parc[0])
+
+        assert recap['statistiques']['sessions'] == {'total': 2, 'reussies': 1, 'echouees': 0, 'en_cours': 1}
+        assert recap['statistiques']['diagnostics']['total'] == 0
+
+    def test_base_vide(self, db):
+        """Sans données, les statistiques sont vides"""
+        stats = StatistiquesService.tableau_de_bord(db)
+        assert stats['total_appareils'] == 0 and stats['par_etat'] == []
+
+class TestDossierAppareil:
+    """Tests pour le chargement du dossier complet d'un appareil"""
+
+    def _creer_sessions(self, db, id_appareil, id_technicien, nombre):
+        sessions = SessionDeTestService.creer_session_bulk(
+            db, [{'id_appareil': id_appareil, 'id_technicien': id_technicien}] * nombre)
+        programmes = ProgrammeDeTestService.creer_programme_bulk(
+            db, ({'id_session': s, 'nom_programme': nom} for s in sessions for nom in NomProgramme))
+        CritereDeTestService.creer_critere_bulk(
+            db, ({'id_programme': p, 'nom_critere': nom} for p in programmes for nom in NomCritere))
+
+    def _compter_requetes(self, db, fonction):
+        requetes = []
+        # Le BEGIN émis à l'ouverture de la transaction n'est pas compté
+        ecouteur = lambda conn, cursor, sql, *args: sql.startswith('SELECT') and requetes.append(sql)
+        event.listen(db.get_bind(), 'before_cursor_execute', ecouteur)
+        try:
+            resultat = fonction()
+        finally:
+            event.remove(db.get_bind(), 'before_cursor_execute', ecouteur)
+        return resultat, len(requetes)
+
+    def test_nombre_de_requetes_fixe(self, db):
+        """Le nombre de requêtes ne dépend pas du nombre de sessions et diagnostics"""
+        martin = TechnicienService.creer_technicien(db, 'Martin', 'Paul').ID_Technicien
+        durand = TechnicienService.creer_technicien(db, 'Durand', 'Marie').ID_Technicien
+        id_appareil = AppareilService.creer_appareil(db, 'LG', 'F4', 'SN1', date.today()).ID_Appareil
+
+        self._creer_sessions(db, id_appareil, martin, 1)
+        db.expire_all()
+        _, requetes_petit = self._compter_requetes(
+            db, lambda: AppareilService.obtenir_dossier_appareil(db, id_appareil))
+
+        self._creer_sessions(db, id_appareil, durand, 5)
+        for _ in range(4):
+            DiagnosticReparationService.creer_diagnostic(db, id_appareil, durand, 'Fuite')
+        db.expire_all()
+        dossier, requetes_grand = self._compter_requetes(
+            db, lambda: AppareilService.obtenir_dossier_appareil(db, id_appareil))
+
+        assert requetes_petit == requetes_grand == 5
+        assert len(dossier.sessions) == 6 and len(dossier.diagnostics) == 4
+        assert {s.Technicien for s in dossier.sessions} == {'Martin Paul', 'Durand Marie'}
+        assert all(len(p.criteres) == len(NomCritere) for s in dossier.sessions for p in s.programmes)
+        assert dossier.statistiques['sessions']['en_cours'] == 6
+        assert dossier.statistiques['diagnostics']['en_cours'] == 4
+
+    def test_lecture_seule(self, db):
+        """Le dossier est un tuple nommé immuable, sans accès ultérieur à la base"""
+        martin = TechnicienService.creer_technicien(db, 'Martin', 'Paul').ID_Technicien
+        id_appareil = AppareilService.creer_appareil(db, 'LG', 'F4', 'SN1', date.today()).ID_Appareil
+        self._creer_sessions(db, id_appareil, martin, 2)
+        dossier = AppareilService.obtenir_dossier_appareil(db, id_appareil)
+
+        with pytest.raises(AttributeError):
+            dossier.Etat = EtatAppareil.EN_VENTE
+        _, requetes = self._compter_requetes(
+            db, lambda: [c.NomCritere for s in dossier.sessions for p in s.programmes for c in p.criteres])
+        assert requetes == 0
+        assert AppareilService.obtenir_dossier_appareil(db, 'APP_INCONNU') is None
+
+class TestIterateurs:
+    """Tests pour les parcours par lots"""
+
+    @pytest.fixture
+    def appareils(self, db):
+        return AppareilService.creer_appareil_bulk(db, (
+            {'marque': ['LG', 'Bosch'][i % 2], 'modele': 'M', 'num_serie': f'SN{i:04d}', 'date_reception': date.today()}
+            for i in range(2500)
+        ))
+
+    def test_memoire_bornee(self, db, appareils):
+        """Seul le lot courant reste dans la carte d'identité de la session"""
+        vus, taille_max = [], 0
+        for appareil in AppareilService.iter_appareils(db, taille_lot=100):
+            vus.append(appareil.ID_Appareil)
+            taille_max = max(taille_max, len(db.identity_map))
+
+        assert vus == appareils
+        assert taille_max <= 200
+
+    def test_filtres(self, db, appareils):
+        """Les itérateurs acceptent les mêmes filtres que les listes"""
+        lg = list(AppareilService.iter_appareils(db, filtres={'marque': 'LG'}, taille_lot=300))
+        assert len(lg) == 1250 and all(a.Marque == 'LG' for a in lg)
+
+        technicien = TechnicienService.creer_technicien(db, 'Martin', 'Paul').ID_Technicien
+        SessionDeTestService.creer_session_bulk(
+            db, ({'id_appareil': a, 'id_technicien': technicien} for a in appareils[:3]))
+        sessions = list(SessionDeTestService.iter_sessions(db, id_appareil=appareils[1]))
+        assert [s.ID_Appareil for s in sessions] == [appareils[1]]
+
+    def test_instantane_coherent(self, db, manager, appareils):
+        """Dans read_snapshot, les écritures d'une autre connexion ne sont pas vues"""
+        autre = manager.get_session()
+        with read_snapshot(db):
+            premier = next(AppareilService.iter_appareils(db))
+            AppareilService.creer_appareil(autre, 'Candy', 'C1', 'SN9999', date.today())
+            assert sum(1 for _ in AppareilService.iter_appareils(db)) == 2500
+            assert premier.ID_Appareil == appareils[0]
+        autre.close()
+
+        assert sum(1 for _ in AppareilService.iter_appareils(db)) == 2501
+
+class TestCacheLectures:
+    """Tests pour le cache des techniciens et des marques"""
+
+    def _compter_requetes(self, db):
+        requetes = []
+        event.listen(db.get_bind(), 'before_cursor_execute',
+                     lambda conn, cursor, sql, *args: sql.startswith('SELECT') and requetes.append(sql))
+        return requetes
+
+    def test_lectures_servies_par_le_cache(self, db):
+        """Les lectures répétées ne refont pas de requête"""
+        technicien = TechnicienService.creer_technicien(db, 'Martin', 'Paul').ID_Technicien
+        AppareilService.creer_appareil(db, 'LG', 'F4', 'SN1', date.today())
+        requetes = self._compter_requetes(db)
+
+        for _ in range(5):
+            assert TechnicienService.obtenir_technicien(db, technicien).Nom == 'Martin'
+            assert [t.Prenom for t in TechnicienService.lister_techniciens(db)] == ['Paul']
+            assert AppareilService.lister_marques(db) == ['LG']
+        assert len(requetes) == 3
+
+    def test_invalidation_par_les_creations(self, db):
+        """Les créations, unitaires ou en masse, vident le cache concerné"""
+        assert TechnicienService.lister_techniciens(db) == []
+        assert AppareilService.lister_marques(db) == []
+
+        TechnicienService.creer_technicien(db, 'Martin', 'Paul')
+        TechnicienService.creer_technicien_bulk(db, [{'nom': 'Durand', 'prenom': 'Marie'}])
+        AppareilService.creer_appareil_bulk(
+            db, [{'marque': 'Bosch', 'modele': 'S6', 'num_serie': 'SN1', 'date_reception': date.today()}])
+
+        assert sorted(t.Nom for t in TechnicienService.lister_techniciens(db)) == ['Durand', 'Martin']
+        assert AppareilService.lister_marques(db) == ['Bosch']
+
+    def test_annulation_ne_laisse_rien_en_cache(self, db):
+        """Un technicien lu dans une transaction annulée ne reste pas en cache"""
+        with pytest.raises(RuntimeError):
+            with transaction(db):
+                TechnicienService.creer_technicien(db, 'Martin', 'Paul')
+                assert len(TechnicienService.lister_techniciens(db)) == 1
+                raise RuntimeError("abandon")
+
+        assert TechnicienService.lister_techniciens(db) == []
+
+    def test_compteurs(self):
+        """Succès, échecs et évictions sont comptés ; la durée de vie est respectée"""
+        maintenant = [0.0]
+        cache = LookupCache('essai', maxsize=2, ttl=10, clock=lambda: maintenant[0])
+
+        cache.get_or_load('a', lambda: 1)
+        cache.get_or_load('a', lambda: 2)
+        cache.get_or_load('b', lambda: 3)
+        cache.get_or_load('c', lambda: 4)
+        maintenant[0] = 11
+        assert cache.get_or_load('c', lambda: 5) == 5
+
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['evictions'], stats['size']) == (1, 4, 1, 2)
+        assert any(s['name'] == 'techniciens' for s in cache_stats())
+
+    def test_invalidation_pendant_chargement(self):
+        """Une valeur chargée pendant une invalidation n'est pas conservée"""
+        cache = LookupCache('essai')
+
+        def charger():
+            # Écriture (et invalidation) pendant la lecture
+            cache.invalidate('a')
+            return 'ancienne'
+
+        assert cache.get_or_load('a', charger) == 'ancienne'
+        assert cache.get_or_load('a', lambda: 'nouvelle') == 'nouvelle'
+
+class TestModificationEtatEnMasse:
+    """Tests pour les changements d'état ensemblistes"""
+
+    @pytest.fixture
+    def appareils(self, db):
+        return AppareilService.creer_appareil_bulk(db, (
+            {'marque': ['LG', 'Bosch'][i % 2], 'modele': 'M', 'num_serie': f'SN{i:04d}', 'date_reception': date.today()}
+            for i in range(1200)
+        ))
+
+    def test_par_identifiants(self, db, appareils):
+        """Un seul appel pour 1200 appareils, les identifiants inconnus sont signalés"""
+        deja_charge = AppareilService.obtenir_appareil(db, appareils[0])
+        ids = appareils + ['APP_INCONNU', appareils[0]]
+
+        resultat = AppareilService.modifier_etat_appareils(db, EtatAppareil.EN_VENTE, ids=ids)
+
+        assert resultat == {'modifies': 1200, 'manquants': ['APP_INCONNU']}
+        assert deja_charge.Etat == EtatAppareil.EN_VENTE
+        assert db.query(Appareil).filter(Appareil.DateMiseEnVente == date.today()).count() == 1200
+
+    def test_par_filtres(self, db, appareils):
+        """Les filtres désignent les appareils à modifier ; les autres ne changent pas"""
+        resultat = AppareilService.modifier_etat_appareils(
+            db, EtatAppareil.RECONDITIONNE, filtres={'marque': 'LG', 'etat': EtatAppareil.EN_TEST})
+
+        assert resultat['modifies'] == 600
+        par_etat = dict(StatistiquesService.appareils_par_etat(db))
+        assert par_etat == {EtatAppareil.RECONDITIONNE: 600, EtatAppareil.EN_TEST: 600}
+        assert db.query(Appareil).filter(Appareil.DateMiseEnVente.isnot(None)).count() == 0
+
+    def test_designation_obligatoire(self, db):
+        """Il faut indiquer soit des identifiants, soit des filtres"""
+        with pytest.raises(ValueError):
+            AppareilService.modifier_etat_appareils(db, EtatAppareil.EN_VENTE)
+
+class TestActualisationIncrementale:
+    """Tests pour la lecture des seules lignes modifiées"""
+
+    def test_version_de_toutes_les_ecritures(self, db):
+        """Créations unitaires et en masse, modifications ORM et ensemblistes avancent la version"""
+        unitaire = AppareilService.creer_appareil(db, 'LG', 'M', 'SN1', date(2024, 1, 1))
+        ids = AppareilService.creer_appareil_bulk(db, (
+            {'marque': 'Bosch', 'modele': 'M', 'num_serie': f'SN{i}', 'date_reception': date(2024, 1, 2)}
+            for i in range(2, 6)
+        ))
+        technicien = TechnicienService.creer_technicien(db, 'Martin', 'Paul')
+        assert len(AppareilService.lister_lignes_appareils_modifiees(db, 0)['appareils']) == 5
+        assert TechnicienService.lister_techniciens_modifies(db, 0)['techniciens'] == [
+            (technicien.ID_Technicien, 'Martin', 'Paul')
+        ]
+
+        repere = AppareilService.derniere_modification_appareils(db)
+        assert AppareilService.lister_lignes_appareils_modifiees(db, repere)['appareils'] == []
+
+        AppareilService.mettre_a_jour_actions_a_faire(db, unitaire.ID_Appareil, "Changer le joint")
+        AppareilService.modifier_etat_appareils(db, EtatAppareil.EN_VENTE, ids=ids[:2])
+        modifications = AppareilService.lister_lignes_appareils_modifiees(db, repere)
+
+        assert modifications['complet']
+        assert {ligne.ID_Appareil for ligne in modifications['appareils']} == {unitaire.ID_Appareil, *ids[:2]}
+        assert modifications['version'] > repere
+        suivantes = AppareilService.lister_lignes_appareils_modifiees(db, modifications['version'])
+        assert suivantes['appareils'] == [] and suivantes['version'] == modifications['version']
+
+    def test_validation_tardive(self, manager, db):
+        """Une écriture commencée avant la lecture du repère et validée après n'est pas perdue"""
+        appareil = AppareilService.creer_appareil(db, 'LG', 'M', 'SN1', date(2024, 1, 1))
+
+        autre = manager.get_session()
+        autre.query(Appareil).filter(Appareil.ID_Appareil == appareil.ID_Appareil).update({Appareil.Modele: 'M2'})
+        # Une écriture plus récente ne peut pas être validée avant : le verrou est pris
+        repere = AppareilService.derniere_modification_appareils(db)
+        autre.commit()
+        autre.close()
+
+        modifiees = AppareilService.lister_lignes_appareils_modifiees(db, repere)['appareils']
+        assert [(ligne.ID_Appareil, ligne.Modele) for ligne in modifiees] == [(appareil.ID_Appareil, 'M2')]
+
+    def test_trop_de_modifications(self, db):
+        """Au-delà de la limite, l'appelant est invité à relire la liste"""
+        AppareilService.creer_appareil_bulk(db, (
+            {'marque': 'LG', 'modele': 'M', 'num_serie': f'SN{i}', 'date_reception': date(2024, 1, 1)}
+            for i in range(30)
+        ))
+        modifications = AppareilService.lister_lignes_appareils_modifiees(db, None, limite=20)
+        assert not modifications['complet'] and modifications['version'] is None
+
+    def test_techniciens_modifies(self, db):
+        """La lecture initiale retourne tous les techniciens, les suivantes les seuls modifiés"""
+        TechnicienService.creer_technicien(db, 'Martin', 'Paul')
+        initiale = TechnicienService.lister_techniciens_modifies(db, None)
+        assert [ligne[1:] for ligne in initiale['techniciens']] == [('Martin', 'Paul')]
+
+        nouveau = TechnicienService.creer_technicien(db, 'Durand', 'Lea')
+        suivante = TechnicienService.lister_techniciens_modifies(db, initiale['version'])
+        assert suivante['techniciens'] == [(nouveau.ID_Technicien, 'Durand', 'Lea')]
+
+    def test_suppressions_signalees(self, manager, db):
+        """Une ligne supprimée, même par un autre outil, est signalée par son ID"""
+        appareil = AppareilService.creer_appareil(db, 'LG', 'M', 'SN1', date(2024, 1, 1))
+        technicien = TechnicienService.creer_technicien(db, 'Martin', 'Paul')
+        repere = AppareilService.derniere_modification_appareils(db)
+        assert AppareilService.lister_lignes_appareils_modifiees(db, None)['supprimes'] == []
+
+        with manager.engine.begin() as connexion:
+            connexion.execute(text("DELETE FROM appareils WHERE ID_Appareil = :id"), {'id': appareil.ID_Appareil})
+            connexion.execute(text("DELETE FROM techniciens"))
+
+        modifications = AppareilService.lister_lignes_appareils_modifiees(db, repere)
+        assert modifications['appareils'] == [] and modifications['supprimes'] == [appareil.ID_Appareil]
+        assert modifications['version'] > repere
+        assert TechnicienService.lister_techniciens_modifies(db, repere)['supprimes'] == [technicien.ID_Technicien]
+        assert AppareilService.lister_lignes_appareils_modifiees(db, modifications['version'])['supprimes'] == []
+
+    def test_lignes_virtuelles_remplacees_sur_place(self, db):
+        """Une modification sans changement de clé de tri est appliquée sans relire la liste"""
+        ids = AppareilService.creer_appareil_bulk(db, (
+            {'marque': 'LG', 'modele': 'M', 'num_serie': f'SN{i:02d}', 'date_reception': date(2024, 1, 1 + i)}
+            for i in range(20)
+        ))
+        chargements = []
+
+        def charger(apres, decalage, limite):
+            chargements.append(decalage)
+            return AppareilService.lister_lignes_appareils_page(db, tri='-DateReception', apres=apres,
+                                                                decalage=decalage, limite=limite)
+
+        lignes = VirtualRows(charger, page_size=10)
+        repere = AppareilService.derniere_modification_appareils(db)
+        date_reception = itemgetter(4)
+
+        AppareilService.modifier_etat_appareils(db, EtatAppareil.EN_VENTE, ids=[ids[-1]])
+        modifiees = AppareilService.lister_lignes_appareils_modifiees(db, repere)['appareils']
+        assert lignes.update_rows(modifiees, date_reception)
+        assert lignes.rows(0, 1)[0].Etat == 'En Vente' and len(chargements) == 1
+
+        # Ligne pas encore lue (page 2), puis nouvel appareil : la liste doit être relue
+        AppareilService.modifier_etat_appareils(db, EtatAppareil.EN_VENTE, ids=[ids[0]])
+        assert not lignes.update_rows(AppareilService.lister_lignes_appareils_modifiees(db, repere)['appareils'],
+                                      date_reception)
+
+class TestRechercheAppareils:
+    """Tests pour la recherche instantanée d'appareils"""
+
+    def test_recherche_par_champ(self, db):
+        """ID, numéro de série, marque ou modèle, par le début ou une partie du champ"""
+        ids = AppareilService.creer_appareil_bulk(db, (
+            {'marque': marque, 'modele': modele, 'num_serie': num_serie, 'date_reception': date(2024, 1, 1)}
+            for marque, modele, num_serie in [('Bosch', 'Serie 4', 'BX-1000'), ('LG', 'F4WV', 'LG-7000'),
+                                              ('Samsung', 'WW90', 'SM-1001')]
+        ))
+
+        assert [a.ID_Appareil for a in AppareilService.rechercher_appareils(db, 'bosch')['appareils']] == [ids[0]]
+        assert [a.NumSerie for a in AppareilService.rechercher_appareils(db, '-100')['appareils']] == \
+            ['BX-1000', 'SM-1001']
+        assert [a.Modele for a in AppareilService.rechercher_appareils(db, ids[1])['appareils']] == ['F4WV']
+
+        resultat = AppareilService.rechercher_appareils(db, '100', limite=1)
+        assert len(resultat['appareils']) == 1 and not resultat['complet']
+
+    def test_index_mis_a_jour(self, manager, db):
+        """Les créations et modifications faites après la construction de l'index sont trouvées"""
+        appareil = AppareilService.creer_appareil(db, 'Bosch', 'Serie 4', 'BX-1000', date(2024, 1, 1))
+        assert AppareilService.indexer_recherche_appareils(db) == 1
+
+        # Écritures par une autre session (autre poste, import)
+        autre = manager.get_session()
+        AppareilService.creer_appareil(autre, 'LG', 'F4WV', 'LG-7000', date(2024, 1, 2))
+        autre.query(Appareil).filter(Appareil.ID_Appareil == appareil.ID_Appareil).update({Appareil.NumSerie: 'BX-2000'})
+        autre.commit()
+        autre.close()
+
+        assert [a.NumSerie for a in AppareilService.rechercher_appareils(db, 'F4WV')['appareils']] == ['LG-7000']
+        assert AppareilService.rechercher_appareils(db, 'BX-1000')['appareils'] == []
+        resultat = AppareilService.rechercher_appareils(db, 'bx-2')
+        assert [a.ID_Appareil for a in resultat['appareils']] == [appareil.ID_Appareil]
+        assert AppareilService.lister_lignes_appareils_modifiees(db, resultat['version'])['appareils'] == []
+
+    def test_validation_tardive(self, manager, db):
+        """Une écriture validée après la construction de l'index, mais commencée avant, est trouvée"""
+        appareil = AppareilService.creer_appareil(db, 'Bosch', 'Serie 4', 'BX-1000', date(2024, 1, 1))
+        autre = manager.get_session()
+        autre.query(Appareil).filter(Appareil.ID_Appareil == appareil.ID_Appareil).update({Appareil.Modele: 'WAT28'})
+
+        assert AppareilService.indexer_recherche_appareils(db) == 1
+        autre.commit()
+        autre.close()
+
+        assert [a.ID_Appareil for a in AppareilService.rechercher_appareils(db, 'wat')['appareils']] == \
+            [appareil.ID_Appareil]
+
+    def test_suppression_retiree_de_l_index(self, manager, db):
+        """Un appareil supprimé, même par un autre outil, sort de l'index sans reconstruction"""
+        appareil = AppareilService.creer_appareil(db, 'Bosch', 'Serie 4', 'BX-1000', date(2024, 1, 1))
+        AppareilService.creer_appareil(db, 'LG', 'F4WV', 'LG-7000', date(2024, 1, 2))
+        assert AppareilService.indexer_recherche_appareils(db) == 2
+
+        with manager.engine.begin() as connexion:
+            connexion.execute(text("DELETE FROM appareils WHERE ID_Appareil = :id"), {'id': appareil.ID_Appareil})
+        assert AppareilService.indexer_recherche_appareils(db) == 1
+        assert AppareilService.rechercher_appareils(db, 'bosch')['appareils'] == []
+
+    def test_reconstruction_periodique(self, manager, db, monkeypatch):
+        """Après DUREE_INDEX_RECHERCHE, l'index est reconstruit en arrière-plan sans bloquer les recherches"""
+        AppareilService.creer_appareil_bulk(db, (
+            {'marque': 'LG', 'modele': 'M', 'num_serie': f'SN{i}', 'date_reception': date(2024, 1, 1)}
+            for i in range(3)
+        ))
+        services._cache_recherche.invalidate()
+        assert AppareilService.indexer_recherche_appareils(db) == 3
+
+        # Suppression par un outil qui écrit sans les triggers de version
+        with manager.engine.begin() as connexion:
+            connexion.execute(text("DROP TRIGGER _gestia_v_appareils_del"))
+            connexion.execute(text("DELETE FROM appareils WHERE NumSerie = 'SN0'"))
+        assert AppareilService.indexer_recherche_appareils(db) == 3
+
+        construire = AppareilService._construire_index
+        debloquer = threading.Event()
+
+        def construire_lentement(session):
+            debloquer.wait(5)
+            return construire(session)
+
+        monkeypatch.setattr(AppareilService, '_construire_index', staticmethod(construire_lentement))
+        monkeypatch.setattr(services, 'DUREE_INDEX_RECHERCHE', 0.0)
+        # La reconstruction est lancée, les recherches continuent sur l'index courant
+        assert AppareilService.indexer_recherche_appareils(db) == 3
+        reconstruction, = [thread for thread in threading.enumerate() if thread.name == 'gestia-index-recherche']
+        assert AppareilService.indexer_recherche_appareils(db) == 3 and reconstruction.is_alive()
+
+        debloquer.set()
+        reconstruction.join(5)
+        monkeypatch.setattr(services, 'DUREE_INDEX_RECHERCHE', 3600.0)
+        assert AppareilService.indexer_recherche_appareils(db) == 2
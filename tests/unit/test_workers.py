@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests pour les lectures en arrière-plan GESTIA
+==============================================
+
+Tests unitaires pour l'exécuteur de l'interface graphique. La fenêtre Tk
+est remplacée par une file de rappels exécutés à la demande.
+"""
+
+import pytest
+import threading
+import time
+import sys
+import os
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+pytest.importorskip('tkinter')
+
+from gestia.core.database import DatabaseManager
+from gestia.core.services import TechnicienService
+from gestia.ui.workers import BackgroundExecutor
+
+class FenetreSimulee:
+    """Remplace root.after : les rappels s'exécutent quand le test le décide"""
+
+    def __init__(self):
+        self.rappels = []
+
+    def after(self, delai, rappel):
+        self.rappels.append(rappel)
+        return len(self.rappels)
+
+    def traiter(self, executeur, timeout=5.0):
+        """Exécute les rappels jusqu'à ce que l'exécuteur n'ait plus de tâche"""
+        limite = time.monotonic() + timeout
+        while executeur.busy:
+            assert time.monotonic() < limite
+            time.sleep(0.01)
+            rappels, self.rappels = self.rappels, []
+            for rappel in rappels:
+                rappel()
+
+@pytest.fixture
+def manager(tmp_path):
+    """Base de test neuve"""
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'gestia.db'}", profile='test')
+    manager.create_tables()
+    yield manager
+    manager.dispose()
+
+@pytest.fixture
+def fenetre():
+    return FenetreSimulee()
+
+@pytest.fixture
+def executeur(manager, fenetre):
+    etats = []
+    executeur = BackgroundExecutor(fenetre, manager.get_session, on_busy=etats.append)
+    executeur.etats = etats
+    yield executeur
+    executeur.shutdown()
+
+class TestBackgroundExecutor:
+    """Tests pour l'exécuteur de lectures en arrière-plan"""
+
+    def test_resultat_livre_sur_le_thread_appelant(self, manager, fenetre, executeur):
+        """La lecture se fait sur un thread de travail, le rappel sur le thread de l'interface"""
+        db = manager.get_session()
+        TechnicienService.creer_technicien(db, 'Martin', 'Paul')
+        db.close()
+
+        threads, recus = [], []
+
+        def lire(session):
+            threads.append(threading.current_thread())
+            return TechnicienService.lister_techniciens(session)
+
+        executeur.submit(lire, lambda techniciens: recus.append((threading.current_thread(), techniciens)))
+        fenetre.traiter(executeur)
+
+        assert threads[0] is not threading.current_thread()
+        (thread, techniciens), = recus
+        assert thread is threading.current_thread()
+        # Objets détachés de la session de travail, colonnes lisibles
+        assert [(t.Nom, t.Prenom) for t in techniciens] == [('Martin', 'Paul')]
+        assert executeur.etats == [True, False]
+
+    def test_annulation_par_groupe(self, fenetre, executeur):
+        """Les tâches d'un écran quitté ne sont pas livrées, les autres le sont"""
+        debut = threading.Event()
+        recus = []
+
+        def lente(session):
+            debut.wait(5)
+            return 'ancien écran'
+
+        executeur.submit(lente, recus.append, group='contenu')
+        executeur.submit(lambda session: 'dossier', recus.append, group='dossier')
+        executeur.cancel_group('contenu')
+        debut.set()
+        fenetre.traiter(executeur)
+
+        assert recus == ['dossier']
+
+    def test_erreur_transmise(self, fenetre, executeur):
+        """Une exception de la lecture est passée à on_error sur le thread de l'interface"""
+        erreurs = []
+
+        def echec(session):
+            raise RuntimeError("base verrouillée")
+
+        executeur.submit(echec, pytest.fail, on_error=erreurs.append)
+        fenetre.traiter(executeur)
+
+        assert [str(e) for e in erreurs] == ["base verrouillée"]
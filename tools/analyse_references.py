@@ -9,6 +9,7 @@ Script pour analyser et décomposer les références complexes d'appareils élec
 import re
 import sys
 import os
+from collections import Counter
 
 # Ajouter le répertoire src au path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -46,6 +47,14 @@ class AnalyseurReferences:
             'GR': 'Gris',
         }
     
+    def identifier_format(self, reference):
+        """Retourne le nom du format reconnu pour une référence, ou None"""
+        reference = reference.upper()
+        for nom, pattern in self.patterns.items():
+            if re.match(pattern, reference):
+                return nom
+        return None
+    
     def analyser_reference_samsung(self, reference):
         """Analyse une référence Samsung"""
         print(f"🔍 Analyse de la référence : {reference}")
@@ -167,12 +176,15 @@ def analyser_appareils_existants():
     db = db_manager.get_session()
     
     try:
-        appareils = AppareilService.lister_appareils(db)
+        # Seuls les 5 premiers appareils sont analysés : inutile de charger la table
+        page = AppareilService.lister_appareils_page(db, tri='ID_Appareil', limite=5)
+        appareils = page['appareils']
+        nombre = page['total']
         analyseur = AnalyseurReferences()
         
-        print(f"📋 {len(appareils)} appareils trouvés dans la base")
+        print(f"📋 {nombre if page['total_exact'] else f'environ {nombre}'} appareils trouvés dans la base")
         
-        for appareil in appareils[:5]:  # Analyser les 5 premiers
+        for appareil in appareils:
             print(f"\n🔍 Appareil {appareil.ID_Appareil}:")
             print(f"  Marque : {appareil.Marque}")
             print(f"  Modèle : {appareil.Modele}")
@@ -183,8 +195,42 @@ def analyser_appareils_existants():
             else:
                 analyseur.analyser_reference_generique(appareil.Modele)
         
-        if len(appareils) > 5:
-            print(f"\n... et {len(appareils) - 5} autres appareils")
+        if nombre > len(appareils):
+            print(f"\n... et {nombre - len(appareils)} autres appareils")
+            
+    except Exception as e:
+        print(f"❌ Erreur lors de l'analyse : {e}")
+    finally:
+        db.close()
+
+def analyser_toutes_les_references():
+    """Compte les formats de référence de tous les appareils de la base"""
+    print("\n📈 Formats de référence de tous les appareils")
+    print("=" * 60)
+    
+    set_environment('development')
+    init_database()
+    db = db_manager.get_session()
+    
+    try:
+        analyseur = AnalyseurReferences()
+        formats = Counter()
+        non_reconnus = Counter()
+        
+        # Parcours par lots : la mémoire ne dépend pas du nombre d'appareils
+        for appareil in AppareilService.iter_appareils(db):
+            nom_format = analyseur.identifier_format(appareil.Modele)
+            formats[nom_format or 'non reconnu'] += 1
+            if nom_format is None:
+                non_reconnus[appareil.Marque] += 1
+        
+        print(f"📋 {sum(formats.values())} appareils analysés")
+        for nom_format, nombre in formats.most_common():
+            print(f"  {nom_format} : {nombre}")
+        if non_reconnus:
+            print("\n❓ Références non reconnues par marque :")
+            for marque, nombre in non_reconnus.most_common(10):
+                print(f"  {marque} : {nombre}")
             
     except Exception as e:
         print(f"❌ Erreur lors de l'analyse : {e}")
@@ -193,4 +239,5 @@ def analyser_appareils_existants():
 
 if __name__ == "__main__":
     test_analyse_references()
-    analyser_appareils_existants() 
\ No newline at end of file
+    analyser_appareils_existants()
+    analyser_toutes_les_references() 
\ No newline at end of file
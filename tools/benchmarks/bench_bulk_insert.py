@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark des créations en masse
+================================
+
+Compare AppareilService.creer_appareil (add + commit + refresh par ligne)
+et AppareilService.creer_appareil_bulk (INSERT multi-lignes dans une seule
+transaction) pour chaque profil de moteur. Les profils development et
+production ont le journal des modifications actif (triggers de capture).
+
+Usage :
+    python tools/benchmarks/bench_bulk_insert.py --appareils 100000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from gestia.core.database import DatabaseManager, ENGINE_PROFILES
+from gestia.core.services import AppareilService
+
+MARQUES = ["Samsung", "LG", "Bosch", "Whirlpool", "Electrolux", "Beko", "Candy"]
+
+def appareils(nombre):
+    """Génère les enregistrements à créer"""
+    aujourd_hui = date.today()
+    for i in range(nombre):
+        yield {
+            'marque': MARQUES[i % len(MARQUES)],
+            'modele': f"MOD{i % 500}",
+            'num_serie': f"SN{i:09d}",
+            'date_reception': aujourd_hui,
+        }
+
+def bench_profile(profile, nb_unitaires, nb_masse):
+    """Mesure les créations unitaires puis en masse sur une base neuve"""
+    workdir = tempfile.mkdtemp(prefix="gestia_bench_")
+    manager = DatabaseManager(f"sqlite:///{os.path.join(workdir, 'gestia.db')}", profile=profile)
+    manager.create_tables()
+    db = manager.get_session()
+
+    start = time.perf_counter()
+    for appareil in appareils(nb_unitaires):
+        AppareilService.creer_appareil(db, appareil['marque'], appareil['modele'],
+                                       appareil['num_serie'], appareil['date_reception'])
+    unit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    AppareilService.creer_appareil_bulk(db, appareils(nb_masse))
+    bulk_time = time.perf_counter() - start
+
+    db.close()
+    manager.dispose()
+    shutil.rmtree(workdir)
+    return {
+        'profile': profile,
+        'changelog': manager.profile['changelog'],
+        'unit_per_s': nb_unitaires / unit_time,
+        'bulk_per_s': nb_masse / bulk_time,
+    }
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Benchmark des créations en masse")
+    parser.add_argument('--appareils', type=int, default=100000,
+                       help="Nombre d'appareils créés en masse")
+    parser.add_argument('--unitaires', type=int, default=2000,
+                       help="Nombre d'appareils créés un par un")
+    args = parser.parse_args()
+
+    results = [bench_profile(name, args.unitaires, args.appareils) for name in ENGINE_PROFILES]
+
+    print()
+    print(f"{'Profil':<14} {'Journal':>8} {'Unitaire/s':>12} {'Masse/s':>12} {'Gain':>8}")
+    print("-" * 59)
+    for result in results:
+        print(f"{result['profile']:<14} {'oui' if result['changelog'] else 'non':>8} "
+              f"{result['unit_per_s']:>12.0f} {result['bulk_per_s']:>12.0f} "
+              f"{result['bulk_per_s'] / result['unit_per_s']:>7.0f}x")
+
+if __name__ == "__main__":
+    main()
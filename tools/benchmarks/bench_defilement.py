@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark du défilement de la liste virtualisée
+===============================================
+
+Mesure, sur un grand inventaire, le temps de lecture des lignes affichées
+par la liste virtualisée (VirtualRows sur lister_lignes_appareils_page) :
+ouverture de la liste, défilement ligne à ligne et page à page, sauts
+aléatoires de la barre de défilement. Seule la lecture des données est
+mesurée (pas de rendu Tk) ; le widget n'insère que les lignes visibles.
+
+Usage :
+    python tools/benchmarks/bench_defilement.py --appareils 1000000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from gestia.core.database import DatabaseManager
+from gestia.core.paging import VirtualRows
+from gestia.core.services import AppareilService
+
+MARQUES = ["Samsung", "LG", "Bosch", "Whirlpool", "Electrolux", "Beko", "Candy"]
+
+# Lignes visibles dans la fenêtre
+VISIBLES = 30
+
+def appareils(nombre):
+    """Génère les enregistrements à créer"""
+    debut = date(2020, 1, 1)
+    for i in range(nombre):
+        yield {
+            'marque': MARQUES[i % len(MARQUES)],
+            'modele': f"MOD{i % 500}",
+            'num_serie': f"SN{i:09d}",
+            'date_reception': debut + timedelta(days=i % 1500),
+        }
+
+def mesurer(lignes, positions):
+    """Retourne les durées (ms) de lecture de la fenêtre visible à chaque position"""
+    durees = []
+    for position in positions:
+        start = time.perf_counter()
+        lignes.rows(position, VISIBLES)
+        durees.append((time.perf_counter() - start) * 1000)
+    return durees
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Benchmark du défilement de la liste virtualisée")
+    parser.add_argument('--appareils', type=int, default=1000000, help="Nombre d'appareils en base")
+    parser.add_argument('--sauts', type=int, default=200, help="Nombre de sauts aléatoires")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="gestia_bench_")
+    manager = DatabaseManager(f"sqlite:///{os.path.join(workdir, 'gestia.db')}", profile='test')
+    manager.create_tables()
+    db = manager.get_session()
+
+    print(f"🔧 Création de {args.appareils} appareils...")
+    AppareilService.creer_appareil_bulk(db, appareils(args.appareils))
+
+    def charger(apres, decalage, limite):
+        return AppareilService.lister_lignes_appareils_page(db, tri='-DateReception', apres=apres,
+                                                            decalage=decalage, limite=limite)
+
+    start = time.perf_counter()
+    lignes = VirtualRows(charger)
+    lignes.rows(0, VISIBLES)
+    ouverture = (time.perf_counter() - start) * 1000
+
+    resultats = [
+        ("Ligne à ligne (10k)", mesurer(lignes, range(0, 10000))),
+        ("Page à page (10k)", mesurer(lignes, range(0, 10000 * VISIBLES, VISIBLES))),
+    ]
+    random.seed(42)
+    sauts = [random.randrange(args.appareils - VISIBLES) for _ in range(args.sauts)]
+    resultats.append(("Sauts aléatoires", mesurer(VirtualRows(charger), sauts)))
+    # Après les sauts, les clés connues rapprochent les sauts suivants
+    resultats.append(("Sauts, clés connues", mesurer(lignes, sauts)))
+
+    db.close()
+    manager.dispose()
+    shutil.rmtree(workdir)
+
+    print()
+    print(f"Ouverture de la liste : {ouverture:.1f} ms")
+    print(f"{'Défilement':<22} {'Moyenne (ms)':>13} {'p95 (ms)':>9} {'Max (ms)':>9}")
+    print("-" * 56)
+    for nom, durees in resultats:
+        p95 = statistics.quantiles(durees, n=20)[-1]
+        print(f"{nom:<22} {statistics.mean(durees):>13.2f} {p95:>9.2f} {max(durees):>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark des profils de moteur SQLite
+======================================
+
+Compare le débit d'écriture et de lecture entre la configuration historique
+(journal rollback, pragmas par défaut, echo SQL) et les profils de moteur
+définis dans gestia.core.database.
+
+Usage :
+    python tools/benchmarks/bench_engine_profiles.py --appareils 100000
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from gestia.core.database import DatabaseManager, ENGINE_PROFILES
+from gestia.core.models import Appareil, EtatAppareil
+
+# Configuration historique : aucun pragma, rollback journal
+LEGACY_PROFILE = {'echo': False, 'pragmas': {}}
+LEGACY_ECHO_PROFILE = {'echo': True, 'pragmas': {}}
+
+MARQUES = ["Samsung", "LG", "Bosch", "Whirlpool", "Electrolux", "Beko", "Candy"]
+
+def seed_database(db_path, nb_appareils):
+    """Remplit une base avec nb_appareils appareils (insertion brute rapide)"""
+    manager = DatabaseManager(f"sqlite:///{db_path}", profile=LEGACY_PROFILE)
+    manager.create_tables()
+    manager.engine.dispose()
+
+    conn = sqlite3.connect(db_path)
+    debut = date(2024, 1, 1)
+    etats = [etat.name for etat in EtatAppareil]
+    conn.executemany(
+        "INSERT INTO appareils (ID_Appareil, Marque, Modele, NumSerie, DateReception, Etat) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (f"APP_{i:08d}", random.choice(MARQUES), f"MOD{i % 500}", f"SN{i:09d}",
+             (debut + timedelta(days=i % 365)).isoformat(), random.choice(etats))
+            for i in range(nb_appareils)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+def bench_profile(label, profile, template_path, nb_ecritures, nb_lectures):
+    """Mesure les écritures unitaires (add + commit) et les lectures par clé"""
+    workdir = tempfile.mkdtemp(prefix="gestia_bench_")
+    db_path = os.path.join(workdir, "gestia.db")
+    with open(template_path, 'rb') as src, open(db_path, 'wb') as dst:
+        dst.write(src.read())
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        manager = DatabaseManager(f"sqlite:///{db_path}", profile=profile)
+        session = manager.get_session()
+
+        # Écritures : même schéma que AppareilService.creer_appareil
+        start = time.perf_counter()
+        for i in range(nb_ecritures):
+            session.add(Appareil(
+                ID_Appareil=f"BENCH_{i:08d}",
+                Marque=random.choice(MARQUES),
+                Modele="BENCH",
+                NumSerie=f"BSN{i:09d}",
+                DateReception=date.today(),
+                Etat=EtatAppareil.EN_TEST,
+            ))
+            session.commit()
+        write_time = time.perf_counter() - start
+
+        # Lectures : recherche par identifiant
+        total = session.query(Appareil).count()
+        ids = [f"APP_{random.randrange(total - nb_ecritures):08d}" for _ in range(nb_lectures)]
+        start = time.perf_counter()
+        for id_appareil in ids:
+            session.query(Appareil).filter(Appareil.ID_Appareil == id_appareil).first()
+            session.expunge_all()
+        read_time = time.perf_counter() - start
+
+        session.close()
+        manager.engine.dispose()
+
+    return {
+        'label': label,
+        'writes_per_s': nb_ecritures / write_time,
+        'reads_per_s': nb_lectures / read_time,
+    }
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Benchmark des profils de moteur SQLite")
+    parser.add_argument('--appareils', type=int, default=100000,
+                       help="Nombre d'appareils dans la base de référence")
+    parser.add_argument('--ecritures', type=int, default=2000,
+                       help="Nombre d'écritures unitaires (add + commit)")
+    parser.add_argument('--lectures', type=int, default=20000,
+                       help="Nombre de lectures par identifiant")
+    args = parser.parse_args()
+
+    random.seed(42)
+    workdir = tempfile.mkdtemp(prefix="gestia_bench_")
+    template_path = os.path.join(workdir, "template.db")
+    print(f"🔧 Préparation d'une base de {args.appareils} appareils...")
+    seed_database(template_path, args.appareils)
+
+    scenarios = [
+        ("historique (echo=True)", LEGACY_ECHO_PROFILE),
+        ("historique (sans echo)", LEGACY_PROFILE),
+    ] + [(f"profil {name}", name) for name in ENGINE_PROFILES]
+
+    results = [
+        bench_profile(label, profile, template_path, args.ecritures, args.lectures)
+        for label, profile in scenarios
+    ]
+
+    reference = results[0]
+    print()
+    print(f"{'Configuration':<26} {'Écritures/s':>12} {'Lectures/s':>12} {'x écr.':>8} {'x lect.':>8}")
+    print("-" * 70)
+    for result in results:
+        print(f"{result['label']:<26} {result['writes_per_s']:>12.0f} {result['reads_per_s']:>12.0f} "
+              f"{result['writes_per_s'] / reference['writes_per_s']:>8.1f} "
+              f"{result['reads_per_s'] / reference['reads_per_s']:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark des identifiants
+==========================
+
+Compare le schéma historique (préfixe + 8 caractères hexadécimaux
+aléatoires) et les identifiants horodatés de gestia.core.ids : débit
+d'insertion par lots dans criteres_de_test et taille finale de la table
+et de son index de clé primaire.
+
+Usage :
+    python tools/benchmarks/bench_ids.py --lignes 2000000 --lot 10000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from gestia.core.database import DatabaseManager
+from gestia.core.ids import allocate_ids, new_id, PREFIX_CRITERE
+
+def legacy_ids(count):
+    """Identifiants historiques : 32 bits aléatoires"""
+    return [f"CRIT_{uuid.uuid4().hex[:8].upper()}" for _ in range(count)]
+
+def unit_ids(count):
+    """Identifiants horodatés, alloués un par un"""
+    return [new_id(PREFIX_CRITERE) for _ in range(count)]
+
+def bulk_ids(count):
+    """Identifiants horodatés, plage réservée en une fois"""
+    return allocate_ids(PREFIX_CRITERE, count)
+
+SCHEMES = [
+    ("historique (uuid 8 hex)", legacy_ids),
+    ("horodaté (new_id)", unit_ids),
+    ("horodaté (allocate_ids)", bulk_ids),
+]
+
+def object_sizes(conn):
+    """Taille (Mo) de la table et de son index de clé primaire via dbstat"""
+    try:
+        rows = conn.execute(
+            "SELECT name, SUM(pgsize) FROM dbstat "
+            "WHERE name IN ('criteres_de_test', 'sqlite_autoindex_criteres_de_test_1') GROUP BY name"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        # SQLite compilé sans dbstat
+        return None, None
+    sizes = {name: size / 1024 / 1024 for name, size in rows}
+    return sizes.get('criteres_de_test'), sizes.get('sqlite_autoindex_criteres_de_test_1')
+
+def bench_scheme(label, generate, nb_lignes, taille_lot):
+    """Insère nb_lignes critères par lots et mesure débit et tailles"""
+    workdir = tempfile.mkdtemp(prefix="gestia_bench_")
+    db_path = os.path.join(workdir, "gestia.db")
+    manager = DatabaseManager(f"sqlite:///{db_path}", profile='test')
+    manager.create_tables()
+    manager.dispose()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("INSERT INTO programmes_de_test (ID_Programme, NomProgramme, StatutExecution, ID_Session) "
+                 "VALUES ('PROG_1', 'RAPIDE', 'TERMINE_OK', 'SESS_1')")
+    conn.commit()
+
+    id_time = 0.0
+    collisions = 0
+    start = time.perf_counter()
+    for offset in range(0, nb_lignes, taille_lot):
+        count = min(taille_lot, nb_lignes - offset)
+        id_start = time.perf_counter()
+        ids = generate(count)
+        id_time += time.perf_counter() - id_start
+        cursor = conn.executemany(
+            "INSERT OR IGNORE INTO criteres_de_test (ID_Critere, NomCritere, EstValide, ID_Programme) "
+            "VALUES (?, 'VIDANGE', 0, 'PROG_1')",
+            ((identifier,) for identifier in ids)
+        )
+        collisions += count - cursor.rowcount
+        conn.commit()
+    total_time = time.perf_counter() - start
+
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    table_mb, index_mb = object_sizes(conn)
+    conn.close()
+    result = {
+        'label': label,
+        'rows_per_s': nb_lignes / total_time,
+        'id_us': id_time * 1e6 / nb_lignes,
+        'collisions': collisions,
+        'file_mb': os.path.getsize(db_path) / 1024 / 1024,
+        'table_mb': table_mb,
+        'index_mb': index_mb,
+    }
+    os.remove(db_path)
+    return result
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Benchmark des identifiants")
+    parser.add_argument('--lignes', type=int, default=2000000,
+                       help="Nombre de critères insérés")
+    parser.add_argument('--lot', type=int, default=10000,
+                       help="Lignes par transaction")
+    args = parser.parse_args()
+
+    print(f"🔧 Insertion de {args.lignes} critères par lots de {args.lot}...")
+    results = [bench_scheme(label, generate, args.lignes, args.lot) for label, generate in SCHEMES]
+
+    def mb(value):
+        return f"{value:.1f}" if value is not None else "n/a"
+
+    print()
+    print(f"{'Schéma':<26} {'Lignes/s':>10} {'µs/id':>7} {'Collisions':>11} "
+          f"{'Fichier':>9} {'Table':>8} {'Index PK':>9}")
+    print("-" * 86)
+    for result in results:
+        print(f"{result['label']:<26} {result['rows_per_s']:>10.0f} {result['id_us']:>7.2f} "
+              f"{result['collisions']:>11} {mb(result['file_mb']):>9} {mb(result['table_mb']):>8} "
+              f"{mb(result['index_mb']):>9}")
+    print("\nTailles en Mo ; les collisions sont les lignes ignorées (clé déjà présente).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark des sauvegardes incrémentales
+=======================================
+
+Simule une journée de sauvegardes horaires et compare les octets écrits
+par les copies complètes (online_backup) et par le magasin incrémental
+(ChunkStore) pour plusieurs tailles de blocs.
+
+Usage :
+    python tools/benchmarks/bench_incremental_backup.py --appareils 200000 --heures 24
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from gestia.backup import online_backup
+from gestia.backup.store import ChunkStore
+from gestia.core.database import DatabaseManager
+from gestia.core.models import EtatAppareil
+
+MARQUES = ["Samsung", "LG", "Bosch", "Whirlpool", "Electrolux", "Beko", "Candy"]
+
+def seed_database(db_path, nb_appareils):
+    """Crée une base WAL avec nb_appareils appareils"""
+    manager = DatabaseManager(f"sqlite:///{db_path}", profile='production')
+    manager.create_tables()
+    manager.dispose()
+
+    conn = sqlite3.connect(db_path)
+    debut = date(2024, 1, 1)
+    etats = [etat.name for etat in EtatAppareil]
+    conn.executemany(
+        "INSERT INTO appareils (ID_Appareil, Marque, Modele, NumSerie, DateReception, Etat) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (f"APP_{i:08d}", random.choice(MARQUES), f"MOD{i % 500}", f"SN{i:09d}",
+             (debut + timedelta(days=i % 365)).isoformat(), random.choice(etats))
+            for i in range(nb_appareils)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+def simulate_hour(db_path, hour, nb_appareils, inserts, updates):
+    """Simule une heure d'activité : réceptions et changements d'état"""
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO appareils (ID_Appareil, Marque, Modele, NumSerie, DateReception, Etat) "
+        "VALUES (?, ?, ?, ?, ?, 'EN_TEST')",
+        (
+            (f"APP_H{hour:03d}_{i:06d}", random.choice(MARQUES), "NOUVEAU",
+             f"SNH{hour:03d}{i:06d}", date.today().isoformat())
+            for i in range(inserts)
+        )
+    )
+    conn.executemany(
+        "UPDATE appareils SET Etat = 'EN_VENTE', DateMiseEnVente = ? WHERE ID_Appareil = ?",
+        (
+            (date.today().isoformat(), f"APP_{random.randrange(nb_appareils):08d}")
+            for _ in range(updates)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Benchmark des sauvegardes incrémentales")
+    parser.add_argument('--appareils', type=int, default=200000,
+                       help="Nombre d'appareils dans la base initiale")
+    parser.add_argument('--heures', type=int, default=24,
+                       help="Nombre de sauvegardes horaires simulées")
+    parser.add_argument('--insertions', type=int, default=200,
+                       help="Appareils reçus par heure")
+    parser.add_argument('--modifications', type=int, default=300,
+                       help="Changements d'état par heure")
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[4096, 16384, 65536],
+                       help="Tailles de blocs à comparer (octets)")
+    args = parser.parse_args()
+
+    random.seed(42)
+    workdir = tempfile.mkdtemp(prefix="gestia_bench_")
+    db_path = os.path.join(workdir, "gestia.db")
+    print(f"🔧 Préparation d'une base de {args.appareils} appareils...")
+    seed_database(db_path, args.appareils)
+
+    full_dir = os.path.join(workdir, "full")
+    os.makedirs(full_dir)
+    stores = {size: ChunkStore(os.path.join(workdir, f"store_{size}")) for size in args.chunk_sizes}
+    totals = {'full': 0}
+    durations = {'full': 0.0}
+    for size in args.chunk_sizes:
+        totals[size] = 0
+        durations[size] = 0.0
+
+    for hour in range(args.heures):
+        if hour:
+            simulate_hour(db_path, hour, args.appareils, args.insertions, args.modifications)
+
+        start = time.perf_counter()
+        backup_path = os.path.join(full_dir, f"backup_{hour:03d}.db")
+        online_backup(db_path, backup_path, pages=-1, sleep=0)
+        durations['full'] += time.perf_counter() - start
+        totals['full'] += os.path.getsize(backup_path)
+
+        for size, store in stores.items():
+            start = time.perf_counter()
+            manifest = store.create_backup(db_path, f"backup_{hour:03d}", chunk_size=size)
+            durations[size] += time.perf_counter() - start
+            totals[size] += manifest['bytes_written']
+
+    print()
+    print(f"{'Mode':<22} {'Octets écrits':>15} {'Disque final':>14} {'Ratio':>8} {'Durée (s)':>10}")
+    print("-" * 74)
+    full_disk = sum(os.path.getsize(os.path.join(full_dir, f)) for f in os.listdir(full_dir))
+    print(f"{'copies complètes':<22} {totals['full']:>15,} {full_disk:>14,} {1.0:>8.2f} {durations['full']:>10.2f}")
+    for size, store in stores.items():
+        disk = store.disk_usage()['bytes']
+        print(f"{f'incrémental {size // 1024} Kio':<22} {totals[size]:>15,} {disk:>14,} "
+              f"{totals[size] / totals['full']:>8.2f} {durations[size]:>10.2f}")
+
+    shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    main()
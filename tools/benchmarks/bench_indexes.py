@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Benchmark des index de performance
+==================================
+
+Mesure les requêtes critiques des services (sessions et diagnostics d'un
+appareil, marques distinctes, comptage par état, programmes d'une session,
+critères d'un programme) avant et après la migration
+005_add_performance_indexes, et affiche le plan d'exécution
+(EXPLAIN QUERY PLAN) de chacune.
+
+Usage :
+    python tools/benchmarks/bench_indexes.py --appareils 100000 --criteres 10000000
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Ajouter les répertoires src et tools/db au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tools', 'db'))
+
+from gestia.core.database import DatabaseManager
+from gestia.core.models import EtatAppareil, NomCritere, NomProgramme, ResultatSession
+from migrate_db import DatabaseMigrator
+
+INDEX_MIGRATION = '005_add_performance_indexes'
+
+MARQUES = ["Samsung", "LG", "Bosch", "Whirlpool", "Electrolux", "Beko", "Candy"]
+
+# Requêtes équivalentes à celles émises par les services
+# (le paramètre est tiré au hasard à chaque exécution)
+QUERIES = [
+    ("sessions d'un appareil",
+     "SELECT * FROM sessions_de_test WHERE ID_Appareil = ? ORDER BY DateDebut DESC", 'appareil'),
+    ("diagnostics d'un appareil",
+     "SELECT * FROM diagnostics_reparation WHERE ID_Appareil = ? ORDER BY DateDebut DESC", 'appareil'),
+    ("marques distinctes",
+     "SELECT DISTINCT Marque FROM appareils", None),
+    ("comptage par état",
+     "SELECT Etat, COUNT(*) FROM appareils GROUP BY Etat", None),
+    ("programmes d'une session",
+     "SELECT * FROM programmes_de_test WHERE ID_Session = ?", 'session'),
+    ("critères d'un programme",
+     "SELECT * FROM criteres_de_test WHERE ID_Programme = ?", 'programme'),
+]
+
+def index_migration():
+    """Retourne la migration des index telle que définie dans migrate_db"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        migrator = DatabaseMigrator('test')
+    return migrator, next(m for m in migrator.get_all_migrations() if m['version'] == INDEX_MIGRATION)
+
+def seed_database(db_path, nb_appareils, nb_criteres):
+    """
+    Crée une base sans index secondaires : 7 critères par programme,
+    3 programmes par session, un diagnostic pour deux appareils.
+
+    Returns:
+        dict: Nombre d'appareils, de sessions et de programmes
+    """
+    manager = DatabaseManager(f"sqlite:///{db_path}", profile='test')
+    manager.create_tables()
+    manager.dispose()
+
+    conn = sqlite3.connect(db_path)
+    # Repartir du schéma d'avant la migration
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' "
+                                "AND name LIKE 'ix_%'").fetchall():
+        conn.execute(f"DROP INDEX {name}")
+
+    nb_programmes = max(1, nb_criteres // len(NomCritere))
+    nb_sessions = max(1, nb_programmes // len(NomProgramme))
+    nb_diagnostics = nb_appareils // 2
+    debut = date(2024, 1, 1)
+    etats = [etat.name for etat in EtatAppareil]
+    criteres = [nom.name for nom in NomCritere]
+    programmes = [nom.name for nom in NomProgramme]
+
+    conn.execute("INSERT INTO techniciens (ID_Technicien, Nom, Prenom) VALUES ('TECH_1', 'Martin', 'Paul')")
+    conn.executemany(
+        "INSERT INTO appareils (ID_Appareil, Marque, Modele, NumSerie, DateReception, Etat) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        ((f"APP_{i:08d}", random.choice(MARQUES), f"MOD{i % 500}", f"SN{i:09d}",
+          (debut + timedelta(days=i % 365)).isoformat(), random.choice(etats))
+         for i in range(nb_appareils))
+    )
+    conn.executemany(
+        "INSERT INTO sessions_de_test (ID_Session, DateDebut, ResultatFinal, ID_Appareil, ID_Technicien) "
+        "VALUES (?, ?, ?, ?, 'TECH_1')",
+        ((f"SESS_{i:08d}", (debut + timedelta(days=i % 365)).isoformat(), ResultatSession.PASSE.name,
+          f"APP_{random.randrange(nb_appareils):08d}")
+         for i in range(nb_sessions))
+    )
+    conn.executemany(
+        "INSERT INTO diagnostics_reparation (ID_DiagRep, DateDebut, DescriptionProbleme, ID_Appareil, ID_Technicien) "
+        "VALUES (?, ?, 'Fuite', ?, 'TECH_1')",
+        ((f"DIAG_{i:08d}", (debut + timedelta(days=i % 365)).isoformat(),
+          f"APP_{random.randrange(nb_appareils):08d}")
+         for i in range(nb_diagnostics))
+    )
+    conn.executemany(
+        "INSERT INTO programmes_de_test (ID_Programme, NomProgramme, StatutExecution, ID_Session) "
+        "VALUES (?, ?, 'TERMINE_OK', ?)",
+        ((f"PROG_{i:08d}", programmes[i % len(programmes)], f"SESS_{i // len(programmes):08d}")
+         for i in range(nb_programmes))
+    )
+    conn.executemany(
+        "INSERT INTO criteres_de_test (ID_Critere, NomCritere, EstValide, ID_Programme, ID_Technicien) "
+        "VALUES (?, ?, 1, ?, 'TECH_1')",
+        ((f"CRIT_{i:09d}", criteres[i % len(criteres)], f"PROG_{i // len(criteres):08d}")
+         for i in range(nb_programmes * len(criteres)))
+    )
+    conn.commit()
+    conn.close()
+    return {'appareil': nb_appareils, 'session': nb_sessions, 'programme': nb_programmes}
+
+def query_plan(conn, sql):
+    """Retourne le plan d'exécution d'une requête (une ligne par étape)"""
+    params = ('X',) * sql.count('?')
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+def bench_queries(db_path, sizes, repetitions):
+    """Mesure le temps moyen de chaque requête (en ms) et relève son plan"""
+    prefixes = {'appareil': 'APP', 'session': 'SESS', 'programme': 'PROG'}
+    conn = sqlite3.connect(db_path)
+    results = {}
+    for label, sql, parameter in QUERIES:
+        start = time.perf_counter()
+        for _ in range(repetitions):
+            params = ()
+            if parameter:
+                params = (f"{prefixes[parameter]}_{random.randrange(sizes[parameter]):08d}",)
+            conn.execute(sql, params).fetchall()
+        results[label] = {
+            'ms': (time.perf_counter() - start) * 1000 / repetitions,
+            'plan': query_plan(conn, sql),
+        }
+    conn.close()
+    return results
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Benchmark des index de performance")
+    parser.add_argument('--appareils', type=int, default=100000,
+                       help="Nombre d'appareils")
+    parser.add_argument('--criteres', type=int, default=10000000,
+                       help="Nombre de critères de test")
+    parser.add_argument('--repetitions', type=int, default=20,
+                       help="Exécutions de chaque requête")
+    args = parser.parse_args()
+
+    random.seed(42)
+    workdir = tempfile.mkdtemp(prefix="gestia_bench_")
+    db_path = os.path.join(workdir, "gestia.db")
+    print(f"🔧 Préparation d'une base de {args.appareils} appareils et {args.criteres} critères...")
+    start = time.perf_counter()
+    sizes = seed_database(db_path, args.appareils, args.criteres)
+    print(f"   Base prête en {time.perf_counter() - start:.1f} s "
+          f"({os.path.getsize(db_path) / 1024 / 1024:.0f} Mo)")
+
+    before = bench_queries(db_path, sizes, args.repetitions)
+
+    migrator, migration = index_migration()
+    migrator.db_path = db_path
+    migrator.ensure_migrations_table()
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        migrator.run_migration(migration['version'], migration['description'], migration['sql'])
+    print(f"🚀 Migration {INDEX_MIGRATION} appliquée en {time.perf_counter() - start:.1f} s "
+          f"({os.path.getsize(db_path) / 1024 / 1024:.0f} Mo)")
+
+    after = bench_queries(db_path, sizes, args.repetitions)
+
+    print()
+    print(f"{'Requête':<28} {'Avant (ms)':>12} {'Après (ms)':>12} {'Gain':>10}")
+    print("-" * 66)
+    for label, _, _ in QUERIES:
+        print(f"{label:<28} {before[label]['ms']:>12.3f} {after[label]['ms']:>12.3f} "
+              f"{before[label]['ms'] / max(after[label]['ms'], 1e-6):>9.0f}x")
+
+    print()
+    print("📋 Plans d'exécution (EXPLAIN QUERY PLAN)")
+    for label, sql, _ in QUERIES:
+        print(f"\n{label} : {sql}")
+        print(f"  avant : {' | '.join(before[label]['plan'])}")
+        print(f"  après : {' | '.join(after[label]['plan'])}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la liste des appareils
+===================================
+
+Compare AppareilService.lister_appareils (toute la table chargée en
+mémoire) et AppareilService.lister_appareils_page (pagination par clé) :
+temps et pic mémoire pour la première page et pour une page lointaine.
+
+Usage :
+    python tools/benchmarks/bench_pagination.py --appareils 1000000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from gestia.core.database import DatabaseManager
+from gestia.core.models import EtatAppareil
+from gestia.core.services import AppareilService
+
+MARQUES = ["Samsung", "LG", "Bosch", "Whirlpool", "Electrolux", "Beko", "Candy"]
+
+def appareils(nombre):
+    """Génère les enregistrements à créer"""
+    debut = date(2020, 1, 1)
+    for i in range(nombre):
+        yield {
+            'marque': MARQUES[i % len(MARQUES)],
+            'modele': f"MOD{i % 500}",
+            'num_serie': f"SN{i:09d}",
+            'date_reception': debut + timedelta(days=i % 1500),
+        }
+
+def mesurer(fonction):
+    """Exécute fonction et retourne (résultat, ms, pic mémoire en Mo)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    resultat = fonction()
+    elapsed = (time.perf_counter() - start) * 1000
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return resultat, elapsed, peak
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Benchmark de la liste des appareils")
+    parser.add_argument('--appareils', type=int, default=1000000,
+                       help="Nombre d'appareils en base")
+    parser.add_argument('--pages', type=int, default=50,
+                       help="Nombre de pages parcourues avant la page mesurée")
+    parser.add_argument('--limite', type=int, default=100,
+                       help="Appareils par page")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="gestia_bench_")
+    manager = DatabaseManager(f"sqlite:///{os.path.join(workdir, 'gestia.db')}", profile='test')
+    manager.create_tables()
+    db = manager.get_session()
+
+    print(f"🔧 Création de {args.appareils} appareils...")
+    AppareilService.creer_appareil_bulk(db, appareils(args.appareils))
+
+    cas = []
+    _, ms, mb = mesurer(lambda: AppareilService.lister_appareils(db))
+    cas.append(("lister_appareils (tout)", ms, mb))
+    db.expunge_all()
+
+    for tri, filtres in [('-DateReception', None), ('NumSerie', None),
+                         ('-DateReception', {'marque': 'LG', 'etat': EtatAppareil.EN_TEST})]:
+        libelle = f"{tri}{' + filtres' if filtres else ''}"
+        page, ms, mb = mesurer(lambda: AppareilService.lister_appareils_page(
+            db, filtres=filtres, tri=tri, limite=args.limite))
+        cas.append((f"page 1 ({libelle})", ms, mb))
+
+        for _ in range(args.pages):
+            page = AppareilService.lister_appareils_page(
+                db, filtres=filtres, tri=tri, apres=page['cle_suivante'], limite=args.limite)
+        apres = page['cle_suivante']
+        _, ms, mb = mesurer(lambda: AppareilService.lister_appareils_page(
+            db, filtres=filtres, tri=tri, apres=apres, limite=args.limite))
+        cas.append((f"page {args.pages + 2} ({libelle})", ms, mb))
+        db.expunge_all()
+
+    db.close()
+    manager.dispose()
+    shutil.rmtree(workdir)
+
+    print()
+    print(f"{'Requête':<46} {'Temps (ms)':>11} {'Pic (Mo)':>9}")
+    print("-" * 68)
+    for libelle, ms, mb in cas:
+        print(f"{libelle:<46} {ms:>11.1f} {mb:>9.1f}")
+    print("\nLa première page inclut l'estimation du total (comptage plafonné).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark des listes d'appareils
+================================
+
+Compare, pour une même page, AppareilService.lister_appareils_page
+(entités ORM, dates formatées ensuite pour l'affichage comme le faisait
+l'interface) et AppareilService.lister_lignes_appareils_page (colonnes
+affichées seulement, lignes LigneAppareil) : temps et pic mémoire.
+
+Usage :
+    python tools/benchmarks/bench_projections.py --appareils 500000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from sqlalchemy import text
+
+from gestia.core.database import DatabaseManager
+from gestia.core.services import AppareilService
+
+MARQUES = ["Samsung", "LG", "Bosch", "Whirlpool", "Electrolux", "Beko", "Candy"]
+
+def appareils(nombre):
+    """Génère les enregistrements à créer"""
+    debut = date(2020, 1, 1)
+    for i in range(nombre):
+        yield {
+            'marque': MARQUES[i % len(MARQUES)],
+            'modele': f"MOD{i % 500}",
+            'num_serie': f"SN{i:09d}",
+            'date_reception': debut + timedelta(days=i % 1500),
+        }
+
+def orm(db, limite):
+    """Entités ORM puis valeurs affichées, comme l'ancienne liste"""
+    page = AppareilService.lister_appareils_page(db, tri='-DateReception', limite=limite)
+    return [
+        (a.ID_Appareil, a.Marque, a.Modele, a.NumSerie, a.DateReception.strftime('%d/%m/%Y'),
+         a.Etat.value, a.DateMiseEnVente.strftime('%d/%m/%Y') if a.DateMiseEnVente else '-')
+        for a in page['appareils']
+    ]
+
+def projection(db, limite):
+    """Lignes projetées, prêtes à afficher"""
+    return AppareilService.lister_lignes_appareils_page(db, tri='-DateReception', limite=limite)['appareils']
+
+def mesurer(db, fonction, limite):
+    """
+    Retourne (ms, pic mémoire en Mo) pour une page de `limite` appareils.
+    
+    Le temps et la mémoire sont mesurés par deux exécutions distinctes :
+    tracemalloc ralentit fortement les allocations.
+    """
+    db.expunge_all()
+    start = time.perf_counter()
+    lignes = fonction(db, limite)
+    elapsed = (time.perf_counter() - start) * 1000
+    assert len(lignes) == limite
+    del lignes
+    
+    db.expunge_all()
+    tracemalloc.start()
+    fonction(db, limite)
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Benchmark des listes d'appareils")
+    parser.add_argument('--appareils', type=int, default=500000,
+                       help="Nombre d'appareils en base (et chargés dans la plus grande page)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="gestia_bench_")
+    manager = DatabaseManager(f"sqlite:///{os.path.join(workdir, 'gestia.db')}", profile='test')
+    manager.create_tables()
+    db = manager.get_session()
+
+    print(f"🔧 Création de {args.appareils} appareils...")
+    AppareilService.creer_appareil_bulk(db, appareils(args.appareils))
+    # Colonnes Text renseignées comme sur une base réelle
+    db.execute(text(
+        "UPDATE appareils SET "
+        "ActionsAFaire = 'Contrôler la pompe de vidange et remplacer le joint de hublot.', "
+        "SoucisMachine = 'Fuite constatée en fin de cycle, bruit anormal à l''essorage.'"
+    ))
+    db.commit()
+
+    resultats = []
+    for limite in sorted({500, 10000, args.appareils}):
+        limite = min(limite, args.appareils)
+        resultats.append((limite, mesurer(db, orm, limite), mesurer(db, projection, limite)))
+
+    db.close()
+    manager.dispose()
+    shutil.rmtree(workdir)
+
+    print()
+    print(f"{'Lignes':>8} {'ORM (ms)':>10} {'ORM (Mo)':>9} {'Lignes (ms)':>12} {'Lignes (Mo)':>12} {'Gain':>6}")
+    print("-" * 62)
+    for limite, (orm_ms, orm_mb), (proj_ms, proj_mb) in resultats:
+        print(f"{limite:>8} {orm_ms:>10.1f} {orm_mb:>9.1f} {proj_ms:>12.1f} {proj_mb:>12.1f} "
+              f"{orm_ms / proj_ms:>5.1f}x")
+
+if __name__ == "__main__":
+    main()
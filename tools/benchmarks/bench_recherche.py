@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la recherche d'appareils
+=====================================
+
+Mesure, sur un grand inventaire :
+- l'index en mémoire seul (SearchIndex) : construction, recherches par
+  préfixe et par sous-chaîne, mise à jour d'un appareil ;
+- la recherche complète du service (AppareilService.rechercher_appareils) :
+  construction de l'index depuis la base, puis recherche avec mise à jour
+  de l'index et lecture des lignes affichées.
+
+Usage :
+    python tools/benchmarks/bench_recherche.py --appareils 500000
+"""
+
+import argparse
+import gc
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from gestia.core.database import DatabaseManager
+from gestia.core.ids import allocate_ids, PREFIX_APPAREIL
+from gestia.core.search import SearchIndex
+from gestia.core.services import AppareilService
+
+MARQUES = ["Samsung", "LG", "Bosch", "Whirlpool", "Electrolux", "Beko", "Candy"]
+
+# Recherches mesurées : préfixes (courts et longs) et sous-chaînes
+RECHERCHES = ['SN0001', 'sn000123456', '0001', '123456', 'bosch', 'mod4', 'od49', 'LG', 'zzz', 'APP_0']
+
+# Appareils modifiés un à un pour mesurer la mise à jour de l'index
+MISES_A_JOUR = 1000
+
+def champs(i, nombre):
+    """Marque, modèle, numéro de série et date de réception du i-ème appareil"""
+    return (MARQUES[i % len(MARQUES)], f"MOD{i % 500}", f"SN{(i * 7919) % nombre:09d}",
+            date(2020, 1, 1) + timedelta(days=i % 1500))
+
+def mesurer(recherche, repetitions=20):
+    """Retourne les durées (ms) de chaque recherche de RECHERCHES, répétée"""
+    durees = []
+    for texte in RECHERCHES:
+        for _ in range(repetitions):
+            start = time.perf_counter()
+            recherche(texte)
+            durees.append((time.perf_counter() - start) * 1000)
+    return durees
+
+def afficher(nom, durees):
+    """Affiche la moyenne, le p95 et le maximum des durées"""
+    p95 = statistics.quantiles(durees, n=20)[-1]
+    print(f"{nom:<30} {statistics.mean(durees):>13.2f} {p95:>9.2f} {max(durees):>9.2f}")
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Benchmark de la recherche d'appareils")
+    parser.add_argument('--appareils', type=int, default=500000, help="Nombre d'appareils")
+    args = parser.parse_args()
+    nombre = args.appareils
+
+    # Index seul
+    ids = allocate_ids(PREFIX_APPAREIL, nombre)
+    lignes = [(ids[i], *champs(i, nombre)[:3]) for i in range(nombre)]
+    start = time.perf_counter()
+    index = SearchIndex()
+    index.update(lignes)
+    construction_index = time.perf_counter() - start
+    gc.collect()
+    index_seul = mesurer(lambda texte: index.search(texte, 501))
+    start = time.perf_counter()
+    for i in range(MISES_A_JOUR):
+        index.update([(ids[i], 'Bosch', 'MOD1', f"NEW{i:06d}")])
+    mise_a_jour = (time.perf_counter() - start) * 1000 / MISES_A_JOUR
+    del index, lignes
+
+    # Service complet, sur une base
+    workdir = tempfile.mkdtemp(prefix="gestia_bench_")
+    manager = DatabaseManager(f"sqlite:///{os.path.join(workdir, 'gestia.db')}", profile='test')
+    manager.create_tables()
+    db = manager.get_session()
+
+    print(f"🔧 Création de {nombre} appareils...")
+    AppareilService.creer_appareil_bulk(db, (
+        dict(zip(('marque', 'modele', 'num_serie', 'date_reception'), champs(i, nombre))) for i in range(nombre)
+    ))
+    start = time.perf_counter()
+    AppareilService.indexer_recherche_appareils(db)
+    construction_service = time.perf_counter() - start
+    gc.collect()
+    service = mesurer(lambda texte: AppareilService.rechercher_appareils(db, texte), repetitions=5)
+
+    db.close()
+    manager.dispose()
+    shutil.rmtree(workdir)
+
+    print()
+    print(f"Construction de l'index (mémoire) : {construction_index:.1f} s")
+    print(f"Construction de l'index (base)    : {construction_service:.1f} s")
+    print(f"Mise à jour d'un appareil         : {mise_a_jour:.3f} ms")
+    print(f"{'Recherche':<30} {'Moyenne (ms)':>13} {'p95 (ms)':>9} {'Max (ms)':>9}")
+    print("-" * 64)
+    afficher("Index seul", index_seul)
+    afficher("Service (index + lignes)", service)
+
+if __name__ == "__main__":
+    main()
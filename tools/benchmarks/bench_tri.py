@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark du tri des listes par colonne
+=======================================
+
+Mesure le temps de tri d'une liste de 50 000 appareils :
+- liste virtualisée : tri délégué à la base (ORDER BY sur colonne indexée),
+  temps de lecture de la première fenêtre dans le nouvel ordre ;
+- liste complète dans un TreeviewSortable : ancien tri (lecture du texte de
+  chaque cellule dans Tk, tri textuel, un move() par ligne) comparé au tri
+  sur clés typées mémorisées (un seul set_children()).
+
+La partie Tk demande un affichage ; sans affichage, seule la partie base
+est mesurée.
+
+Usage :
+    python tools/benchmarks/bench_tri.py --appareils 50000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Ajouter le répertoire src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+import tkinter as tk
+
+from gestia.core.database import DatabaseManager
+from gestia.core.paging import VirtualRows
+from gestia.core.services import AppareilService
+from gestia.ui.gui import TreeviewSortable, TRIS_LISTE_APPAREILS
+
+MARQUES = ["Samsung", "LG", "Bosch", "Whirlpool", "Electrolux", "Beko", "Candy"]
+COLONNES = ('ID', 'Marque', 'Modèle', 'N° Série', 'Date Réception', 'État', 'Date Vente')
+
+# Lignes visibles dans la fenêtre
+VISIBLES = 30
+
+def appareils(nombre):
+    """Génère les enregistrements à créer"""
+    debut = date(2020, 1, 1)
+    for i in range(nombre):
+        yield {
+            'marque': MARQUES[i % len(MARQUES)],
+            'modele': f"MOD{i % 500}",
+            'num_serie': f"SN{(i * 7919) % nombre:09d}",
+            'date_reception': debut + timedelta(days=(i * 31) % 1500),
+        }
+
+def chronometrer(fonction):
+    """Retourne la durée (ms) d'un appel"""
+    start = time.perf_counter()
+    fonction()
+    return (time.perf_counter() - start) * 1000
+
+def tri_ancien(tree, column_id, reverse):
+    """Tri d'origine de TreeviewSortable : texte lu dans Tk, un move() par ligne"""
+    items = [(tree.set(item, column_id), item) for item in tree.get_children('')]
+    items.sort(reverse=reverse)
+    for index, (val, item) in enumerate(items):
+        tree.move(item, '', index)
+
+def mesurer_base(db):
+    """Tri délégué à la base : première fenêtre de la liste virtualisée"""
+    resultats = []
+    for colonne, tri in TRIS_LISTE_APPAREILS.items():
+        for sens in ('', '-'):
+            def charger(apres, decalage, limite, tri=sens + tri):
+                return AppareilService.lister_lignes_appareils_page(db, tri=tri, apres=apres,
+                                                                    decalage=decalage, limite=limite)
+            duree = chronometrer(lambda: VirtualRows(charger).rows(0, VISIBLES))
+            resultats.append((f"{colonne} {'↓' if sens else '↑'}", duree))
+    return resultats
+
+def mesurer_tk(lignes):
+    """Tri d'une liste complète dans Tk, ancien et nouveau ; None sans affichage"""
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    root.withdraw()
+    tree = TreeviewSortable(root, columns=COLONNES, show='headings')
+    for ligne in lignes:
+        tree.insert('', 'end', iid=ligne[0], values=ligne)
+    resultats = []
+    for colonne in ('Date Réception', 'N° Série', 'Marque'):
+        ancien = chronometrer(lambda: tri_ancien(tree, colonne, False))
+        premier = chronometrer(lambda: tree.sort_by_column(colonne))
+        inverse = chronometrer(lambda: tree.sort_by_column(colonne))
+        resultats.append((colonne, ancien, premier, inverse))
+    root.destroy()
+    return resultats
+
+def main():
+    """Point d'entrée principal"""
+    parser = argparse.ArgumentParser(description="Benchmark du tri des listes par colonne")
+    parser.add_argument('--appareils', type=int, default=50000, help="Nombre d'appareils en base")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="gestia_bench_")
+    manager = DatabaseManager(f"sqlite:///{os.path.join(workdir, 'gestia.db')}", profile='test')
+    manager.create_tables()
+    db = manager.get_session()
+
+    print(f"🔧 Création de {args.appareils} appareils...")
+    AppareilService.creer_appareil_bulk(db, appareils(args.appareils))
+
+    base = mesurer_base(db)
+    lignes = AppareilService.lister_lignes_appareils_page(db, limite=args.appareils)['appareils']
+
+    db.close()
+    manager.dispose()
+    shutil.rmtree(workdir)
+
+    print()
+    print("Liste virtualisée (tri en base, première fenêtre)")
+    print(f"{'Tri':<22} {'Durée (ms)':>11}")
+    print("-" * 34)
+    for nom, duree in base:
+        print(f"{nom:<22} {duree:>11.2f}")
+
+    tk_resultats = mesurer_tk(lignes)
+    print()
+    if tk_resultats is None:
+        print("⚠️ Pas d'affichage : tri Tk non mesuré")
+        return
+    print(f"Liste complète dans Tk ({len(lignes)} lignes)")
+    print(f"{'Colonne':<16} {'Ancien (ms)':>12} {'Clés typées (ms)':>17} {'Inversion (ms)':>15}")
+    print("-" * 63)
+    for colonne, ancien, premier, inverse in tk_resultats:
+        print(f"{colonne:<16} {ancien:>12.1f} {premier:>17.1f} {inverse:>15.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ Démonstration de la fonctionnalité de tri
 =========================================
 
 Interface graphique simple pour démontrer le tri des colonnes.
+La liste est virtualisée : tout l'inventaire est parcourable, seules les
+lignes visibles sont dans le widget et le tri est fait par la base.
 """
 
 import tkinter as tk
@@ -14,7 +16,7 @@ import os
 # Ajouter le répertoire src au path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from gestia.ui.gui import TreeviewSortable
+from gestia.ui.gui import TreeviewVirtuel, TRIS_LISTE_APPAREILS
 from gestia.core.database import init_database, db_manager, set_environment
 from gestia.core.services import AppareilService
 
@@ -43,7 +45,7 @@ class DemoTri:
         
         # Instructions
         instructions = ttk.Label(self.root, 
-                               text="Double-cliquez sur les en-têtes de colonnes pour trier\n" +
+                               text="Double-cliquez sur les en-têtes ID, N° Série ou Date Réception pour trier\n" +
                                     "Les flèches ↑/↓ indiquent l'ordre de tri",
                                font=('Arial', 10), foreground='blue')
         instructions.pack(pady=10)
@@ -52,9 +54,10 @@ class DemoTri:
         frame = ttk.Frame(self.root)
         frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
-        # Treeview avec tri
-        columns = ('ID', 'Marque', 'Modèle', 'Date Réception', 'État', 'Date Vente')
-        self.tree = TreeviewSortable(frame, columns=columns, show='headings', height=20)
+        # Treeview virtualisé avec tri (colonnes dans l'ordre de LigneAppareil)
+        columns = ('ID', 'Marque', 'Modèle', 'N° Série', 'Date Réception', 'État', 'Date Vente')
+        self.tree = TreeviewVirtuel(frame, tris=TRIS_LISTE_APPAREILS, columns=columns,
+                                    show='headings', height=20)
         
         # Configuration des colonnes
         for col in columns:
@@ -62,12 +65,16 @@ class DemoTri:
             self.tree.column(col, width=120)
         
         # Scrollbar
-        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL)
+        self.tree.attacher_scrollbar(scrollbar)
         
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
+        # Nombre d'appareils
+        self.count_label = ttk.Label(self.root, text="", font=('Arial', 10, 'bold'))
+        self.count_label.pack(pady=5)
+        
         # Bouton de rafraîchissement
         ttk.Button(self.root, text="🔄 Rafraîchir les données", 
                   command=self.load_data).pack(pady=10)
@@ -78,35 +85,23 @@ class DemoTri:
     
     def load_data(self):
         """Charge les données dans le Treeview"""
-        # Effacer les données existantes
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
         try:
-            # Charger les appareils
-            appareils = AppareilService.lister_appareils(self.db)
-            
-            for app in appareils:
-                self.tree.insert('', tk.END, values=(
-                    app.ID_Appareil,
-                    app.Marque,
-                    app.Modele,
-                    app.DateReception.strftime('%d/%m/%Y'),
-                    app.Etat.value,
-                    app.DateMiseEnVente.strftime('%d/%m/%Y') if app.DateMiseEnVente else '-'
-                ))
+            # Les plus récents d'abord ; les pages sont lues au fil du défilement
+            self.tree.charger(self.charger_page, '-DateReception')
             
             # Afficher le nombre d'éléments
-            count_label = ttk.Label(self.root, 
-                                  text=f"📊 {len(appareils)} appareils chargés",
-                                  font=('Arial', 10, 'bold'))
-            count_label.pack(pady=5)
+            lignes = self.tree.lignes
+            total = lignes.total if lignes.total_exact else f"≈ {lignes.total}"
+            self.count_label.config(text=f"📊 {total} appareils", foreground='black')
             
         except Exception as e:
-            error_label = ttk.Label(self.root, 
-                                  text=f"❌ Erreur: {e}",
-                                  font=('Arial', 10), foreground='red')
-            error_label.pack(pady=5)
+            self.count_label.config(text=f"❌ Erreur: {e}", foreground='red')
+    
+    def charger_page(self, tri, apres, decalage, limite):
+        """Lit une page d'appareils pour la liste virtualisée"""
+        return AppareilService.lister_lignes_appareils_page(
+            self.db, tri=tri, apres=apres, decalage=decalage, limite=limite
+        )
     
     def run(self):
         """Lance la démonstration"""
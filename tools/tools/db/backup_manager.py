@@ -8,29 +8,48 @@ Script pour gérer les sauvegardes de base de données de manière professionnel
 
 import sys
 import os
-import shutil
-import sqlite3
 from datetime import datetime
 import json
 
 # Ajouter le répertoire src au path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
 
-from gestia.core.database import set_environment
+from gestia.backup import (online_backup, compressed_backup,
+                           COMPRESSION_METHODS, DEFAULT_PAGES_PER_STEP, DEFAULT_STEP_SLEEP)
+from gestia.backup.catalog import (open_catalog, metadata_path_for, STORE_DIRNAME,
+                                   KIND_FULL, KIND_COMPRESSED, KIND_INCREMENTAL)
+from gestia.backup.store import ChunkStore, DEFAULT_CHUNK_SIZE
+from gestia.backup.verify import verify_backups, record_result, file_sha256, STATUS_OK
+from gestia.backup.restore import (point_in_time_restore, abandon_history_after,
+                                   archive_changelog, normalize_timestamp,
+                                   restore_environment, install_database, work_path_for)
 
 class BackupManager:
     """Gestionnaire de sauvegardes de base de données"""
     
-    def __init__(self):
+    def __init__(self, pages=DEFAULT_PAGES_PER_STEP, sleep=DEFAULT_STEP_SLEEP):
         self.backup_dir = "data/backups"
+        self.pages = pages
+        self.sleep = sleep
         self.ensure_backup_dir()
+        self.store = ChunkStore(os.path.join(self.backup_dir, STORE_DIRNAME))
+        self.catalog = open_catalog(self.backup_dir)
     
     def ensure_backup_dir(self):
         """Crée le dossier de sauvegardes s'il n'existe pas"""
         os.makedirs(self.backup_dir, exist_ok=True)
     
-    def create_backup(self, environment='development', description=""):
-        """Crée une sauvegarde d'un environnement"""
+    def create_backup(self, environment='development', description="",
+                      incremental=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                      compression=None, level=None, staging=False):
+        """
+        Crée une sauvegarde d'un environnement.
+        
+        Avec staging=True, les sauvegardes incrémentales et compressées
+        peuvent passer par une copie non compressée dans le dossier des
+        sauvegardes si l'instantané de la base ne peut pas être figé ; sans
+        cette option, elles échouent dans ce cas.
+        """
         print(f"🔄 Création d'une sauvegarde pour l'environnement: {environment}")
         
         # Chemin de la base source
@@ -42,12 +61,21 @@ class BackupManager:
         
         # Nom du fichier de sauvegarde
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if incremental:
+            return self._create_incremental_backup(source_db, environment, description,
+                                                   f"gestia_{environment}_{timestamp}", chunk_size, staging)
+        if compression:
+            return self._create_compressed_backup(source_db, environment, description,
+                                                  f"gestia_{environment}_{timestamp}", compression, level,
+                                                  staging)
         backup_name = f"gestia_{environment}_{timestamp}.db"
         backup_path = os.path.join(self.backup_dir, backup_name)
         
         try:
-            # Copier la base de données
-            shutil.copy2(source_db, backup_path)
+            # Copier la base de données à chaud, page par page
+            stats = online_backup(source_db, backup_path, pages=self.pages,
+                                  sleep=self.sleep, progress=self._print_progress)
+            print()
             
             # Créer un fichier de métadonnées
             metadata = {
@@ -55,15 +83,25 @@ class BackupManager:
                 'description': description,
                 'created_at': datetime.now().isoformat(),
                 'source_size': os.path.getsize(source_db),
-                'backup_size': os.path.getsize(backup_path)
+                'backup_size': os.path.getsize(backup_path),
+                'sha256': file_sha256(backup_path),
+                'duration_seconds': round(stats['duration'], 3)
             }
             
-            metadata_path = backup_path.replace('.db', '.json')
+            metadata_path = metadata_path_for(backup_path)
             with open(metadata_path, 'w') as f:
                 json.dump(metadata, f, indent=2)
             
+            self.catalog.add(
+                name=backup_name, kind=KIND_FULL, environment=environment,
+                created_at=metadata['created_at'], path=backup_name,
+                size=metadata['backup_size'], uncompressed_size=metadata['backup_size'],
+                sha256=metadata['sha256'], description=description
+            )
+            
             print(f"✅ Sauvegarde créée: {backup_name}")
             print(f"📁 Taille: {metadata['backup_size'] / (1024*1024):.1f} MB")
+            print(f"⏱️  Durée: {metadata['duration_seconds']:.2f} s")
             print(f"📝 Description: {description}")
             
             return backup_path
@@ -72,51 +110,117 @@ class BackupManager:
             print(f"❌ Erreur lors de la sauvegarde: {e}")
             return False
     
-    def list_backups(self):
-        """Liste toutes les sauvegardes disponibles"""
+    def _create_incremental_backup(self, source_db, environment, description, name, chunk_size, staging=False):
+        """Crée une sauvegarde incrémentale dans le magasin de blocs"""
+        try:
+            parent = self.catalog.latest(environment, (KIND_INCREMENTAL,))
+            manifest = self.store.create_backup(source_db, name, environment, description,
+                                                chunk_size, parent['name'] if parent else None, staging)
+            self.catalog.add(
+                name=name, kind=KIND_INCREMENTAL, environment=environment,
+                created_at=manifest['created_at'],
+                path=os.path.relpath(self.store.manifest_path(name), self.backup_dir),
+                size=manifest['size'], uncompressed_size=manifest['size'],
+                sha256=manifest['sha256'], parent=manifest['parent'],
+                description=description, chunks=manifest['chunks']
+            )
+            
+            print(f"✅ Sauvegarde incrémentale créée: {name}")
+            print(f"📁 Taille de la base: {manifest['size'] / (1024*1024):.1f} MB "
+                  f"({len(manifest['chunks'])} blocs)")
+            print(f"🆕 Nouveaux blocs: {manifest['new_chunks']} "
+                  f"({manifest['bytes_written'] / (1024*1024):.2f} MB écrits)")
+            print(f"📝 Description: {description}")
+            
+            return self.store.manifest_path(name)
+            
+        except Exception as e:
+            print(f"❌ Erreur lors de la sauvegarde incrémentale: {e}")
+            return False
+    
+    def _create_compressed_backup(self, source_db, environment, description, name, method, level,
+                                  staging=False):
+        """Crée une sauvegarde complète compressée en flux (gzip ou lzma)"""
+        backup_name = f"{name}.db{COMPRESSION_METHODS[method]['extension']}"
+        backup_path = os.path.join(self.backup_dir, backup_name)
+        
+        try:
+            stats = compressed_backup(source_db, backup_path, method, level,
+                                      progress=self._print_bytes_progress, staging=staging)
+            print()
+            
+            metadata = {
+                'environment': environment,
+                'description': description,
+                'created_at': datetime.now().isoformat(),
+                'source_size': os.path.getsize(source_db),
+                'backup_size': stats['compressed_size'],
+                'uncompressed_size': stats['size'],
+                'compression': method,
+                'compression_level': stats['level'],
+                'compression_ratio': stats['ratio'],
+                'throughput_mb_s': stats['throughput_mb_s'],
+                'sha256': stats['sha256'],
+                'staged_copy': stats['staged'],
+                'duration_seconds': round(stats['duration'], 3)
+            }
+            
+            with open(metadata_path_for(backup_path), 'w') as f:
+                json.dump(metadata, f, indent=2)
+            
+            self.catalog.add(
+                name=backup_name, kind=KIND_COMPRESSED, environment=environment,
+                created_at=metadata['created_at'], path=backup_name,
+                size=stats['compressed_size'], uncompressed_size=stats['size'],
+                compression=method, sha256=stats['sha256'], description=description
+            )
+            
+            print(f"✅ Sauvegarde compressée créée: {backup_name}")
+            print(f"📁 Taille: {stats['compressed_size'] / (1024*1024):.1f} MB "
+                  f"(base: {stats['size'] / (1024*1024):.1f} MB, ratio {stats['ratio']:.2f})")
+            print(f"⏱️  Durée: {stats['duration']:.2f} s ({stats['throughput_mb_s']:.1f} MB/s)")
+            print(f"📝 Description: {description}")
+            
+            return backup_path
+            
+        except Exception as e:
+            print(f"❌ Erreur lors de la sauvegarde compressée: {e}")
+            return False
+    
+    def _print_bytes_progress(self, done, total):
+        """Affiche la progression d'une sauvegarde compressée"""
+        percent = 100 * done / total if total else 100
+        print(f"\r📦 Progression: {percent:5.1f}% ({done / (1024*1024):.1f} MB)", end='', flush=True)
+    
+    def _print_progress(self, copied, total):
+        """Affiche la progression de la copie"""
+        percent = 100 * copied / total if total else 100
+        print(f"\r📦 Progression: {percent:5.1f}% ({copied}/{total} pages)", end='', flush=True)
+    
+    def list_backups(self, environment=None):
+        """Liste toutes les sauvegardes disponibles (depuis le catalogue)"""
         print("📋 Sauvegardes disponibles:")
         print("=" * 60)
         
-        if not os.path.exists(self.backup_dir):
-            print("❌ Aucun dossier de sauvegardes trouvé")
-            return
-        
-        backups = []
-        for file in os.listdir(self.backup_dir):
-            if file.endswith('.db'):
-                backup_path = os.path.join(self.backup_dir, file)
-                metadata_path = backup_path.replace('.db', '.json')
-                
-                # Récupérer les métadonnées
-                metadata = {}
-                if os.path.exists(metadata_path):
-                    try:
-                        with open(metadata_path, 'r') as f:
-                            metadata = json.load(f)
-                    except:
-                        pass
-                
-                backups.append({
-                    'file': file,
-                    'path': backup_path,
-                    'size': os.path.getsize(backup_path),
-                    'created': metadata.get('created_at', 'Inconnu'),
-                    'environment': metadata.get('environment', 'Inconnu'),
-                    'description': metadata.get('description', '')
-                })
-        
-        # Trier par date de création (plus récent en premier)
-        backups.sort(key=lambda x: x['created'], reverse=True)
-        
+        backups = self.catalog.list(environment)
         if not backups:
             print("📭 Aucune sauvegarde trouvée")
             return
         
         for i, backup in enumerate(backups, 1):
-            print(f"{i}. {backup['file']}")
+            suffix = " (incrémentale)" if backup['kind'] == KIND_INCREMENTAL else ""
+            print(f"{i}. {backup['name']}{suffix}")
             print(f"   📊 Taille: {backup['size'] / (1024*1024):.1f} MB")
-            print(f"   🌍 Environnement: {backup['environment']}")
-            print(f"   📅 Créée: {backup['created']}")
+            if backup['compression']:
+                print(f"   🗜️  Compression: {backup['compression']} "
+                      f"({backup['uncompressed_size'] / (1024*1024):.1f} MB décompressée)")
+            print(f"   🌍 Environnement: {backup['environment'] or 'Inconnu'}")
+            print(f"   📅 Créée: {backup['created_at']}")
+            if backup['parent']:
+                print(f"   🔗 Parente: {backup['parent']}")
+            if backup['verify_status']:
+                duree = f" ({backup['verify_seconds']:.2f} s)" if backup['verify_seconds'] is not None else ""
+                print(f"   🔍 Vérifiée: {backup['verify_status']} le {backup['verified_at']}{duree}")
             if backup['description']:
                 print(f"   📝 Description: {backup['description']}")
             print()
@@ -125,8 +229,15 @@ class BackupManager:
         """Restaure une sauvegarde"""
         print(f"🔄 Restauration de la sauvegarde: {backup_file}")
         
-        backup_path = os.path.join(self.backup_dir, backup_file)
+        backup = self.catalog.get(backup_file)
+        if backup is None and backup_file.isdigit():
+            backup = self.catalog.get_by_number(int(backup_file))
+        if backup is None:
+            print(f"❌ Sauvegarde non trouvée dans le catalogue: {backup_file}")
+            print("💡 Lancez 'rebuild-catalog' si des fichiers ont été copiés à la main")
+            return False
         
+        backup_path = self.catalog.resolve_path(backup)
         if not os.path.exists(backup_path):
             print(f"❌ Sauvegarde non trouvée: {backup_path}")
             return False
@@ -152,8 +263,16 @@ class BackupManager:
                 print("🔄 Création d'une sauvegarde de la base actuelle...")
                 self.create_backup(environment, "Sauvegarde avant restauration")
             
-            # Restaurer la sauvegarde
-            shutil.copy2(backup_path, target_db)
+            # Restaurer à côté de la base active, vérifier, puis substituer ;
+            # le journal est archivé et l'historique postérieur écarté
+            stats = restore_environment(self.catalog, environment, backup, target_db)
+            print(f"🧩 Préparation: {stats['prepare_seconds']:.2f} s, "
+                  f"interruption: {stats['swap_seconds'] * 1000:.1f} ms")
+            if stats['abandoned']:
+                print(f"📁 {stats['abandoned']} segments postérieurs écartés de l'historique")
+            
+            # Nouvelle base de départ pour les restaurations futures
+            self.create_backup(environment, f"Base après restauration de {backup['name']}")
             
             print(f"✅ Restauration terminée: {target_db}")
             print(f"📊 Taille restaurée: {os.path.getsize(target_db) / (1024*1024):.1f} MB")
@@ -164,42 +283,93 @@ class BackupManager:
             print(f"❌ Erreur lors de la restauration: {e}")
             return False
     
-    def cleanup_old_backups(self, keep_count=5):
-        """Nettoie les anciennes sauvegardes (garde les plus récentes)"""
-        print(f"🧹 Nettoyage des sauvegardes (garde les {keep_count} plus récentes)")
+    def restore_at(self, timestamp, environment='development', force=False):
+        """
+        Restaure un environnement tel qu'il était à un instant donné.
         
-        if not os.path.exists(self.backup_dir):
-            print("❌ Aucun dossier de sauvegardes trouvé")
-            return
+        Part de la sauvegarde la plus proche avant l'instant visé puis rejoue
+        le journal des modifications jusqu'à cet instant.
+        """
+        try:
+            target = normalize_timestamp(timestamp)
+        except ValueError:
+            print(f"❌ Date invalide: {timestamp} (format attendu: AAAA-MM-JJ HH:MM[:SS])")
+            return False
+        print(f"🔄 Restauration de {environment} à l'instant {target}")
         
-        # Récupérer toutes les sauvegardes
-        backups = []
-        for file in os.listdir(self.backup_dir):
-            if file.endswith('.db'):
-                backup_path = os.path.join(self.backup_dir, file)
-                metadata_path = backup_path.replace('.db', '.json')
-                
-                created = "1970-01-01T00:00:00"
-                if os.path.exists(metadata_path):
-                    try:
-                        with open(metadata_path, 'r') as f:
-                            metadata = json.load(f)
-                            created = metadata.get('created_at', created)
-                    except:
-                        pass
-                
-                backups.append({
-                    'file': file,
-                    'path': backup_path,
-                    'metadata_path': metadata_path,
-                    'created': created
-                })
+        target_db = f"data/{environment}/gestia.db"
+        if os.path.exists(target_db) and not force:
+            print(f"⚠️  La base de données de destination existe déjà: {target_db}")
+            response = input("Voulez-vous la remplacer ? (y/N): ")
+            if response.lower() != 'y':
+                print("❌ Restauration annulée")
+                return False
+        
+        work_db = work_path_for(target_db)
+        try:
+            if os.path.exists(target_db):
+                # Le journal courant est archivé : l'historique abandonné reste consultable
+                self.archive_changelog(environment)
+                print("🔄 Création d'une sauvegarde de la base actuelle...")
+                self.create_backup(environment, "Sauvegarde avant restauration")
+            
+            stats = point_in_time_restore(self.catalog, environment, target, work_db,
+                                          target_db if os.path.exists(target_db) else None)
+            print(f"📦 Sauvegarde de départ: {stats['base']}")
+            print(f"🔁 {stats['changes']} modifications rejouées en {stats['batches']} lots "
+                  f"({stats['duration']:.2f} s)")
+            
+            swap = install_database(work_db, target_db)
+            print(f"🧩 Interruption: {swap['swap_seconds'] * 1000:.1f} ms")
+            
+            abandoned = abandon_history_after(self.catalog, environment, stats)
+            if abandoned:
+                print(f"📁 {abandoned} segments postérieurs écartés de l'historique")
+            
+            # Nouvelle base de départ pour les restaurations futures
+            self.create_backup(environment, f"Base après restauration au {target}")
+            
+            print(f"✅ Restauration terminée: {target_db}")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Erreur lors de la restauration: {e}")
+            return False
+        finally:
+            for path in (work_db, work_db + '-wal', work_db + '-shm'):
+                if os.path.exists(path):
+                    os.remove(path)
+    
+    def archive_changelog(self, environment='development'):
+        """Archive le journal des modifications d'un environnement"""
+        source_db = f"data/{environment}/gestia.db"
+        if not os.path.exists(source_db):
+            print(f"❌ Base de données source non trouvée: {source_db}")
+            return None
         
-        # Trier par date de création
-        backups.sort(key=lambda x: x['created'], reverse=True)
+        segment = archive_changelog(self.catalog, environment, source_db)
+        if segment:
+            print(f"📜 Journal archivé: {segment['rows']} modifications "
+                  f"({segment['first_ts']} → {segment['last_ts']})")
+        return segment
+    
+    def cleanup_old_backups(self, keep_count=5, environment=None):
+        """
+        Nettoie les anciennes sauvegardes : garde les plus récentes de chaque
+        environnement (ou du seul environnement indiqué).
+        """
+        print(f"🧹 Nettoyage des sauvegardes (garde les {keep_count} plus récentes par environnement)")
+        
+        # Sauvegardes complètes au-delà de la rétention (requête indexée)
+        to_delete = self.catalog.expired(keep_count, environment, kinds=(KIND_FULL, KIND_COMPRESSED))
+        kept = self.catalog.count(environment, kinds=(KIND_FULL, KIND_COMPRESSED)) - len(to_delete)
         
-        # Supprimer les anciennes sauvegardes
-        to_delete = backups[keep_count:]
+        # Rétention des sauvegardes incrémentales + GC des blocs orphelins (depuis le catalogue)
+        result = self.store.prune(self.catalog, keep_count, environment)
+        if result['removed_manifests'] or result['deleted_chunks']:
+            print(f"🗑️  {len(result['removed_manifests'])} sauvegardes incrémentales supprimées, "
+                  f"{result['deleted_chunks']} blocs libérés "
+                  f"({result['freed_bytes'] / (1024*1024):.1f} MB)")
         
         if not to_delete:
             print("✅ Aucune sauvegarde à supprimer")
@@ -207,15 +377,74 @@ class BackupManager:
         
         print(f"🗑️  Suppression de {len(to_delete)} sauvegardes anciennes:")
         for backup in to_delete:
-            print(f"  - {backup['file']}")
+            print(f"  - {backup['name']}")
+            backup_path = self.catalog.resolve_path(backup)
             try:
-                os.remove(backup['path'])
-                if os.path.exists(backup['metadata_path']):
-                    os.remove(backup['metadata_path'])
+                if os.path.exists(backup_path):
+                    os.remove(backup_path)
+                metadata_path = metadata_path_for(backup_path)
+                if os.path.exists(metadata_path):
+                    os.remove(metadata_path)
+                self.catalog.remove(backup['name'])
             except Exception as e:
                 print(f"    ❌ Erreur: {e}")
         
-        print(f"✅ Nettoyage terminé. {len(backups) - len(to_delete)} sauvegardes conservées.")
+        print(f"✅ Nettoyage terminé. {kept} sauvegardes conservées.")
+    
+    def verify_backups(self, backup_file=None, workers=None, full_check=False):
+        """
+        Vérifie les sauvegardes en parallèle (empreinte + quick_check).
+        
+        Args:
+            backup_file (str): Sauvegarde à vérifier (toutes si None)
+            workers (int): Nombre de processus de vérification
+            full_check (bool): integrity_check complet au lieu de quick_check
+        
+        Returns:
+            bool: True si toutes les sauvegardes vérifiées sont valides
+        """
+        entries = [self.catalog.get(backup_file)] if backup_file else self.catalog.list()
+        entries = [entry for entry in entries if entry is not None]
+        if not entries:
+            print("📭 Aucune sauvegarde à vérifier")
+            return False
+        
+        print(f"🔍 Vérification de {len(entries)} sauvegardes "
+              f"({'integrity_check' if full_check else 'quick_check'} + SHA-256)...")
+        by_name = {entry['name']: entry for entry in entries}
+        tasks = [{
+            'name': entry['name'],
+            'kind': entry['kind'],
+            'path': self.catalog.resolve_path(entry),
+            'expected_sha256': entry['sha256'],
+            'store_root': self.store.root,
+        } for entry in entries]
+        
+        start = datetime.now()
+        failures = 0
+        for result in verify_backups(tasks, workers, quick=not full_check):
+            entry = by_name[result['name']]
+            backup_path = self.catalog.resolve_path(entry)
+            metadata_path = backup_path if entry['kind'] == KIND_INCREMENTAL else metadata_path_for(backup_path)
+            record_result(self.catalog, result, metadata_path)
+            
+            if result['status'] == STATUS_OK:
+                print(f"  ✅ {result['name']} ({result['duration_seconds']:.2f} s)")
+            else:
+                failures += 1
+                print(f"  ❌ {result['name']}: {result['status']} - {result['detail']}")
+        
+        elapsed = (datetime.now() - start).total_seconds()
+        print(f"🏁 Vérification terminée en {elapsed:.1f} s: "
+              f"{len(tasks) - failures} valides, {failures} en échec")
+        return failures == 0
+    
+    def rebuild_catalog(self):
+        """Reconstruit le catalogue à partir des fichiers présents sur disque"""
+        print("🔄 Reconstruction du catalogue des sauvegardes...")
+        count = self.catalog.rebuild(self.store)
+        print(f"✅ Catalogue reconstruit: {count} sauvegardes indexées")
+        return count
 
 def main():
     """Point d'entrée principal"""
@@ -223,7 +452,8 @@ def main():
     
     parser = argparse.ArgumentParser(description="Gestionnaire de sauvegardes GESTIA")
     parser.add_argument('action', 
-                       choices=['create', 'list', 'restore', 'cleanup'],
+                       choices=['create', 'list', 'restore', 'cleanup', 'verify',
+                                'archive-changelog', 'rebuild-catalog'],
                        help='Action à effectuer')
     parser.add_argument('--env', default='development',
                        choices=['development', 'test', 'production'],
@@ -231,23 +461,50 @@ def main():
     parser.add_argument('--description', default='',
                        help='Description de la sauvegarde')
     parser.add_argument('--backup-file', default='',
-                       help='Fichier de sauvegarde à restaurer')
+                       help='Sauvegarde à restaurer (nom ou numéro dans la liste)')
+    parser.add_argument('--at',
+                       help="Restaurer l'état à cet instant (AAAA-MM-JJ HH:MM[:SS])")
     parser.add_argument('--force', action='store_true',
                        help='Forcer la restauration')
     parser.add_argument('--keep', type=int, default=5,
                        help='Nombre de sauvegardes à conserver')
+    parser.add_argument('--pages', type=int, default=DEFAULT_PAGES_PER_STEP,
+                       help='Pages copiées par étape de sauvegarde')
+    parser.add_argument('--sleep', type=float, default=DEFAULT_STEP_SLEEP,
+                       help='Pause entre deux étapes de sauvegarde (secondes)')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Sauvegarde incrémentale dans le magasin de blocs')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                       help='Taille des blocs des sauvegardes incrémentales (octets)')
+    parser.add_argument('--workers', type=int,
+                       help='Processus de vérification en parallèle (défaut: nombre de CPU)')
+    parser.add_argument('--full-check', action='store_true',
+                       help='Vérification avec integrity_check au lieu de quick_check')
+    parser.add_argument('--compress', choices=list(COMPRESSION_METHODS),
+                       help='Compresser la sauvegarde en flux (gzip ou lzma)')
+    parser.add_argument('--level', type=int,
+                       help='Niveau de compression (gzip 1-9, lzma 0-9)')
+    parser.add_argument('--staging', action='store_true',
+                       help="Autoriser une copie non compressée dans le dossier des sauvegardes "
+                            "si la base ne peut pas être figée (sauvegardes incrémentales et compressées)")
     
     args = parser.parse_args()
     
-    manager = BackupManager()
+    manager = BackupManager(pages=args.pages, sleep=args.sleep)
     
     if args.action == 'create':
-        manager.create_backup(args.env, args.description)
+        if not manager.create_backup(args.env, args.description, args.incremental, args.chunk_size,
+                                     args.compress, args.level, args.staging):
+            sys.exit(1)
+        manager.archive_changelog(args.env)
     
     elif args.action == 'list':
         manager.list_backups()
     
     elif args.action == 'restore':
+        if args.at:
+            manager.restore_at(args.at, args.env, args.force)
+            return
         if not args.backup_file:
             print("❌ Veuillez spécifier le fichier de sauvegarde avec --backup-file")
             return
@@ -255,6 +512,16 @@ def main():
     
     elif args.action == 'cleanup':
         manager.cleanup_old_backups(args.keep)
+    
+    elif args.action == 'archive-changelog':
+        manager.archive_changelog(args.env)
+    
+    elif args.action == 'verify':
+        if not manager.verify_backups(args.backup_file or None, args.workers, args.full_check):
+            sys.exit(1)
+    
+    elif args.action == 'rebuild-catalog':
+        manager.rebuild_catalog()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -16,7 +16,7 @@ def create_migration():
     print("=" * 40)
     
     # Demander les informations
-    version = input("Version de la migration (ex: 005_add_champ): ")
+    version = input("Version de la migration (ex: 008_add_champ): ")
     description = input("Description (ex: Ajout du champ Prix): ")
     
     print("\n📝 Commandes SQL à exécuter:")
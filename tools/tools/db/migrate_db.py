@@ -18,6 +18,8 @@ src_path = os.path.join(project_root, 'src')
 sys.path.insert(0, src_path)
 
 from gestia.core.database import db_manager, set_environment
+from gestia.backup.changelog import drop_triggers, install_triggers, is_installed
+from gestia.core.versions import version_statements
 
 class DatabaseMigrator:
     """Gestionnaire de migrations de base de données"""
@@ -92,10 +94,18 @@ class DatabaseMigrator:
         cursor = conn.cursor()
         
         try:
+            # Les triggers du journal référencent les colonnes : ils sont
+            # retirés pendant la migration puis régénérés sur le nouveau schéma
+            changelog = is_installed(conn)
+            if changelog:
+                drop_triggers(conn)
+            
             for command in sql_commands:
                 print(f"  Exécution: {command[:50]}...")
                 cursor.execute(command)
             
+            if changelog:
+                install_triggers(conn)
             conn.commit()
             self.mark_migration_applied(version, description)
             print(f"✅ Migration {version} appliquée avec succès")
@@ -143,9 +153,47 @@ class DatabaseMigrator:
                     'ALTER TABLE appareils ADD COLUMN NumeroSerie TEXT'
                 ]
             },
+            {
+                'version': '005_add_performance_indexes',
+                'description': 'Index sur les clés étrangères et les colonnes filtrées',
+                'sql': [
+                    'CREATE INDEX IF NOT EXISTS ix_appareils_marque ON appareils (Marque)',
+                    'CREATE INDEX IF NOT EXISTS ix_appareils_etat ON appareils (Etat)',
+                    'CREATE INDEX IF NOT EXISTS ix_sessions_appareil_date ON sessions_de_test (ID_Appareil, DateDebut)',
+                    'CREATE INDEX IF NOT EXISTS ix_sessions_technicien ON sessions_de_test (ID_Technicien)',
+                    'CREATE INDEX IF NOT EXISTS ix_programmes_session ON programmes_de_test (ID_Session)',
+                    'CREATE INDEX IF NOT EXISTS ix_criteres_programme ON criteres_de_test (ID_Programme)',
+                    'CREATE INDEX IF NOT EXISTS ix_criteres_technicien ON criteres_de_test (ID_Technicien)',
+                    'CREATE INDEX IF NOT EXISTS ix_diagnostics_appareil_date ON diagnostics_reparation (ID_Appareil, DateDebut)',
+                    'CREATE INDEX IF NOT EXISTS ix_diagnostics_technicien ON diagnostics_reparation (ID_Technicien)',
+                    'CREATE INDEX IF NOT EXISTS ix_diagnostics_session ON diagnostics_reparation (ID_Session)',
+                    # Statistiques pour le planificateur de requêtes
+                    'ANALYZE'
+                ]
+            },
+            {
+                'version': '006_add_device_listing_indexes',
+                'description': 'Index composites pour la pagination de la liste des appareils',
+                'sql': [
+                    'CREATE INDEX IF NOT EXISTS ix_appareils_date ON appareils (DateReception, ID_Appareil)',
+                    'CREATE INDEX IF NOT EXISTS ix_appareils_marque_date ON appareils (Marque, DateReception, ID_Appareil)',
+                    'CREATE INDEX IF NOT EXISTS ix_appareils_etat_date ON appareils (Etat, DateReception, ID_Appareil)',
+                    'CREATE INDEX IF NOT EXISTS ix_appareils_numserie ON appareils (NumSerie, ID_Appareil)',
+                    # Remplacés par les index composites (même préfixe)
+                    'DROP INDEX IF EXISTS ix_appareils_marque',
+                    'DROP INDEX IF EXISTS ix_appareils_etat',
+                    'ANALYZE'
+                ]
+            },
+            {
+                'version': '007_add_row_versions',
+                'description': "Versions des lignes pour l'actualisation incrémentale des listes",
+                # Table _gestia_versions et triggers (voir gestia/core/versions.py)
+                'sql': version_statements()
+            },
             # 🚀 POUR AJOUTER UNE NOUVELLE MIGRATION :
             # Ajoutez ici un nouveau dictionnaire avec :
-            # - version: '005_nom_de_la_migration'
+            # - version: '008_nom_de_la_migration'
             # - description: 'Description claire de ce que fait la migration'
             # - sql: [liste des commandes SQL à exécuter]
         ]